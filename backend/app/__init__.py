@@ -58,8 +58,9 @@ def create_app(env: str = None) -> Flask:
         response.headers["Access-Control-Allow-Origin"] = allowed
         response.headers["Access-Control-Allow-Headers"] = "Authorization, Content-Type"
         response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, PATCH, DELETE, OPTIONS"
+        response.headers["Access-Control-Expose-Headers"] = "ETag, X-Next-Cursor"
         if allowed != "*":
-            response.headers["Vary"] = "Origin"
+            response.vary.add("Origin")
         return response
 
     with app.app_context():
@@ -77,7 +78,10 @@ def create_app(env: str = None) -> Flask:
             QuizQuestionSource,
             QuizAttempt,
             QuizAttemptAnswer,
+            QuizJob,
+            QuizGenerationCache,
             Event,
+            AnswerCache,
         )  # noqa: F401
 
         # Register blueprints
@@ -87,11 +91,17 @@ def create_app(env: str = None) -> Flask:
         from app.api.chat import chat_bp
         from app.api.quizzes import quizzes_bp
         from app.api.analytics import analytics_bp
+        from app.api.metrics import metrics_bp
         app.register_blueprint(auth_bp)
         app.register_blueprint(dev_bp)
         app.register_blueprint(documents_bp)
         app.register_blueprint(chat_bp)
         app.register_blueprint(quizzes_bp)
         app.register_blueprint(analytics_bp)
+        app.register_blueprint(metrics_bp)
+
+        # Request spans (no-op unless TRACING_EXPORTER is set)
+        from app.services.observability.tracing import init_tracing
+        init_tracing(app)
 
     return app
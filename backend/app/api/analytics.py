@@ -6,12 +6,14 @@ from app.services.analytics.metrics import (
     get_progress_metrics,
     get_weak_topics_metrics,
 )
+from app.services.cache.response_cache import cached_response
 
 analytics_bp = Blueprint("analytics", __name__, url_prefix="/api/analytics")
 
 
 @analytics_bp.get("/overview")
 @jwt_required()
+@cached_response("analytics_overview")
 def analytics_overview():
     user_id = get_jwt_identity()
     return jsonify(get_overview_metrics(user_id)), 200
@@ -19,6 +21,7 @@ def analytics_overview():
 
 @analytics_bp.get("/progress")
 @jwt_required()
+@cached_response("analytics_progress", per_utc_day=True)
 def analytics_progress():
     user_id = get_jwt_identity()
     return jsonify(get_progress_metrics(user_id)), 200
@@ -26,6 +29,7 @@ def analytics_progress():
 
 @analytics_bp.get("/weak-topics")
 @jwt_required()
+@cached_response("analytics_weak_topics")
 def analytics_weak_topics():
     user_id = get_jwt_identity()
     return jsonify(get_weak_topics_metrics(user_id)), 200
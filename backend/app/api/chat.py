@@ -9,6 +9,10 @@ GET   /api/chat/sessions/<chat_id>/messages      – get messages for a session
 POST  /api/chat/sessions/<chat_id>/messages      – send a message + get answer
 
 All routes require a valid JWT access token (Bearer in Authorization header).
+
+The two GET list routes accept optional ``limit`` / ``cursor`` query params
+(see app/api/pagination.py); the next page token is returned in the
+``X-Next-Cursor`` response header.
 """
 
 from __future__ import annotations
@@ -20,6 +24,14 @@ from datetime import datetime, timezone
 
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy.orm import load_only, selectinload
+
+from app.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    PaginationError,
+    paginate,
+    parse_page_args,
+)
 
 from app.db.models.chat import Chat
 from app.db.models.chat_message import ChatMessage
@@ -27,7 +39,10 @@ from app.db.models.chat_message_source import ChatMessageSource
 from app.db.models.document import Document
 from app.extensions import db
 from app.services.analytics.events import EVENT_CHAT_ASKED, record_event
+from app.services.cache.response_cache import bump_data_version, cached_response
+from app.services.observability.tracing import span
 from app.services.rag.answering import generate_answer
+from app.services.rag.history import build_history
 from app.services.router.classifier import classify
 from app.services.router.heuristics import route as heuristics_route
 from app.services.wrapper.client import WrapperError
@@ -36,10 +51,6 @@ log = logging.getLogger(__name__)
 
 chat_bp = Blueprint("chat", __name__, url_prefix="/api/chat")
 
-# Maximum prior turns to include as history in the LLM prompt
-_MAX_HISTORY_TURNS = 10
-
-
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def _chat_to_dict(chat: Chat) -> dict:
@@ -76,9 +87,17 @@ def _source_to_dict(src: ChatMessageSource) -> dict:
 
 def _select_model(message: str) -> dict:
     """Run heuristics then classifier if uncertain. Return router decision."""
-    decision = heuristics_route(message)
-    if decision["confidence"] == "low":
-        decision = classify(message)
+    with span("chat.route_model") as route_span:
+        decision = heuristics_route(message)
+        if decision["confidence"] == "low":
+            decision = classify(message)
+        route_span.set_attributes(
+            {
+                "gen_ai.request.model": decision.get("model"),
+                "router.category": decision.get("category"),
+                "router.method": decision.get("method"),
+            }
+        )
     return decision
 
 
@@ -98,6 +117,7 @@ def create_session():
         title=title,
     )
     db.session.add(chat)
+    bump_data_version(user_id)
     db.session.commit()
 
     return jsonify(_chat_to_dict(chat)), 201
@@ -107,16 +127,31 @@ def create_session():
 
 @chat_bp.get("/sessions")
 @jwt_required()
+@cached_response("list_sessions")
 def list_sessions():
-    """Return all chat sessions for the authenticated user, newest first."""
+    """Return chat sessions for the authenticated user, most recently updated first."""
     user_id = get_jwt_identity()
-    chats = (
-        Chat.query
-        .filter_by(user_id=user_id)
-        .order_by(Chat.updated_at.desc())
-        .all()
+    try:
+        limit, cursor = parse_page_args(request.args)
+    except PaginationError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    query = (
+        db.session.query(Chat.id, Chat.title, Chat.created_at, Chat.updated_at)
+        .filter(Chat.user_id == user_id)
+    )
+    chats, next_cursor = paginate(
+        query,
+        sort_column=Chat.updated_at,
+        id_column=Chat.id,
+        limit=limit,
+        cursor=cursor,
     )
-    return jsonify([_chat_to_dict(c) for c in chats]), 200
+
+    response = jsonify([_chat_to_dict(c) for c in chats])
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response, 200
 
 
 # ── GET /api/chat/sessions/<chat_id>/messages ─────────────────────────────────
@@ -124,21 +159,54 @@ def list_sessions():
 @chat_bp.get("/sessions/<chat_id>/messages")
 @jwt_required()
 def get_messages(chat_id: str):
-    """Return all messages for a session, oldest first, with sources."""
-    user_id = get_jwt_identity()
+    """
+    Return messages for a session, oldest first, with sources.
 
-    chat = Chat.query.filter_by(id=chat_id, user_id=user_id).first()
-    if not chat:
+    With ``limit`` the newest page is returned (still in chronological order)
+    and ``X-Next-Cursor`` points at the next *older* page.
+    """
+    user_id = get_jwt_identity()
+    try:
+        limit, cursor = parse_page_args(request.args)
+    except PaginationError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    chat_exists = (
+        db.session.query(Chat.id)
+        .filter(Chat.id == chat_id, Chat.user_id == user_id)
+        .first()
+    )
+    if not chat_exists:
         return jsonify({"error": "chat session not found"}), 404
 
-    messages = (
+    query = (
         ChatMessage.query
+        .options(load_only(
+            ChatMessage.id,
+            ChatMessage.chat_id,
+            ChatMessage.role,
+            ChatMessage.content,
+            ChatMessage.model_used,
+            ChatMessage.created_at,
+        ))
+        .options(selectinload(ChatMessage.sources))
         .filter_by(chat_id=chat_id, user_id=user_id)
-        .order_by(ChatMessage.created_at.asc())
-        .all()
     )
+    messages, next_cursor = paginate(
+        query,
+        sort_column=ChatMessage.created_at,
+        id_column=ChatMessage.id,
+        limit=limit,
+        cursor=cursor,
+        descending=limit is not None or cursor is not None,
+    )
+    if limit is not None or cursor is not None:
+        messages.reverse()
 
-    return jsonify([_message_to_dict(m, include_sources=True) for m in messages]), 200
+    response = jsonify([_message_to_dict(m, include_sources=True) for m in messages])
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response, 200
 
 
 # ── POST /api/chat/sessions/<chat_id>/messages ────────────────────────────────
@@ -185,18 +253,9 @@ def send_message(chat_id: str):
     router_decision = _select_model(content)
     selected_model  = router_decision["model"]
 
-    # ── 3. Build conversation history for context ────────────────────────────
-    prior_messages = (
-        ChatMessage.query
-        .filter_by(chat_id=chat_id, user_id=user_id)
-        .filter(ChatMessage.role.in_(["user", "assistant"]))
-        .order_by(ChatMessage.created_at.desc())
-        .limit(_MAX_HISTORY_TURNS * 2)   # each turn = 2 messages
-        .all()
-    )
-    # Reverse to chronological order (oldest first); exclude the just-flushed user msg
-    prior_messages = [m for m in reversed(prior_messages) if m.id != user_msg.id]
-    history = [{"role": m.role, "content": m.content} for m in prior_messages]
+    # ── 3. Build token-budgeted history (older turns → rolling summary) ──────
+    with span("chat.build_history"):
+        history_state = build_history(chat, exclude_message_id=user_msg.id)
 
     # ── 4. Load per-chat document filter ──────────────────────────────────────
     selected_docs   = chat.selected_documents.filter(
@@ -211,7 +270,9 @@ def send_message(chat_id: str):
             question=content,
             user_id=user_id,
             model=selected_model,
-            history=history,
+            history=history_state["history"],
+            history_summary=history_state["summary"],
+            session_id=chat_id,
             document_ids=doc_ids_filter,
             use_general_knowledge=use_general_knowledge,
         )
@@ -272,9 +333,12 @@ def send_message(chat_id: str):
             "selected_document_count": len(doc_ids_filter or []),
             "model_used": model_used,
             "out_of_context": bool(result.get("out_of_context", False)),
+            "answer_cached": bool(result.get("cached", False)),
         },
     )
-    db.session.commit()
+    bump_data_version(user_id)
+    with span("db.commit"):
+        db.session.commit()
 
     # ── 9. Reload sources with relationships ──────────────────────────────────
     db.session.refresh(assistant_msg)
@@ -366,6 +430,7 @@ def set_chat_documents(chat_id: str):
 
     # Replace selection (SQLAlchemy takes care of the junction rows)
     chat.selected_documents = docs
+    bump_data_version(user_id)
     db.session.commit()
 
     return jsonify(
@@ -5,7 +5,7 @@ Routes
 ------
 POST   /api/documents/upload                            multipart file upload
 POST   /api/documents/text                              JSON {title, text}
-GET    /api/documents                                   list user's documents
+GET    /api/documents                                   list user's documents (keyset paged)
 GET    /api/documents/<id>                              document detail
 DELETE /api/documents/<id>                              soft delete
 GET    /api/documents/<id>/ingestions/<ingestion_id>/status
@@ -20,6 +20,12 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from werkzeug.utils import secure_filename
 
+from app.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    PaginationError,
+    paginate,
+    parse_page_args,
+)
 from app.db.models.chunk import Chunk
 from app.db.models.document import Document
 from app.db.models.document_ingestion import DocumentIngestion
@@ -29,7 +35,12 @@ from app.services.analytics.events import (
     EVENT_DOC_UPLOADED,
     record_event,
 )
+from app.services.cache.response_cache import bump_data_version, cached_response
+from app.services.quiz.cache import invalidate_document
 from app.services.rag.ingestion import ingest_text, ingest_upload
+from app.services.rag.local_index import invalidate_local_index
+from app.services.rag.retrieval_cache import invalidate_retrieval_cache
+from app.services.rag.vector_store import get_vector_store
 
 log = logging.getLogger(__name__)
 
@@ -135,6 +146,7 @@ def upload_document():
             "source_type": doc.source_type,
         },
     )
+    bump_data_version(user_id)
     db.session.commit()
 
     # Run ingestion pipeline (in-memory, no disk I/O)
@@ -205,6 +217,7 @@ def text_document():
             "source_type": doc.source_type,
         },
     )
+    bump_data_version(user_id)
     db.session.commit()
 
     # Run ingestion pipeline (synchronous)
@@ -228,15 +241,43 @@ def text_document():
 
 @documents_bp.get("")
 @jwt_required()
+@cached_response("list_documents")
 def list_documents():
     user_id = get_jwt_identity()
-    docs = (
-        Document.query
-        .filter_by(user_id=user_id, is_deleted=False)
-        .order_by(Document.created_at.desc())
-        .all()
+    try:
+        limit, cursor = parse_page_args(request.args)
+    except PaginationError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    # Column projection: never pull original_text (up to 5 MB) for a listing.
+    query = (
+        db.session.query(
+            Document.id,
+            Document.title,
+            Document.source_type,
+            Document.filename,
+            Document.mime_type,
+            Document.created_at,
+            Document.is_deleted,
+            Document.current_ingestion_id,
+        )
+        .filter(Document.user_id == user_id, Document.is_deleted.is_(False))
     )
-    return jsonify({"documents": [_doc_dict(d) for d in docs]}), 200
+    docs, next_cursor = paginate(
+        query,
+        sort_column=Document.created_at,
+        id_column=Document.id,
+        limit=limit,
+        cursor=cursor,
+    )
+
+    response = jsonify({
+        "documents": [_doc_dict(d) for d in docs],
+        "next_cursor": next_cursor,
+    })
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response, 200
 
 
 # ── GET /api/documents/<id> ───────────────────────────────────────────────────
@@ -270,7 +311,13 @@ def delete_document(doc_id: str):
         return jsonify({"error": "Document not found"}), 404
 
     doc.is_deleted = True
+    invalidate_document(user_id, doc.id)
+    invalidate_local_index(user_id)
+    invalidate_retrieval_cache(user_id)
+    bump_data_version(user_id)
     db.session.commit()
+    if doc.current_ingestion_id:
+        get_vector_store().delete_ingestion(doc.current_ingestion_id)
     return jsonify({"message": "Document deleted"}), 200
 
 
@@ -341,6 +388,7 @@ def reingest_document(doc_id: str):
             status="processing",
         )
         db.session.add(ingestion)
+        bump_data_version(user_id)
         db.session.commit()
 
         try:
@@ -367,6 +415,7 @@ def reingest_document(doc_id: str):
             status="processing",
         )
         db.session.add(ingestion)
+        bump_data_version(user_id)
         db.session.commit()
 
         try:
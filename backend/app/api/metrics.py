@@ -0,0 +1,31 @@
+"""
+Prometheus scrape endpoint.
+
+Endpoint:  GET /metrics
+Auth:      none, or "Authorization: Bearer <METRICS_TOKEN>" when that is set
+Purpose:   Exposes the in-process counters and histograms defined in
+           app/services/observability/metrics.py in the Prometheus text
+           format.  Returns 404 unless METRICS_ENABLED is on.
+"""
+
+import hmac
+
+from flask import Blueprint, current_app, jsonify, request
+
+from app.services.observability.metrics import CONTENT_TYPE, render_metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.get("/metrics")
+def prometheus_metrics():
+    if not current_app.config.get("METRICS_ENABLED"):
+        return jsonify({"error": "Not found"}), 404
+
+    token = str(current_app.config.get("METRICS_TOKEN") or "")
+    if token:
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+            return jsonify({"error": "Invalid metrics token"}), 401
+
+    return current_app.response_class(render_metrics(), status=200, content_type=CONTENT_TYPE)
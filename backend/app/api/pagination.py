@@ -0,0 +1,95 @@
+"""
+Keyset (cursor) pagination helpers shared by the list endpoints.
+
+Query parameters
+----------------
+limit  : int  – page size, 1..MAX_PAGE_LIMIT (omit to return every row)
+cursor : str  – opaque token returned by the previous page
+
+Pages are ordered by ``(sort_column, id)`` and the next page is selected with
+a row-value comparison against the last row of the current page, so each page
+is a single index range scan regardless of how deep the client has paged.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+MAX_PAGE_LIMIT = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PaginationError(ValueError):
+    """Raised when limit or cursor query parameters are malformed."""
+
+
+def parse_page_args(args) -> tuple[int | None, tuple[datetime, str] | None]:
+    raw_limit = args.get("limit")
+    limit = None
+    if raw_limit not in (None, ""):
+        try:
+            limit = int(raw_limit)
+        except (TypeError, ValueError):
+            raise PaginationError("limit must be an integer")
+        if limit < 1 or limit > MAX_PAGE_LIMIT:
+            raise PaginationError(f"limit must be between 1 and {MAX_PAGE_LIMIT}")
+
+    raw_cursor = args.get("cursor")
+    cursor = decode_cursor(raw_cursor) if raw_cursor else None
+    return limit, cursor
+
+
+def encode_cursor(sort_value: datetime, row_id: str) -> str:
+    raw = json.dumps([sort_value.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[datetime, str]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        sort_raw, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(sort_raw), str(row_id)
+    except (ValueError, TypeError, UnicodeError):
+        raise PaginationError("cursor is invalid")
+
+
+def paginate(
+    query,
+    *,
+    sort_column,
+    id_column,
+    limit: int | None,
+    cursor: tuple[datetime, str] | None,
+    descending: bool = True,
+):
+    """
+    Apply keyset ordering, the cursor predicate and ``limit + 1`` to *query*.
+
+    Returns ``(rows, next_cursor)`` where ``next_cursor`` is ``None`` on the
+    last page.  Rows must expose attributes named after *sort_column* and
+    *id_column* (full entities and column projections both do).
+    """
+    key = tuple_(sort_column, id_column)
+    if cursor is not None:
+        boundary = tuple_(*cursor)
+        query = query.filter(key < boundary if descending else key > boundary)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    if limit is None:
+        return query.all(), None
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
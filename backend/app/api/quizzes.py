@@ -1,27 +1,49 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import uuid
+from datetime import datetime, timedelta, timezone
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import get_jwt_identity, jwt_required
-
+from sqlalchemy import func, insert
+from sqlalchemy.orm import selectinload
+
+from app.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    PaginationError,
+    paginate,
+    parse_page_args,
+)
 from app.db.models.document import Document
 from app.db.models.quiz import Quiz
 from app.db.models.quiz_attempt import QuizAttempt
 from app.db.models.quiz_attempt_answer import QuizAttemptAnswer
 from app.db.models.quiz_question import QuizQuestion
+from app.db.models.quiz_job import QuizJob
 from app.db.models.quiz_question_source import QuizQuestionSource
 from app.extensions import db
 from app.services.analytics.events import EVENT_QUIZ_SUBMITTED, record_event
+from app.services.cache.response_cache import bump_data_version, cached_response
 from app.services.quiz.generator import QuizGenerationError, generate_and_store_quiz
-from app.services.quiz.grading import QuizGradingError, grade_quiz_submission
+from app.services.quiz.answer_key import AnswerKey, get_answer_key, peek_answer_key
+from app.services.quiz.grading import QuizGradingError, resolve_submission, score_submission
+from app.services.quiz.jobs import JOB_STATUS_SUCCEEDED, enqueue_quiz_job, expire_stale_quiz_jobs
+from app.services.quiz.render_cache import RenderedQuestions, get_rendered_questions
 from app.services.quiz.spec_parser import QuizRequestSpec, QuizSpecError, parse_quiz_request
-from app.services.quiz.summarizer import summarize_attempt
+from app.services.quiz.summarizer import (
+    SUMMARY_STATUS_FALLBACK,
+    SUMMARY_STATUS_PENDING,
+    build_fallback_summary,
+    enqueue_attempt_summary,
+    expire_stale_attempt_summary,
+)
 
 quizzes_bp = Blueprint("quizzes", __name__, url_prefix="/api/quizzes")
 
 
-def _quiz_to_dict(quiz: Quiz) -> dict:
+def _quiz_to_dict(quiz: Quiz, question_count: int | None = None) -> dict:
+    if question_count is None:
+        question_count = quiz.questions.count()
     return {
         "id": quiz.id,
         "title": quiz.title,
@@ -31,7 +53,7 @@ def _quiz_to_dict(quiz: Quiz) -> dict:
         "time_limit_sec": quiz.time_limit_sec,
         "model_used": quiz.model_used,
         "created_at": quiz.created_at.isoformat(),
-        "question_count": quiz.questions.count(),
+        "question_count": question_count,
     }
 
 
@@ -55,6 +77,7 @@ def _attempt_to_dict(attempt: QuizAttempt) -> dict:
         "score": attempt.score,
         "total_marks": attempt.total_marks,
         "summary": attempt.summary_json,
+        "summary_status": attempt.summary_status,
     }
 
 
@@ -73,29 +96,19 @@ def _question_to_dict(question: QuizQuestion, *, include_sources: bool = True) -
     return payload
 
 
-def _attempt_answer_to_dict(
-    attempt_answer: QuizAttemptAnswer,
-    *,
-    include_correct: bool,
-) -> dict:
-    question = attempt_answer.question
-    payload = {
-        "id": attempt_answer.id,
-        "question_id": attempt_answer.question_id,
-        "question_index": question.question_index,
-        "type": question.type,
-        "question_text": question.question_text,
-        "options": question.options_json,
-        "marks": question.marks,
-        "chosen_json": attempt_answer.chosen_json,
-        "is_correct": attempt_answer.is_correct,
-        "marks_awarded": attempt_answer.marks_awarded,
-        "sources": [_source_to_dict(source) for source in question.sources],
+def _job_to_dict(job: QuizJob) -> dict:
+    return {
+        "id": job.id,
+        "status": job.status,
+        "stage": job.stage,
+        "progress": job.progress_json or {},
+        "quiz_id": job.quiz_id,
+        "error": job.error_message,
+        "error_status": job.error_status,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
     }
-    if include_correct:
-        payload["correct_json"] = question.correct_json
-        payload["explanation"] = question.explanation
-    return payload
 
 
 def _validate_document_ids(
@@ -124,29 +137,153 @@ def _validate_document_ids(
 
 
 def _parse_time_spent_sec(payload: dict, attempt: QuizAttempt) -> int:
-    if payload.get("time_spent_sec") is not None:
-        try:
-            time_spent_sec = int(payload.get("time_spent_sec"))
-        except (TypeError, ValueError):
-            raise QuizGradingError("time_spent_sec must be an integer")
-        if time_spent_sec < 0:
-            raise QuizGradingError("time_spent_sec must be >= 0")
+    time_spent_sec = _parse_optional_time_spent_sec(payload)
+    if time_spent_sec is not None:
         return time_spent_sec
 
     elapsed = datetime.now(timezone.utc) - attempt.started_at
     return max(0, int(elapsed.total_seconds()))
 
 
-def _load_attempt_answers(attempt_id: str) -> list[QuizAttemptAnswer]:
+def _parse_optional_time_spent_sec(payload: dict) -> int | None:
+    if payload.get("time_spent_sec") is None:
+        return None
+    try:
+        time_spent_sec = int(payload.get("time_spent_sec"))
+    except (TypeError, ValueError):
+        raise QuizGradingError("time_spent_sec must be an integer")
+    if time_spent_sec < 0:
+        raise QuizGradingError("time_spent_sec must be >= 0")
+    return time_spent_sec
+
+
+def _parse_submitted_at(value, default: datetime) -> datetime:
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise QuizGradingError("submitted_at must be an ISO 8601 timestamp")
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise QuizGradingError("submitted_at must be an ISO 8601 timestamp")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _load_questions(quiz: Quiz) -> list[QuizQuestion]:
+    # Sources are fetched in one batched SELECT ... IN instead of one per question.
     return (
-        QuizAttemptAnswer.query
-        .join(QuizQuestion, QuizQuestion.id == QuizAttemptAnswer.question_id)
-        .filter(QuizAttemptAnswer.attempt_id == attempt_id)
+        quiz.questions
+        .options(selectinload(QuizQuestion.sources))
         .order_by(QuizQuestion.question_index.asc())
         .all()
     )
 
 
+def _load_attempt_answers(attempt_id: str) -> list:
+    # Only the per-attempt columns; the question side comes from the render cache.
+    return (
+        db.session.query(
+            QuizAttemptAnswer.id,
+            QuizAttemptAnswer.question_id,
+            QuizAttemptAnswer.chosen_json,
+            QuizAttemptAnswer.is_correct,
+            QuizAttemptAnswer.marks_awarded,
+        )
+        .filter(QuizAttemptAnswer.attempt_id == attempt_id)
+        .all()
+    )
+
+
+def _rendered_questions(quiz: Quiz) -> RenderedQuestions:
+    def load() -> tuple[list[str], list[dict], list[dict]]:
+        questions = _load_questions(quiz)
+        return (
+            [question.id for question in questions],
+            [_question_to_dict(question) for question in questions],
+            [
+                {"correct_json": question.correct_json, "explanation": question.explanation}
+                for question in questions
+            ],
+        )
+
+    return get_rendered_questions(quiz.id, load)
+
+
+def _quiz_answer_key(quiz: Quiz, rendered: RenderedQuestions) -> AnswerKey:
+    answer_key = peek_answer_key(quiz.id, rendered.question_ids)
+    if answer_key is None:
+        questions = quiz.questions.order_by(QuizQuestion.question_index.asc()).all()
+        answer_key = get_answer_key(quiz.id, questions)
+    return answer_key
+
+
+def _questions_response(
+    payload: dict,
+    rendered: RenderedQuestions,
+    status: int,
+    answers_json: bytes | None = None,
+):
+    # Same body jsonify would produce, with the cached "questions" bytes (and
+    # the spliced "answers") appended instead of re-serializing every question.
+    body = current_app.json.dumps(payload).encode("utf-8")[:-1]
+    if answers_json is not None:
+        body += b', "answers": ' + answers_json
+    body += b', "questions": ' + rendered.questions_json + b"}"
+    return current_app.response_class(body, status=status, mimetype=current_app.json.mimetype)
+
+
+def _attempt_answers_json(rendered: RenderedQuestions, answers: list, *, include_correct: bool) -> bytes:
+    """Each answer's own columns plus its question's pre-rendered fields, in question order."""
+    ordered = sorted(
+        (rendered.positions[answer.question_id], answer)
+        for answer in answers
+        if answer.question_id in rendered.positions
+    )
+    items = []
+    for position, answer in ordered:
+        own = current_app.json.dumps(
+            {
+                "id": answer.id,
+                "question_id": answer.question_id,
+                "chosen_json": answer.chosen_json,
+                "is_correct": answer.is_correct,
+                "marks_awarded": answer.marks_awarded,
+            }
+        ).encode("utf-8")
+        members = [own[1:-1], rendered.answer_fields[position]]
+        if include_correct:
+            members.append(rendered.review_fields[position])
+        items.append(b"{" + b", ".join(members) + b"}")
+    return b"[" + b", ".join(items) + b"]"
+
+
+def _answer_rows(
+    attempt_id: str,
+    answer_key: AnswerKey,
+    chosen: list[int | None],
+    outcome: dict,
+) -> list[dict]:
+    return [
+        {
+            "attempt_id": attempt_id,
+            "question_id": answer_key.question_ids[position],
+            "chosen_json": (
+                None
+                if option_index is None
+                else {
+                    "option_index": option_index,
+                    "option_text": answer_key.options[position][option_index],
+                }
+            ),
+            "is_correct": outcome["is_correct"][position],
+            "marks_awarded": outcome["marks_awarded"][position],
+        }
+        for position, option_index in enumerate(chosen)
+    ]
+
+
 def _latest_submitted_attempt_id(user_id: str, quiz_id: str) -> str | None:
     attempt = (
         QuizAttempt.query
@@ -181,26 +318,100 @@ def create_quiz():
     except QuizGenerationError as exc:
         return jsonify({"error": str(exc)}), exc.status_code
 
-    questions = quiz.questions.order_by(QuizQuestion.question_index.asc()).all()
-    return jsonify(
-        {
-            "quiz": _quiz_to_dict(quiz),
-            "questions": [_question_to_dict(question) for question in questions],
-        }
-    ), 201
+    rendered = _rendered_questions(quiz)
+    return _questions_response(
+        {"quiz": _quiz_to_dict(quiz, question_count=rendered.question_count)},
+        rendered,
+        201,
+    )
+
+
+@quizzes_bp.post("/jobs")
+@jwt_required()
+def create_quiz_job():
+    user_id = get_jwt_identity()
+
+    try:
+        spec = parse_quiz_request(request.get_json(silent=True) or {})
+    except QuizSpecError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    ok, error_response = _validate_document_ids(user_id=user_id, spec=spec)
+    if not ok and error_response is not None:
+        body, status_code = error_response
+        return jsonify(body), status_code
+
+    try:
+        job = enqueue_quiz_job(user_id=user_id, spec=spec)
+    except QuizGenerationError as exc:
+        return jsonify({"error": str(exc)}), exc.status_code
+
+    response = jsonify({"job": _job_to_dict(job)})
+    response.headers["Location"] = f"{quizzes_bp.url_prefix}/jobs/{job.id}"
+    return response, 202
+
+
+@quizzes_bp.get("/jobs/<string:job_id>")
+@jwt_required()
+def get_quiz_job(job_id: str):
+    user_id = get_jwt_identity()
+    expire_stale_quiz_jobs(user_id)
+    job = QuizJob.query.filter_by(id=job_id, user_id=user_id).first()
+    if not job:
+        return jsonify({"error": "quiz job not found"}), 404
+
+    payload = {"job": _job_to_dict(job)}
+    if job.status == JOB_STATUS_SUCCEEDED and job.quiz is not None:
+        payload["quiz"] = _quiz_to_dict(job.quiz)
+    return jsonify(payload), 200
 
 
 @quizzes_bp.get("")
 @jwt_required()
+@cached_response("list_quizzes")
 def list_quizzes():
     user_id = get_jwt_identity()
-    quizzes = (
-        Quiz.query
-        .filter_by(user_id=user_id)
-        .order_by(Quiz.created_at.desc())
-        .all()
+    try:
+        limit, cursor = parse_page_args(request.args)
+    except PaginationError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    question_count = (
+        db.session.query(func.count(QuizQuestion.id))
+        .filter(QuizQuestion.quiz_id == Quiz.id)
+        .correlate(Quiz)
+        .scalar_subquery()
+        .label("question_count")
+    )
+    query = (
+        db.session.query(
+            Quiz.id,
+            Quiz.title,
+            Quiz.instructions,
+            Quiz.spec_json,
+            Quiz.total_marks,
+            Quiz.time_limit_sec,
+            Quiz.model_used,
+            Quiz.created_at,
+            question_count,
+        )
+        .filter(Quiz.user_id == user_id)
     )
-    return jsonify({"quizzes": [_quiz_to_dict(quiz) for quiz in quizzes]}), 200
+    quizzes, next_cursor = paginate(
+        query,
+        sort_column=Quiz.created_at,
+        id_column=Quiz.id,
+        limit=limit,
+        cursor=cursor,
+    )
+
+    response = jsonify({
+        "quizzes": [_quiz_to_dict(quiz, question_count=quiz.question_count) for quiz in quizzes],
+        "next_cursor": next_cursor,
+    })
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response, 200
 
 
 @quizzes_bp.get("/<string:quiz_id>")
@@ -222,14 +433,15 @@ def get_quiz_questions(quiz_id: str):
     if not quiz:
         return jsonify({"error": "quiz not found"}), 404
 
-    questions = quiz.questions.order_by(QuizQuestion.question_index.asc()).all()
-    return jsonify(
+    rendered = _rendered_questions(quiz)
+    return _questions_response(
         {
-            "quiz": _quiz_to_dict(quiz),
-            "questions": [_question_to_dict(question) for question in questions],
+            "quiz": _quiz_to_dict(quiz, question_count=rendered.question_count),
             "latest_submitted_attempt_id": _latest_submitted_attempt_id(user_id, quiz.id),
-        }
-    ), 200
+        },
+        rendered,
+        200,
+    )
 
 
 @quizzes_bp.post("/<string:quiz_id>/attempts/start")
@@ -246,17 +458,19 @@ def start_quiz_attempt(quiz_id: str):
         total_marks=quiz.total_marks,
     )
     db.session.add(attempt)
+    bump_data_version(user_id)
     db.session.commit()
 
-    questions = quiz.questions.order_by(QuizQuestion.question_index.asc()).all()
-    return jsonify(
+    rendered = _rendered_questions(quiz)
+    return _questions_response(
         {
             "attempt": _attempt_to_dict(attempt),
-            "quiz": _quiz_to_dict(quiz),
-            "questions": [_question_to_dict(question) for question in questions],
+            "quiz": _quiz_to_dict(quiz, question_count=rendered.question_count),
             "answers": [],
-        }
-    ), 201
+        },
+        rendered,
+        201,
+    )
 
 
 @quizzes_bp.post("/<string:quiz_id>/attempts/<string:attempt_id>/submit")
@@ -280,35 +494,28 @@ def submit_quiz_attempt(quiz_id: str, attempt_id: str):
 
     payload = request.get_json(silent=True) or {}
     answers_payload = payload.get("answers", [])
-    questions = quiz.questions.order_by(QuizQuestion.question_index.asc()).all()
+    rendered = _rendered_questions(quiz)
+    answer_key = _quiz_answer_key(quiz, rendered)
 
     try:
-        grading_result = grade_quiz_submission(
-            questions=questions,
-            submitted_answers=answers_payload,
-        )
+        chosen = resolve_submission(answer_key, answers_payload)
         time_spent_sec = _parse_time_spent_sec(payload, attempt)
     except QuizGradingError as exc:
         return jsonify({"error": str(exc)}), 400
+    grading_result = score_submission(answer_key, chosen)
 
     attempt.answers.delete(synchronize_session=False)
-    for result in grading_result["results"]:
-        question = result["question"]
-        db.session.add(
-            QuizAttemptAnswer(
-                attempt_id=attempt.id,
-                question_id=question.id,
-                chosen_json=result["chosen_json"],
-                is_correct=result["is_correct"],
-                marks_awarded=result["marks_awarded"],
-            )
-        )
+    answer_rows = _answer_rows(attempt.id, answer_key, chosen, grading_result)
+    if answer_rows:
+        db.session.execute(insert(QuizAttemptAnswer), answer_rows)
 
     attempt.submitted_at = datetime.now(timezone.utc)
     attempt.time_spent_sec = time_spent_sec
     attempt.score = grading_result["score"]
     attempt.total_marks = grading_result["total_marks"]
-    attempt.summary_json = summarize_attempt(quiz=quiz, grading_result=grading_result)
+    # The LLM summary is written later by the attempt_summaries worker.
+    attempt.summary_json = build_fallback_summary(quiz=quiz, grading_result=grading_result)
+    attempt.summary_status = SUMMARY_STATUS_PENDING
 
     score_percent = round((attempt.score / attempt.total_marks) * 100, 2) if attempt.total_marks else 0.0
     topic = quiz.spec_json.get("topic") if isinstance(quiz.spec_json, dict) else None
@@ -326,23 +533,129 @@ def submit_quiz_attempt(quiz_id: str, attempt_id: str):
             "score_percent": score_percent,
         },
     )
+    bump_data_version(user_id)
     db.session.commit()
+    enqueue_attempt_summary(attempt.id)
 
     answers = _load_attempt_answers(attempt.id)
-    return jsonify(
+    return _questions_response(
         {
             "attempt": _attempt_to_dict(attempt),
-            "quiz": _quiz_to_dict(quiz),
+            "quiz": _quiz_to_dict(quiz, question_count=rendered.question_count),
             "score": attempt.score,
             "total_marks": attempt.total_marks,
             "summary": attempt.summary_json,
-            "questions": [_question_to_dict(question) for question in questions],
-            "answers": [
-                _attempt_answer_to_dict(answer, include_correct=True)
-                for answer in answers
+        },
+        rendered,
+        200,
+        answers_json=_attempt_answers_json(rendered, answers, include_correct=True),
+    )
+
+
+@quizzes_bp.post("/<string:quiz_id>/attempts/bulk")
+@jwt_required()
+def bulk_grade_quiz_attempts(quiz_id: str):
+    """
+    Grade and store many completed attempts at once (e.g. offline answer sheets).
+
+    Body: {"attempts": [{"answers": [...], "time_spent_sec"?: int,
+    "submitted_at"?: ISO 8601}, ...]}.  The whole batch is rejected if any
+    attempt is invalid.  Imported attempts get the deterministic summary only.
+    """
+    user_id = get_jwt_identity()
+    quiz = Quiz.query.filter_by(id=quiz_id, user_id=user_id).first()
+    if not quiz:
+        return jsonify({"error": "quiz not found"}), 404
+
+    payload = request.get_json(silent=True) or {}
+    attempts_payload = payload.get("attempts")
+    if not isinstance(attempts_payload, list) or not attempts_payload:
+        return jsonify({"error": "attempts must be a non-empty list"}), 400
+    max_attempts = int(current_app.config.get("QUIZ_BULK_GRADE_MAX_ATTEMPTS", 500))
+    if len(attempts_payload) > max_attempts:
+        return jsonify({"error": f"at most {max_attempts} attempts can be graded per request"}), 400
+
+    answer_key = _quiz_answer_key(quiz, _rendered_questions(quiz))
+    now = datetime.now(timezone.utc)
+
+    attempt_rows: list[dict] = []
+    answer_rows: list[dict] = []
+    for index, item in enumerate(attempts_payload):
+        label = f"attempts[{index}]"
+        try:
+            if not isinstance(item, dict):
+                raise QuizGradingError("must be an object")
+            chosen = resolve_submission(answer_key, item.get("answers"))
+            time_spent_sec = _parse_optional_time_spent_sec(item)
+            submitted_at = _parse_submitted_at(item.get("submitted_at"), now)
+        except QuizGradingError as exc:
+            return jsonify({"error": f"{label}: {exc}"}), 400
+
+        outcome = score_submission(answer_key, chosen)
+        attempt_id = str(uuid.uuid4())
+        attempt_rows.append(
+            {
+                "id": attempt_id,
+                "quiz_id": quiz.id,
+                "user_id": user_id,
+                "started_at": submitted_at - timedelta(seconds=time_spent_sec or 0),
+                "submitted_at": submitted_at,
+                "time_spent_sec": time_spent_sec,
+                "score": outcome["score"],
+                "total_marks": outcome["total_marks"],
+                "summary_json": build_fallback_summary(quiz=quiz, grading_result=outcome),
+                "summary_status": SUMMARY_STATUS_FALLBACK,
+            }
+        )
+        answer_rows.extend(_answer_rows(attempt_id, answer_key, chosen, outcome))
+
+    db.session.execute(insert(QuizAttempt), attempt_rows)
+    if answer_rows:
+        db.session.execute(insert(QuizAttemptAnswer), answer_rows)
+
+    topic = quiz.spec_json.get("topic") if isinstance(quiz.spec_json, dict) else None
+    for row in attempt_rows:
+        record_event(
+            user_id=user_id,
+            event_type=EVENT_QUIZ_SUBMITTED,
+            entity_type="quiz_attempt",
+            entity_id=row["id"],
+            metadata={
+                "attempt_id": row["id"],
+                "quiz_id": quiz.id,
+                "topic": topic or quiz.title,
+                "score": row["score"],
+                "total_marks": row["total_marks"],
+                "score_percent": row["summary_json"]["accuracy_pct"],
+                "imported": True,
+            },
+            created_at=row["submitted_at"],
+        )
+    bump_data_version(user_id)
+    db.session.commit()
+
+    scores = [row["score"] for row in attempt_rows]
+    return jsonify(
+        {
+            "quiz_id": quiz.id,
+            "imported": len(attempt_rows),
+            "mean_score": round(sum(scores) / len(scores), 2),
+            "attempts": [
+                {
+                    "id": row["id"],
+                    "submitted_at": row["submitted_at"].isoformat(),
+                    "time_spent_sec": row["time_spent_sec"],
+                    "score": row["score"],
+                    "total_marks": row["total_marks"],
+                    "accuracy_pct": row["summary_json"]["accuracy_pct"],
+                    "correct_count": row["summary_json"]["correct_count"],
+                    "incorrect_count": row["summary_json"]["incorrect_count"],
+                    "unanswered_count": row["summary_json"]["unanswered_count"],
+                }
+                for row in attempt_rows
             ],
         }
-    ), 200
+    ), 201
 
 
 @quizzes_bp.get("/attempts/<string:attempt_id>")
@@ -352,23 +665,22 @@ def get_quiz_attempt(attempt_id: str):
     attempt = QuizAttempt.query.filter_by(id=attempt_id, user_id=user_id).first()
     if not attempt:
         return jsonify({"error": "quiz attempt not found"}), 404
+    expire_stale_attempt_summary(attempt)
 
     quiz = Quiz.query.filter_by(id=attempt.quiz_id, user_id=user_id).first()
     if not quiz:
         return jsonify({"error": "quiz not found"}), 404
 
     include_correct = attempt.submitted_at is not None
-    questions = quiz.questions.order_by(QuizQuestion.question_index.asc()).all()
+    rendered = _rendered_questions(quiz)
     answers = _load_attempt_answers(attempt.id)
 
-    return jsonify(
+    return _questions_response(
         {
             "attempt": _attempt_to_dict(attempt),
-            "quiz": _quiz_to_dict(quiz),
-            "questions": [_question_to_dict(question) for question in questions],
-            "answers": [
-                _attempt_answer_to_dict(answer, include_correct=include_correct)
-                for answer in answers
-            ],
-        }
-    ), 200
+            "quiz": _quiz_to_dict(quiz, question_count=rendered.question_count),
+        },
+        rendered,
+        200,
+        answers_json=_attempt_answers_json(rendered, answers, include_correct=include_correct),
+    )
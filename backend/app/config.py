@@ -32,10 +32,144 @@ class Config:
     OLLAMA_TIMEOUT = int(os.getenv("OLLAMA_TIMEOUT", "120"))      # seconds
     OLLAMA_MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "1"))
     OLLAMA_BASE_DELAY = float(os.getenv("OLLAMA_BASE_DELAY", "0.5"))  # seconds
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "")  # e.g. "30m"; empty = server default
+
+    # Chat prompt layout: "stable_prefix" (context in the last user message so
+    # Ollama can reuse its KV cache across turns) or "legacy" (context in the
+    # system prompt).
+    CHAT_PROMPT_LAYOUT = os.getenv("CHAT_PROMPT_LAYOUT", "stable_prefix")
+
+    # Chat history: recent turns kept verbatim within this approximate token
+    # budget and message cap; older turns are folded into a rolling summary on
+    # the chat row once either limit is exceeded.
+    CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "1500"))
+    CHAT_HISTORY_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_HISTORY_SUMMARY_MAX_TOKENS", "300"))
+    CHAT_HISTORY_MAX_MESSAGES = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "40"))
+
+    # Prompt context packing: retrieved sources are de-overlapped and fitted
+    # into what the model's context window (Ollama num_ctx) leaves after the
+    # rest of the prompt and the reply (max_tokens, at most a quarter of the
+    # window), capped at CONTEXT_SOURCE_MAX_TOKENS.
+    # MODEL_CONTEXT_WINDOWS overrides per model: "qwen3.5:0.8b=4096,llama3.1=8192".
+    MODEL_CONTEXT_WINDOW = int(os.getenv("MODEL_CONTEXT_WINDOW", "8192"))
+    MODEL_CONTEXT_WINDOWS = os.getenv("MODEL_CONTEXT_WINDOWS", "")
+    CONTEXT_SOURCE_MAX_TOKENS = int(os.getenv("CONTEXT_SOURCE_MAX_TOKENS", "1200"))
+
+    # Retrieval spans: merge hits that are consecutive chunks of one ingestion,
+    # and optionally widen the top RETRIEVAL_NEIGHBOR_HITS hits by
+    # RETRIEVAL_NEIGHBOR_WINDOW chunks on each side (0 = off).
+    RETRIEVAL_MERGE_ADJACENT = os.getenv("RETRIEVAL_MERGE_ADJACENT", "true").lower() in ("1", "true", "yes")
+    RETRIEVAL_NEIGHBOR_WINDOW = int(os.getenv("RETRIEVAL_NEIGHBOR_WINDOW", "0"))
+    RETRIEVAL_NEIGHBOR_HITS = int(os.getenv("RETRIEVAL_NEIGHBOR_HITS", "2"))
+
+    # Chunk embedding storage: "vector" (float32), "halfvec" (float16, half the
+    # size) or "binary" (Hamming shortlist of top_k * RETRIEVAL_BINARY_OVERSAMPLE
+    # over binary_quantize(halfvec), re-scored with float16 cosine distance).
+    EMBEDDING_STORAGE = os.getenv("EMBEDDING_STORAGE", "vector")
+    RETRIEVAL_BINARY_OVERSAMPLE = int(os.getenv("RETRIEVAL_BINARY_OVERSAMPLE", "10"))
+
+    # Matryoshka dimensions: embeddings are truncated to EMBEDDING_DIM (<= 1536,
+    # zero-padded to the column width).  RETRIEVAL_COARSE_PASS shortlists
+    # top_k * RETRIEVAL_COARSE_OVERSAMPLE chunks on the stored 256-dim prefix
+    # and re-ranks them on the full vector; run
+    # embedding_storage.ensure_coarse_storage() once before turning it on.
+    EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1536"))
+    RETRIEVAL_COARSE_PASS = os.getenv("RETRIEVAL_COARSE_PASS", "false").lower() in ("1", "true", "yes")
+    RETRIEVAL_COARSE_OVERSAMPLE = int(os.getenv("RETRIEVAL_COARSE_OVERSAMPLE", "8"))
+
+    # Exact in-process search (numpy) for users with at most
+    # RETRIEVAL_LOCAL_INDEX_MAX_CHUNKS chunks; matrices are memory-mapped from
+    # RETRIEVAL_LOCAL_INDEX_DIR (default: instance/vector_index).
+    RETRIEVAL_LOCAL_INDEX = os.getenv("RETRIEVAL_LOCAL_INDEX", "false").lower() in ("1", "true", "yes")
+    RETRIEVAL_LOCAL_INDEX_MAX_CHUNKS = int(os.getenv("RETRIEVAL_LOCAL_INDEX_MAX_CHUNKS", "5000"))
+    RETRIEVAL_LOCAL_INDEX_MAX_USERS = int(os.getenv("RETRIEVAL_LOCAL_INDEX_MAX_USERS", "64"))
+    RETRIEVAL_LOCAL_INDEX_DIR = os.getenv("RETRIEVAL_LOCAL_INDEX_DIR", "")
+
+    # Vector search backend: "pgvector" (default) or "ivf" (memory-mapped
+    # segment files under VECTOR_STORE_DIR, default: instance/vector_store;
+    # requires numpy).  Segments with at least VECTOR_STORE_IVF_MIN_ROWS
+    # chunks are split into inverted lists, VECTOR_STORE_IVF_PROBES of which
+    # are scanned per query.
+    VECTOR_STORE = os.getenv("VECTOR_STORE", "pgvector")
+    VECTOR_STORE_DIR = os.getenv("VECTOR_STORE_DIR", "")
+    VECTOR_STORE_IVF_MIN_ROWS = int(os.getenv("VECTOR_STORE_IVF_MIN_ROWS", "1024"))
+    VECTOR_STORE_IVF_PROBES = int(os.getenv("VECTOR_STORE_IVF_PROBES", "8"))
+
+    # Per-process cache of retrieval rankings, keyed by user, normalized
+    # query, scope and top_k and invalidated by the user's corpus version
+    # (their current ingestions).  A hit skips the query embedding and the
+    # vector search.
+    RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "1024"))
+
+    # Opt-in semantic answer cache for first-turn chat questions: a cached
+    # answer over the same retrieved sources and model is reused when the
+    # question embeddings are within ANSWER_CACHE_SIMILARITY (cosine).
+    # ANSWER_CACHE_SCOPE "user" keys on the user's own chunks; "shared" keys
+    # on source text, so identical course PDFs share answers across users.
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+    ANSWER_CACHE_SCOPE = os.getenv("ANSWER_CACHE_SCOPE", "user")
+    ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+    ANSWER_CACHE_TTL_SEC = int(os.getenv("ANSWER_CACHE_TTL_SEC", "86400"))
+    ANSWER_CACHE_MAX_CANDIDATES = int(os.getenv("ANSWER_CACHE_MAX_CANDIDATES", "20"))
+
+    # Request tracing: "none" (default), "log" (JSON lines to TRACING_LOG_PATH,
+    # or the app.tracing logger when empty) or "otlp" (OTLP/HTTP JSON to
+    # TRACING_OTLP_ENDPOINT).  TRACING_SAMPLE_RATIO of new traces are kept.
+    TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")
+    TRACING_LOG_PATH = os.getenv("TRACING_LOG_PATH", "")
+    TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+    TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "tutor-bot-backend")
+
+    # Prometheus scrape endpoint (GET /metrics).  Off by default; when
+    # METRICS_TOKEN is set, scrapes must send "Authorization: Bearer <token>".
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
     # Legacy alias kept for older code paths and environment files.
     WRAPPER_DEFAULT_MODEL = os.getenv("WRAPPER_DEFAULT_MODEL", OLLAMA_MODEL)
 
+    # Background quiz generation jobs (POST /api/quizzes/jobs)
+    QUIZ_JOB_MAX_WORKERS = int(os.getenv("QUIZ_JOB_MAX_WORKERS", "2"))
+    QUIZ_JOB_MAX_PENDING_PER_USER = int(os.getenv("QUIZ_JOB_MAX_PENDING_PER_USER", "3"))
+    # Active jobs whose heartbeat is older than this are failed as orphaned.
+    QUIZ_JOB_STALE_AFTER_SEC = int(os.getenv("QUIZ_JOB_STALE_AFTER_SEC", "900"))
+
+    # Streamed quiz generation: validate questions as they arrive, stop early
+    # after QUIZ_STREAM_MAX_INVALID broken questions, salvage truncated output.
+    QUIZ_GENERATION_STREAMING = os.getenv("QUIZ_GENERATION_STREAMING", "false").lower() in ("1", "true", "yes")
+    QUIZ_STREAM_MAX_INVALID = int(os.getenv("QUIZ_STREAM_MAX_INVALID", "2"))
+
+    # Sharded quiz generation: quizzes with at least 2 * QUIZ_SHARD_MIN_QUESTIONS
+    # questions are split over up to QUIZ_GENERATION_SHARDS concurrent calls.
+    # Set this to Ollama's OLLAMA_NUM_PARALLEL; 1 disables sharding.
+    QUIZ_GENERATION_SHARDS = int(os.getenv("QUIZ_GENERATION_SHARDS", "1"))
+    QUIZ_SHARD_MIN_QUESTIONS = int(os.getenv("QUIZ_SHARD_MIN_QUESTIONS", "5"))
+
+    # Background LLM summaries for submitted quiz attempts; a summary still
+    # pending this long after submit is treated as "fallback" when read.
+    ATTEMPT_SUMMARY_MAX_WORKERS = int(os.getenv("ATTEMPT_SUMMARY_MAX_WORKERS", "1"))
+    ATTEMPT_SUMMARY_STALE_AFTER_SEC = int(os.getenv("ATTEMPT_SUMMARY_STALE_AFTER_SEC", "900"))
+
+    # Quiz generation cache: identical spec + corpus + model reuses a stored quiz.
+    # Requests can opt out per quiz with "fresh_questions": true.
+    QUIZ_CACHE_ENABLED = os.getenv("QUIZ_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    QUIZ_CACHE_TTL_SEC = int(os.getenv("QUIZ_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+    QUIZ_CACHE_SHUFFLE_OPTIONS = os.getenv("QUIZ_CACHE_SHUFFLE_OPTIONS", "true").lower() in ("1", "true", "yes")
+
+    # Compiled quiz answer keys kept in process memory, and bulk grading limit
+    QUIZ_ANSWER_KEY_CACHE_SIZE = int(os.getenv("QUIZ_ANSWER_KEY_CACHE_SIZE", "512"))
+    QUIZ_BULK_GRADE_MAX_ATTEMPTS = int(os.getenv("QUIZ_BULK_GRADE_MAX_ATTEMPTS", "500"))
+
+    # Pre-rendered quiz question payloads (process LRU, optional shared Redis tier)
+    QUIZ_RENDER_CACHE_MAX_ENTRIES = int(os.getenv("QUIZ_RENDER_CACHE_MAX_ENTRIES", "256"))
+    QUIZ_RENDER_CACHE_REDIS_URL = os.getenv("QUIZ_RENDER_CACHE_REDIS_URL", "")
+    QUIZ_RENDER_CACHE_TTL_SEC = int(os.getenv("QUIZ_RENDER_CACHE_TTL_SEC", "86400"))
+
+    # Per-user ETag response cache (rendered bodies kept in process memory)
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+
     # File uploads
     UPLOAD_FOLDER = os.getenv("UPLOAD_FOLDER", "")  # default: instance/uploads
 
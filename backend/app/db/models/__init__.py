@@ -11,7 +11,10 @@ from app.db.models.quiz_question import QuizQuestion
 from app.db.models.quiz_question_source import QuizQuestionSource
 from app.db.models.quiz_attempt import QuizAttempt
 from app.db.models.quiz_attempt_answer import QuizAttemptAnswer
+from app.db.models.quiz_job import QuizJob
+from app.db.models.quiz_generation_cache import QuizGenerationCache
 from app.db.models.event import Event
+from app.db.models.answer_cache import AnswerCache
 
 __all__ = [
     "User",
@@ -27,5 +30,8 @@ __all__ = [
     "QuizQuestionSource",
     "QuizAttempt",
     "QuizAttemptAnswer",
+    "QuizJob",
+    "QuizGenerationCache",
     "Event",
+    "AnswerCache",
 ]
@@ -0,0 +1,41 @@
+import uuid
+from datetime import datetime, timezone
+from pgvector.sqlalchemy import Vector
+from app.extensions import db
+
+
+class AnswerCache(db.Model):
+    """Generated chat answer reusable for a similar question over the same sources."""
+
+    __tablename__ = "answer_cache"
+    __table_args__ = (
+        db.Index("ix_answer_cache_source_key_created_at", "source_key", "created_at"),
+    )
+
+    id = db.Column(
+        db.String(36),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4()),
+    )
+    # User whose question produced the answer
+    user_id = db.Column(
+        db.String(36),
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    # sha256 of the ordered sources the answer was generated from and the model
+    source_key = db.Column(db.String(64), nullable=False)
+    question = db.Column(db.Text, nullable=False)
+    question_embedding = db.Column(Vector(1536), nullable=False)
+    answer = db.Column(db.Text, nullable=False)
+    model_used = db.Column(db.String(100), nullable=True)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    last_used_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<AnswerCache id={self.id} user={self.user_id} hits={self.hit_count}>"
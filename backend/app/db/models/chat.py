@@ -6,6 +6,10 @@ from app.db.models.chat_document import chat_documents
 
 class Chat(db.Model):
     __tablename__ = "chats"
+    __table_args__ = (
+        # Keyset pagination for GET /api/chat/sessions
+        db.Index("ix_chats_user_updated_at_id", "user_id", "updated_at", "id"),
+    )
 
     id = db.Column(
         db.String(36),
@@ -30,6 +34,10 @@ class Chat(db.Model):
         onupdate=lambda: datetime.now(timezone.utc),
         nullable=False,
     )
+    # Rolling summary of turns that no longer fit the history token budget.
+    # Messages created at or before history_summary_until are covered by it.
+    history_summary = db.Column(db.Text, nullable=True)
+    history_summary_until = db.Column(db.DateTime(timezone=True), nullable=True)
 
     # Relationships
     messages = db.relationship(
@@ -5,6 +5,10 @@ from app.extensions import db
 
 class ChatMessage(db.Model):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Keyset pagination for GET /api/chat/sessions/<chat_id>/messages
+        db.Index("ix_chat_messages_chat_created_at_id", "chat_id", "created_at", "id"),
+    )
 
     id = db.Column(
         db.String(36),
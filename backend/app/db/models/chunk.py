@@ -1,5 +1,6 @@
 from datetime import datetime, timezone
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC, Vector
+from sqlalchemy.orm import deferred
 from app.extensions import db
 
 
@@ -33,7 +34,14 @@ class Chunk(db.Model):
     page_start = db.Column(db.Integer, nullable=True)
     page_end = db.Column(db.Integer, nullable=True)
     content = db.Column(db.Text, nullable=False)
-    embedding = db.Column(Vector(1536), nullable=False)
+    # Only the column of the active EMBEDDING_STORAGE mode is written; see
+    # app/services/rag/embedding_storage.py.
+    embedding = db.Column(Vector(1536), nullable=True)
+    # Deferred: the column only exists on pgvector >= 0.7 (see the c7d9e1f3a5b8
+    # migration), so plain Chunk loads must not select it.
+    embedding_half = deferred(db.Column(HALFVEC(1536), nullable=True))
+    # First 256 dimensions of the embedding, for the coarse search pass.
+    embedding_coarse = db.Column(Vector(256), nullable=True)
     created_at = db.Column(
         db.DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
@@ -5,6 +5,10 @@ from app.extensions import db
 
 class Document(db.Model):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Keyset pagination for GET /api/documents
+        db.Index("ix_documents_user_created_at_id", "user_id", "created_at", "id"),
+    )
 
     id = db.Column(
         db.String(36),
@@ -11,6 +11,8 @@ class Quiz(db.Model):
             "time_limit_sec IS NULL OR time_limit_sec > 0",
             name="ck_quizzes_time_limit_sec_positive",
         ),
+        # Keyset pagination for GET /api/quizzes
+        db.Index("ix_quizzes_user_created_at_id", "user_id", "created_at", "id"),
     )
 
     id = db.Column(
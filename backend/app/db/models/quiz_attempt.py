@@ -51,6 +51,8 @@ class QuizAttempt(db.Model):
     score = db.Column(db.Float, nullable=True)
     total_marks = db.Column(db.Float, nullable=False, default=0.0)
     summary_json = db.Column(db.JSON, nullable=True)
+    # pending -> ready | fallback while the LLM summary is generated in the background.
+    summary_status = db.Column(db.String(20), nullable=True)
 
     quiz = db.relationship("Quiz", back_populates="attempts")
     answers = db.relationship(
@@ -0,0 +1,41 @@
+import uuid
+from datetime import datetime, timezone
+from app.extensions import db
+
+
+class QuizGenerationCache(db.Model):
+    """Validated quiz payload reusable for an identical spec over the same corpus."""
+
+    __tablename__ = "quiz_generation_cache"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "cache_key", name="uq_quiz_generation_cache_user_key"),
+    )
+
+    id = db.Column(
+        db.String(36),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4()),
+    )
+    user_id = db.Column(
+        db.String(36),
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    # sha256 of the normalized spec (without title), the corpus and the model
+    cache_key = db.Column(db.String(64), nullable=False)
+    # [[document_id, current_ingestion_id], ...] the payload was generated from
+    corpus_json = db.Column(db.JSON, nullable=False)
+    payload_json = db.Column(db.JSON, nullable=False)
+    # Cited sources, needed to recreate quiz_question_sources rows on a hit
+    sources_json = db.Column(db.JSON, nullable=False)
+    model_used = db.Column(db.String(100), nullable=True)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    last_used_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<QuizGenerationCache id={self.id} user={self.user_id} hits={self.hit_count}>"
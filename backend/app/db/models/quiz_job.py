@@ -0,0 +1,55 @@
+import uuid
+from datetime import datetime, timezone
+from app.extensions import db
+
+
+class QuizJob(db.Model):
+    """Background quiz generation request and its progress."""
+
+    __tablename__ = "quiz_jobs"
+    __table_args__ = (
+        db.CheckConstraint(
+            "status IN ('queued', 'running', 'succeeded', 'failed')",
+            name="ck_quiz_jobs_status",
+        ),
+        db.Index("ix_quiz_jobs_user_status", "user_id", "status"),
+    )
+
+    id = db.Column(
+        db.String(36),
+        primary_key=True,
+        default=lambda: str(uuid.uuid4()),
+    )
+    user_id = db.Column(
+        db.String(36),
+        db.ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    # Current pipeline stage: queued | retrieving | generating | validating | repairing | storing | done
+    stage = db.Column(db.String(30), nullable=False, default="queued")
+    spec_json = db.Column(db.JSON, nullable=False)
+    # Intermediate generation state (attempt number, validation errors per attempt, ...)
+    progress_json = db.Column(db.JSON, nullable=True)
+    quiz_id = db.Column(
+        db.String(36),
+        db.ForeignKey("quizzes.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    error_message = db.Column(db.Text, nullable=True)
+    error_status = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    started_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    # Refreshed while the owning process still holds the job (queued or running);
+    # expire_stale_quiz_jobs fails active jobs whose heartbeat stopped.
+    heartbeat_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    completed_at = db.Column(db.DateTime(timezone=True), nullable=True)
+
+    quiz = db.relationship("Quiz")
+
+    def __repr__(self):
+        return f"<QuizJob id={self.id} status={self.status!r} stage={self.stage!r}>"
@@ -21,6 +21,8 @@ class User(db.Model):
         nullable=False,
     )
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    # Bumped on every write that changes user-visible data; drives ETag caching.
+    data_version = db.Column(db.Integer, default=0, server_default="0", nullable=False)
 
     # ── password helpers ─────────────────────────────────────────────────────
 
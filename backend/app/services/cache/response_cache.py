@@ -0,0 +1,157 @@
+"""
+Per-user HTTP response cache with ETag validation.
+
+Public API
+----------
+    bump_data_version(user_id) -> None
+    get_data_version(user_id) -> int | None
+    cached_response(endpoint_key, *, per_utc_day=False)   (view decorator)
+
+Every write that changes user-visible data bumps ``users.data_version`` inside
+the same transaction.  Cached GET endpoints read that counter first:
+
+  - If-None-Match matches the current ETag -> 304 Not Modified
+  - a locally cached body for the same version exists -> replay it
+  - otherwise the view runs and its 200 body is cached for that version
+
+Because the version lives in the database, a write handled by one worker is
+seen by every other worker on its next lookup; only the rendered bodies are
+kept in process memory.
+
+Views whose body depends on the current date (e.g. a "last N days" window)
+pass ``per_utc_day=True``: the UTC date joins the key and the ETag, so the
+cached body and any 304 expire at UTC midnight even without a write.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import update
+
+from app.db.models.user import User
+from app.extensions import db
+from app.services.observability.metrics import CACHE_REQUESTS
+
+DEFAULT_MAX_ENTRIES = 2048
+
+_lock = threading.Lock()
+_entries: "OrderedDict[tuple, tuple[int, bytes, str]]" = OrderedDict()
+
+
+def bump_data_version(user_id: str) -> None:
+    """Increment the user's data version in the current transaction."""
+    if not user_id:
+        return
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1)
+    )
+
+
+def get_data_version(user_id: str) -> int | None:
+    return (
+        db.session.query(User.data_version)
+        .filter(User.id == user_id)
+        .scalar()
+    )
+
+
+def cached_response(endpoint_key: str, *, per_utc_day: bool = False):
+    """
+    Cache a JWT-protected GET view per user, keyed by endpoint, view args and
+    query string (and the UTC date with *per_utc_day*).  Must be applied
+    below ``@jwt_required()``.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = get_jwt_identity()
+            version = get_data_version(user_id)
+            if version is None:
+                return view(*args, **kwargs)
+
+            cache_key = (
+                user_id,
+                endpoint_key,
+                tuple(sorted(kwargs.items())),
+                request.query_string,
+                _utc_today().isoformat() if per_utc_day else None,
+            )
+            etag = _build_etag(cache_key, version)
+
+            if request.if_none_match.contains(etag):
+                CACHE_REQUESTS.inc(cache="response", result="hit")
+                response = current_app.response_class(status=304)
+                return _finalize(response, etag)
+
+            cached = _get(cache_key, version)
+            if cached is not None:
+                CACHE_REQUESTS.inc(cache="response", result="hit")
+                body, mimetype = cached
+                response = current_app.response_class(body, status=200, mimetype=mimetype)
+                return _finalize(response, etag)
+
+            CACHE_REQUESTS.inc(cache="response", result="miss")
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough:
+                _put(cache_key, version, response.get_data(), response.mimetype)
+                _finalize(response, etag)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def clear_response_cache() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def _utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _build_etag(cache_key: tuple, version: int) -> str:
+    raw = repr((cache_key, version)).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()
+
+
+def _finalize(response, etag: str):
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Authorization")
+    return response
+
+
+def _get(cache_key: tuple, version: int) -> tuple[bytes, str] | None:
+    with _lock:
+        entry = _entries.get(cache_key)
+        if entry is None:
+            return None
+        cached_version, body, mimetype = entry
+        if cached_version != version:
+            del _entries[cache_key]
+            return None
+        _entries.move_to_end(cache_key)
+        return body, mimetype
+
+
+def _put(cache_key: tuple, version: int, body: bytes, mimetype: str) -> None:
+    max_entries = int(current_app.config.get("RESPONSE_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+    if max_entries <= 0:
+        return
+    with _lock:
+        _entries[cache_key] = (version, body, mimetype)
+        _entries.move_to_end(cache_key)
+        while len(_entries) > max_entries:
+            _entries.popitem(last=False)
@@ -0,0 +1,80 @@
+"""
+Bounded background worker pools for long-running AI work.
+
+Public API
+----------
+    submit(pool_name, fn, *args, max_workers, **kwargs) -> Future
+    shutdown(wait=False) -> None
+
+Each named pool is a ``ThreadPoolExecutor`` created on first use with
+*max_workers* threads, so the pool size caps how many jobs of that kind hit
+the local Ollama server at once; extra submissions wait in the pool queue.
+
+Jobs run inside a fresh application context with their own scoped database
+session, which is removed when the job finishes.  Jobs must therefore take
+ids, not ORM objects, as arguments.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from flask import current_app
+
+from app.extensions import db
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pools: dict[str, ThreadPoolExecutor] = {}
+
+
+def submit(
+    pool_name: str,
+    fn: Callable[..., Any],
+    *args: Any,
+    max_workers: int,
+    **kwargs: Any,
+) -> Future:
+    app = current_app._get_current_object()
+    executor = _get_executor(pool_name, max_workers)
+    return executor.submit(_run_in_app_context, app, pool_name, fn, args, kwargs)
+
+
+def shutdown(wait: bool = False) -> None:
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for executor in pools:
+        executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def _get_executor(pool_name: str, max_workers: int) -> ThreadPoolExecutor:
+    with _lock:
+        executor = _pools.get(pool_name)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=max(1, int(max_workers)),
+                thread_name_prefix=f"{pool_name}-worker",
+            )
+            _pools[pool_name] = executor
+        return executor
+
+
+def _run_in_app_context(app, pool_name: str, fn, args: tuple, kwargs: dict):
+    with app.app_context():
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            log.exception("background job failed in pool=%s", pool_name)
+            db.session.rollback()
+            raise
+        finally:
+            db.session.remove()
+
+
+atexit.register(shutdown)
@@ -0,0 +1,285 @@
+"""
+In-process Prometheus metrics.
+
+Public API
+----------
+    Counter.inc(amount=1.0, **labels) -> None
+    Histogram.observe(value, **labels) -> None
+    Histogram.time(**labels)   (context manager / decorator)
+    render_metrics() -> str
+    clear_metrics() -> None
+
+Metrics are plain counters and histograms held in process memory and
+rendered in the Prometheus text exposition format (version 0.0.4) by
+``GET /metrics`` (see app/api/metrics.py).  Recording is a dict update under
+a lock, so instrumented code never depends on the endpoint being enabled.
+
+Every worker process keeps its own values; scrape each worker (or run a
+single worker) and aggregate with ``sum by (...)`` in PromQL.
+
+Catalog
+-------
+    tutor_provider_request_duration_seconds   histogram  provider, model, status
+    tutor_provider_retries_total               counter    provider, reason
+    tutor_provider_backoff_seconds_total       counter    provider
+    tutor_embedding_batch_size                 histogram  model
+    tutor_ingested_chunks_total                counter    kind
+    tutor_ingestion_duration_seconds           histogram  kind, outcome
+    tutor_retrieval_duration_seconds           histogram  mode
+    tutor_quiz_validation_attempts             histogram  outcome
+    tutor_quiz_repairs_total                   counter    mode, outcome
+    tutor_cache_requests_total                 counter    cache, result
+
+``status`` is the final HTTP status code, or ``timeout`` / ``error`` when no
+response arrived.  Cache hit ratio per cache is
+``sum(rate(tutor_cache_requests_total{result="hit"}[5m])) by (cache)``
+divided by the same sum without the ``result`` filter.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Iterator, Sequence
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROVIDER_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250)
+ATTEMPT_BUCKETS = (1, 2, 3, 4, 5)
+
+_registry_lock = threading.Lock()
+_registry: dict[str, "_Metric"] = {}
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: dict) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple("" if labels[name] is None else str(labels[name]) for name in self.labelnames)
+
+    def _label_text(self, values: tuple[str, ...], extra: tuple[tuple[str, str], ...] = ()) -> str:
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every recorded sample (tests)."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("counters can only increase")
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, total in items:
+            lines.append(f"{self.name}{self._label_text(values)} {_format_number(total)}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        # per label set: [count per bucket..., sum, count]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the wall time of the block (or decorated call) in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._label_values(labels))
+            return int(state[-1]) if state else 0
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((values, list(state)) for values, state in self._values.items())
+        for values, state in items:
+            for bound, cumulative in zip(self.buckets, state):
+                lines.append(
+                    f"{self.name}_bucket{self._label_text(values, (('le', _format_number(bound)),))} "
+                    f"{_format_number(cumulative)}"
+                )
+            lines.append(f"{self.name}_bucket{self._label_text(values, (('le', '+Inf'),))} {_format_number(state[-1])}")
+            lines.append(f"{self.name}_sum{self._label_text(values)} {_format_number(state[-2])}")
+            lines.append(f"{self.name}_count{self._label_text(values)} {_format_number(state[-1])}")
+        return lines
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return _register(Counter(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return _register(Histogram(name, documentation, labelnames, buckets))
+
+
+def render_metrics() -> str:
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda metric: metric.name)
+    lines: list[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def clear_metrics() -> None:
+    """Reset every recorded value (the metric definitions stay registered)."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    for metric in metrics:
+        metric.clear()
+
+
+def _register(metric):
+    with _registry_lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# ── Catalog ───────────────────────────────────────────────────────────────────
+
+PROVIDER_REQUEST_SECONDS = histogram(
+    "tutor_provider_request_duration_seconds",
+    "AI provider request latency including retries, by final status.",
+    ("provider", "model", "status"),
+    PROVIDER_BUCKETS,
+)
+PROVIDER_RETRIES = counter(
+    "tutor_provider_retries_total",
+    "AI provider requests retried, by retryable status or network error.",
+    ("provider", "reason"),
+)
+PROVIDER_BACKOFF_SECONDS = counter(
+    "tutor_provider_backoff_seconds_total",
+    "Time spent sleeping between AI provider retries.",
+    ("provider",),
+)
+EMBEDDING_BATCH_SIZE = histogram(
+    "tutor_embedding_batch_size",
+    "Number of inputs per embedding request.",
+    ("model",),
+    BATCH_SIZE_BUCKETS,
+)
+INGESTED_CHUNKS = counter(
+    "tutor_ingested_chunks_total",
+    "Chunks embedded and stored by successful ingestions.",
+    ("kind",),
+)
+INGESTION_SECONDS = histogram(
+    "tutor_ingestion_duration_seconds",
+    "Wall time of one ingestion run from extraction to ready.",
+    ("kind", "outcome"),
+    PROVIDER_BUCKETS,
+)
+RETRIEVAL_SECONDS = histogram(
+    "tutor_retrieval_duration_seconds",
+    "Retrieval latency including embedding, search and span building.",
+    ("mode",),
+)
+QUIZ_VALIDATION_ATTEMPTS = histogram(
+    "tutor_quiz_validation_attempts",
+    "Validation attempts per quiz generation.",
+    ("outcome",),
+    ATTEMPT_BUCKETS,
+)
+QUIZ_REPAIRS = counter(
+    "tutor_quiz_repairs_total",
+    "Quiz repair rounds by mode and whether the repaired quiz validated.",
+    ("mode", "outcome"),
+)
+CACHE_REQUESTS = counter(
+    "tutor_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result"),
+)
@@ -0,0 +1,452 @@
+"""
+Request-scoped tracing spans.
+
+Public API
+----------
+    span(name, kind=KIND_INTERNAL, **attributes)   (context manager -> Span)
+    current_span() -> Span
+    inject_traceparent(headers=None) -> dict
+    init_tracing(app) -> None
+    flush_tracing() -> None
+
+Spans follow the OpenTelemetry data model (128-bit trace ids, 64-bit span
+ids, parent links, kinds, attributes, error status) and propagate through
+the W3C ``traceparent`` header: an incoming header continues the caller's
+trace, and ``inject_traceparent`` adds one to outgoing provider requests.
+The current span is held in a ContextVar, so nesting follows the call stack.
+
+Exporters (TRACING_EXPORTER)
+----------------------------
+  none (default)
+      tracing is off; ``span()`` yields a shared no-op span.
+  log
+      one JSON line per finished span, appended to TRACING_LOG_PATH or, when
+      that is empty, logged at INFO on the ``app.tracing`` logger.
+  otlp
+      spans are queued and POSTed in batches as OTLP/HTTP JSON to
+      TRACING_OTLP_ENDPOINT (default: a local collector on port 4318) by a
+      background thread; a full queue drops spans instead of blocking.
+
+Only a TRACING_SAMPLE_RATIO fraction of new traces is recorded; the decision
+is taken once per trace and inherited by every child span.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+import requests
+from flask import current_app, g, has_app_context, request
+
+log = logging.getLogger(__name__)
+span_log = logging.getLogger("app.tracing")
+
+EXPORTER_NONE = "none"
+EXPORTER_LOG = "log"
+EXPORTER_OTLP = "otlp"
+EXPORTERS = (EXPORTER_NONE, EXPORTER_LOG, EXPORTER_OTLP)
+
+# OpenTelemetry span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+DEFAULT_OTLP_ENDPOINT = "http://localhost:4318/v1/traces"
+DEFAULT_SERVICE_NAME = "tutor-bot-backend"
+
+_OTLP_BATCH_SIZE = 256
+_OTLP_QUEUE_SIZE = 8192
+_OTLP_INTERVAL_SEC = 2.0
+
+
+class Span:
+    """A recording span; use ``span()`` rather than constructing one."""
+
+    recording = True
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        kind: int,
+        trace_id: str,
+        parent_span_id: str | None,
+        exporter: "_Exporter",
+        attributes: dict[str, Any],
+    ):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = _random_hex(16)
+        self.parent_span_id = parent_span_id
+        self.attributes = attributes
+        self.error: str | None = None
+        self.start_ns = time.time_ns()
+        self._exporter = exporter
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: dict[str, Any]) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self) -> None:
+        self._exporter.export(self, time.time_ns())
+
+
+class _NonRecordingSpan:
+    """Placeholder for unsampled traces (children stay unsampled) and no-op use."""
+
+    recording = False
+    span_id = None
+
+    def __init__(self, trace_id: str | None = None):
+        self.trace_id = trace_id
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: dict[str, Any]) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+_NOOP_SPAN = _NonRecordingSpan()
+_current: contextvars.ContextVar[Span | _NonRecordingSpan | None] = contextvars.ContextVar(
+    "tracing_current_span", default=None
+)
+
+
+@contextmanager
+def span(name: str, kind: int = KIND_INTERNAL, **attributes: Any) -> Iterator[Span | _NonRecordingSpan]:
+    """
+    Run the block inside a child of the current span (or a new trace).
+    Exceptions are recorded as the span's error status and re-raised.
+    """
+    new_span = _start_span(name, kind, attributes)
+    if new_span is _NOOP_SPAN:
+        yield new_span
+        return
+
+    token = _current.set(new_span)
+    try:
+        yield new_span
+    except BaseException as exc:
+        new_span.record_exception(exc)
+        raise
+    finally:
+        _current.reset(token)
+        new_span.end()
+
+
+def current_span() -> Span | _NonRecordingSpan:
+    return _current.get() or _NOOP_SPAN
+
+
+def inject_traceparent(headers: dict | None = None) -> dict:
+    """Return *headers* plus a W3C ``traceparent`` for the current span, if recording."""
+    headers = dict(headers or {})
+    active = _current.get()
+    if active is not None and active.recording:
+        headers["traceparent"] = f"00-{active.trace_id}-{active.span_id}-01"
+    return headers
+
+
+def init_tracing(app) -> None:
+    """Open a SERVER span per request; no-op per request while TRACING_EXPORTER=none."""
+
+    @app.before_request
+    def _start_request_span():
+        if _get_exporter() is None:
+            return None
+        parent = _parse_traceparent(request.headers.get("traceparent", ""))
+        request_span = _start_span(
+            f"{request.method} {request.url_rule.rule if request.url_rule else request.path}",
+            KIND_SERVER,
+            {"http.request.method": request.method, "url.path": request.path},
+            parent=parent,
+        )
+        g.tracing_span = request_span
+        g.tracing_token = _current.set(request_span)
+        return None
+
+    @app.after_request
+    def _tag_request_span(response):
+        request_span = g.get("tracing_span")
+        if request_span is not None:
+            request_span.set_attribute("http.response.status_code", response.status_code)
+        return response
+
+    @app.teardown_request
+    def _end_request_span(exc):
+        request_span = g.pop("tracing_span", None)
+        token = g.pop("tracing_token", None)
+        if request_span is None:
+            return
+        if exc is not None:
+            request_span.record_exception(exc)
+        if token is not None:
+            try:
+                _current.reset(token)
+            except ValueError:
+                # Torn down from another context (streamed response).
+                pass
+        request_span.end()
+
+
+def flush_tracing() -> None:
+    """Export everything queued so far (tests, shutdown)."""
+    with _exporter_lock:
+        exporters = list(_exporters.values())
+    for exporter in exporters:
+        exporter.flush()
+
+
+def _start_span(
+    name: str,
+    kind: int,
+    attributes: dict[str, Any],
+    parent: tuple[str, str | None, bool] | None = None,
+) -> Span | _NonRecordingSpan:
+    active = _current.get()
+    if parent is None and active is not None:
+        if not active.recording:
+            return active
+        return Span(
+            name=name,
+            kind=kind,
+            trace_id=active.trace_id,
+            parent_span_id=active.span_id,
+            exporter=active._exporter,
+            attributes=dict(attributes),
+        )
+
+    exporter = _get_exporter()
+    if exporter is None:
+        return _NOOP_SPAN
+    if parent is not None:
+        trace_id, parent_span_id, sampled = parent
+    else:
+        trace_id, parent_span_id = _random_hex(32), None
+        sampled = random.random() < _sample_ratio()
+    if not sampled:
+        return _NonRecordingSpan(trace_id)
+    return Span(
+        name=name,
+        kind=kind,
+        trace_id=trace_id,
+        parent_span_id=parent_span_id,
+        exporter=exporter,
+        attributes=dict(attributes),
+    )
+
+
+def _parse_traceparent(header: str) -> tuple[str, str, bool] | None:
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if set(parts[1]) == {"0"} or set(parts[2]) == {"0"}:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+# ── Exporters ─────────────────────────────────────────────────────────────────
+
+class _Exporter(ABC):
+    def __init__(self, service_name: str):
+        self.service_name = service_name
+
+    @abstractmethod
+    def export(self, finished: Span, end_ns: int) -> None:
+        """Hand one finished span to the backend; must not raise."""
+
+    def flush(self) -> None:
+        pass
+
+
+class _LogExporter(_Exporter):
+    def __init__(self, service_name: str, path: str):
+        super().__init__(service_name)
+        self._path = path
+        self._lock = threading.Lock()
+
+    def export(self, finished: Span, end_ns: int) -> None:
+        line = json.dumps(
+            {
+                "service": self.service_name,
+                "trace_id": finished.trace_id,
+                "span_id": finished.span_id,
+                "parent_span_id": finished.parent_span_id,
+                "name": finished.name,
+                "kind": finished.kind,
+                "start_unix_nano": finished.start_ns,
+                "duration_ms": round((end_ns - finished.start_ns) / 1e6, 3),
+                "attributes": finished.attributes,
+                "error": finished.error,
+            },
+            default=str,
+            separators=(",", ":"),
+        )
+        if not self._path:
+            span_log.info(line)
+            return
+        with self._lock:
+            with open(self._path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+
+
+class _OTLPExporter(_Exporter):
+    def __init__(self, service_name: str, endpoint: str):
+        super().__init__(service_name)
+        self._endpoint = endpoint
+        self._queue: queue.Queue = queue.Queue(maxsize=_OTLP_QUEUE_SIZE)
+        self._send_lock = threading.Lock()
+        self._dropped = 0
+        self._thread = threading.Thread(target=self._run, name="otlp-span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, finished: Span, end_ns: int) -> None:
+        try:
+            self._queue.put_nowait(_otlp_span(finished, end_ns))
+        except queue.Full:
+            self._dropped += 1
+
+    def flush(self) -> None:
+        self._send_pending()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(_OTLP_INTERVAL_SEC)
+            self._send_pending()
+
+    def _send_pending(self) -> None:
+        with self._send_lock:
+            while True:
+                batch = []
+                while len(batch) < _OTLP_BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    break
+                self._post(batch)
+            if self._dropped:
+                log.warning("tracing: dropped %d spans, export queue full", self._dropped)
+                self._dropped = 0
+
+    def _post(self, spans: list[dict]) -> None:
+        body = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                    "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": spans}],
+                }
+            ]
+        }
+        try:
+            response = requests.post(self._endpoint, json=body, timeout=5)
+            if response.status_code >= 400:
+                log.warning("tracing: collector returned %s for %d spans", response.status_code, len(spans))
+        except requests.exceptions.RequestException as exc:
+            log.warning("tracing: could not export %d spans: %s", len(spans), exc)
+
+
+def _otlp_span(finished: Span, end_ns: int) -> dict:
+    payload = {
+        "traceId": finished.trace_id,
+        "spanId": finished.span_id,
+        "name": finished.name,
+        "kind": finished.kind,
+        "startTimeUnixNano": str(finished.start_ns),
+        "endTimeUnixNano": str(end_ns),
+        "attributes": _otlp_attributes(finished.attributes),
+        "status": {"code": 2, "message": finished.error} if finished.error else {"code": 1},
+    }
+    if finished.parent_span_id:
+        payload["parentSpanId"] = finished.parent_span_id
+    return payload
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict]:
+    encoded = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        encoded.append({"key": key, "value": typed})
+    return encoded
+
+
+_exporter_lock = threading.Lock()
+_exporters: dict[tuple, _Exporter] = {}
+
+
+def _get_exporter() -> _Exporter | None:
+    if not has_app_context():
+        return None
+    name = str(current_app.config.get("TRACING_EXPORTER") or "").strip().lower()
+    if name not in EXPORTERS or name == EXPORTER_NONE:
+        return None
+
+    service_name = str(current_app.config.get("TRACING_SERVICE_NAME") or DEFAULT_SERVICE_NAME)
+    if name == EXPORTER_LOG:
+        signature = (name, service_name, str(current_app.config.get("TRACING_LOG_PATH") or "").strip())
+    else:
+        endpoint = str(current_app.config.get("TRACING_OTLP_ENDPOINT") or "").strip()
+        signature = (name, service_name, endpoint or DEFAULT_OTLP_ENDPOINT)
+
+    with _exporter_lock:
+        exporter = _exporters.get(signature)
+        if exporter is None:
+            if name == EXPORTER_LOG:
+                exporter = _LogExporter(service_name, signature[2])
+            else:
+                exporter = _OTLPExporter(service_name, signature[2])
+            _exporters[signature] = exporter
+    return exporter
+
+
+def _sample_ratio() -> float:
+    try:
+        return float(current_app.config.get("TRACING_SAMPLE_RATIO", 1.0))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def _random_hex(length: int) -> str:
+    return os.urandom(length // 2).hex()
+
+
+atexit.register(flush_tracing)
@@ -0,0 +1,153 @@
+"""
+Compiled quiz answer keys.
+
+Public API
+----------
+    AnswerKey                                      (frozen, per quiz)
+    compile_answer_key(quiz_id, questions) -> AnswerKey
+    get_answer_key(quiz_id, questions) -> AnswerKey   (cached)
+    peek_answer_key(quiz_id, question_ids) -> AnswerKey | None
+
+An AnswerKey holds everything grading needs as position-aligned tuples: the
+options of every question, a lowercase text -> option index lookup, the
+correct option index, and the marks.  Grading then resolves each submitted
+answer to an option index and compares it with ``correct_index`` at the same
+position, without touching ``correct_json`` or the ORM rows again.
+
+Compiled keys are kept in a per-process LRU (QUIZ_ANSWER_KEY_CACHE_SIZE
+quizzes).  An entry is only reused while the quiz still has the same question
+ids in the same order.  Questions are never edited in place and quizzes are
+only deleted with their user, so entries are never invalidated explicitly.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from flask import current_app
+
+from app.db.models.quiz_question import QuizQuestion
+
+DEFAULT_CACHE_SIZE = 512
+
+# correct_index value for questions whose key is stored as text only.
+NO_INDEX = -1
+
+
+@dataclass(frozen=True, slots=True)
+class AnswerKey:
+    quiz_id: str
+    question_ids: tuple[str, ...]
+    positions: dict[str, int]
+    types: tuple[str, ...]
+    options: tuple[tuple[str, ...], ...]
+    option_lookup: tuple[dict[str, int], ...]
+    correct_index: tuple[int, ...]
+    correct_text: tuple[str | None, ...]
+    marks: tuple[float, ...]
+    total_marks: float
+
+    def __len__(self) -> int:
+        return len(self.question_ids)
+
+
+_lock = threading.Lock()
+_cache: OrderedDict[str, AnswerKey] = OrderedDict()
+
+
+def compile_answer_key(quiz_id: str, questions: list[QuizQuestion]) -> AnswerKey:
+    types: list[str] = []
+    options: list[tuple[str, ...]] = []
+    lookups: list[dict[str, int]] = []
+    correct_index: list[int] = []
+    correct_text: list[str | None] = []
+    marks: list[float] = []
+
+    for question in questions:
+        raw_options = question.options_json
+        question_options = (
+            tuple(str(option) for option in raw_options)
+            if isinstance(raw_options, list)
+            else ()
+        )
+        lookup: dict[str, int] = {}
+        for index, option in enumerate(question_options):
+            lookup.setdefault(normalize_text(option) or "", index)
+
+        index, text = _compile_correct(question.correct_json)
+        types.append(question.type)
+        options.append(question_options)
+        lookups.append(lookup)
+        correct_index.append(index)
+        correct_text.append(text)
+        marks.append(round(float(question.marks), 2))
+
+    question_ids = tuple(question.id for question in questions)
+    return AnswerKey(
+        quiz_id=quiz_id,
+        question_ids=question_ids,
+        positions={question_id: position for position, question_id in enumerate(question_ids)},
+        types=tuple(types),
+        options=tuple(options),
+        option_lookup=tuple(lookups),
+        correct_index=tuple(correct_index),
+        correct_text=tuple(correct_text),
+        marks=tuple(marks),
+        total_marks=round(sum(float(question.marks) for question in questions), 2),
+    )
+
+
+def get_answer_key(quiz_id: str, questions: list[QuizQuestion]) -> AnswerKey:
+    question_ids = tuple(question.id for question in questions)
+    with _lock:
+        key = _cache.get(quiz_id)
+        if key is not None and key.question_ids == question_ids:
+            _cache.move_to_end(quiz_id)
+            return key
+
+    key = compile_answer_key(quiz_id, questions)
+    with _lock:
+        _cache[quiz_id] = key
+        _cache.move_to_end(quiz_id)
+        while len(_cache) > _cache_size():
+            _cache.popitem(last=False)
+    return key
+
+
+def peek_answer_key(quiz_id: str, question_ids: tuple[str, ...]) -> AnswerKey | None:
+    """Return the cached key when it matches *question_ids*, without compiling."""
+    with _lock:
+        key = _cache.get(quiz_id)
+        if key is None or key.question_ids != tuple(question_ids):
+            return None
+        _cache.move_to_end(quiz_id)
+        return key
+
+
+def normalize_text(value: Any) -> str | None:
+    if value is None:
+        return None
+    text = str(value).strip().lower()
+    return text or None
+
+
+def _compile_correct(correct_json: Any) -> tuple[int, str | None]:
+    if not isinstance(correct_json, dict):
+        return NO_INDEX, None
+    raw_index = correct_json.get("option_index")
+    if raw_index is not None:
+        try:
+            return int(raw_index), None
+        except (TypeError, ValueError):
+            pass
+    return NO_INDEX, normalize_text(correct_json.get("option_text"))
+
+
+def _cache_size() -> int:
+    try:
+        return max(1, int(current_app.config.get("QUIZ_ANSWER_KEY_CACHE_SIZE", DEFAULT_CACHE_SIZE)))
+    except (TypeError, ValueError, RuntimeError):
+        return DEFAULT_CACHE_SIZE
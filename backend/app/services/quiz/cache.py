@@ -0,0 +1,202 @@
+"""
+Quiz generation cache.
+
+Public API
+----------
+    build_cache_key(user_id, spec, model) -> tuple[str, list] | None
+    lookup_cached_quiz(user_id, cache_key) -> dict | None
+    store_cached_quiz(user_id, cache_key, corpus, payload, sources, model_used) -> None
+    invalidate_document(user_id, document_id) -> int
+    shuffle_options(payload, rng=None) -> dict
+
+The key is a sha256 of the normalized QuizRequestSpec (title and the
+``fresh_questions`` flag excluded), the ``(document_id, current_ingestion_id)``
+pairs of the documents the quiz may draw from, and the generation model.
+Reingesting or deleting a document changes the pairs, so a stale entry can
+never be served; ``invalidate_document`` additionally removes those entries
+eagerly.  Entries older than QUIZ_CACHE_TTL_SEC are treated as misses.
+
+Lookups and stores only modify the caller's session; the caller commits
+together with the quiz rows.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+
+from app.db.models.document import Document
+from app.db.models.quiz_generation_cache import QuizGenerationCache
+from app.extensions import db
+from app.services.observability.metrics import CACHE_REQUESTS
+from app.services.quiz.spec_parser import QuizRequestSpec
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TTL_SEC = 7 * 24 * 3600
+
+# Spec fields that do not change the generated questions.
+_KEY_EXCLUDED_FIELDS = ("title", "fresh_questions")
+
+
+def build_cache_key(
+    user_id: str,
+    spec: QuizRequestSpec,
+    model: str,
+) -> tuple[str, list[list[str]]] | None:
+    query = Document.query.with_entities(Document.id, Document.current_ingestion_id).filter(
+        Document.user_id == user_id,
+        Document.is_deleted.is_(False),
+        Document.current_ingestion_id.isnot(None),
+    )
+    if spec.document_ids:
+        query = query.filter(Document.id.in_(spec.document_ids))
+    corpus = sorted([document_id, ingestion_id] for document_id, ingestion_id in query.all())
+    if not corpus:
+        return None
+
+    key_material = {
+        "spec": _normalized_spec(spec),
+        "corpus": corpus,
+        "model": model,
+    }
+    encoded = json.dumps(key_material, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest(), corpus
+
+
+def lookup_cached_quiz(user_id: str, cache_key: str) -> dict[str, Any] | None:
+    entry = QuizGenerationCache.query.filter_by(user_id=user_id, cache_key=cache_key).first()
+    if entry is None:
+        CACHE_REQUESTS.inc(cache="quiz", result="miss")
+        return None
+
+    created_at = entry.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    if created_at < datetime.now(timezone.utc) - timedelta(seconds=_ttl_sec()):
+        db.session.delete(entry)
+        CACHE_REQUESTS.inc(cache="quiz", result="miss")
+        return None
+
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_used_at = datetime.now(timezone.utc)
+    CACHE_REQUESTS.inc(cache="quiz", result="hit")
+    return {
+        "payload": entry.payload_json,
+        "sources": entry.sources_json,
+        "model_used": entry.model_used,
+    }
+
+
+def store_cached_quiz(
+    *,
+    user_id: str,
+    cache_key: str,
+    corpus: list[list[str]],
+    payload: dict[str, Any],
+    sources: list[dict[str, Any]],
+    model_used: str | None,
+) -> None:
+    cited_chunk_ids = {
+        chunk_id
+        for question in payload["questions"]
+        for chunk_id in question["citation_chunk_ids"]
+    }
+    cited_sources = [
+        {
+            "chunk_id": int(source["chunk_id"]),
+            "document_id": source["document_id"],
+            "score": source.get("score"),
+            "snippet": source.get("snippet"),
+        }
+        for source in sources
+        if int(source["chunk_id"]) in cited_chunk_ids
+    ]
+
+    entry = QuizGenerationCache.query.filter_by(user_id=user_id, cache_key=cache_key).first()
+    if entry is None:
+        entry = QuizGenerationCache(user_id=user_id, cache_key=cache_key, hit_count=0)
+    entry.corpus_json = corpus
+    entry.payload_json = payload
+    entry.sources_json = cited_sources
+    entry.model_used = model_used
+    entry.created_at = datetime.now(timezone.utc)
+
+    # A concurrent generation may store the same key first; losing that race
+    # must not fail the quiz, so the insert runs in a savepoint.
+    try:
+        with db.session.begin_nested():
+            db.session.add(entry)
+    except IntegrityError:
+        log.info("quiz cache entry for user=%s already stored concurrently", user_id)
+
+
+def invalidate_document(user_id: str, document_id: str) -> int:
+    """Delete cache entries generated from *document_id*; the caller commits."""
+    entries = (
+        QuizGenerationCache.query
+        .with_entities(QuizGenerationCache.id, QuizGenerationCache.corpus_json)
+        .filter(QuizGenerationCache.user_id == user_id)
+        .all()
+    )
+    stale_ids = [
+        entry_id
+        for entry_id, corpus in entries
+        if any(pair[0] == document_id for pair in corpus or [])
+    ]
+    if stale_ids:
+        db.session.execute(
+            delete(QuizGenerationCache).where(QuizGenerationCache.id.in_(stale_ids))
+        )
+    return len(stale_ids)
+
+
+def shuffle_options(payload: dict[str, Any], rng: random.Random | None = None) -> dict[str, Any]:
+    """Return a copy of *payload* with multiple-choice options in a new order."""
+    rng = rng or random.Random()
+    questions: list[dict[str, Any]] = []
+    for question in payload["questions"]:
+        question = dict(question)
+        options = question.get("options")
+        correct = question.get("correct_json") or {}
+        if question.get("type") == "mcq_single" and options and "option_index" in correct:
+            order = list(range(len(options)))
+            rng.shuffle(order)
+            new_index = order.index(correct["option_index"])
+            question["options"] = [options[index] for index in order]
+            question["correct_json"] = {
+                **correct,
+                "option_index": new_index,
+                "option_text": question["options"][new_index],
+            }
+        questions.append(question)
+    return {**payload, "questions": questions}
+
+
+def _normalized_spec(spec: QuizRequestSpec) -> dict[str, Any]:
+    normalized = {
+        key: value
+        for key, value in spec.to_dict().items()
+        if key not in _KEY_EXCLUDED_FIELDS
+    }
+    for key in ("topic", "instructions", "retrieval_query"):
+        if isinstance(normalized.get(key), str):
+            normalized[key] = " ".join(normalized[key].lower().split())
+    normalized["question_types"] = sorted(normalized.get("question_types") or [])
+    normalized["document_ids"] = sorted(normalized.get("document_ids") or [])
+    return normalized
+
+
+def _ttl_sec() -> int:
+    try:
+        return int(current_app.config.get("QUIZ_CACHE_TTL_SEC", DEFAULT_TTL_SEC))
+    except (TypeError, ValueError):
+        return DEFAULT_TTL_SEC
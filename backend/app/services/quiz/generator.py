@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import json
 import logging
-from typing import Any
+from dataclasses import replace
+from typing import Any, Callable
+
+from flask import current_app
 
 from app.db.models.document import Document
 from app.db.models.quiz import Quiz
@@ -9,13 +13,27 @@ from app.db.models.quiz_question import QuizQuestion
 from app.db.models.quiz_question_source import QuizQuestionSource
 from app.extensions import db
 from app.services.analytics.events import EVENT_QUIZ_CREATED, record_event
+from app.services.cache.response_cache import bump_data_version
+from app.services.jobs.executor import submit
+from app.services.observability.metrics import QUIZ_REPAIRS, QUIZ_VALIDATION_ATTEMPTS
+from app.services.quiz.cache import (
+    build_cache_key,
+    lookup_cached_quiz,
+    shuffle_options,
+    store_cached_quiz,
+)
 from app.services.quiz.spec_parser import QuizRequestSpec
 from app.services.quiz.validator import (
     QuizValidationError,
+    build_source_map,
     extract_quiz_json,
+    normalize_question,
     validate_quiz_payload,
 )
+from app.services.quiz.stream_parser import QuizStreamParser
+from app.services.rag.context_packer import pack_sources, reply_token_reserve, source_token_budget
 from app.services.rag.retrieval import retrieve_chunks, retrieve_chunks_diversified
+from app.services.rag.tokens import estimate_tokens
 from app.services.wrapper.client import (
     WrapperError,
     get_client,
@@ -27,6 +45,15 @@ log = logging.getLogger(__name__)
 
 MAX_VALIDATION_ATTEMPTS = 3
 MAX_SOURCE_DOCUMENT_COVERAGE = 3
+DEFAULT_STREAM_MAX_INVALID = 2
+DEFAULT_GENERATION_SHARDS = 1
+DEFAULT_SHARD_MIN_QUESTIONS = 5
+SHARD_POOL_NAME = "quiz_generation_shards"
+
+# Reply budget of a generation call (its max_tokens) plus the instructions
+# around the source block; the sources get what the context window has left.
+GENERATION_MAX_TOKENS = 4000
+_PROMPT_INSTRUCTION_TOKENS = 600
 
 
 class QuizGenerationError(RuntimeError):
@@ -37,9 +64,46 @@ class QuizGenerationError(RuntimeError):
         self.status_code = status_code
 
 
-def generate_and_store_quiz(user_id: str, spec: QuizRequestSpec) -> Quiz:
-    sources = _retrieve_context_sources(user_id=user_id, spec=spec)
-    generated_payload, model_used = _generate_valid_payload(spec=spec, sources=sources)
+# progress(stage, details) is called as generation moves through its stages so
+# background jobs can persist intermediate state.  It must not touch pending
+# quiz rows: it runs before any of them are added to the session.
+ProgressCallback = Callable[[str, dict[str, Any]], None]
+
+
+def generate_and_store_quiz(
+    user_id: str,
+    spec: QuizRequestSpec,
+    progress: ProgressCallback | None = None,
+) -> Quiz:
+    progress = progress or _ignore_progress
+    cache_key = None
+    corpus: list[list[str]] = []
+    cached = None
+    if current_app.config.get("QUIZ_CACHE_ENABLED"):
+        key = build_cache_key(user_id=user_id, spec=spec, model=get_generation_model())
+        if key is not None:
+            cache_key, corpus = key
+            if not spec.fresh_questions:
+                cached = lookup_cached_quiz(user_id=user_id, cache_key=cache_key)
+
+    if cached is not None:
+        progress("cached", {"cache_hit": True})
+        # The title is not part of the cache key; the stored one belongs to
+        # whichever request filled the entry.
+        generated_payload = {**cached["payload"], "title": spec.title}
+        if current_app.config.get("QUIZ_CACHE_SHUFFLE_OPTIONS"):
+            generated_payload = shuffle_options(generated_payload)
+        sources = cached["sources"]
+        model_used = cached["model_used"]
+    else:
+        progress("retrieving", {})
+        sources = _retrieve_context_sources(user_id=user_id, spec=spec)
+        generated_payload, model_used = _generate_valid_payload(
+            spec=spec,
+            sources=sources,
+            progress=progress,
+        )
+    progress("storing", {"question_count": len(generated_payload["questions"])})
 
     quiz = Quiz(
         user_id=user_id,
@@ -82,6 +146,16 @@ def generate_and_store_quiz(user_id: str, spec: QuizRequestSpec) -> Quiz:
                     )
                 )
 
+        if cache_key is not None and cached is None:
+            store_cached_quiz(
+                user_id=user_id,
+                cache_key=cache_key,
+                corpus=corpus,
+                payload=generated_payload,
+                sources=sources,
+                model_used=model_used,
+            )
+
         record_event(
             user_id=user_id,
             event_type=EVENT_QUIZ_CREATED,
@@ -95,6 +169,7 @@ def generate_and_store_quiz(user_id: str, spec: QuizRequestSpec) -> Quiz:
                 "document_ids": spec.document_ids or [],
             },
         )
+        bump_data_version(user_id)
         db.session.commit()
         return quiz
     except Exception:
@@ -152,15 +227,41 @@ def _retrieve_context_sources(user_id: str, spec: QuizRequestSpec) -> list[dict[
 def _generate_valid_payload(
     spec: QuizRequestSpec,
     sources: list[dict[str, Any]],
+    progress: ProgressCallback | None = None,
 ) -> tuple[dict[str, Any], str]:
+    progress = progress or _ignore_progress
     minimum_document_coverage = _document_coverage_target(
         sources=sources,
         question_count=spec.question_count,
     )
-    raw_response, model_used = _chat_with_fallback(_build_generation_messages(spec, sources))
-    raw_for_validation = raw_response
+    progress(
+        "generating",
+        {
+            "attempt": 1,
+            "max_attempts": MAX_VALIDATION_ATTEMPTS,
+            "source_count": len(sources),
+        },
+    )
+    shard_plan = _plan_shards(spec, sources)
+    if shard_plan:
+        progress("generating", {"shards": len(shard_plan)})
+        raw_for_validation, model_used = _generate_sharded(shard_plan)
+    elif current_app.config.get("QUIZ_GENERATION_STREAMING"):
+        raw_for_validation, model_used = _stream_generation(
+            messages=_build_generation_messages(spec, sources),
+            spec=spec,
+            sources=sources,
+            progress=progress,
+        )
+    else:
+        raw_for_validation, model_used = _chat_with_fallback(
+            _build_generation_messages(spec, sources)
+        )
 
+    repair_mode = None
     for attempt in range(1, MAX_VALIDATION_ATTEMPTS + 1):
+        progress("validating", {"attempt": attempt})
+        payload = None
         try:
             payload = extract_quiz_json(raw_for_validation)
             validated = validate_quiz_payload(
@@ -169,27 +270,383 @@ def _generate_valid_payload(
                 available_sources=sources,
                 minimum_document_coverage=minimum_document_coverage,
             )
+            _record_validation(attempt, "valid", repair_mode)
             return validated, model_used
         except QuizValidationError as exc:
             if attempt >= MAX_VALIDATION_ATTEMPTS:
+                _record_validation(attempt, "failed", repair_mode)
                 raise QuizGenerationError(
                     "Quiz generation failed validation after multiple attempts.",
                     status_code=502,
                 ) from exc
 
-            raw_for_validation, model_used = _chat_with_fallback(
-                _build_repair_messages(
-                    spec=spec,
-                    sources=sources,
-                    previous_response=raw_for_validation,
-                    errors=exc.errors,
+            if repair_mode is not None:
+                QUIZ_REPAIRS.inc(mode=repair_mode, outcome="invalid")
+            kept_questions = _partial_repair_keep(payload=payload, exc=exc, spec=spec)
+            repair_mode = "full" if kept_questions is None else "partial"
+            if kept_questions is None:
+                progress(
+                    "repairing",
+                    {"attempt": attempt + 1, "repair_mode": "full", "errors": exc.errors},
+                )
+                raw_for_validation, model_used = _chat_with_fallback(
+                    _build_repair_messages(
+                        spec=spec,
+                        sources=sources,
+                        previous_response=_as_text(raw_for_validation),
+                        errors=exc.errors,
+                    )
                 )
+                continue
+
+            replacement_count = spec.question_count - len(kept_questions)
+            progress(
+                "repairing",
+                {
+                    "attempt": attempt + 1,
+                    "repair_mode": "partial",
+                    "replacing": replacement_count,
+                    "errors": exc.errors,
+                },
             )
+            replacements: list[Any] = []
+            if replacement_count > 0:
+                raw_replacements, model_used = _chat_with_fallback(
+                    _build_replacement_messages(
+                        spec=spec,
+                        sources=sources,
+                        kept_questions=kept_questions,
+                        replacement_count=replacement_count,
+                        errors=[error for error in exc.errors if error.startswith("questions[")],
+                    ),
+                    max_tokens=_replacement_max_tokens(replacement_count),
+                )
+                replacements = _parse_replacement_questions(raw_replacements)
+            raw_for_validation = {
+                "title": payload.get("title"),
+                "instructions": payload.get("instructions"),
+                "questions": _merge_replacements(
+                    kept_questions=kept_questions,
+                    replacements=replacements[:replacement_count],
+                    failed_indices=exc.failed_indices,
+                ),
+            }
 
     raise QuizGenerationError("Quiz generation did not complete.", status_code=502)
 
 
-def _chat_with_fallback(messages: list[dict[str, str]]) -> tuple[str, str]:
+def _record_validation(attempt: int, outcome: str, repair_mode: str | None) -> None:
+    """Count the attempts used and the outcome of the last repair, if any."""
+    QUIZ_VALIDATION_ATTEMPTS.observe(attempt, outcome=outcome)
+    if repair_mode is not None:
+        QUIZ_REPAIRS.inc(mode=repair_mode, outcome="valid" if outcome == "valid" else "invalid")
+
+
+def _plan_shards(
+    spec: QuizRequestSpec,
+    sources: list[dict[str, Any]],
+) -> list[tuple[QuizRequestSpec, list[dict[str, Any]]]]:
+    """
+    Split a large quiz into QUIZ_GENERATION_SHARDS concurrent generations.
+
+    Returns an empty list when the quiz is too small to shard.  Every shard
+    gets its own slice of the question count and marks and a disjoint subset
+    of the sources, so shards cannot cite the same chunks and, when several
+    documents are available, each shard covers different documents.
+    """
+    max_shards = _config_int("QUIZ_GENERATION_SHARDS", DEFAULT_GENERATION_SHARDS)
+    min_questions = max(1, _config_int("QUIZ_SHARD_MIN_QUESTIONS", DEFAULT_SHARD_MIN_QUESTIONS))
+    shard_count = min(max_shards, spec.question_count // min_questions, len(sources))
+    if shard_count < 2:
+        return []
+
+    source_groups = _split_sources(sources, shard_count)
+    base_count, extra = divmod(spec.question_count, shard_count)
+    plan: list[tuple[QuizRequestSpec, list[dict[str, Any]]]] = []
+    for index, shard_sources in enumerate(source_groups):
+        question_count = base_count + (1 if index < extra else 0)
+        shard_spec = replace(
+            spec,
+            question_count=question_count,
+            total_marks=round(spec.total_marks * question_count / spec.question_count, 2),
+        )
+        plan.append((shard_spec, shard_sources))
+    return plan
+
+
+def _split_sources(
+    sources: list[dict[str, Any]],
+    shard_count: int,
+) -> list[list[dict[str, Any]]]:
+    by_document: dict[Any, list[dict[str, Any]]] = {}
+    for source in sources:
+        by_document.setdefault(source.get("document_id"), []).append(source)
+
+    groups: list[list[dict[str, Any]]] = [[] for _ in range(shard_count)]
+    if len(by_document) >= shard_count:
+        # Whole documents go to the shard with the fewest sources so far.
+        for document_sources in by_document.values():
+            smallest = min(groups, key=len)
+            smallest.extend(document_sources)
+    else:
+        for index, source in enumerate(sources):
+            groups[index % shard_count].append(source)
+    return groups
+
+
+def _generate_sharded(
+    plan: list[tuple[QuizRequestSpec, list[dict[str, Any]]]],
+) -> tuple[dict[str, Any], str]:
+    """
+    Run the shards concurrently and merge them into one raw quiz payload.
+
+    Questions are concatenated in shard order with duplicates (same question
+    text) dropped; the validation loop re-indexes them and repairs any
+    shortfall from failed shards or duplicates.
+    """
+    max_workers = _config_int("QUIZ_GENERATION_SHARDS", DEFAULT_GENERATION_SHARDS)
+    futures = [
+        submit(
+            SHARD_POOL_NAME,
+            _generate_shard,
+            shard_spec,
+            shard_sources,
+            max_workers=max_workers,
+        )
+        for shard_spec, shard_sources in plan
+    ]
+
+    title = None
+    instructions = None
+    model_used = None
+    merged: list[Any] = []
+    seen_texts: set[str] = set()
+    last_exc: QuizGenerationError | None = None
+    for index, future in enumerate(futures):
+        try:
+            raw_response, model = future.result()
+        except QuizGenerationError as exc:
+            log.warning("quiz shard %d failed: %s", index, exc)
+            last_exc = exc
+            continue
+
+        model_used = model_used or model
+        try:
+            payload = extract_quiz_json(raw_response)
+        except QuizValidationError:
+            log.warning("quiz shard %d returned unreadable JSON", index)
+            continue
+        questions = payload.get("questions") if isinstance(payload, dict) else payload
+        if isinstance(payload, dict):
+            title = title or payload.get("title")
+            instructions = instructions or payload.get("instructions")
+        if not isinstance(questions, list):
+            continue
+        for question in questions:
+            key = _question_dedup_key(question)
+            if key and key in seen_texts:
+                continue
+            if key:
+                seen_texts.add(key)
+            merged.append(question)
+
+    if model_used is None:
+        raise last_exc or QuizGenerationError(
+            "AI service unavailable during quiz generation.",
+            status_code=503,
+        )
+    return {"title": title, "instructions": instructions, "questions": merged}, model_used
+
+
+def _generate_shard(
+    shard_spec: QuizRequestSpec,
+    shard_sources: list[dict[str, Any]],
+) -> tuple[str, str]:
+    return _chat_with_fallback(_build_generation_messages(shard_spec, shard_sources))
+
+
+def _question_dedup_key(question: Any) -> str:
+    if not isinstance(question, dict):
+        return ""
+    text = question.get("question_text") or question.get("prompt") or ""
+    return " ".join(str(text).lower().split())
+
+
+def _config_int(key: str, default: int) -> int:
+    try:
+        return int(current_app.config.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _stream_generation(
+    *,
+    messages: list[dict[str, str]],
+    spec: QuizRequestSpec,
+    sources: list[dict[str, Any]],
+    progress: ProgressCallback,
+) -> tuple[Any, str]:
+    """
+    Generate the quiz over a token stream and validate questions as they close.
+
+    Each completed question is normalized immediately and a preview (no
+    answer, no explanation) is reported through ``progress`` so a polling
+    client can show it before the quiz is stored.  Generation is aborted once
+    QUIZ_STREAM_MAX_INVALID questions have failed; the questions received so
+    far are then returned as a payload dict and the validation loop repairs
+    only what is missing or broken.  A stream that breaks off mid-quiz is
+    salvaged the same way.  If the stream fails before producing anything,
+    the non-streaming call (with its fallback model) is used instead.
+    """
+    model = get_generation_model()
+    source_map = build_source_map(sources)
+    max_invalid = max(
+        1,
+        int(current_app.config.get("QUIZ_STREAM_MAX_INVALID", DEFAULT_STREAM_MAX_INVALID)),
+    )
+    parser = QuizStreamParser()
+    previews: list[dict[str, Any]] = []
+    invalid_count = 0
+    complete = False
+
+    try:
+        stream = get_client().chat_completions_stream(
+            model=model,
+            messages=messages,
+            temperature=0.2,
+            max_tokens=GENERATION_MAX_TOKENS,
+        )
+        try:
+            for delta in stream:
+                for question_raw in parser.feed(delta):
+                    index = len(parser.questions) - 1
+                    errors, normalized = normalize_question(
+                        question_raw=question_raw,
+                        index=index,
+                        spec=spec,
+                        source_map=source_map,
+                    )
+                    if normalized is None:
+                        invalid_count += 1
+                        log.info("streamed quiz question %d is invalid: %s", index, errors)
+                    else:
+                        previews.append(_question_preview(normalized))
+                    progress(
+                        "generating",
+                        {"streamed_questions": list(previews), "streamed_invalid": invalid_count},
+                    )
+                if invalid_count >= max_invalid:
+                    log.warning(
+                        "aborting streamed quiz generation after %d invalid questions",
+                        invalid_count,
+                    )
+                    break
+                if parser.questions_closed:
+                    complete = True
+                    break
+            else:
+                complete = True
+        finally:
+            stream.close()
+    except WrapperError as exc:
+        log.warning("streamed quiz generation failed with model %s: %s", model, exc)
+        if not parser.questions:
+            return _chat_with_fallback(messages)
+
+    if complete and invalid_count < max_invalid:
+        try:
+            return extract_quiz_json(parser.text), model
+        except QuizValidationError:
+            pass
+    if not parser.questions:
+        return parser.text, model
+    return parser.partial_payload(), model
+
+
+def _question_preview(question: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "question_index": question["question_index"],
+        "type": question["type"],
+        "question_text": question["question_text"],
+        "options": question.get("options"),
+    }
+
+
+def _partial_repair_keep(
+    *,
+    payload: Any,
+    exc: QuizValidationError,
+    spec: QuizRequestSpec,
+) -> list[Any] | None:
+    """
+    Return the raw questions worth keeping for a partial repair, or None when
+    the whole quiz has to be regenerated.
+
+    A partial repair is possible when the payload parsed, at least one
+    question validated, and the remaining problems are broken or missing
+    questions.  Surplus valid questions are trimmed to the requested count.
+    Pure coverage failures (every question valid but from too few documents)
+    fall back to a full repair because no single question is at fault.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("questions"), list):
+        return None
+    if not exc.valid_indices:
+        return None
+
+    questions_raw = payload["questions"]
+    kept = [questions_raw[index] for index in exc.valid_indices][: spec.question_count]
+    trimmed = len(questions_raw) > spec.question_count
+    if len(kept) == spec.question_count and not trimmed:
+        return None
+    return kept
+
+
+def _merge_replacements(
+    *,
+    kept_questions: list[Any],
+    replacements: list[Any],
+    failed_indices: list[int],
+) -> list[Any]:
+    """Put replacements back at the positions of the questions they replace."""
+    merged = list(kept_questions)
+    remaining = list(replacements)
+    for slot in sorted(failed_indices):
+        if not remaining:
+            break
+        merged.insert(min(slot, len(merged)), remaining.pop(0))
+    return merged + remaining
+
+
+def _replacement_max_tokens(replacement_count: int) -> int:
+    # A generated question with options, explanation, and citations is ~200
+    # tokens; keep headroom for the JSON wrapper.
+    return min(4000, 300 + 250 * replacement_count)
+
+
+def _parse_replacement_questions(raw_response: str) -> list[Any]:
+    try:
+        parsed = extract_quiz_json(raw_response)
+    except QuizValidationError:
+        return []
+    if isinstance(parsed, dict):
+        parsed = parsed.get("questions")
+    return parsed if isinstance(parsed, list) else []
+
+
+def _as_text(raw_payload: Any) -> str:
+    if isinstance(raw_payload, str):
+        return raw_payload
+    return json.dumps(raw_payload, ensure_ascii=False)
+
+
+def _ignore_progress(stage: str, details: dict[str, Any]) -> None:
+    return None
+
+
+def _chat_with_fallback(
+    messages: list[dict[str, str]],
+    max_tokens: int = GENERATION_MAX_TOKENS,
+) -> tuple[str, str]:
     client = get_client()
     primary_model = get_generation_model()
     model_chain = [primary_model]
@@ -204,7 +661,7 @@ def _chat_with_fallback(messages: list[dict[str, str]]) -> tuple[str, str]:
                 model=model,
                 messages=messages,
                 temperature=0.2,
-                max_tokens=4000,
+                max_tokens=max_tokens,
                 max_retries=None if index == len(model_chain) - 1 else 0,
             )
             content = response["choices"][0]["message"]["content"]
@@ -300,7 +757,10 @@ def _build_repair_messages(
     errors: list[str],
 ) -> list[dict[str, str]]:
     error_block = "\n".join(f"- {error}" for error in errors)
-    source_block = _build_source_block(sources)
+    source_block = _build_source_block(
+        sources,
+        extra_reserved_tokens=estimate_tokens(previous_response) + estimate_tokens(error_block),
+    )
     document_coverage_rule = _build_document_coverage_rule(
         sources=sources,
         question_count=spec.question_count,
@@ -325,16 +785,102 @@ def _build_repair_messages(
     ]
 
 
-def _build_source_block(sources: list[dict[str, Any]]) -> str:
+def _build_replacement_messages(
+    spec: QuizRequestSpec,
+    sources: list[dict[str, Any]],
+    kept_questions: list[Any],
+    replacement_count: int,
+    errors: list[str],
+) -> list[dict[str, str]]:
+    cited_chunk_ids = {
+        _safe_int(citation)
+        for question in kept_questions
+        for citation in (question.get("citations", question.get("citation_chunk_ids")) or [])
+    }
+    covered_document_ids = {
+        source["document_id"]
+        for source in sources
+        if int(source["chunk_id"]) in cited_chunk_ids
+    }
+    # Offer the sources the kept questions do not already use, which both
+    # shrinks the prompt and steers replacements towards uncovered material.
+    fresh_sources = [source for source in sources if int(source["chunk_id"]) not in cited_chunk_ids]
+    prompt_sources = fresh_sources if len(fresh_sources) >= replacement_count else sources
+
+    coverage_target = _document_coverage_target(
+        sources=sources,
+        question_count=spec.question_count,
+    )
+    coverage_rule = "- Cite the most relevant supplied chunks."
+    if len(covered_document_ids) < coverage_target:
+        coverage_rule = (
+            "- Prefer chunks from documents the existing questions do not cite yet, "
+            f"so the full quiz covers at least {coverage_target} documents."
+        )
+
+    existing_block = "\n".join(
+        f"- {str(question.get('question_text') or '').strip()}"
+        for question in kept_questions
+    ) or "- none"
+    error_block = "\n".join(f"- {error}" for error in errors) or "- missing questions"
+    marks_hint = round(spec.total_marks / spec.question_count, 2)
+
+    user_prompt = (
+        f"Write exactly {replacement_count} new quiz question(s).\n"
+        f"Topic: {spec.topic}\n"
+        f"Difficulty: {spec.difficulty}\n"
+        f"Allowed question types: {', '.join(spec.question_types)}\n"
+        f"Marks per question: {marks_hint}\n\n"
+        "Return JSON only, with no markdown fences, in this shape:\n"
+        '{"questions": [{"type": "mcq_single", "question_text": "string", '
+        '"options": ["a", "b", "c", "d"], "correct_answer": {"option_index": 0}, '
+        '"marks": 1, "explanation": "string", "citations": [123]}]}\n\n'
+        "Rules:\n"
+        "- mcq_single needs 4 options; true_false options must be [\"True\", \"False\"].\n"
+        "- Cite 1 to 3 chunk IDs from the sources below.\n"
+        "- Do not repeat the existing questions.\n"
+        f"{coverage_rule}\n\n"
+        f"Problems with the questions being replaced:\n{error_block}\n\n"
+        f"Existing questions:\n{existing_block}\n\n"
+        f"Available sources:\n{_build_source_block(prompt_sources)}"
+    )
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You write replacement questions for a grounded quiz. "
+                "Use only the supplied sources and return valid JSON only."
+            ),
+        },
+        {"role": "user", "content": user_prompt},
+    ]
+
+
+def _safe_int(value: Any) -> int | None:
+    if isinstance(value, dict):
+        value = value.get("chunk_id")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _build_source_block(
+    sources: list[dict[str, Any]],
+    *,
+    extra_reserved_tokens: int = 0,
+) -> str:
+    token_budget = source_token_budget(
+        reserved_tokens=(
+            reply_token_reserve(GENERATION_MAX_TOKENS) + _PROMPT_INSTRUCTION_TOKENS + extra_reserved_tokens
+        ),
+    )
     lines: list[str] = []
-    for source in sources:
-        snippet = (source.get("snippet") or "").strip().replace("\r", " ").replace("\n", " ")
-        if len(snippet) > 450:
-            snippet = snippet[:447].rstrip() + "..."
+    for source in pack_sources(sources, token_budget):
         lines.append(
             f"chunk_id={source['chunk_id']} | document_id={source['document_id']} | "
-            f"title={source.get('document_title', 'Unknown')} | score={source.get('score', 0)}\n"
-            f"{snippet}"
+            f"title={source.get('document_title', 'Unknown')} | score={round(float(source.get('score') or 0), 3)}\n"
+            f"{source['snippet']}"
         )
     return "\n\n".join(lines)
 
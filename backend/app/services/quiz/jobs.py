@@ -0,0 +1,263 @@
+"""
+Background quiz generation jobs.
+
+Public API
+----------
+    enqueue_quiz_job(user_id: str, spec: QuizRequestSpec) -> QuizJob
+    run_quiz_job(job_id: str) -> None        (runs on the worker pool)
+    expire_stale_quiz_jobs(user_id: str) -> None
+    touch_held_jobs() -> int                 (heartbeat; also run by a daemon thread)
+
+A job row is committed as ``queued`` and its id handed to the
+``quiz_generation`` worker pool (QUIZ_JOB_MAX_WORKERS threads), so at most
+that many generations run against Ollama at once.  The worker moves the job
+through the generator's stages, persisting the attempt number and the
+validation errors of every failed attempt in ``progress_json``, and finally
+links the stored quiz or records the error.
+
+While a process holds a job, queued in its pool or running, a daemon thread
+refreshes the job's ``heartbeat_at`` every third of QUIZ_JOB_STALE_AFTER_SEC
+(progress updates refresh it too).  ``expire_stale_quiz_jobs`` only fails
+active jobs whose heartbeat is older than that, i.e. jobs whose process
+died; a long queue or a long generation never expires.  Final status writes
+only apply to jobs that are still ``running``, so an expired job is never
+overwritten.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import func, update
+
+from app.db.models.quiz_job import QuizJob
+from app.extensions import db
+from app.services.jobs.executor import submit
+from app.services.quiz.generator import QuizGenerationError, generate_and_store_quiz
+from app.services.quiz.spec_parser import QuizRequestSpec
+
+log = logging.getLogger(__name__)
+
+JOB_POOL_NAME = "quiz_generation"
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_SUCCEEDED = "succeeded"
+JOB_STATUS_FAILED = "failed"
+ACTIVE_JOB_STATUSES = (JOB_STATUS_QUEUED, JOB_STATUS_RUNNING)
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_PENDING_PER_USER = 3
+DEFAULT_STALE_AFTER_SEC = 900
+
+# Job ids queued or running in this process's pool, kept alive by the heartbeat thread.
+_held_lock = threading.Lock()
+_held_jobs: set[str] = set()
+_heartbeat_thread: threading.Thread | None = None
+
+
+def enqueue_quiz_job(user_id: str, spec: QuizRequestSpec) -> QuizJob:
+    expire_stale_quiz_jobs(user_id)
+
+    max_pending = int(
+        current_app.config.get("QUIZ_JOB_MAX_PENDING_PER_USER", DEFAULT_MAX_PENDING_PER_USER)
+    )
+    pending = QuizJob.query.filter(
+        QuizJob.user_id == user_id,
+        QuizJob.status.in_(ACTIVE_JOB_STATUSES),
+    ).count()
+    if pending >= max_pending:
+        raise QuizGenerationError(
+            "Too many quiz generations in progress. Wait for one to finish and try again.",
+            status_code=429,
+        )
+
+    job = QuizJob(
+        user_id=user_id,
+        status=JOB_STATUS_QUEUED,
+        stage="queued",
+        spec_json=spec.to_dict(),
+        heartbeat_at=datetime.now(timezone.utc),
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    _hold(job.id)
+    try:
+        submit(
+            JOB_POOL_NAME,
+            run_quiz_job,
+            job.id,
+            max_workers=int(current_app.config.get("QUIZ_JOB_MAX_WORKERS", DEFAULT_MAX_WORKERS)),
+        )
+    except Exception:
+        _release(job.id)
+        raise
+    return job
+
+
+def run_quiz_job(job_id: str) -> None:
+    try:
+        _run_quiz_job(job_id)
+    finally:
+        _release(job_id)
+
+
+def _run_quiz_job(job_id: str) -> None:
+    now = datetime.now(timezone.utc)
+    started = db.session.execute(
+        update(QuizJob)
+        .where(QuizJob.id == job_id, QuizJob.status == JOB_STATUS_QUEUED)
+        .values(status=JOB_STATUS_RUNNING, started_at=now, heartbeat_at=now)
+    )
+    db.session.commit()
+    if not started.rowcount:
+        return
+    job = db.session.get(QuizJob, job_id)
+
+    spec = QuizRequestSpec(**job.spec_json)
+    try:
+        quiz = generate_and_store_quiz(
+            user_id=job.user_id,
+            spec=spec,
+            progress=lambda stage, details: _record_progress(job_id, stage, details),
+        )
+    except QuizGenerationError as exc:
+        db.session.rollback()
+        _mark_failed(job_id, str(exc), exc.status_code)
+        return
+    except Exception:
+        log.exception("quiz job %s failed unexpectedly", job_id)
+        db.session.rollback()
+        _mark_failed(job_id, "Quiz generation failed unexpectedly.", 500)
+        return
+
+    _finish(
+        job_id,
+        quiz_id=quiz.id,
+        status=JOB_STATUS_SUCCEEDED,
+        stage="done",
+    )
+
+
+def expire_stale_quiz_jobs(user_id: str) -> None:
+    """Fail active jobs whose process stopped sending heartbeats (e.g. it restarted)."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=_stale_after_sec())
+    result = db.session.execute(
+        update(QuizJob)
+        .where(
+            QuizJob.user_id == user_id,
+            QuizJob.status.in_(ACTIVE_JOB_STATUSES),
+            func.coalesce(QuizJob.heartbeat_at, QuizJob.created_at) < cutoff,
+        )
+        .values(
+            status=JOB_STATUS_FAILED,
+            error_message="Quiz generation was interrupted. Please try again.",
+            error_status=503,
+            completed_at=datetime.now(timezone.utc),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        db.session.commit()
+
+
+def _record_progress(job_id: str, stage: str, details: dict[str, Any]) -> None:
+    job = db.session.get(QuizJob, job_id)
+    if job is None or job.status != JOB_STATUS_RUNNING:
+        return
+
+    progress = dict(job.progress_json or {})
+    errors = details.get("errors")
+    if errors:
+        failed_attempt = int(details.get("attempt", 1)) - 1
+        history = list(progress.get("validation_errors") or [])
+        history.append({"attempt": failed_attempt, "errors": list(errors)})
+        progress["validation_errors"] = history
+    progress.update({key: value for key, value in details.items() if key != "errors"})
+
+    job.stage = stage
+    job.progress_json = progress
+    job.heartbeat_at = datetime.now(timezone.utc)
+    db.session.commit()
+
+
+def _mark_failed(job_id: str, message: str, status_code: int) -> None:
+    _finish(
+        job_id,
+        status=JOB_STATUS_FAILED,
+        error_message=message,
+        error_status=status_code,
+    )
+
+
+def _finish(job_id: str, **values: Any) -> None:
+    """Record the outcome, unless the job is no longer running (e.g. it was expired)."""
+    result = db.session.execute(
+        update(QuizJob)
+        .where(QuizJob.id == job_id, QuizJob.status == JOB_STATUS_RUNNING)
+        .values(completed_at=datetime.now(timezone.utc), **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if not result.rowcount:
+        log.warning("quiz job %s was no longer running; outcome %s not recorded", job_id, values.get("status"))
+
+
+# ── Heartbeats ────────────────────────────────────────────────────────────────
+
+def touch_held_jobs() -> int:
+    """Refresh ``heartbeat_at`` of every active job this process holds; returns the row count."""
+    with _held_lock:
+        job_ids = list(_held_jobs)
+    if not job_ids:
+        return 0
+    result = db.session.execute(
+        update(QuizJob)
+        .where(QuizJob.id.in_(job_ids), QuizJob.status.in_(ACTIVE_JOB_STATUSES))
+        .values(heartbeat_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def _hold(job_id: str) -> None:
+    global _heartbeat_thread
+    with _held_lock:
+        _held_jobs.add(job_id)
+        if _heartbeat_thread is None or not _heartbeat_thread.is_alive():
+            _heartbeat_thread = threading.Thread(
+                target=_heartbeat_loop,
+                args=(current_app._get_current_object(), max(1.0, _stale_after_sec() / 3)),
+                name="quiz-job-heartbeat",
+                daemon=True,
+            )
+            _heartbeat_thread.start()
+
+
+def _release(job_id: str) -> None:
+    with _held_lock:
+        _held_jobs.discard(job_id)
+
+
+def _heartbeat_loop(app, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        with app.app_context():
+            try:
+                touch_held_jobs()
+            except Exception:
+                log.exception("quiz job heartbeat failed")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+
+def _stale_after_sec() -> int:
+    return int(current_app.config.get("QUIZ_JOB_STALE_AFTER_SEC", DEFAULT_STALE_AFTER_SEC))
@@ -0,0 +1,201 @@
+"""
+Pre-rendered quiz question payloads.
+
+Public API
+----------
+    RenderedQuestions                                  (frozen, per quiz)
+    get_rendered_questions(quiz_id, load) -> RenderedQuestions
+
+Quizzes do not change after creation, so everything a response shows about
+the questions is rendered to JSON bytes once and spliced into every response
+that shows the quiz.  ``load`` is only called on a miss and returns
+``(question_ids, question_dicts, review_dicts)`` in display order; a review
+dict holds a question's ``correct_json`` and ``explanation``.
+
+A RenderedQuestions holds:
+  - ``questions_json``: the ``questions`` list (question fields plus sources,
+    never the answers);
+  - ``answer_fields``: per question, the JSON members an attempt answer
+    repeats from its question (index, type, text, options, marks, sources);
+  - ``review_fields``: per question, the ``correct_json`` / ``explanation``
+    members, spliced only into answers of submitted attempts.
+Attempt views therefore only load and serialize the per-attempt answer rows.
+
+Two tiers:
+  1. a per-process LRU of QUIZ_RENDER_CACHE_MAX_ENTRIES quizzes;
+  2. optionally Redis (QUIZ_RENDER_CACHE_REDIS_URL), shared by all workers,
+     with entries expiring after QUIZ_RENDER_CACHE_TTL_SEC.  The ``redis``
+     package is only imported when a URL is configured; if it is missing or
+     the server is unreachable the cache silently runs process-local.
+
+Quiz ids are never reused and no code path edits or deletes a single quiz
+(quizzes only go away with their user), so entries are never invalidated;
+the LRU and the Redis TTL drop them.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from flask import current_app
+
+from app.services.observability.metrics import CACHE_REQUESTS
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL_SEC = 24 * 3600
+SHARED_KEY_PREFIX = "tutor:quiz-questions:v2:"
+
+# Question fields an attempt answer does not repeat.
+_QUESTION_ONLY_FIELDS = ("id", "quiz_id")
+
+
+@dataclass(frozen=True, slots=True)
+class RenderedQuestions:
+    quiz_id: str
+    question_ids: tuple[str, ...]
+    positions: dict[str, int]
+    questions_json: bytes
+    answer_fields: tuple[bytes, ...]
+    review_fields: tuple[bytes, ...]
+
+    @property
+    def question_count(self) -> int:
+        return len(self.question_ids)
+
+
+_lock = threading.Lock()
+_cache: OrderedDict[str, RenderedQuestions] = OrderedDict()
+_shared_clients: dict[str, Any] = {}
+
+
+def get_rendered_questions(
+    quiz_id: str,
+    load: Callable[[], tuple[list[str], list[dict[str, Any]]]],
+) -> RenderedQuestions:
+    with _lock:
+        rendered = _cache.get(quiz_id)
+        if rendered is not None:
+            _cache.move_to_end(quiz_id)
+            CACHE_REQUESTS.inc(cache="quiz_render", result="hit")
+            return rendered
+
+    rendered = _shared_get(quiz_id)
+    CACHE_REQUESTS.inc(cache="quiz_render", result="miss" if rendered is None else "hit")
+    if rendered is None:
+        question_ids, questions, reviews = load()
+        rendered = _render(quiz_id, question_ids, questions, reviews)
+        _shared_set(rendered, reviews)
+
+    with _lock:
+        _cache[quiz_id] = rendered
+        _cache.move_to_end(quiz_id)
+        while len(_cache) > _max_entries():
+            _cache.popitem(last=False)
+    return rendered
+
+
+def _render(
+    quiz_id: str,
+    question_ids: list[str],
+    questions: list[dict[str, Any]],
+    reviews: list[dict[str, Any]],
+    questions_json: bytes | None = None,
+) -> RenderedQuestions:
+    question_ids = tuple(question_ids)
+    return RenderedQuestions(
+        quiz_id=quiz_id,
+        question_ids=question_ids,
+        positions={question_id: position for position, question_id in enumerate(question_ids)},
+        questions_json=questions_json or _dumps(questions),
+        answer_fields=tuple(
+            _members({key: value for key, value in question.items() if key not in _QUESTION_ONLY_FIELDS})
+            for question in questions
+        ),
+        review_fields=tuple(_members(review) for review in reviews),
+    )
+
+
+def _dumps(value: Any) -> bytes:
+    return current_app.json.dumps(value).encode("utf-8")
+
+
+def _members(mapping: dict[str, Any]) -> bytes:
+    """``mapping`` as JSON object members, without the braces."""
+    return _dumps(mapping)[1:-1]
+
+
+def _shared_get(quiz_id: str) -> RenderedQuestions | None:
+    client = _shared_client()
+    if client is None:
+        return None
+    try:
+        raw = client.get(SHARED_KEY_PREFIX + quiz_id)
+    except Exception as exc:
+        log.warning("quiz render cache: shared get failed: %s", exc)
+        return None
+    if not raw:
+        return None
+
+    # Stored as "<id>,<id>,...\n<questions json>\n<reviews json>"; ids are
+    # uuids and compact JSON has no raw newlines.
+    header, questions_json, reviews_json = bytes(raw).split(b"\n", 2)
+    question_ids = header.decode("ascii").split(",") if header else []
+    return _render(
+        quiz_id,
+        question_ids,
+        current_app.json.loads(questions_json),
+        current_app.json.loads(reviews_json),
+        questions_json=questions_json,
+    )
+
+
+def _shared_set(rendered: RenderedQuestions, reviews: list[dict[str, Any]]) -> None:
+    client = _shared_client()
+    if client is None:
+        return
+    value = b"\n".join(
+        [",".join(rendered.question_ids).encode("ascii"), rendered.questions_json, _dumps(reviews)]
+    )
+    try:
+        client.set(SHARED_KEY_PREFIX + rendered.quiz_id, value, ex=_ttl_sec())
+    except Exception as exc:
+        log.warning("quiz render cache: shared set failed: %s", exc)
+
+
+def _shared_client() -> Any | None:
+    url = (current_app.config.get("QUIZ_RENDER_CACHE_REDIS_URL") or "").strip()
+    if not url:
+        return None
+
+    with _lock:
+        if url in _shared_clients:
+            return _shared_clients[url]
+        try:
+            import redis
+        except ImportError:
+            log.warning("QUIZ_RENDER_CACHE_REDIS_URL is set but the redis package is not installed")
+            client = None
+        else:
+            client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        _shared_clients[url] = client
+        return client
+
+
+def _max_entries() -> int:
+    try:
+        return max(1, int(current_app.config.get("QUIZ_RENDER_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)))
+    except (TypeError, ValueError):
+        return DEFAULT_MAX_ENTRIES
+
+
+def _ttl_sec() -> int:
+    try:
+        return max(1, int(current_app.config.get("QUIZ_RENDER_CACHE_TTL_SEC", DEFAULT_TTL_SEC)))
+    except (TypeError, ValueError):
+        return DEFAULT_TTL_SEC
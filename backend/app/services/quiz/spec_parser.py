@@ -25,6 +25,8 @@ class QuizRequestSpec:
     question_types: list[str]
     document_ids: list[str] | None
     retrieval_query: str
+    # Skip the generation cache and always ask the model for new questions.
+    fresh_questions: bool = False
 
     def to_dict(self) -> dict[str, Any]:
         return asdict(self)
@@ -64,6 +66,7 @@ def parse_quiz_request(payload: dict[str, Any] | None) -> QuizRequestSpec:
     question_types = _parse_question_types(data.get("question_types"))
     document_ids = _parse_document_ids(data.get("document_ids"))
     retrieval_query = _build_retrieval_query(topic=topic, instructions=instructions)
+    fresh_questions = _parse_bool(data.get("fresh_questions", False), "fresh_questions")
 
     return QuizRequestSpec(
         title=title,
@@ -76,6 +79,7 @@ def parse_quiz_request(payload: dict[str, Any] | None) -> QuizRequestSpec:
         question_types=question_types,
         document_ids=document_ids,
         retrieval_query=retrieval_query,
+        fresh_questions=fresh_questions,
     )
 
 
@@ -160,6 +164,14 @@ def _parse_float(value: Any, field_name: str, minimum: float | None = None) -> f
     return parsed
 
 
+def _parse_bool(value: Any, field_name: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    raise QuizSpecError(f"{field_name} must be a boolean")
+
+
 def _clean_text(value: Any, *, lower: bool = False) -> str | None:
     if value is None:
         return None
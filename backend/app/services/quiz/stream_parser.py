@@ -0,0 +1,166 @@
+"""
+Incremental parser for streamed quiz-generation output.
+
+Public API
+----------
+    QuizStreamParser()
+        .feed(text: str) -> list[Any]    questions completed by this chunk
+        .questions                       every completed question so far
+        .questions_closed                True once the questions array ended
+        .text                            everything fed so far
+        .partial_payload() -> dict       {title, instructions, questions}
+
+The parser walks the model's JSON one character at a time, tracking string
+and nesting state, so it can hand each element of the top-level
+``questions`` array to the caller the moment its closing brace arrives.
+Anything before the first ``{`` (markdown fences, a stray sentence) is
+skipped.  When the output is cut off mid-question, ``partial_payload()``
+still returns every question that closed, so a truncated response keeps its
+valid prefix instead of failing as a whole.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+QUESTIONS_KEY = "questions"
+_CAPTURED_VALUE_KEYS = ("title", "instructions")
+
+
+class QuizStreamParser:
+    def __init__(self) -> None:
+        self._chunks: list[str] = []
+        self._buffer = ""
+        self._base = 0
+        self._offset = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_value = False
+        self._last_key: str | None = None
+        self._questions_depth: int | None = None
+        self._element_start: int | None = None
+        self.questions_closed = False
+        self.questions: list[Any] = []
+        self._values: dict[str, Any] = {}
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, text: str) -> list[Any]:
+        if not text:
+            return []
+        self._chunks.append(text)
+        self._buffer += text
+
+        completed: list[Any] = []
+        position = self._offset
+        for char in text:
+            self._consume(char, position, completed)
+            position += 1
+        self._offset = position
+        self._trim_buffer()
+        return completed
+
+    def partial_payload(self) -> dict[str, Any]:
+        return {
+            "title": self._values.get("title"),
+            "instructions": self._values.get("instructions"),
+            "questions": list(self.questions),
+        }
+
+    def _consume(self, char: str, position: int, completed: list[Any]) -> None:
+        if not self._started:
+            if char != "{":
+                return
+            self._started = True
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                self._close_string(position)
+            return
+
+        if char == '"':
+            self._in_string = True
+            self._string_start = position
+        elif char in "{[":
+            self._open(char, position)
+        elif char in "}]":
+            self._close(char, position, completed)
+        elif char == ":" and self._depth == 1:
+            self._expect_value = True
+        elif char == "," and self._depth == 1:
+            self._expect_value = False
+            self._last_key = None
+
+    def _open(self, char: str, position: int) -> None:
+        if (
+            char == "["
+            and self._depth == 1
+            and self._expect_value
+            and self._last_key == QUESTIONS_KEY
+            and self._questions_depth is None
+            and not self.questions_closed
+        ):
+            self._questions_depth = self._depth + 1
+        elif char == "{" and self._questions_depth is not None and self._depth == self._questions_depth:
+            self._element_start = position
+        self._depth += 1
+
+    def _close(self, char: str, position: int, completed: list[Any]) -> None:
+        self._depth -= 1
+        if self._questions_depth is None:
+            return
+        if char == "]" and self._depth == self._questions_depth - 1:
+            self._questions_depth = None
+            self.questions_closed = True
+        elif (
+            char == "}"
+            and self._element_start is not None
+            and self._depth == self._questions_depth
+        ):
+            raw = self._slice(self._element_start, position + 1)
+            self._element_start = None
+            try:
+                question = json.loads(raw)
+            except json.JSONDecodeError:
+                question = None
+            self.questions.append(question)
+            completed.append(question)
+
+    def _close_string(self, position: int) -> None:
+        if self._depth != 1:
+            return
+        try:
+            value = json.loads(self._slice(self._string_start, position + 1))
+        except json.JSONDecodeError:
+            return
+        if self._expect_value:
+            if self._last_key in _CAPTURED_VALUE_KEYS:
+                self._values[self._last_key] = value
+        else:
+            self._last_key = value
+
+    def _slice(self, start: int, end: int) -> str:
+        return self._buffer[start - self._base : end - self._base]
+
+    def _trim_buffer(self) -> None:
+        # Later slices only need text from the oldest open string or question
+        # element, so everything before it can be dropped.
+        keep_from = self._offset
+        if self._in_string:
+            keep_from = min(keep_from, self._string_start)
+        if self._element_start is not None:
+            keep_from = min(keep_from, self._element_start)
+        if keep_from > self._base:
+            self._buffer = self._buffer[keep_from - self._base :]
+            self._base = keep_from
@@ -1,33 +1,175 @@
+"""
+Quiz attempt summaries.
+
+Public API
+----------
+    build_fallback_summary(quiz, grading_result) -> dict
+    summarize_attempt(quiz, grading_result) -> dict     (blocking LLM call)
+    enqueue_attempt_summary(attempt_id: str) -> None
+    run_attempt_summary(attempt_id: str) -> None        (runs on the worker pool)
+    expire_stale_attempt_summary(attempt: QuizAttempt) -> None
+
+Submitting an attempt stores the deterministic fallback summary with
+``summary_status="pending"`` and enqueues the LLM summary on the
+``attempt_summaries`` pool (ATTEMPT_SUMMARY_MAX_WORKERS threads), so the
+student gets their score without waiting on the model.  The worker replaces
+``summary_json`` and sets ``summary_status`` to ``ready``, or to
+``fallback`` when the model call fails and the fallback summary stays.
+
+The pool lives in process memory, so a restart loses queued summaries.
+``expire_stale_attempt_summary`` runs when an attempt is read and settles a
+summary still ``pending`` ATTEMPT_SUMMARY_STALE_AFTER_SEC after submit as
+``fallback``; the worker skips attempts that are no longer pending, so a
+late run never overwrites it.
+"""
+
 from __future__ import annotations
 
 import json
 import logging
 import re
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
+from flask import current_app
+from sqlalchemy import update
+
 from app.db.models.quiz import Quiz
+from app.db.models.quiz_attempt import QuizAttempt
+from app.db.models.quiz_attempt_answer import QuizAttemptAnswer
+from app.db.models.quiz_question import QuizQuestion
+from app.extensions import db
+from app.services.jobs.executor import submit
 from app.services.wrapper.client import WrapperError, get_client, get_generation_model
 
 log = logging.getLogger(__name__)
 
+SUMMARY_POOL_NAME = "attempt_summaries"
+SUMMARY_STATUS_PENDING = "pending"
+SUMMARY_STATUS_READY = "ready"
+SUMMARY_STATUS_FALLBACK = "fallback"
+
+DEFAULT_MAX_WORKERS = 1
+DEFAULT_STALE_AFTER_SEC = 900
+
+_SUMMARY_ERRORS = (WrapperError, KeyError, IndexError, TypeError, ValueError, json.JSONDecodeError)
+
+
 def summarize_attempt(quiz: Quiz, grading_result: dict[str, Any]) -> dict[str, Any]:
-    fallback_summary = _build_fallback_summary(quiz=quiz, grading_result=grading_result)
+    fallback_summary = build_fallback_summary(quiz=quiz, grading_result=grading_result)
 
     try:
-        response = get_client().chat_completions(
-            model=get_generation_model(),
-            messages=_build_messages(quiz=quiz, grading_result=grading_result),
-            temperature=0.2,
-            max_tokens=800,
-        )
-        raw_content = response["choices"][0]["message"]["content"]
-        summary_payload = _extract_json_object(raw_content)
-        return _normalize_summary(summary_payload, fallback_summary)
-    except (WrapperError, KeyError, IndexError, TypeError, ValueError, json.JSONDecodeError) as exc:
+        return _generate_summary(quiz, grading_result, fallback_summary)
+    except _SUMMARY_ERRORS as exc:
         log.warning("quiz summary generation failed, using fallback summary: %s", exc)
         return fallback_summary
 
 
+def enqueue_attempt_summary(attempt_id: str) -> None:
+    submit(
+        SUMMARY_POOL_NAME,
+        run_attempt_summary,
+        attempt_id,
+        max_workers=int(current_app.config.get("ATTEMPT_SUMMARY_MAX_WORKERS", DEFAULT_MAX_WORKERS)),
+    )
+
+
+def run_attempt_summary(attempt_id: str) -> None:
+    attempt = db.session.get(QuizAttempt, attempt_id)
+    if attempt is None or attempt.summary_status != SUMMARY_STATUS_PENDING:
+        return
+
+    fallback_summary = dict(attempt.summary_json or {})
+    grading_result = _grading_result_from_attempt(attempt, fallback_summary)
+    try:
+        summary = _generate_summary(attempt.quiz, grading_result, fallback_summary)
+        status = SUMMARY_STATUS_READY
+    except _SUMMARY_ERRORS as exc:
+        log.warning("quiz summary generation failed for attempt %s, keeping fallback: %s", attempt_id, exc)
+        summary = fallback_summary
+        status = SUMMARY_STATUS_FALLBACK
+
+    # No data-version bump: no ETag-cached response includes attempt summaries,
+    # and bumping here would needlessly invalidate the user's cached lists.
+    attempt.summary_json = summary
+    attempt.summary_status = status
+    db.session.commit()
+
+
+def expire_stale_attempt_summary(attempt: QuizAttempt) -> None:
+    """Settle a summary whose worker never finished (e.g. the process restarted) as ``fallback``."""
+    if attempt.summary_status != SUMMARY_STATUS_PENDING or attempt.submitted_at is None:
+        return
+    submitted_at = attempt.submitted_at
+    if submitted_at.tzinfo is None:
+        submitted_at = submitted_at.replace(tzinfo=timezone.utc)
+    if submitted_at >= datetime.now(timezone.utc) - timedelta(seconds=_stale_after_sec()):
+        return
+
+    # Conditional so a worker that finishes at the same moment keeps its "ready".
+    result = db.session.execute(
+        update(QuizAttempt)
+        .where(QuizAttempt.id == attempt.id, QuizAttempt.summary_status == SUMMARY_STATUS_PENDING)
+        .values(summary_status=SUMMARY_STATUS_FALLBACK)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        log.warning("quiz summary for attempt %s never finished, keeping fallback", attempt.id)
+        # Committing expires the attempt, so the response reloads the new status.
+        db.session.commit()
+
+
+def _stale_after_sec() -> int:
+    return int(current_app.config.get("ATTEMPT_SUMMARY_STALE_AFTER_SEC", DEFAULT_STALE_AFTER_SEC))
+
+
+def _generate_summary(
+    quiz: Quiz,
+    grading_result: dict[str, Any],
+    fallback_summary: dict[str, Any],
+) -> dict[str, Any]:
+    response = get_client().chat_completions(
+        model=get_generation_model(),
+        messages=_build_messages(quiz=quiz, grading_result=grading_result),
+        temperature=0.2,
+        max_tokens=800,
+    )
+    raw_content = response["choices"][0]["message"]["content"]
+    summary_payload = _extract_json_object(raw_content)
+    return _normalize_summary(summary_payload, fallback_summary)
+
+
+def _grading_result_from_attempt(
+    attempt: QuizAttempt,
+    fallback_summary: dict[str, Any],
+) -> dict[str, Any]:
+    """Rebuild the grading result the prompt needs from the stored answers."""
+    answers = (
+        QuizAttemptAnswer.query
+        .join(QuizQuestion, QuizQuestion.id == QuizAttemptAnswer.question_id)
+        .filter(QuizAttemptAnswer.attempt_id == attempt.id)
+        .order_by(QuizQuestion.question_index.asc())
+        .all()
+    )
+    return {
+        "score": attempt.score,
+        "total_marks": attempt.total_marks,
+        "accuracy_pct": fallback_summary.get("accuracy_pct", 0.0),
+        "correct_count": fallback_summary.get("correct_count", 0),
+        "incorrect_count": fallback_summary.get("incorrect_count", 0),
+        "unanswered_count": fallback_summary.get("unanswered_count", 0),
+        "results": [
+            {
+                "question": answer.question,
+                "chosen_json": answer.chosen_json,
+                "is_correct": answer.is_correct,
+                "marks_awarded": answer.marks_awarded,
+            }
+            for answer in answers
+        ],
+    }
+
+
 def _build_messages(quiz: Quiz, grading_result: dict[str, Any]) -> list[dict[str, str]]:
     question_lines: list[str] = []
     for item in grading_result["results"]:
@@ -128,7 +270,7 @@ def _normalize_summary(
     return normalized
 
 
-def _build_fallback_summary(quiz: Quiz, grading_result: dict[str, Any]) -> dict[str, Any]:
+def build_fallback_summary(quiz: Quiz, grading_result: dict[str, Any]) -> dict[str, Any]:
     accuracy_pct = grading_result["accuracy_pct"]
     correct_count = grading_result["correct_count"]
     incorrect_count = grading_result["incorrect_count"]
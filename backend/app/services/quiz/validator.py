@@ -8,11 +8,26 @@ from app.services.quiz.spec_parser import QuizRequestSpec
 
 
 class QuizValidationError(ValueError):
-    """Raised when a generated quiz payload cannot be normalized safely."""
-
-    def __init__(self, errors: list[str]):
+    """
+    Raised when a generated quiz payload cannot be normalized safely.
+
+    ``failed_indices`` / ``valid_indices`` list the positions in the payload's
+    questions array that did / did not validate, so callers can keep the good
+    questions and regenerate only the broken ones.  Both are empty when the
+    payload itself could not be read (bad JSON, missing questions array).
+    """
+
+    def __init__(
+        self,
+        errors: list[str],
+        *,
+        failed_indices: list[int] | None = None,
+        valid_indices: list[int] | None = None,
+    ):
         super().__init__("\n".join(errors))
         self.errors = errors
+        self.failed_indices = failed_indices or []
+        self.valid_indices = valid_indices or []
 
 
 def extract_quiz_json(raw_payload: Any) -> Any:
@@ -52,11 +67,7 @@ def validate_quiz_payload(
         raise QuizValidationError(["Quiz payload must be a JSON object."])
 
     errors: list[str] = []
-    source_map = {
-        int(source["chunk_id"]): source
-        for source in available_sources
-        if source.get("chunk_id") is not None
-    }
+    source_map = build_source_map(available_sources)
 
     questions_raw = payload.get("questions")
     if not isinstance(questions_raw, list):
@@ -68,6 +79,8 @@ def validate_quiz_payload(
 
     normalized_questions: list[dict[str, Any]] = []
     provided_marks: list[float | None] = []
+    failed_indices: list[int] = []
+    valid_indices: list[int] = []
 
     for index, question_raw in enumerate(questions_raw):
         question_errors, normalized_question, marks_value = _normalize_question(
@@ -80,6 +93,9 @@ def validate_quiz_payload(
         if normalized_question is not None:
             normalized_questions.append(normalized_question)
             provided_marks.append(marks_value)
+            valid_indices.append(index)
+        else:
+            failed_indices.append(index)
 
     if minimum_document_coverage > 1:
         cited_document_ids: set[str] = set()
@@ -96,7 +112,11 @@ def validate_quiz_payload(
             )
 
     if errors:
-        raise QuizValidationError(errors)
+        raise QuizValidationError(
+            errors,
+            failed_indices=failed_indices,
+            valid_indices=valid_indices,
+        )
 
     marks = _finalize_marks(provided_marks=provided_marks, total_marks=spec.total_marks)
     for question, mark in zip(normalized_questions, marks):
@@ -112,6 +132,30 @@ def validate_quiz_payload(
     }
 
 
+def build_source_map(available_sources: list[dict[str, Any]]) -> dict[int, dict[str, Any]]:
+    return {
+        int(source["chunk_id"]): source
+        for source in available_sources
+        if source.get("chunk_id") is not None
+    }
+
+
+def normalize_question(
+    question_raw: Any,
+    index: int,
+    spec: QuizRequestSpec,
+    source_map: dict[int, dict[str, Any]],
+) -> tuple[list[str], dict[str, Any] | None]:
+    """Validate a single question as soon as it is available (streaming generation)."""
+    errors, normalized, _ = _normalize_question(
+        question_raw=question_raw,
+        index=index,
+        spec=spec,
+        source_map=source_map,
+    )
+    return errors, normalized
+
+
 def _normalize_question(
     question_raw: Any,
     index: int,
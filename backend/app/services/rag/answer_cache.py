@@ -0,0 +1,205 @@
+"""
+Semantic answer cache for first-turn chat questions.
+
+Public API
+----------
+    build_answer_cache_key(user_id, sources, model) -> str | None
+    lookup_cached_answer(cache_key, question, question_vector=None) -> tuple[dict | None, list[float] | None]
+    store_cached_answer(*, user_id, cache_key, question, answer, model_used, question_vector=None) -> None
+
+Opt-in (ANSWER_CACHE_ENABLED).  generate_answer only consults the cache for
+document-grounded questions without chat history or summary: the answer then
+depends on nothing but the question, the retrieved sources and the model.
+
+The key is a sha256 of the ordered retrieved sources and the model:
+
+  ANSWER_CACHE_SCOPE=user (default)
+      the user id and, per source, its ingestion, chunk ids and text hash.
+      Reingesting or deleting a document changes the retrieved set, so a
+      stale answer is never served.
+  ANSWER_CACHE_SCOPE=shared
+      the text hash of each source only, so students who uploaded the same
+      course PDF share answers.  Only the answer text crosses users; the
+      returned sources are always the asker's own.
+
+Within one key, a cached answer is reused when its question is the same
+after normalization or its question embedding is within
+ANSWER_CACHE_SIMILARITY (cosine) of the new question's.  generate_answer
+passes in the query vector retrieval already computed for the question, and
+the lookup hands it on to the store, so the cache makes no embedding call of
+its own.  Only when no vector is passed (e.g. a caller outside a request) is
+the question embedded, and then only if there are candidates and none
+matches exactly, or when an answer is stored.  Entries older than
+ANSWER_CACHE_TTL_SEC are deleted on lookup.
+
+Lookups and stores only modify the caller's session; the caller commits
+together with the chat messages.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any, List
+
+from flask import current_app
+from sqlalchemy import delete
+
+from app.db.models.answer_cache import AnswerCache
+from app.extensions import db
+from app.services.observability.metrics import CACHE_REQUESTS
+from app.services.rag.retrieval import embed_query
+from app.services.rag.vector_store import as_float_list
+from app.services.wrapper.client import WrapperError
+
+log = logging.getLogger(__name__)
+
+SCOPE_USER = "user"
+SCOPE_SHARED = "shared"
+SCOPES = (SCOPE_USER, SCOPE_SHARED)
+
+DEFAULT_SIMILARITY = 0.95
+DEFAULT_TTL_SEC = 24 * 3600
+DEFAULT_MAX_CANDIDATES = 20
+
+
+def build_answer_cache_key(user_id: str, sources: List[dict], model: str) -> str | None:
+    """Return the cache key for answering over *sources*, or None if not cacheable."""
+    if not current_app.config.get("ANSWER_CACHE_ENABLED") or not sources:
+        return None
+
+    scope = _scope()
+    if scope == SCOPE_SHARED:
+        key_sources = [_text_hash(source.get("snippet")) for source in sources]
+        key_material: dict[str, Any] = {"scope": scope, "sources": key_sources, "model": model}
+    else:
+        key_sources = [
+            [
+                source.get("ingestion_id"),
+                source.get("chunk_ids") or [source.get("chunk_id")],
+                _text_hash(source.get("snippet")),
+            ]
+            for source in sources
+        ]
+        key_material = {"scope": scope, "user": user_id, "sources": key_sources, "model": model}
+    encoded = json.dumps(key_material, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def lookup_cached_answer(
+    cache_key: str,
+    question: str,
+    question_vector: List[float] | None = None,
+) -> tuple[dict[str, Any] | None, List[float] | None]:
+    """
+    Return ``(hit, question_vector)``.  *hit* has ``answer``, ``model_used``
+    and ``similarity``; *question_vector* is the question's embedding (the
+    one passed in, typically retrieval's query vector, or the one the lookup
+    had to compute) -- pass it on to ``store_cached_answer``.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=_config_int("ANSWER_CACHE_TTL_SEC", DEFAULT_TTL_SEC))
+    db.session.execute(
+        delete(AnswerCache).where(AnswerCache.source_key == cache_key, AnswerCache.created_at < cutoff)
+    )
+    candidates = (
+        AnswerCache.query
+        .filter(AnswerCache.source_key == cache_key, AnswerCache.created_at >= cutoff)
+        .order_by(AnswerCache.created_at.desc())
+        .limit(_config_int("ANSWER_CACHE_MAX_CANDIDATES", DEFAULT_MAX_CANDIDATES))
+        .all()
+    )
+    if not candidates:
+        CACHE_REQUESTS.inc(cache="answer", result="miss")
+        return None, question_vector
+
+    normalized = _normalize(question)
+    best, similarity = None, 0.0
+    for entry in candidates:
+        if _normalize(entry.question) == normalized:
+            best, similarity = entry, 1.0
+            break
+    else:
+        if question_vector is None:
+            try:
+                question_vector = embed_query(question)
+            except WrapperError as exc:
+                log.warning("answer cache: question embedding failed, skipping lookup: %s", exc)
+                CACHE_REQUESTS.inc(cache="answer", result="miss")
+                return None, None
+        for entry in candidates:
+            score = _cosine(question_vector, entry.question_embedding)
+            if score > similarity:
+                best, similarity = entry, score
+        if similarity < _similarity_threshold():
+            CACHE_REQUESTS.inc(cache="answer", result="miss")
+            return None, question_vector
+
+    best.hit_count = (best.hit_count or 0) + 1
+    best.last_used_at = datetime.now(timezone.utc)
+    CACHE_REQUESTS.inc(cache="answer", result="hit")
+    return {"answer": best.answer, "model_used": best.model_used, "similarity": similarity}, question_vector
+
+
+def store_cached_answer(
+    *,
+    user_id: str,
+    cache_key: str,
+    question: str,
+    answer: str,
+    model_used: str | None,
+    question_vector: List[float] | None = None,
+) -> None:
+    if question_vector is None:
+        try:
+            question_vector = embed_query(question)
+        except WrapperError as exc:
+            log.warning("answer cache: question embedding failed, not caching: %s", exc)
+            return
+    db.session.add(
+        AnswerCache(
+            user_id=user_id,
+            source_key=cache_key,
+            question=question,
+            question_embedding=question_vector,
+            answer=answer,
+            model_used=model_used,
+            hit_count=0,
+        )
+    )
+
+
+def _cosine(left: List[float], stored) -> float:
+    right = as_float_list(stored)
+    dot = sum(a * b for a, b in zip(left, right))
+    norm = math.sqrt(sum(a * a for a in left)) * math.sqrt(sum(b * b for b in right))
+    return dot / norm if norm else 0.0
+
+
+def _normalize(question: str) -> str:
+    return " ".join((question or "").split()).casefold()
+
+
+def _text_hash(text: str | None) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+def _scope() -> str:
+    scope = str(current_app.config.get("ANSWER_CACHE_SCOPE") or "").strip().lower()
+    return scope if scope in SCOPES else SCOPE_USER
+
+
+def _similarity_threshold() -> float:
+    try:
+        return float(current_app.config.get("ANSWER_CACHE_SIMILARITY", DEFAULT_SIMILARITY))
+    except (TypeError, ValueError):
+        return DEFAULT_SIMILARITY
+
+
+def _config_int(key: str, default: int) -> int:
+    try:
+        return int(current_app.config.get(key, default))
+    except (TypeError, ValueError):
+        return default
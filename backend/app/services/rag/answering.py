@@ -9,6 +9,7 @@ Public API
         model: str,
         history: list[dict],
         top_k: int = 5,
+        history_summary: str | None = None,
     ) -> dict
 
 Return value
@@ -17,12 +18,34 @@ Return value
     "answer": str,
     "model": str,
     "sources": list[dict],
+    "out_of_context": bool,
+    "cached": bool,       # served from the semantic answer cache
 }
 
 Architecture rules:
   - Uses retrieval.py for vector search.
   - Uses get_client().chat_completions() for generation.
   - Uses the configured Ollama model and optional Ollama fallback model.
+
+Prompt layout (CHAT_PROMPT_LAYOUT)
+----------------------------------
+  stable_prefix (default)
+      system instructions + rolling summary + history form a prefix that only
+      grows between turns of the same chat; the retrieved context is sent in
+      the final user message.  Ollama can then reuse its KV cache for the
+      whole prefix and only prefill the new turn.
+  legacy
+      retrieved context inside the system prompt, ahead of the history.  Every
+      turn changes the first message, so the whole prompt is re-prefilled.
+
+With ANSWER_CACHE_ENABLED, first-turn questions (no history or summary) are
+looked up in the semantic answer cache (answer_cache.py) after retrieval; a
+hit returns the cached answer with the freshly retrieved sources and skips
+generation entirely.
+
+Retrieved sources are packed by context_packer.pack_sources into what the
+model's context window leaves after the rest of the prompt and the reply, so
+overlapping chunk text is sent once and long chunks are clipped by relevance.
 """
 
 from __future__ import annotations
@@ -30,7 +53,14 @@ from __future__ import annotations
 import logging
 from typing import List
 
+from flask import current_app
+
+from app.services.observability.tracing import span
+from app.services.rag.answer_cache import build_answer_cache_key, lookup_cached_answer, store_cached_answer
+from app.services.rag.context_packer import pack_sources, reply_token_reserve, source_token_budget
 from app.services.rag.retrieval import retrieve_chunks, retrieve_chunks_diversified
+from app.services.rag.retrieval_cache import recall_query_vector
+from app.services.rag.tokens import MESSAGE_OVERHEAD_TOKENS, estimate_message_tokens, estimate_tokens
 from app.services.wrapper.client import (
     WrapperError,
     get_client,
@@ -40,6 +70,11 @@ from app.services.wrapper.client import (
 log = logging.getLogger(__name__)
 
 _DEFAULT_MINIMUM_DOCUMENT_COUNT = 2
+_ANSWER_MAX_TOKENS = 4096
+
+PROMPT_LAYOUT_STABLE_PREFIX = "stable_prefix"
+PROMPT_LAYOUT_LEGACY = "legacy"
+PROMPT_LAYOUTS = (PROMPT_LAYOUT_STABLE_PREFIX, PROMPT_LAYOUT_LEGACY)
 
 _SYSTEM_TEMPLATE = """\
 You are a knowledgeable and helpful AI tutor. Answer the student's question \
@@ -65,6 +100,36 @@ Context from the student's uploaded documents:
 {context_block}
 """
 
+# Same rules as _SYSTEM_TEMPLATE but without the per-turn context, which is
+# carried by the final user message instead (see _CONTEXT_USER_TEMPLATE).
+_STABLE_SYSTEM = """\
+You are a knowledgeable and helpful AI tutor. Answer the student's question \
+accurately and clearly.
+
+Each student question arrives together with context sources retrieved from \
+the student's uploaded documents. First, carefully read those context sources \
+and decide whether they contain information relevant to the question.
+
+IF the context contains relevant information:
+- Answer the question using the context.
+- Cite sources using [Source N] notation.
+- When multiple sources are relevant, synthesize them into one answer.
+- If some retrieved sources are weak or irrelevant, rely on the relevant ones only.
+- If the answer is long, break it into clearly labelled sections with headings.
+- Be thorough and complete; do not stop mid-answer.
+
+IF the context does NOT contain relevant information about the question:
+- Reply with ONLY this exact line and nothing else: [NO_CONTEXT]
+- Do NOT attempt to answer from general knowledge.
+- Do NOT provide any explanation.
+"""
+
+_CONTEXT_USER_TEMPLATE = """\
+Context from the student's uploaded documents:
+{context_block}
+
+Question: {question}"""
+
 _NO_CONTEXT_SYSTEM = """\
 You are a knowledgeable and helpful AI tutor. Answer the student's question \
 accurately and clearly. No document context is available; answer from your \
@@ -73,13 +138,18 @@ general knowledge.
 - Be thorough and complete; do not stop mid-answer.
 """
 
+_HISTORY_SUMMARY_TEMPLATE = """
+Summary of the earlier conversation (older turns are not shown verbatim):
+{summary}
+"""
+
 
-def _build_context_block(sources: List[dict]) -> str:
+def _build_context_block(sources: List[dict], token_budget: int) -> str:
     if not sources:
         return "(no relevant document context found)"
 
     lines = []
-    for index, source in enumerate(sources, start=1):
+    for index, source in enumerate(pack_sources(sources, token_budget), start=1):
         title = source.get("document_title", "Unknown")
         snippet = source.get("snippet", "").strip()
         source_type = source.get("source_type", "")
@@ -89,11 +159,17 @@ def _build_context_block(sources: List[dict]) -> str:
     return "\n\n".join(lines)
 
 
-def _chat_with_fallback(model: str, messages: list, max_tokens: int = 4096) -> tuple[str, str]:
+def _chat_with_fallback(
+    model: str,
+    messages: list,
+    max_tokens: int = _ANSWER_MAX_TOKENS,
+    session_id: str | None = None,
+) -> tuple[str, str]:
     """
     Attempt chat completion with *model*.
 
     If OLLAMA_FALLBACK_MODEL is configured, retry once with that model.
+    *session_id* pins the request to the chat's generation session.
     Returns (answer_text, model_used).
     """
     fallback_chain = [model]
@@ -104,29 +180,40 @@ def _chat_with_fallback(model: str, messages: list, max_tokens: int = 4096) -> t
     client = get_client()
     last_exc = None
 
-    for index, attempt_model in enumerate(fallback_chain):
-        is_last = index == len(fallback_chain) - 1
-        try:
-            response = client.chat_completions(
-                model=attempt_model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=max_tokens,
-                max_retries=None if is_last else 0,
-            )
-            text = response["choices"][0]["message"]["content"]
-            if attempt_model != model:
-                log.info(
-                    "answering: primary model %s failed, used fallback %s",
-                    model,
-                    attempt_model,
+    with span(
+        "answering.generate",
+        **{
+            "gen_ai.request.model": model,
+            "gen_ai.request.max_tokens": max_tokens,
+            "prompt_tokens_estimate": estimate_message_tokens(messages),
+        },
+    ) as generation_span:
+        for index, attempt_model in enumerate(fallback_chain):
+            is_last = index == len(fallback_chain) - 1
+            generation_span.set_attribute("model_attempts", index + 1)
+            try:
+                response = client.chat_completions(
+                    model=attempt_model,
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=max_tokens,
+                    max_retries=None if is_last else 0,
+                    session_id=session_id,
                 )
-            return text, attempt_model
-        except (WrapperError, KeyError, IndexError, TypeError) as exc:
-            log.warning("answering: model %s failed: %s", attempt_model, exc)
-            last_exc = exc
-
-    raise WrapperError(f"All models failed for answer generation. Last error: {last_exc}")
+                text = response["choices"][0]["message"]["content"]
+                if attempt_model != model:
+                    log.info(
+                        "answering: primary model %s failed, used fallback %s",
+                        model,
+                        attempt_model,
+                    )
+                generation_span.set_attribute("gen_ai.response.model", attempt_model)
+                return text, attempt_model
+            except (WrapperError, KeyError, IndexError, TypeError) as exc:
+                log.warning("answering: model %s failed: %s", attempt_model, exc)
+                last_exc = exc
+
+        raise WrapperError(f"All models failed for answer generation. Last error: {last_exc}")
 
 
 def generate_answer(
@@ -137,15 +224,23 @@ def generate_answer(
     top_k: int = 5,
     document_ids: List[str] | None = None,
     use_general_knowledge: bool = False,
+    history_summary: str | None = None,
+    session_id: str | None = None,
 ) -> dict:
     """
     Generate a RAG-augmented answer for *question*.
 
+    *history_summary* is the chat's rolling summary of turns older than
+    *history*; it is appended to the system prompt when present.
+    *session_id* (the chat id) is forwarded to the generation client for
+    keep-alive / session pinning.
+
     Returns:
         answer: str
         model: str
         sources: list[dict]
         out_of_context: bool
+        cached: bool
     """
     history = history or []
     out_of_context = False
@@ -175,35 +270,124 @@ def generate_answer(
             log.warning("answering: retrieval failed, proceeding without context: %s", exc)
             sources = []
 
-    if use_general_knowledge or not sources:
-        system_content = _NO_CONTEXT_SYSTEM
-    else:
-        system_content = _SYSTEM_TEMPLATE.format(
-            context_block=_build_context_block(sources)
-        )
-
-    messages = [{"role": "system", "content": system_content}]
-    for turn in history:
-        if turn.get("role") in ("user", "assistant") and turn.get("content"):
-            messages.append({"role": turn["role"], "content": turn["content"]})
-    messages.append({"role": "user", "content": question})
+    # Earlier turns can change the answer, so only first-turn questions are cached.
+    answer_cache_key = None
+    question_vector = None
+    if not use_general_knowledge and not history and not history_summary:
+        answer_cache_key = build_answer_cache_key(user_id=user_id, sources=sources, model=model)
+    if answer_cache_key is not None:
+        with span("answering.cache_lookup") as lookup_span:
+            cached, question_vector = lookup_cached_answer(
+                answer_cache_key, question, question_vector=recall_query_vector(question)
+            )
+            lookup_span.set_attribute("hit", cached is not None)
+        if cached is not None:
+            log.info("answering: answer cache hit similarity=%.3f", cached["similarity"])
+            return {
+                "answer": cached["answer"],
+                "model": cached["model_used"] or model,
+                "sources": sources,
+                "out_of_context": False,
+                "cached": True,
+            }
 
-    answer_text, model_used = _chat_with_fallback(model=model, messages=messages)
+    messages = _build_messages(
+        question=question,
+        sources=[] if use_general_knowledge else sources,
+        history=history,
+        history_summary=history_summary,
+        layout=get_prompt_layout(),
+        model=model,
+    )
+
+    answer_text, model_used = _chat_with_fallback(
+        model=model,
+        messages=messages,
+        session_id=session_id,
+    )
 
     if not use_general_knowledge and answer_text.strip().startswith("[NO_CONTEXT]"):
         out_of_context = True
         answer_text = "The provided documents do not contain information about this topic."
         sources = []
         log.info("answering: out-of-context detected for question=%r", question[:80])
+    elif answer_cache_key is not None:
+        store_cached_answer(
+            user_id=user_id,
+            cache_key=answer_cache_key,
+            question=question,
+            answer=answer_text,
+            model_used=model_used,
+            question_vector=question_vector,
+        )
 
     return {
         "answer": answer_text,
         "model": model_used,
         "sources": sources,
         "out_of_context": out_of_context,
+        "cached": False,
     }
 
 
+def get_prompt_layout() -> str:
+    layout = str(current_app.config.get("CHAT_PROMPT_LAYOUT") or "").strip().lower()
+    return layout if layout in PROMPT_LAYOUTS else PROMPT_LAYOUT_STABLE_PREFIX
+
+
+def _build_messages(
+    *,
+    question: str,
+    sources: List[dict],
+    history: List[dict],
+    history_summary: str | None,
+    layout: str,
+    model: str | None = None,
+) -> list[dict]:
+    summary_content = (
+        _HISTORY_SUMMARY_TEMPLATE.format(summary=history_summary.strip())
+        if history_summary
+        else ""
+    )
+    history_messages = [
+        {"role": turn["role"], "content": turn["content"]}
+        for turn in history
+        if turn.get("role") in ("user", "assistant") and turn.get("content")
+    ]
+
+    if not sources:
+        system_content = _NO_CONTEXT_SYSTEM
+        final_user_content = question
+    else:
+        # Everything except the context block, plus a bounded share for the reply.
+        reserved_tokens = (
+            estimate_tokens(_SYSTEM_TEMPLATE)
+            + estimate_tokens(summary_content)
+            + estimate_message_tokens(history_messages)
+            + estimate_tokens(question)
+            + 2 * MESSAGE_OVERHEAD_TOKENS
+            + reply_token_reserve(_ANSWER_MAX_TOKENS, model)
+        )
+        context_block = _build_context_block(
+            sources,
+            source_token_budget(model, reserved_tokens=reserved_tokens),
+        )
+        if layout == PROMPT_LAYOUT_LEGACY:
+            system_content = _SYSTEM_TEMPLATE.format(context_block=context_block)
+            final_user_content = question
+        else:
+            system_content = _STABLE_SYSTEM
+            final_user_content = _CONTEXT_USER_TEMPLATE.format(
+                context_block=context_block,
+                question=question,
+            )
+
+    messages = [{"role": "system", "content": system_content + summary_content}]
+    messages.extend(history_messages)
+    messages.append({"role": "user", "content": final_user_content})
+    return messages
+
+
 def _minimum_document_count(
     *,
     top_k: int,
@@ -4,6 +4,9 @@ Text chunking service for the RAG pipeline.
 Splits text into overlapping character-based chunks.
 For PDF ingestion, page metadata is preserved per chunk.
 For plain-text ingestion, page_start / page_end are None.
+
+overlap_length() finds the text two chunks share, so prompt building and
+retrieval can drop the repeat when neighbouring chunks are used together.
 """
 
 from __future__ import annotations
@@ -14,6 +17,12 @@ from typing import List, Optional
 CHUNK_SIZE = 1000       # target characters per chunk
 CHUNK_OVERLAP = 200     # overlap between consecutive chunks
 
+# Shared text shorter than this is treated as a coincidental repeat.
+MIN_OVERLAP_CHARS = 40
+# Chunk boundaries are stripped of whitespace, so the real overlap can be a
+# little longer or shorter than CHUNK_OVERLAP.
+MAX_OVERLAP_CHARS = CHUNK_OVERLAP * 2
+
 
 @dataclass
 class TextChunk:
@@ -98,3 +107,23 @@ def chunk_pages(pages: List[dict]) -> List[TextChunk]:
         flush_chunk(buffer_text, buffer_page_start, buffer_page_end)
 
     return chunks
+
+
+def overlap_length(head: str, tail: str) -> int:
+    """
+    Length of the longest suffix of *head* that *tail* starts with.
+
+    Returns 0 when the shared text is shorter than MIN_OVERLAP_CHARS or
+    would cover all of *tail*.
+    """
+    if len(head) < MIN_OVERLAP_CHARS or len(tail) < MIN_OVERLAP_CHARS:
+        return 0
+    window = head[-MAX_OVERLAP_CHARS:]
+    probe = tail[:MIN_OVERLAP_CHARS]
+    position = window.find(probe)
+    while position != -1:
+        candidate = window[position:]
+        if len(candidate) < len(tail) and tail.startswith(candidate):
+            return len(candidate)
+        position = window.find(probe, position + 1)
+    return 0
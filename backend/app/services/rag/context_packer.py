@@ -0,0 +1,171 @@
+"""
+Token-budgeted packing of retrieved sources into prompt context.
+
+Public API
+----------
+    model_context_window(model: str | None = None) -> int
+    source_token_budget(model: str | None = None, reserved_tokens: int = 0) -> int
+    reply_token_reserve(max_tokens: int, model: str | None = None) -> int
+    pack_sources(sources: list[dict], token_budget: int) -> list[dict]
+
+Behaviour
+---------
+``source_token_budget`` is what is left of the model's context window
+(MODEL_CONTEXT_WINDOW, or a per-model entry in MODEL_CONTEXT_WINDOWS) after
+*reserved_tokens* for the rest of the prompt and the reply, capped at
+CONTEXT_SOURCE_MAX_TOKENS.  The reply part comes from ``reply_token_reserve``:
+the reply's max_tokens, but never more than a quarter of the window, so a
+4096-token model does not give its whole window to a 4096-token reply cap
+and shrink every source to the citable minimum.
+
+``pack_sources`` returns copies of *sources*, in the same order, whose
+``snippet`` is rewritten for the prompt:
+  1. whitespace runs are collapsed;
+  2. text repeated between chunks of the same document (the CHUNK_OVERLAP
+     region of adjacent chunks) is dropped from the start of the later chunk;
+  3. if the texts still exceed the budget, it is shared out in proportion to
+     each source's relevance ``score``.  Sources that fit in their share keep
+     their full text and hand the rest back to the others; every source keeps
+     at least MIN_SOURCE_TOKENS so it stays citable.
+
+The input dicts are not modified, so the sources returned to the client and
+stored with messages keep the full chunk text.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from flask import current_app
+
+from app.services.rag.chunking import overlap_length
+from app.services.rag.tokens import CHARS_PER_TOKEN, estimate_tokens
+from app.services.wrapper.client import get_generation_model
+
+DEFAULT_CONTEXT_WINDOW = 8192
+DEFAULT_SOURCE_MAX_TOKENS = 1200
+MIN_SOURCE_TOKENS = 24
+REPLY_RESERVE_WINDOW_FRACTION = 4
+
+_MIN_WEIGHT = 0.05
+
+
+def model_context_window(model: str | None = None) -> int:
+    model = model or get_generation_model()
+    overrides = _parse_context_windows(current_app.config.get("MODEL_CONTEXT_WINDOWS"))
+    if model in overrides:
+        return overrides[model]
+    return _config_int("MODEL_CONTEXT_WINDOW", DEFAULT_CONTEXT_WINDOW)
+
+
+def source_token_budget(model: str | None = None, reserved_tokens: int = 0) -> int:
+    available = model_context_window(model) - max(0, reserved_tokens)
+    cap = _config_int("CONTEXT_SOURCE_MAX_TOKENS", DEFAULT_SOURCE_MAX_TOKENS)
+    return max(MIN_SOURCE_TOKENS, min(cap, available))
+
+
+def reply_token_reserve(max_tokens: int, model: str | None = None) -> int:
+    return max(0, min(max_tokens, model_context_window(model) // REPLY_RESERVE_WINDOW_FRACTION))
+
+
+def pack_sources(sources: list[dict[str, Any]], token_budget: int) -> list[dict[str, Any]]:
+    texts = [" ".join(str(source.get("snippet") or "").split()) for source in sources]
+    texts = _drop_overlaps(sources, texts)
+
+    allowances = _allocate(
+        sizes=[estimate_tokens(text) for text in texts],
+        weights=[_weight(source) for source in sources],
+        budget=max(token_budget, MIN_SOURCE_TOKENS * len(sources)),
+    )
+    return [
+        {**source, "snippet": _clip(text, allowance)}
+        for source, text, allowance in zip(sources, texts, allowances)
+    ]
+
+
+def _drop_overlaps(sources: list[dict[str, Any]], texts: list[str]) -> list[str]:
+    trimmed = list(texts)
+    trimmed_against: dict[int, int] = {}
+    for later, later_source in enumerate(sources):
+        best_index, best_overlap = None, 0
+        for earlier, earlier_source in enumerate(sources):
+            if (
+                earlier == later
+                or later_source.get("document_id") is None
+                or earlier_source.get("document_id") != later_source.get("document_id")
+            ):
+                continue
+            # Never trim two chunks against each other.
+            if trimmed_against.get(earlier) == later:
+                continue
+            overlap = overlap_length(texts[earlier], texts[later])
+            if overlap > best_overlap:
+                best_index, best_overlap = earlier, overlap
+        if best_index is not None:
+            trimmed[later] = "... " + texts[later][best_overlap:].lstrip()
+            trimmed_against[later] = best_index
+    return trimmed
+
+
+def _allocate(sizes: list[int], weights: list[float], budget: int) -> list[int]:
+    allowances = list(sizes)
+    if sum(sizes) <= budget:
+        return allowances
+
+    remaining = budget
+    open_indexes = list(range(len(sizes)))
+    while open_indexes:
+        total_weight = sum(weights[index] for index in open_indexes)
+        shares = {
+            index: max(MIN_SOURCE_TOKENS, int(remaining * weights[index] / total_weight))
+            for index in open_indexes
+        }
+        fitting = [index for index in open_indexes if sizes[index] <= shares[index]]
+        if not fitting:
+            for index in open_indexes:
+                allowances[index] = shares[index]
+            break
+        for index in fitting:
+            allowances[index] = sizes[index]
+            remaining -= sizes[index]
+            open_indexes.remove(index)
+    return allowances
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    clipped = text[: max_chars - 3]
+    # Cut at a word boundary unless that would throw away most of the text.
+    boundary = clipped.rfind(" ")
+    if boundary > max_chars // 2:
+        clipped = clipped[:boundary]
+    return clipped.rstrip() + "..."
+
+
+def _weight(source: dict[str, Any]) -> float:
+    try:
+        return max(float(source.get("score") or 0.0), _MIN_WEIGHT)
+    except (TypeError, ValueError):
+        return _MIN_WEIGHT
+
+
+def _parse_context_windows(raw: Any) -> dict[str, int]:
+    windows: dict[str, int] = {}
+    for entry in str(raw or "").split(","):
+        model, separator, value = entry.strip().rpartition("=")
+        if not separator or not model.strip():
+            continue
+        try:
+            windows[model.strip()] = int(value)
+        except ValueError:
+            continue
+    return windows
+
+
+def _config_int(key: str, default: int) -> int:
+    try:
+        return int(current_app.config.get(key, default))
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,236 @@
+"""
+Chunk embedding storage modes.
+
+Public API
+----------
+    get_embedding_storage() -> str
+    uses_half_column(storage=None) -> bool
+    get_embedding_dim() -> int
+    prepare_embedding(raw: list[float]) -> list[float]
+    coarse_prefix(vector: list[float]) -> list[float]
+    embedding_columns(vector: list[float]) -> dict
+    convert_chunk_embeddings(storage: str, drop_other: bool = False) -> int
+    ensure_half_storage(storage: str) -> None
+    ensure_coarse_storage() -> int
+    pgvector_version() -> tuple[int, ...]
+
+Dimensions
+----------
+The embedding model returns Matryoshka embeddings (3072 dims for Gemini
+embedding-001) whose prefixes are usable embeddings on their own.
+``prepare_embedding`` keeps the first EMBEDDING_DIM dimensions and pads with
+zeros up to the 1536-wide columns; zero padding leaves cosine similarity
+unchanged, so any EMBEDDING_DIM up to 1536 works without a schema change.
+Every chunk also stores the first COARSE_EMBEDDING_DIM (256) dimensions in
+``chunks.embedding_coarse`` for the optional coarse search pass (see
+pgvector_store.py, RETRIEVAL_COARSE_PASS).  The d2f4a6c8e0b1 migration only
+adds that column; before turning the pass on, run ``ensure_coarse_storage()``
+once to fill it for older chunks and build its HNSW index.
+
+Modes (EMBEDDING_STORAGE)
+-------------------------
+  vector (default)
+      float32 ``chunks.embedding`` (~6 KB per chunk), cosine search on the
+      ivfflat index.
+  halfvec
+      float16 ``chunks.embedding_half`` (~3 KB per chunk), cosine search on
+      its HNSW index.
+  binary
+      ``embedding_half`` storage; a first pass ranks chunks by Hamming
+      distance on ``binary_quantize(embedding_half)`` (192 bytes per chunk,
+      HNSW ``bit_hamming_ops`` index) and the shortlist of
+      top_k * RETRIEVAL_BINARY_OVERSAMPLE chunks is re-scored with the
+      float16 cosine distance.
+
+New chunks are written to the column of the active mode only.  After
+switching modes, run ``convert_chunk_embeddings(<new mode>)`` once (e.g.
+from ``flask shell``) so chunks ingested under the previous mode are
+searchable; ``drop_other=True`` also clears the column the new mode does not
+read, which is what actually reclaims the table space.
+
+The halfvec and binary modes need pgvector >= 0.7 (halfvec,
+binary_quantize).  The c7d9e1f3a5b8 migration only adds ``embedding_half``
+when the server supports it and builds no index on it; converting to a half
+mode (``ensure_half_storage``) adds the column if it is missing and builds
+the one index that mode searches, so deployments on ``vector`` never pay for
+them and older pgvector servers can still upgrade.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import text
+
+from app.extensions import db
+
+# Width of the embedding / embedding_half columns.
+EMBEDDING_DIM = 1536
+# Width of the embedding_coarse prefix column.
+COARSE_EMBEDDING_DIM = 256
+
+STORAGE_VECTOR = "vector"
+STORAGE_HALFVEC = "halfvec"
+STORAGE_BINARY = "binary"
+STORAGE_MODES = (STORAGE_VECTOR, STORAGE_HALFVEC, STORAGE_BINARY)
+
+# halfvec and binary_quantize() first shipped in this pgvector release.
+HALF_STORAGE_MIN_PGVECTOR = (0, 7, 0)
+
+
+def get_embedding_storage() -> str:
+    storage = str(current_app.config.get("EMBEDDING_STORAGE") or "").strip().lower()
+    return storage if storage in STORAGE_MODES else STORAGE_VECTOR
+
+
+def uses_half_column(storage: str | None = None) -> bool:
+    return (storage or get_embedding_storage()) != STORAGE_VECTOR
+
+
+def get_embedding_dim() -> int:
+    try:
+        dim = int(current_app.config.get("EMBEDDING_DIM", EMBEDDING_DIM))
+    except (TypeError, ValueError):
+        dim = EMBEDDING_DIM
+    return max(COARSE_EMBEDDING_DIM, min(dim, EMBEDDING_DIM))
+
+
+def prepare_embedding(raw: list[float]) -> list[float]:
+    """Truncate a model embedding to EMBEDDING_DIM and pad it to the column width."""
+    vector = [float(value) for value in raw[: get_embedding_dim()]]
+    if len(vector) < EMBEDDING_DIM:
+        vector.extend([0.0] * (EMBEDDING_DIM - len(vector)))
+    return vector
+
+
+def coarse_prefix(vector: list[float]) -> list[float]:
+    return list(vector[:COARSE_EMBEDDING_DIM])
+
+
+def embedding_columns(vector: list[float]) -> dict[str, Any]:
+    """Chunk column values for *vector* under the active storage mode."""
+    columns = {"embedding_coarse": coarse_prefix(vector)}
+    if uses_half_column():
+        columns.update(embedding=None, embedding_half=vector)
+    else:
+        # embedding_half is left alone: it may not exist on pgvector < 0.7.
+        columns.update(embedding=vector)
+    return columns
+
+
+def convert_chunk_embeddings(storage: str, drop_other: bool = False) -> int:
+    """
+    Fill the column *storage* reads from the other one; the caller commits.
+
+    Returns the number of rows converted.  With *drop_other* the unused
+    column is set to NULL afterwards (only for rows that now have both).
+    Converting to a half mode first runs ``ensure_half_storage``.
+    """
+    if storage not in STORAGE_MODES:
+        raise ValueError(f"unknown embedding storage {storage!r}")
+
+    if uses_half_column(storage):
+        ensure_half_storage(storage)
+        target, source, cast = "embedding_half", "embedding", f"halfvec({EMBEDDING_DIM})"
+    else:
+        if not _half_column_exists():
+            return 0
+        target, source, cast = "embedding", "embedding_half", f"vector({EMBEDDING_DIM})"
+
+    result = db.session.execute(
+        text(
+            f"UPDATE chunks SET {target} = {source}::{cast} "
+            f"WHERE {target} IS NULL AND {source} IS NOT NULL"
+        )
+    )
+    if drop_other:
+        db.session.execute(
+            text(f"UPDATE chunks SET {source} = NULL WHERE {target} IS NOT NULL AND {source} IS NOT NULL")
+        )
+    return result.rowcount or 0
+
+
+def ensure_half_storage(storage: str) -> None:
+    """
+    Create ``chunks.embedding_half`` and the index *storage* searches on, if
+    missing; the caller commits.  Raises RuntimeError on pgvector < 0.7.
+    """
+    if not uses_half_column(storage):
+        raise ValueError(f"{storage!r} does not use the embedding_half column")
+    version = pgvector_version()
+    if version < HALF_STORAGE_MIN_PGVECTOR:
+        found = ".".join(str(part) for part in version) or "not installed"
+        required = ".".join(str(part) for part in HALF_STORAGE_MIN_PGVECTOR)
+        raise RuntimeError(f"EMBEDDING_STORAGE={storage} needs pgvector >= {required} (found {found})")
+
+    db.session.execute(
+        text(f"ALTER TABLE chunks ADD COLUMN IF NOT EXISTS embedding_half halfvec({EMBEDDING_DIM})")
+    )
+    if storage == STORAGE_HALFVEC:
+        db.session.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_chunks_embedding_half ON chunks "
+                "USING hnsw (embedding_half halfvec_cosine_ops)"
+            )
+        )
+    else:
+        # Coarse first pass of the binary mode; the query must use this exact expression.
+        db.session.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_chunks_embedding_bits ON chunks "
+                f"USING hnsw ((binary_quantize(embedding_half)::bit({EMBEDDING_DIM})) bit_hamming_ops)"
+            )
+        )
+
+
+def ensure_coarse_storage() -> int:
+    """
+    Fill ``chunks.embedding_coarse`` for chunks that lack it and create its
+    HNSW index, if missing; the caller commits.  Returns the rows filled.
+    """
+    # The real[] slice works on every pgvector release (subvector() needs 0.7).
+    source = (
+        f"COALESCE(embedding, embedding_half::vector({EMBEDDING_DIM}))" if _half_column_exists() else "embedding"
+    )
+    result = db.session.execute(
+        text(
+            "UPDATE chunks SET embedding_coarse = "
+            f"(({source})::real[])[1:{COARSE_EMBEDDING_DIM}]::vector({COARSE_EMBEDDING_DIM}) "
+            "WHERE embedding_coarse IS NULL"
+        )
+    )
+    db.session.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_chunks_embedding_coarse ON chunks "
+            "USING hnsw (embedding_coarse vector_cosine_ops)"
+        )
+    )
+    return result.rowcount or 0
+
+
+def pgvector_version() -> tuple[int, ...]:
+    """Installed version of the ``vector`` extension, () when it is missing."""
+    raw = db.session.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+    return _parse_version(raw)
+
+
+def _parse_version(raw: str | None) -> tuple[int, ...]:
+    parts = []
+    for part in str(raw or "").split("."):
+        digits = "".join(char for char in part if char.isdigit())
+        if not digits:
+            break
+        parts.append(int(digits))
+    return tuple(parts)
+
+
+def _half_column_exists() -> bool:
+    return bool(
+        db.session.execute(
+            text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'chunks' AND column_name = 'embedding_half'"
+            )
+        ).scalar()
+    )
@@ -0,0 +1,198 @@
+"""
+Token-budgeted conversation history for chat answering.
+
+Public API
+----------
+    build_history(chat: Chat, exclude_message_id: str | None = None) -> dict
+
+Return value
+------------
+{
+    "history": list[dict],     # recent turns, chronological, kept verbatim
+    "summary": str | None,     # rolling summary of everything older
+}
+
+Behaviour
+---------
+Only messages newer than ``chat.history_summary_until`` are loaded.  While
+there are at most CHAT_HISTORY_MAX_MESSAGES of them and they fit inside
+CHAT_HISTORY_TOKEN_BUDGET they are all returned verbatim.  Once either limit
+is exceeded, the newest messages that fit in half the budget (and half the
+message cap) stay verbatim and every older one is folded into
+``chat.history_summary`` together with the previous summary, so no message
+leaves the window without being summarised.  Folding down to half of both
+limits means the summarisation call runs once every few turns rather than on
+every turn, and between folds the verbatim history only grows at the end,
+which keeps the prompt prefix stable.
+
+The chat row is modified in the caller's session; the caller commits.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import List
+
+from flask import current_app
+from sqlalchemy.orm import load_only
+
+from app.db.models.chat import Chat
+from app.db.models.chat_message import ChatMessage
+from app.services.rag.tokens import (
+    CHARS_PER_TOKEN,
+    MESSAGE_OVERHEAD_TOKENS,
+    estimate_tokens,
+    truncate_to_tokens,
+)
+from app.services.wrapper.client import WrapperError, get_client, get_generation_model
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = 1500
+DEFAULT_SUMMARY_MAX_TOKENS = 300
+DEFAULT_MAX_MESSAGES = 40
+
+# Each folded message is clipped before it is sent to the summariser so a
+# single very long answer cannot blow up the summarisation prompt.
+_SUMMARY_INPUT_TOKENS_PER_MESSAGE = 300
+
+_SUMMARY_SYSTEM = """\
+You maintain a running summary of a tutoring conversation between a student \
+and an AI tutor. Merge the existing summary with the new messages into one \
+updated summary.
+- Keep the topics discussed, facts the tutor explained, and open questions.
+- Keep names, definitions, numbers, and document titles that later questions may refer to.
+- Write plain prose in the third person. No headings, no bullet lists.
+- Reply with the updated summary only.
+"""
+
+
+def build_history(chat: Chat, exclude_message_id: str | None = None) -> dict:
+    budget = _config_int("CHAT_HISTORY_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET)
+    max_messages = _config_int("CHAT_HISTORY_MAX_MESSAGES", DEFAULT_MAX_MESSAGES)
+
+    query = (
+        ChatMessage.query
+        .options(load_only(ChatMessage.id, ChatMessage.role, ChatMessage.content, ChatMessage.created_at))
+        .filter(ChatMessage.chat_id == chat.id)
+        .filter(ChatMessage.role.in_(["user", "assistant"]))
+    )
+    if chat.history_summary_until is not None:
+        query = query.filter(ChatMessage.created_at > chat.history_summary_until)
+    if exclude_message_id:
+        query = query.filter(ChatMessage.id != exclude_message_id)
+
+    # Folding keeps the number of unsummarised messages near the cap, so
+    # loading all of them stays bounded.
+    pending = query.order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc()).all()
+
+    total = sum(_message_cost(message) for message in pending)
+    if len(pending) <= max_messages and total <= budget:
+        folded, kept = [], pending
+    else:
+        folded, kept = _split_for_budget(pending, budget // 2, max(1, max_messages // 2))
+
+    if folded:
+        # A long backlog (e.g. a chat older than the summary columns) is
+        # summarised in cap-sized batches so each summarisation prompt stays small.
+        summary = chat.history_summary
+        batch_size = max(1, max_messages)
+        for start in range(0, len(folded), batch_size):
+            summary = _summarize(summary, folded[start:start + batch_size])
+        chat.history_summary = summary
+        chat.history_summary_until = folded[-1].created_at
+        log.info(
+            "history: folded %d messages into summary for chat=%s",
+            len(folded),
+            chat.id,
+        )
+
+    history = [
+        {"role": message.role, "content": message.content}
+        for message in kept
+    ]
+    if history:
+        # A single message larger than the whole budget is clipped rather than dropped.
+        limit = budget - MESSAGE_OVERHEAD_TOKENS
+        history[0]["content"] = truncate_to_tokens(history[0]["content"], limit)
+
+    return {"history": history, "summary": chat.history_summary or None}
+
+
+def _split_for_budget(
+    pending: List[ChatMessage],
+    keep_budget: int,
+    keep_messages: int,
+) -> tuple[List[ChatMessage], List[ChatMessage]]:
+    """Split chronological *pending* into (folded, kept); the newest messages that fit are kept."""
+    kept_count = 0
+    used = 0
+    for message in reversed(pending):
+        cost = _message_cost(message)
+        if kept_count and (used + cost > keep_budget or kept_count >= keep_messages):
+            break
+        kept_count += 1
+        used += cost
+    split = len(pending) - kept_count
+    return pending[:split], pending[split:]
+
+
+def _message_cost(message: ChatMessage) -> int:
+    return estimate_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _summarize(previous: str | None, messages: List[ChatMessage]) -> str:
+    max_tokens = _config_int("CHAT_HISTORY_SUMMARY_MAX_TOKENS", DEFAULT_SUMMARY_MAX_TOKENS)
+    transcript = "\n".join(
+        f"{message.role.capitalize()}: "
+        f"{truncate_to_tokens(message.content, _SUMMARY_INPUT_TOKENS_PER_MESSAGE)}"
+        for message in messages
+    )
+    user_prompt = (
+        f"Existing summary:\n{previous or '(none)'}\n\n"
+        f"New messages:\n{transcript}\n\n"
+        f"Updated summary (at most {max_tokens * 3 // 4} words):"
+    )
+
+    try:
+        response = get_client().chat_completions(
+            model=get_generation_model(),
+            messages=[
+                {"role": "system", "content": _SUMMARY_SYSTEM},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=0.2,
+            max_tokens=max_tokens,
+        )
+        text = (response["choices"][0]["message"]["content"] or "").strip()
+        if not text:
+            raise ValueError("summary response was empty")
+        return truncate_to_tokens(text, max_tokens)
+    except (WrapperError, KeyError, IndexError, TypeError, AttributeError, ValueError) as exc:
+        log.warning("history: summary generation failed, using fallback summary: %s", exc)
+        return _build_fallback_summary(previous, messages, max_tokens)
+
+
+def _build_fallback_summary(
+    previous: str | None,
+    messages: List[ChatMessage],
+    max_tokens: int,
+) -> str:
+    lines = [previous] if previous else []
+    for message in messages:
+        label = "Student asked" if message.role == "user" else "Tutor answered"
+        lines.append(f"{label}: {truncate_to_tokens(message.content.strip(), 40)}")
+    text = "\n".join(lines)
+
+    # Keep the most recent part when the extractive summary is over budget.
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) > max_chars:
+        text = "..." + text[-(max_chars - 3):]
+    return text
+
+
+def _config_int(key: str, default: int) -> int:
+    try:
+        return int(current_app.config.get(key, default))
+    except (TypeError, ValueError):
+        return default
@@ -14,6 +14,7 @@ from __future__ import annotations
 
 import io
 import logging
+import time
 from datetime import datetime, timezone
 from typing import List
 
@@ -21,7 +22,14 @@ from app.extensions import db
 from app.db.models.chunk import Chunk
 from app.db.models.document import Document
 from app.db.models.document_ingestion import DocumentIngestion
+from app.services.cache.response_cache import bump_data_version
+from app.services.observability.metrics import INGESTED_CHUNKS, INGESTION_SECONDS
+from app.services.quiz.cache import invalidate_document
 from app.services.rag.chunking import TextChunk, chunk_pages, chunk_plain_text
+from app.services.rag.embedding_storage import embedding_columns, prepare_embedding
+from app.services.rag.local_index import invalidate_local_index
+from app.services.rag.retrieval_cache import invalidate_retrieval_cache
+from app.services.rag.vector_store import get_vector_store
 from app.services.wrapper.client import WrapperError, get_client, get_embedding_model
 
 log = logging.getLogger(__name__)
@@ -72,9 +80,9 @@ def _embed_chunks(chunks: List[TextChunk]) -> List[List[float]]:
             embedding = item.get("embedding")
             if embedding is None:
                 raise WrapperError("Embedding response missing 'embedding' field")
-            # DB column is Vector(1536); Gemini embedding-001 returns 3072 dims.
-            # Matryoshka embeddings retain semantic quality when truncated.
-            vectors.append(embedding[:1536])
+            # Gemini embedding-001 returns 3072 dims; Matryoshka embeddings
+            # retain semantic quality when truncated to EMBEDDING_DIM.
+            vectors.append(prepare_embedding(embedding))
 
     return vectors
 
@@ -86,7 +94,9 @@ def _save_chunks(
     ingestion: DocumentIngestion,
     chunks: List[TextChunk],
     vectors: List[List[float]],
-) -> None:
+) -> List[int]:
+    """Add the chunk rows and return their ids (flushed, not committed)."""
+    rows = []
     for chunk, vector in zip(chunks, vectors):
         row = Chunk(
             user_id=document.user_id,
@@ -96,24 +106,65 @@ def _save_chunks(
             page_start=chunk.page_start,
             page_end=chunk.page_end,
             content=chunk.content,
-            embedding=vector,
+            **embedding_columns(vector),
         )
         db.session.add(row)
+        rows.append(row)
+
+    db.session.flush()
+    return [row.id for row in rows]
 
 
 # ── Mark ingestion done ───────────────────────────────────────────────────────
 
-def _mark_ready(document: Document, ingestion: DocumentIngestion) -> None:
+def _mark_ready(
+    document: Document,
+    ingestion: DocumentIngestion,
+    chunk_ids: List[int],
+    vectors: List[List[float]],
+) -> None:
     ingestion.status = "ready"
     ingestion.completed_at = datetime.now(timezone.utc)
+    previous_ingestion_id = document.current_ingestion_id
     document.current_ingestion_id = ingestion.id
+    invalidate_document(document.user_id, document.id)
+    invalidate_local_index(document.user_id)
+    invalidate_retrieval_cache(document.user_id)
+    bump_data_version(document.user_id)
     db.session.commit()
+    # Indexed only once the chunks are committed, so a failed or rolled-back
+    # ingestion never leaves vectors behind in a file-backed store.  Until the
+    # write below finishes the new ingestion is current but unindexed; the
+    # store logs and skips it for that moment.
+    try:
+        get_vector_store().add(
+            user_id=document.user_id,
+            document_id=document.id,
+            ingestion_id=ingestion.id,
+            chunk_ids=chunk_ids,
+            vectors=vectors,
+        )
+    except Exception:
+        log.exception(
+            "ingestion=%s is ready but was not indexed; run rebuild_vector_store()", ingestion.id
+        )
+    if previous_ingestion_id and previous_ingestion_id != ingestion.id:
+        get_vector_store().delete_ingestion(previous_ingestion_id)
+
+
+def _record_ingestion(kind: str, started: float, chunk_count: int | None) -> None:
+    """Observe one run; *chunk_count* is None when the run failed."""
+    outcome = "failed" if chunk_count is None else "ready"
+    INGESTION_SECONDS.observe(time.perf_counter() - started, kind=kind, outcome=outcome)
+    if chunk_count:
+        INGESTED_CHUNKS.inc(chunk_count, kind=kind)
 
 
 def _mark_failed(ingestion: DocumentIngestion, error: str) -> None:
     ingestion.status = "failed"
     ingestion.error_message = error[:2000]
     ingestion.completed_at = datetime.now(timezone.utc)
+    bump_data_version(ingestion.user_id)
     db.session.commit()
 
 
@@ -129,6 +180,7 @@ def ingest_upload(
     Accepts raw bytes — no disk I/O required, works on Vercel and locally.
     Mutates ingestion.status in place.
     """
+    started = time.perf_counter()
     try:
         mime = (document.mime_type or "").lower()
         filename = (document.filename or "").lower()
@@ -147,8 +199,9 @@ def ingest_upload(
             raise RuntimeError("No text chunks produced from the uploaded file.")
 
         vectors = _embed_chunks(chunks)
-        _save_chunks(document, ingestion, chunks, vectors)
-        _mark_ready(document, ingestion)
+        chunk_ids = _save_chunks(document, ingestion, chunks, vectors)
+        _mark_ready(document, ingestion, chunk_ids, vectors)
+        _record_ingestion("upload", started, len(chunks))
 
         log.info(
             "ingest_upload success doc=%s ingestion=%s chunks=%d",
@@ -160,6 +213,7 @@ def ingest_upload(
     except Exception as exc:
         log.exception("ingest_upload failed doc=%s ingestion=%s", document.id, ingestion.id)
         _mark_failed(ingestion, str(exc))
+        _record_ingestion("upload", started, None)
         raise
 
 
@@ -172,6 +226,7 @@ def ingest_text(
     Full pipeline for a plain-text context document.
     Mutates ingestion.status in place.
     """
+    started = time.perf_counter()
     try:
         chunks = chunk_plain_text(text)
 
@@ -179,8 +234,9 @@ def ingest_text(
             raise RuntimeError("No text chunks produced from the provided text.")
 
         vectors = _embed_chunks(chunks)
-        _save_chunks(document, ingestion, chunks, vectors)
-        _mark_ready(document, ingestion)
+        chunk_ids = _save_chunks(document, ingestion, chunks, vectors)
+        _mark_ready(document, ingestion, chunk_ids, vectors)
+        _record_ingestion("text", started, len(chunks))
 
         log.info(
             "ingest_text success doc=%s ingestion=%s chunks=%d",
@@ -192,4 +248,5 @@ def ingest_text(
     except Exception as exc:
         log.exception("ingest_text failed doc=%s ingestion=%s", document.id, ingestion.id)
         _mark_failed(ingestion, str(exc))
+        _record_ingestion("text", started, None)
         raise
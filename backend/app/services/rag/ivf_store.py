@@ -0,0 +1,345 @@
+"""
+File-backed IVF vector store (VECTOR_STORE=ivf).
+
+Public API
+----------
+    IVFVectorStore                                 (VectorStore)
+
+Every ingestion is one immutable segment under VECTOR_STORE_DIR (default
+``instance/vector_store``):
+
+    <ingestion_id>.vectors.npy   float32 (n, 1536), L2-normalized rows,
+                                 grouped by inverted list; memory-mapped
+    <ingestion_id>.index.npz     chunk ids, list centroids and offsets, and
+                                 the owning user / document
+
+Segments with at least VECTOR_STORE_IVF_MIN_ROWS chunks are partitioned
+into ~sqrt(n) inverted lists by spherical k-means when they are added; a
+search scores the query against the centroids and scans only the rows of the
+VECTOR_STORE_IVF_PROBES nearest lists.  Smaller segments are scanned in
+full, i.e. searched exactly.
+
+Tenant and document filtering never touch the index: a search looks up the
+user's current ``(document_id, ingestion_id)`` pairs and opens just those
+segments.  Deleting an ingestion removes its two files.  The files are
+written atomically and never modified, so several worker processes can share
+one directory.  Requires numpy.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, List
+
+from flask import current_app
+
+from app.services.rag.vector_store import (
+    VectorHit,
+    VectorStore,
+    current_ingestions,
+    iter_snapshot_segments,
+    require_numpy,
+    write_snapshot_segment,
+)
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DIR_NAME = "vector_store"
+DEFAULT_IVF_MIN_ROWS = 1024
+DEFAULT_IVF_PROBES = 8
+
+_MAX_LISTS = 1024
+_KMEANS_ITERATIONS = 8
+# Rows scored against the centroids at once while assigning lists.
+_ASSIGN_BLOCK_ROWS = 4096
+_MAX_OPEN_SEGMENTS = 256
+
+
+@dataclass(frozen=True, slots=True)
+class _Segment:
+    user_id: str
+    document_id: str
+    ingestion_id: str
+    matrix: Any  # float32 (n, dim), memory-mapped
+    chunk_ids: Any  # int64 (n,)
+    centroids: Any  # float32 (n_lists, dim); empty for flat segments
+    offsets: Any  # int64 (n_lists + 1,), row range of each list
+
+    def scan(self, query, probes: int):
+        """Return (row indexes, cosine similarities) of the probed rows."""
+        np = require_numpy()
+        if len(self.centroids) > probes:
+            nearest = np.argpartition(-(self.centroids @ query), probes - 1)[:probes]
+            rows = np.concatenate(
+                [np.arange(self.offsets[list_id], self.offsets[list_id + 1]) for list_id in nearest]
+            )
+            return rows, self.matrix[rows] @ query
+        return np.arange(len(self.chunk_ids)), self.matrix @ query
+
+
+class IVFVectorStore(VectorStore):
+    name = "ivf"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._segments: OrderedDict[str, _Segment] = OrderedDict()
+
+    def add(
+        self,
+        *,
+        user_id: str,
+        document_id: str,
+        ingestion_id: str,
+        chunk_ids: List[int],
+        vectors: List[List[float]],
+    ) -> None:
+        np = require_numpy()
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(chunk_ids), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+        ids = np.asarray(chunk_ids, dtype=np.int64)
+
+        centroids = np.empty((0, matrix.shape[1]), dtype=np.float32)
+        offsets = np.asarray([0, len(ids)], dtype=np.int64)
+        if len(ids) >= _config_int("VECTOR_STORE_IVF_MIN_ROWS", DEFAULT_IVF_MIN_ROWS):
+            centroids, assignment = _train_lists(matrix, min(_MAX_LISTS, int(math.sqrt(len(ids)))))
+            order = np.argsort(assignment, kind="stable")
+            matrix, ids = matrix[order], ids[order]
+            counts = np.bincount(assignment, minlength=len(centroids))
+            offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+        vectors_path, index_path = self._paths(ingestion_id)
+        os.makedirs(os.path.dirname(vectors_path), exist_ok=True)
+        # The index file is written last: its presence marks a complete segment.
+        _write_atomic(vectors_path, lambda handle: np.save(handle, matrix))
+        _write_atomic(
+            index_path,
+            lambda handle: np.savez(
+                handle,
+                chunk_ids=ids,
+                centroids=centroids,
+                offsets=offsets,
+                meta=np.asarray([user_id, document_id, ingestion_id]),
+            ),
+        )
+        with self._lock:
+            self._segments.pop(ingestion_id, None)
+        log.info(
+            "ivf store: indexed ingestion=%s chunks=%d lists=%d", ingestion_id, len(ids), len(centroids)
+        )
+
+    def delete_ingestion(self, ingestion_id: str) -> int:
+        segment = self._segment(ingestion_id)
+        with self._lock:
+            self._segments.pop(ingestion_id, None)
+        for path in self._paths(ingestion_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return len(segment.chunk_ids) if segment is not None else 0
+
+    def search(
+        self,
+        query_vector: List[float],
+        *,
+        user_id: str,
+        top_k: int,
+        document_ids: List[str] | None = None,
+    ) -> List[VectorHit]:
+        np = require_numpy()
+        query = _normalized(query_vector)
+        if query is None or top_k <= 0:
+            return []
+
+        chunk_ids, scores, documents = [], [], []
+        for segment in self._user_segments(user_id, document_ids):
+            rows, segment_scores = segment.scan(query, self._probes())
+            if len(rows) > top_k:
+                best = np.argpartition(-segment_scores, top_k - 1)[:top_k]
+                rows, segment_scores = rows[best], segment_scores[best]
+            chunk_ids.append(segment.chunk_ids[rows])
+            scores.append(segment_scores)
+            documents.extend([segment.document_id] * len(rows))
+        if not scores:
+            return []
+
+        chunk_ids, scores = np.concatenate(chunk_ids), np.concatenate(scores)
+        top = np.argsort(-scores, kind="stable")[:top_k]
+        return [VectorHit(int(chunk_ids[i]), 1.0 - float(scores[i]), documents[i]) for i in top]
+
+    def document_seeds(
+        self,
+        query_vector: List[float],
+        *,
+        user_id: str,
+        count: int,
+        document_ids: List[str] | None = None,
+    ) -> List[VectorHit]:
+        np = require_numpy()
+        query = _normalized(query_vector)
+        if query is None or count <= 0:
+            return []
+
+        seeds: list[VectorHit] = []
+        for segment in self._user_segments(user_id, document_ids):
+            rows, segment_scores = segment.scan(query, self._probes())
+            if not len(rows):
+                continue
+            best = int(np.argmax(segment_scores))
+            seeds.append(
+                VectorHit(
+                    int(segment.chunk_ids[rows[best]]),
+                    1.0 - float(segment_scores[best]),
+                    segment.document_id,
+                )
+            )
+        seeds.sort(key=lambda hit: hit.distance)
+        return seeds[:count]
+
+    def snapshot(self, path: str) -> int:
+        written = 0
+        directory = self._directory()
+        if not os.path.isdir(directory):
+            return 0
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".index.npz"):
+                continue
+            segment = self._segment(name[: -len(".index.npz")])
+            if segment is None:
+                continue
+            write_snapshot_segment(
+                path,
+                user_id=segment.user_id,
+                document_id=segment.document_id,
+                ingestion_id=segment.ingestion_id,
+                chunk_ids=segment.chunk_ids,
+                vectors=segment.matrix,
+            )
+            written += len(segment.chunk_ids)
+        return written
+
+    def restore(self, path: str) -> int:
+        restored = 0
+        for segment in iter_snapshot_segments(path):
+            self.add(
+                user_id=segment["user_id"],
+                document_id=segment["document_id"],
+                ingestion_id=segment["ingestion_id"],
+                chunk_ids=segment["chunk_ids"],
+                vectors=segment["vectors"],
+            )
+            restored += len(segment["chunk_ids"])
+        return restored
+
+    def _user_segments(self, user_id: str, document_ids: List[str] | None) -> list[_Segment]:
+        segments = []
+        for _, ingestion_id in current_ingestions(user_id, document_ids):
+            segment = self._segment(ingestion_id)
+            if segment is None:
+                log.warning("ivf store: no segment for current ingestion %s; run rebuild_vector_store()", ingestion_id)
+            elif segment.user_id == user_id:
+                segments.append(segment)
+        return segments
+
+    def _segment(self, ingestion_id: str) -> _Segment | None:
+        with self._lock:
+            segment = self._segments.get(ingestion_id)
+            if segment is not None:
+                self._segments.move_to_end(ingestion_id)
+                return segment
+
+        np = require_numpy()
+        vectors_path, index_path = self._paths(ingestion_id)
+        try:
+            with np.load(index_path) as index:
+                user_id, document_id, _ = (str(value) for value in index["meta"])
+                chunk_ids = index["chunk_ids"]
+                centroids = index["centroids"]
+                offsets = index["offsets"]
+            matrix = np.load(vectors_path, mmap_mode="r")
+        except FileNotFoundError:
+            return None
+
+        segment = _Segment(
+            user_id=user_id,
+            document_id=document_id,
+            ingestion_id=ingestion_id,
+            matrix=matrix,
+            chunk_ids=chunk_ids,
+            centroids=centroids,
+            offsets=offsets,
+        )
+        with self._lock:
+            self._segments[ingestion_id] = segment
+            self._segments.move_to_end(ingestion_id)
+            while len(self._segments) > _MAX_OPEN_SEGMENTS:
+                self._segments.popitem(last=False)
+        return segment
+
+    def _paths(self, ingestion_id: str) -> tuple[str, str]:
+        base = os.path.join(self._directory(), ingestion_id)
+        return base + ".vectors.npy", base + ".index.npz"
+
+    def _directory(self) -> str:
+        configured = (current_app.config.get("VECTOR_STORE_DIR") or "").strip()
+        return configured or os.path.join(current_app.instance_path, DEFAULT_DIR_NAME)
+
+    def _probes(self) -> int:
+        return _config_int("VECTOR_STORE_IVF_PROBES", DEFAULT_IVF_PROBES)
+
+
+def _train_lists(matrix, n_lists: int):
+    """Spherical k-means; returns (unit centroids, list of every row)."""
+    np = require_numpy()
+    rng = np.random.default_rng(0)
+    centroids = matrix[rng.choice(len(matrix), size=n_lists, replace=False)].copy()
+    for _ in range(_KMEANS_ITERATIONS):
+        assignment = _nearest_lists(matrix, centroids)
+        # Accumulate per list instead of a dense (rows, lists) one-hot product.
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, matrix)
+        # Lists that lost every member keep their previous centroid.
+        empty = np.bincount(assignment, minlength=n_lists) == 0
+        sums[empty] = centroids[empty]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids, _nearest_lists(matrix, centroids)
+
+
+def _nearest_lists(matrix, centroids):
+    """Index of each row's most similar centroid, scored in row blocks."""
+    np = require_numpy()
+    assignment = np.empty(len(matrix), dtype=np.int64)
+    for start in range(0, len(matrix), _ASSIGN_BLOCK_ROWS):
+        block = matrix[start : start + _ASSIGN_BLOCK_ROWS]
+        assignment[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+def _normalized(query_vector: List[float]):
+    np = require_numpy()
+    query = np.asarray(query_vector, dtype=np.float32)
+    norm = float(np.linalg.norm(query))
+    return query / norm if norm else None
+
+
+def _write_atomic(path: str, write) -> None:
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as handle:
+        write(handle)
+    os.replace(temp_path, path)
+
+
+def _config_int(key: str, default: int) -> int:
+    try:
+        return max(1, int(current_app.config.get(key, default)))
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,306 @@
+"""
+In-process exact vector index for small tenants.
+
+Public API
+----------
+    LocalIndex                                     (per user, read-only)
+    get_local_index(user_id) -> LocalIndex | None
+    invalidate_local_index(user_id) -> None
+
+With RETRIEVAL_LOCAL_INDEX on, users with at most
+RETRIEVAL_LOCAL_INDEX_MAX_CHUNKS searchable chunks are searched in-process
+instead of through the pgvector index: their current-ingestion embeddings are
+held as one contiguous, L2-normalized float32 matrix, so a cosine top-k is a
+single matrix-vector product plus ``argpartition`` and is exact (no ANN
+recall loss, no tenant filter fighting the index).
+
+The matrix is written once to RETRIEVAL_LOCAL_INDEX_DIR (default
+``instance/vector_index``) and memory-mapped from there, so every worker
+process on the host shares the same page-cache copy.  Files are named after
+a fingerprint of the user's ``(document_id, current_ingestion_id)`` pairs and
+the storage column; reingesting or deleting a document changes the
+fingerprint, and the next lookup rebuilds the index and removes the old
+files.  Each lookup costs one query on ``documents``.
+
+``numpy`` is only imported when the index is enabled; without it retrieval
+stays on pgvector.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from flask import current_app
+
+from app.db.models.chunk import Chunk
+from app.db.models.document import Document
+from app.extensions import db
+from app.services.rag.embedding_storage import get_embedding_storage, uses_half_column
+from app.services.rag.vector_store import VectorHit, as_float_list
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_CHUNKS = 5000
+DEFAULT_MAX_USERS = 64
+DEFAULT_DIR_NAME = "vector_index"
+
+
+@dataclass(frozen=True, slots=True)
+class LocalIndex:
+    user_id: str
+    fingerprint: str
+    matrix: Any  # numpy float32 (n_chunks, dim), rows L2-normalized, memory-mapped
+    chunk_ids: Any  # numpy int64 (n_chunks,)
+    document_codes: Any  # numpy int32 (n_chunks,), index into document_ids
+    document_ids: tuple[str, ...]
+
+    def __len__(self) -> int:
+        return len(self.document_codes)
+
+    def search(
+        self,
+        query_vector: list[float],
+        limit: int,
+        document_ids: list[str] | None = None,
+    ) -> list[VectorHit]:
+        """Exact cosine top-*limit*, nearest first."""
+        np = _numpy()
+        rows, scores = self._scores(query_vector, document_ids)
+        if limit <= 0 or not len(rows):
+            return []
+        if limit < len(rows):
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return self._hits(rows[top], scores[top])
+
+    def document_seeds(
+        self,
+        query_vector: list[float],
+        count: int,
+        document_ids: list[str] | None = None,
+    ) -> list[VectorHit]:
+        """Best chunk of each of the *count* best-matching documents, nearest first."""
+        np = _numpy()
+        rows, scores = self._scores(query_vector, document_ids)
+        if count <= 0 or not len(rows):
+            return []
+        codes = self.document_codes[rows]
+        # Group by document, best score first within each group.
+        order = np.lexsort((-scores, codes))
+        grouped = codes[order]
+        firsts = order[np.concatenate(([True], grouped[1:] != grouped[:-1]))]
+        firsts = firsts[np.argsort(-scores[firsts], kind="stable")][:count]
+        return self._hits(rows[firsts], scores[firsts])
+
+    def _scores(self, query_vector: list[float], document_ids: list[str] | None):
+        np = _numpy()
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if not norm or len(query) != self.matrix.shape[1]:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        rows = np.arange(len(self), dtype=np.int64)
+        if document_ids:
+            allowed = set(document_ids)
+            wanted = [code for code, document_id in enumerate(self.document_ids) if document_id in allowed]
+            rows = np.flatnonzero(np.isin(self.document_codes, wanted))
+            return rows, self.matrix[rows] @ (query / norm)
+        return rows, self.matrix @ (query / norm)
+
+    def _hits(self, rows, scores) -> list[VectorHit]:
+        return [
+            VectorHit(int(chunk_id), 1.0 - float(score), self.document_ids[code])
+            for chunk_id, code, score in zip(self.chunk_ids[rows], self.document_codes[rows], scores)
+        ]
+
+
+# Users whose corpus exceeded the chunk limit at this fingerprint.
+_TOO_LARGE = "too-large"
+
+_lock = threading.Lock()
+_cache: OrderedDict[str, tuple[str, LocalIndex | str]] = OrderedDict()
+_warned_missing_numpy = False
+
+
+def get_local_index(user_id: str) -> LocalIndex | None:
+    """Return the user's index, building it if needed; None means use pgvector."""
+    if not current_app.config.get("RETRIEVAL_LOCAL_INDEX"):
+        return None
+    if _numpy() is None:
+        global _warned_missing_numpy
+        if not _warned_missing_numpy:
+            log.warning("RETRIEVAL_LOCAL_INDEX is set but numpy is not installed")
+            _warned_missing_numpy = True
+        return None
+
+    storage_column = "embedding_half" if uses_half_column() else "embedding"
+    fingerprint = _fingerprint(user_id, storage_column)
+    if fingerprint is None:
+        return None
+
+    with _lock:
+        cached = _cache.get(user_id)
+        if cached is not None and cached[0] == fingerprint:
+            _cache.move_to_end(user_id)
+            return cached[1] if isinstance(cached[1], LocalIndex) else None
+
+    entry: LocalIndex | str
+    try:
+        entry = _load(user_id, fingerprint) or _build(user_id, fingerprint, storage_column) or _TOO_LARGE
+    except OSError as exc:
+        log.warning("local vector index for user %s unavailable: %s", user_id, exc)
+        return None
+
+    with _lock:
+        _cache[user_id] = (fingerprint, entry)
+        _cache.move_to_end(user_id)
+        while len(_cache) > _config_int("RETRIEVAL_LOCAL_INDEX_MAX_USERS", DEFAULT_MAX_USERS):
+            _cache.popitem(last=False)
+    return entry if isinstance(entry, LocalIndex) else None
+
+
+def invalidate_local_index(user_id: str) -> None:
+    """Drop the in-memory entry; files are replaced on the next rebuild."""
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def _fingerprint(user_id: str, storage_column: str) -> str | None:
+    corpus = sorted(
+        [document_id, ingestion_id]
+        for document_id, ingestion_id in (
+            db.session.query(Document.id, Document.current_ingestion_id)
+            .filter(
+                Document.user_id == user_id,
+                Document.is_deleted.is_(False),
+                Document.current_ingestion_id.isnot(None),
+            )
+            .all()
+        )
+    )
+    if not corpus:
+        return None
+    encoded = json.dumps({"corpus": corpus, "column": storage_column}, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+def _load(user_id: str, fingerprint: str) -> LocalIndex | None:
+    np = _numpy()
+    matrix_path, ids_path = _paths(user_id, fingerprint)
+    if not (os.path.exists(matrix_path) and os.path.exists(ids_path)):
+        return None
+    with np.load(ids_path) as ids:
+        chunk_ids = ids["chunk_ids"]
+        document_codes = ids["document_codes"]
+        document_ids = tuple(str(document_id) for document_id in ids["document_ids"])
+    return LocalIndex(
+        user_id=user_id,
+        fingerprint=fingerprint,
+        matrix=np.load(matrix_path, mmap_mode="r"),
+        chunk_ids=chunk_ids,
+        document_codes=document_codes,
+        document_ids=document_ids,
+    )
+
+
+def _build(user_id: str, fingerprint: str, storage_column: str) -> LocalIndex | None:
+    np = _numpy()
+    max_chunks = _config_int("RETRIEVAL_LOCAL_INDEX_MAX_CHUNKS", DEFAULT_MAX_CHUNKS)
+    embedding_column = getattr(Chunk, storage_column)
+    rows = (
+        db.session.query(Chunk.id, Chunk.document_id, embedding_column)
+        .join(Document, Document.id == Chunk.document_id)
+        .filter(
+            Chunk.user_id == user_id,
+            Document.user_id == user_id,
+            Document.is_deleted.is_(False),
+            Chunk.ingestion_id == Document.current_ingestion_id,
+            embedding_column.isnot(None),
+        )
+        .order_by(Chunk.id)
+        .limit(max_chunks + 1)
+        .all()
+    )
+    if not rows or len(rows) > max_chunks:
+        return None
+
+    document_ids = tuple(sorted({row[1] for row in rows}))
+    codes = {document_id: code for code, document_id in enumerate(document_ids)}
+    matrix = np.asarray([as_float_list(row[2]) for row in rows], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+
+    matrix_path, ids_path = _paths(user_id, fingerprint)
+    os.makedirs(os.path.dirname(matrix_path), exist_ok=True)
+    _remove_stale(user_id, fingerprint)
+    _write_atomic(matrix_path, lambda handle: np.save(handle, matrix))
+    _write_atomic(
+        ids_path,
+        lambda handle: np.savez(
+            handle,
+            chunk_ids=np.asarray([row[0] for row in rows], dtype=np.int64),
+            document_codes=np.asarray([codes[row[1]] for row in rows], dtype=np.int32),
+            document_ids=np.asarray(document_ids),
+        ),
+    )
+    log.info(
+        "built local vector index user_id=%s chunks=%d documents=%d storage=%s",
+        user_id,
+        len(rows),
+        len(document_ids),
+        get_embedding_storage(),
+    )
+    return _load(user_id, fingerprint)
+
+
+def _paths(user_id: str, fingerprint: str) -> tuple[str, str]:
+    base = os.path.join(_index_dir(), f"{user_id}.{fingerprint}")
+    return base + ".matrix.npy", base + ".ids.npz"
+
+
+def _index_dir() -> str:
+    configured = (current_app.config.get("RETRIEVAL_LOCAL_INDEX_DIR") or "").strip()
+    return configured or os.path.join(current_app.instance_path, DEFAULT_DIR_NAME)
+
+
+def _remove_stale(user_id: str, fingerprint: str) -> None:
+    directory = _index_dir()
+    prefix = f"{user_id}."
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and not name.startswith(f"{prefix}{fingerprint}."):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def _write_atomic(path: str, write) -> None:
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as handle:
+        write(handle)
+    os.replace(temp_path, path)
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _config_int(key: str, default: int) -> int:
+    try:
+        return max(1, int(current_app.config.get(key, default)))
+    except (TypeError, ValueError):
+        return default
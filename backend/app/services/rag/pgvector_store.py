@@ -0,0 +1,362 @@
+"""
+pgvector-backed vector store (VECTOR_STORE=pgvector, the default).
+
+Public API
+----------
+    PgVectorStore                                  (VectorStore)
+
+Searches run as SQL on the chunk embedding columns, so ``add`` and
+``delete_ingestion`` have nothing to do: ingestion already writes the
+vectors on the chunk rows and superseded ingestions are filtered out by
+``documents.current_ingestion_id``.
+
+Embedding storage
+-----------------
+The distance is computed on the column of the active EMBEDDING_STORAGE mode
+(see embedding_storage.py).  In ``binary`` mode the candidates are first
+narrowed to a Hamming-distance shortlist and then ranked by float16 cosine
+distance, so every retrieval path (plain, diversified) sees the same
+re-scored candidate set.  With RETRIEVAL_COARSE_PASS on (and a non-binary
+storage mode) the shortlist comes from cosine distance on the 256-dim
+``embedding_coarse`` prefix instead, re-ranked on the full vector.
+
+Both shortlists are HNSW scans filtered by user and current ingestion.  A
+plain HNSW scan returns at most ``hnsw.ef_search`` candidates *before* that
+filter, so a tenant with a small share of the table could get fewer than
+top_k chunks back.  The shortlist query therefore raises ``hnsw.ef_search``
+to the shortlist size (transaction-local, at most 1000) and, on pgvector >=
+0.8, turns on ``hnsw.iterative_scan`` so the index keeps scanning until the
+filtered shortlist is full.  On older pgvector a shortlist larger than 1000
+or a very selective filter can still come back short.
+
+Batches
+-------
+``search_rows_batch`` runs every query of a batch in one statement: the
+query vectors are a VALUES list and each one drives a ``LATERAL`` subquery
+that is exactly the single-query search, so each query keeps its own
+ordering, shortlist and LIMIT.
+"""
+
+from __future__ import annotations
+
+from typing import Any, List
+
+from flask import current_app
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
+from sqlalchemy import Integer, cast, column, func, text, true, update, values
+
+from app.db.models.chunk import Chunk
+from app.db.models.document import Document
+from app.extensions import db
+from app.services.rag.embedding_storage import (
+    COARSE_EMBEDDING_DIM,
+    EMBEDDING_DIM,
+    STORAGE_BINARY,
+    coarse_prefix,
+    embedding_columns,
+    get_embedding_storage,
+    pgvector_version,
+    uses_half_column,
+)
+from app.services.rag.vector_store import (
+    VectorHit,
+    VectorStore,
+    as_float_list,
+    iter_snapshot_segments,
+    result_columns,
+    write_snapshot_segment,
+)
+
+_EMBED_DIM = EMBEDDING_DIM  # Must match the Chunk.embedding / embedding_half columns
+_MAX_SHORTLIST_SIZE = 48
+_DEFAULT_BINARY_OVERSAMPLE = 10
+_DEFAULT_COARSE_OVERSAMPLE = 8
+_RESTORE_BATCH_SIZE = 500
+# hnsw.ef_search bounds (pgvector default 40, maximum 1000).
+_DEFAULT_EF_SEARCH = 40
+_MAX_EF_SEARCH = 1000
+# hnsw.iterative_scan first shipped in this pgvector release.
+_ITERATIVE_SCAN_MIN_PGVECTOR = (0, 8, 0)
+
+_iterative_scan_supported: bool | None = None
+
+
+class PgVectorStore(VectorStore):
+    name = "pgvector"
+
+    def add(
+        self,
+        *,
+        user_id: str,
+        document_id: str,
+        ingestion_id: str,
+        chunk_ids: List[int],
+        vectors: List[List[float]],
+    ) -> None:
+        return None
+
+    def delete_ingestion(self, ingestion_id: str) -> int:
+        return 0
+
+    def search(
+        self,
+        query_vector: List[float],
+        *,
+        user_id: str,
+        top_k: int,
+        document_ids: List[str] | None = None,
+    ) -> List[VectorHit]:
+        query, distance_expr = self.chunk_query(
+            query_vector=query_vector,
+            user_id=user_id,
+            document_ids=document_ids,
+            columns=[Chunk.id.label("chunk_id"), Chunk.document_id.label("document_id")],
+            shortlist_size=top_k,
+        )
+        rows = query.order_by(distance_expr.asc()).limit(top_k).all()
+        return [VectorHit(int(row.chunk_id), float(row.distance), row.document_id) for row in rows]
+
+    def search_rows(
+        self,
+        query_vector: List[float],
+        *,
+        user_id: str,
+        top_k: int,
+        document_ids: List[str] | None = None,
+    ) -> list:
+        # One query for ranking and result columns.
+        query, distance_expr = self.chunk_query(
+            query_vector=query_vector,
+            user_id=user_id,
+            document_ids=document_ids,
+            shortlist_size=top_k,
+        )
+        return query.order_by(distance_expr.asc()).limit(top_k).all()
+
+    def search_rows_batch(
+        self,
+        query_vectors: List[List[float]],
+        *,
+        user_id: str,
+        top_k: int,
+        document_ids: List[str] | None = None,
+    ) -> List[list]:
+        if not query_vectors:
+            return []
+        batch = values(
+            column("query_index", Integer),
+            column("query_vector", Vector(_EMBED_DIM)),
+            column("coarse_vector", Vector(COARSE_EMBEDDING_DIM)),
+            name="batch_queries",
+        ).data([(index, vector, coarse_prefix(vector)) for index, vector in enumerate(query_vectors)])
+
+        query, distance_expr = self.chunk_query(
+            # VALUES parameters arrive untyped; the casts inside chunk_query type them.
+            query_vector=batch.c.query_vector,
+            coarse_vector=batch.c.coarse_vector,
+            user_id=user_id,
+            document_ids=document_ids,
+            shortlist_size=top_k,
+        )
+        hits = query.order_by(distance_expr.asc()).limit(top_k).statement.lateral("hits")
+        rows = (
+            db.session.query(batch.c.query_index, hits)
+            .select_from(batch)
+            .join(hits, true())
+            .order_by(batch.c.query_index, hits.c.distance)
+            .all()
+        )
+
+        grouped: List[list] = [[] for _ in query_vectors]
+        for row in rows:
+            grouped[row.query_index].append(row)
+        return grouped
+
+    def document_seeds(
+        self,
+        query_vector: List[float],
+        *,
+        user_id: str,
+        count: int,
+        document_ids: List[str] | None = None,
+    ) -> List[VectorHit]:
+        ranked_query, _ = self.chunk_query(
+            query_vector=query_vector,
+            user_id=user_id,
+            document_ids=document_ids,
+            columns=[Chunk.id.label("chunk_id"), Chunk.document_id.label("document_id")],
+            include_document_rank=True,
+        )
+        ranked_subquery = ranked_query.subquery()
+        rows = (
+            db.session.query(ranked_subquery)
+            .filter(ranked_subquery.c.document_rank == 1)
+            .order_by(ranked_subquery.c.distance.asc())
+            .limit(count)
+            .all()
+        )
+        return [VectorHit(int(row.chunk_id), float(row.distance), row.document_id) for row in rows]
+
+    def snapshot(self, path: str) -> int:
+        embedding_column = Chunk.embedding_half if uses_half_column() else Chunk.embedding
+        documents = (
+            db.session.query(Document.user_id, Document.id, Document.current_ingestion_id)
+            .filter(Document.is_deleted.is_(False), Document.current_ingestion_id.isnot(None))
+            .all()
+        )
+        written = 0
+        for user_id, document_id, ingestion_id in documents:
+            rows = (
+                db.session.query(Chunk.id, embedding_column)
+                .filter(Chunk.ingestion_id == ingestion_id, embedding_column.isnot(None))
+                .order_by(Chunk.chunk_index)
+                .all()
+            )
+            if not rows:
+                continue
+            write_snapshot_segment(
+                path,
+                user_id=user_id,
+                document_id=document_id,
+                ingestion_id=ingestion_id,
+                chunk_ids=[int(row[0]) for row in rows],
+                vectors=[as_float_list(row[1]) for row in rows],
+            )
+            written += len(rows)
+        return written
+
+    def restore(self, path: str) -> int:
+        """Write snapshot vectors back onto existing chunk rows; the caller commits."""
+        restored = 0
+        for segment in iter_snapshot_segments(path):
+            updates = [
+                {"id": chunk_id, **embedding_columns([float(value) for value in vector])}
+                for chunk_id, vector in zip(segment["chunk_ids"], segment["vectors"])
+            ]
+            for start in range(0, len(updates), _RESTORE_BATCH_SIZE):
+                db.session.execute(update(Chunk), updates[start : start + _RESTORE_BATCH_SIZE])
+            restored += len(updates)
+        return restored
+
+    def chunk_query(
+        self,
+        *,
+        query_vector: Any,
+        user_id: str,
+        document_ids: List[str] | None,
+        coarse_vector: Any = None,
+        columns: list | None = None,
+        include_document_rank: bool = False,
+        shortlist_size: int = _MAX_SHORTLIST_SIZE,
+    ):
+        """
+        Return ``(query, distance_expr)`` over the user's current-ingestion
+        chunks, selecting *columns* (default: every result column) plus
+        ``distance`` and, optionally, ``document_rank``.
+
+        *query_vector* is a list of floats or a SQL expression (batches); for
+        an expression, *coarse_vector* must be its 256-dim prefix.
+        """
+        storage = get_embedding_storage()
+        if coarse_vector is None:
+            coarse_vector = coarse_prefix(query_vector)
+        # pgvector cosine distance operator (<=>).
+        # Lower distance -> more similar -> we ORDER BY distance ASC.
+        if uses_half_column(storage):
+            distance_expr = Chunk.embedding_half.cosine_distance(cast(query_vector, HALFVEC(_EMBED_DIM)))
+        else:
+            distance_expr = Chunk.embedding.cosine_distance(cast(query_vector, Vector(_EMBED_DIM)))
+
+        columns = [*(columns if columns is not None else result_columns()), distance_expr.label("distance")]
+        if include_document_rank:
+            columns.append(
+                db.func.row_number().over(
+                    partition_by=Chunk.document_id,
+                    order_by=distance_expr.asc(),
+                ).label("document_rank")
+            )
+
+        query = (
+            db.session.query(*columns)
+            .join(Document, Document.id == Chunk.document_id)
+            .filter(
+                Chunk.user_id == user_id,
+                Document.user_id == user_id,
+                Document.is_deleted.is_(False),
+                Document.current_ingestion_id.isnot(None),
+                Chunk.ingestion_id == Document.current_ingestion_id,
+            )
+        )
+
+        if document_ids:
+            query = query.filter(Document.id.in_(document_ids))
+
+        first_pass = _first_pass(storage, query_vector, coarse_vector)
+        if first_pass is not None:
+            order_expr, oversample = first_pass
+            _prepare_shortlist_scan(max(shortlist_size, 1) * oversample)
+            query = query.filter(
+                Chunk.id.in_(
+                    _shortlist(
+                        order_expr=order_expr,
+                        user_id=user_id,
+                        document_ids=document_ids,
+                        limit=max(shortlist_size, 1) * oversample,
+                    )
+                )
+            )
+
+        return query, distance_expr
+
+
+def _first_pass(storage: str, query_vector: Any, coarse_vector: Any):
+    """Return (distance expression, oversample factor) of the coarse pass, if any."""
+    if storage == STORAGE_BINARY:
+        # Must match the ix_chunks_embedding_bits expression index exactly.
+        hamming_expr = cast(func.binary_quantize(Chunk.embedding_half), BIT(_EMBED_DIM)).op(
+            "<~>", return_type=db.Float
+        )(func.binary_quantize(cast(query_vector, HALFVEC(_EMBED_DIM))))
+        return hamming_expr, _config_int("RETRIEVAL_BINARY_OVERSAMPLE", _DEFAULT_BINARY_OVERSAMPLE)
+    if current_app.config.get("RETRIEVAL_COARSE_PASS"):
+        coarse_expr = Chunk.embedding_coarse.cosine_distance(cast(coarse_vector, Vector(COARSE_EMBEDDING_DIM)))
+        return coarse_expr, _config_int("RETRIEVAL_COARSE_OVERSAMPLE", _DEFAULT_COARSE_OVERSAMPLE)
+    return None
+
+
+def _prepare_shortlist_scan(limit: int) -> None:
+    """Let the HNSW shortlist scan fill *limit* rows after the user filter."""
+    global _iterative_scan_supported
+    ef_search = min(max(limit, _DEFAULT_EF_SEARCH), _MAX_EF_SEARCH)
+    db.session.execute(text("SELECT set_config('hnsw.ef_search', :value, true)"), {"value": str(ef_search)})
+    if _iterative_scan_supported is None:
+        _iterative_scan_supported = pgvector_version() >= _ITERATIVE_SCAN_MIN_PGVECTOR
+    if _iterative_scan_supported:
+        db.session.execute(text("SELECT set_config('hnsw.iterative_scan', 'strict_order', true)"))
+
+
+def _shortlist(
+    *,
+    order_expr,
+    user_id: str,
+    document_ids: List[str] | None,
+    limit: int,
+):
+    shortlist = (
+        db.session.query(Chunk.id)
+        .join(Document, Document.id == Chunk.document_id)
+        .filter(
+            Chunk.user_id == user_id,
+            Document.is_deleted.is_(False),
+            Chunk.ingestion_id == Document.current_ingestion_id,
+        )
+    )
+    if document_ids:
+        shortlist = shortlist.filter(Document.id.in_(document_ids))
+    return shortlist.order_by(order_expr.asc()).limit(limit).statement
+
+
+def _config_int(key: str, default: int) -> int:
+    try:
+        return int(current_app.config.get(key, default))
+    except (TypeError, ValueError):
+        return default
@@ -5,6 +5,9 @@ Public API
 ----------
     retrieve_chunks(query_text, user_id, top_k=5) -> list[dict]
     retrieve_chunks_diversified(...) -> list[dict]
+    retrieve_chunks_batch(queries, user_id, top_k=5, document_ids=None) -> list[list[dict]]
+    merge_adjacent_chunks(results) -> list[dict]
+    embed_query(query_text) -> list[float]
 
 Each returned dict has the following keys:
     chunk_id        : int   - primary key of the Chunk row
@@ -14,6 +17,46 @@ Each returned dict has the following keys:
     document_title  : str   - human-readable document title
     source_type     : str   - "upload" | "text"
     filename        : str | None - original filename (upload only, else None)
+    ingestion_id    : str   - ingestion run the chunk belongs to
+    chunk_index     : int   - position of the (first) chunk in that run
+    page_start      : int | None
+    page_end        : int | None
+Merged spans additionally carry ``chunk_ids`` (every chunk in the span, in
+document order); ``chunk_id`` and ``score`` are those of the best chunk.
+
+Post-retrieval spans
+--------------------
+Consecutive chunks overlap by CHUNK_OVERLAP characters.  With
+RETRIEVAL_MERGE_ADJACENT on (default), hits with adjacent ``chunk_index``
+values from the same ingestion are merged into one span: the text is joined
+with the overlap removed once and the page range is combined.  With
+RETRIEVAL_NEIGHBOR_WINDOW > 0, the top RETRIEVAL_NEIGHBOR_HITS hits are first
+widened by that many chunks on each side, fetched in one lookup on the
+(ingestion_id, chunk_index) unique index, and merged the same way.
+
+Vector search
+-------------
+Ranking is delegated to the configured VectorStore (VECTOR_STORE, see
+vector_store.py): pgvector SQL by default, or the file-backed IVF store.
+With RETRIEVAL_LOCAL_INDEX on, users small enough for an in-process index
+(see local_index.py) are ranked exactly in NumPy instead.  Either way only
+the winning chunks are loaded from the database, in one query.
+
+Result cache
+------------
+With RETRIEVAL_CACHE_ENABLED on (default), rankings are cached per user,
+normalized query, document filter, top_k and mode, and tagged with the
+user's corpus version (see retrieval_cache.py).  A hit skips the embedding
+call and the vector search; only the winning rows are reloaded.  Query
+vectors are remembered for the rest of the request, so ``embed_query`` on
+the same question afterwards (the answer cache) does not embed it again.
+
+Batches
+-------
+``retrieve_chunks_batch`` embeds all (distinct) queries in one wrapper call
+and runs the searches through ``VectorStore.search_rows_batch`` - for
+pgvector a single ``LATERAL`` statement - so N queries cost two round trips
+instead of 2N.  Results are per query, in the same shape as retrieve_chunks.
 
 Architecture rules enforced here:
   - LLM/embedding calls only via WrapperClient (get_client).
@@ -28,41 +71,86 @@ from __future__ import annotations
 import logging
 from typing import List
 
+from flask import current_app
+from sqlalchemy import tuple_
+
 from app.db.models.chunk import Chunk
-from app.db.models.document import Document
 from app.extensions import db
+from app.services.observability.metrics import RETRIEVAL_SECONDS
+from app.services.observability.tracing import span
+from app.services.rag.chunking import overlap_length
+from app.services.rag.embedding_storage import prepare_embedding
+from app.services.rag.local_index import LocalIndex, get_local_index
+from app.services.rag.retrieval_cache import (
+    lookup_retrieval,
+    lookup_retrieval_batch,
+    recall_query_vector,
+    remember_query_vector,
+    store_retrieval,
+)
+from app.services.rag.vector_store import get_vector_store, load_hit_rows, load_hit_rows_batch
 from app.services.wrapper.client import WrapperError, get_client, get_embedding_model
 
 log = logging.getLogger(__name__)
 
-_EMBED_DIM = 1536  # Must match the Vector(1536) column on Chunk.embedding
 _MAX_DIVERSIFIED_CANDIDATES = 48
+_DEFAULT_NEIGHBOR_HITS = 2
 
 
 def _embed_query(query_text: str) -> List[float]:
     """
     Embed a single query string via the wrapper and return a 1536-dim vector.
 
-    Gemini embedding-001 returns 3072 dims; we truncate to 1536 using
-    Matryoshka truncation (same strategy as ingestion) so the vectors are
-    comparable to stored chunk embeddings.
+    Gemini embedding-001 returns 3072 dims; we truncate to EMBEDDING_DIM using
+    Matryoshka truncation (same strategy as ingestion, see
+    embedding_storage.prepare_embedding) so the vectors are comparable to
+    stored chunk embeddings.
 
     Raises WrapperError on any embedding failure.
     """
+    return _embed_queries([query_text])[0]
+
+
+def embed_query(query_text: str) -> List[float]:
+    """
+    Embed *query_text* the same way retrieval does; raises WrapperError.
+
+    Returns the vector retrieval already computed for the same query in this
+    request (see retrieval_cache.remember_query_vector) without a new call.
+    """
+    vector = recall_query_vector(query_text)
+    if vector is None:
+        vector = _embed_query(query_text.strip())
+        remember_query_vector(query_text, vector)
+    return vector
+
+
+def _embed_queries(query_texts: List[str]) -> List[List[float]]:
+    """Embed several query strings in one wrapper call, aligned with the input."""
     client = get_client()
-    response = client.embeddings(model=get_embedding_model(), input=query_text)
+    model = get_embedding_model()
+    with span("retrieval.embed", **{"gen_ai.request.model": model, "input_count": len(query_texts)}):
+        response = client.embeddings(
+            model=model,
+            input=query_texts[0] if len(query_texts) == 1 else query_texts,
+        )
 
     data = response.get("data", [])
     if not data:
         raise WrapperError("Embeddings response contained no data items")
+    if len(data) < len(query_texts):
+        raise WrapperError(f"Embeddings response has {len(data)} items for {len(query_texts)} inputs")
 
-    embedding = data[0].get("embedding")
-    if embedding is None:
-        raise WrapperError("Embedding response missing 'embedding' field")
-
-    return embedding[:_EMBED_DIM]
+    vectors: List[List[float]] = []
+    for item in sorted(data, key=lambda item: item.get("index", 0)):
+        embedding = item.get("embedding")
+        if embedding is None:
+            raise WrapperError("Embedding response missing 'embedding' field")
+        vectors.append(prepare_embedding(embedding))
+    return vectors
 
 
+@RETRIEVAL_SECONDS.time(mode="plain")
 def retrieve_chunks(
     query_text: str,
     user_id: str,
@@ -98,27 +186,37 @@ def retrieve_chunks(
     if not query_text or not query_text.strip():
         return []
 
-    query_vector = _embed_query(query_text.strip())
-    rows = _fetch_chunk_rows(
-        query_vector=query_vector,
-        user_id=user_id,
-        top_k=top_k,
-        document_ids=document_ids,
+    cache_entry, cached_hits = lookup_retrieval(
+        user_id, query_text, top_k=top_k, document_ids=document_ids
     )
-    results = _rows_to_results(rows)
+    if cached_hits is not None:
+        rows = load_hit_rows(cached_hits, user_id)
+    else:
+        query_vector = embed_query(query_text)
+        rows = _fetch_chunk_rows(
+            query_vector=query_vector,
+            user_id=user_id,
+            top_k=top_k,
+            document_ids=document_ids,
+            local_index=get_local_index(user_id),
+        )
+        store_retrieval(cache_entry, rows, query_vector)
+    results = _build_spans(_rows_to_results(rows), user_id)
 
     log.debug(
-        "retrieve_chunks user_id=%s top_k=%d doc_filter=%s query_len=%d results=%d",
+        "retrieve_chunks user_id=%s top_k=%d doc_filter=%s query_len=%d results=%d cached=%s",
         user_id,
         top_k,
         len(document_ids) if document_ids else "all",
         len(query_text),
         len(results),
+        cached_hits is not None,
     )
 
     return results
 
 
+@RETRIEVAL_SECONDS.time(mode="diversified")
 def retrieve_chunks_diversified(
     query_text: str,
     user_id: str,
@@ -137,7 +235,18 @@ def retrieve_chunks_diversified(
         return []
 
     minimum_document_count = max(1, min(int(minimum_document_count), top_k))
-    query_vector = _embed_query(query_text.strip())
+    cache_entry, cached_hits = lookup_retrieval(
+        user_id,
+        query_text,
+        top_k=top_k,
+        document_ids=document_ids,
+        mode=("diversified", minimum_document_count),
+    )
+    if cached_hits is not None:
+        return _build_spans(_rows_to_results(load_hit_rows(cached_hits, user_id)), user_id)
+
+    query_vector = embed_query(query_text)
+    local_index = get_local_index(user_id)
 
     if minimum_document_count <= 1:
         rows = _fetch_chunk_rows(
@@ -145,24 +254,22 @@ def retrieve_chunks_diversified(
             user_id=user_id,
             top_k=top_k,
             document_ids=document_ids,
+            local_index=local_index,
         )
-        return _rows_to_results(rows)
-
-    ranked_query, _ = _build_chunk_query(
-        query_vector=query_vector,
-        user_id=user_id,
-        document_ids=document_ids,
-        include_document_rank=True,
-    )
-    ranked_subquery = ranked_query.subquery()
-
-    seed_rows = (
-        db.session.query(ranked_subquery)
-        .filter(ranked_subquery.c.document_rank == 1)
-        .order_by(ranked_subquery.c.distance.asc())
-        .limit(minimum_document_count)
-        .all()
-    )
+        store_retrieval(cache_entry, rows, query_vector)
+        return _build_spans(_rows_to_results(rows), user_id)
+
+    store = get_vector_store()
+    with span("retrieval.seeds", **_search_attributes(store, local_index, minimum_document_count, document_ids)):
+        if local_index is not None:
+            seed_rows = local_index.document_seeds(query_vector, minimum_document_count, document_ids)
+        else:
+            seed_rows = store.document_seeds(
+                query_vector,
+                user_id=user_id,
+                count=minimum_document_count,
+                document_ids=document_ids,
+            )
 
     if len(seed_rows) <= 1:
         rows = _fetch_chunk_rows(
@@ -170,8 +277,10 @@ def retrieve_chunks_diversified(
             user_id=user_id,
             top_k=top_k,
             document_ids=document_ids,
+            local_index=local_index,
         )
-        results = _rows_to_results(rows)
+        store_retrieval(cache_entry, rows, query_vector)
+        results = _build_spans(_rows_to_results(rows), user_id)
         log.debug(
             "retrieve_chunks_diversified fell back to global results user_id=%s top_k=%d "
             "doc_filter=%s query_len=%d results=%d",
@@ -187,19 +296,24 @@ def retrieve_chunks_diversified(
         _MAX_DIVERSIFIED_CANDIDATES,
         max(top_k * 4, top_k + (minimum_document_count * 4)),
     )
-    candidate_rows = (
-        db.session.query(ranked_subquery)
-        .order_by(ranked_subquery.c.distance.asc())
-        .limit(candidate_limit)
-        .all()
-    )
+    with span("retrieval.search", **_search_attributes(store, local_index, candidate_limit, document_ids)):
+        if local_index is not None:
+            candidate_rows = local_index.search(query_vector, candidate_limit, document_ids)
+        else:
+            candidate_rows = store.search(
+                query_vector,
+                user_id=user_id,
+                top_k=candidate_limit,
+                document_ids=document_ids,
+            )
 
     selected_rows = _select_diversified_rows(
         seed_rows=seed_rows,
         candidate_rows=candidate_rows,
         top_k=top_k,
     )
-    results = _rows_to_results(selected_rows)
+    store_retrieval(cache_entry, selected_rows, query_vector)
+    results = _build_spans(_rows_to_results(load_hit_rows(selected_rows, user_id)), user_id)
 
     log.debug(
         "retrieve_chunks_diversified user_id=%s top_k=%d doc_filter=%s min_docs=%d "
@@ -216,65 +330,108 @@ def retrieve_chunks_diversified(
     return results
 
 
-def _fetch_chunk_rows(
-    *,
-    query_vector: List[float],
+@RETRIEVAL_SECONDS.time(mode="batch")
+def retrieve_chunks_batch(
+    queries: List[str],
     user_id: str,
-    top_k: int,
-    document_ids: List[str] | None,
-):
-    query, distance_expr = _build_chunk_query(
-        query_vector=query_vector,
-        user_id=user_id,
-        document_ids=document_ids,
+    top_k: int = 5,
+    document_ids: List[str] | None = None,
+) -> List[List[dict]]:
+    """
+    ``retrieve_chunks`` for several queries at once.
+
+    Returns one result list per entry of *queries*, in order; blank queries
+    get ``[]``.  Duplicate queries are embedded and searched once, and
+    queries found in the result cache are not embedded at all.
+    """
+    texts = [(query or "").strip() for query in queries]
+    unique_texts = list(dict.fromkeys(text for text in texts if text))
+    if not unique_texts:
+        return [[] for _ in texts]
+
+    lookups = dict(
+        zip(
+            unique_texts,
+            lookup_retrieval_batch(user_id, unique_texts, top_k=top_k, document_ids=document_ids),
+        )
+    )
+    cached_texts = [text for text in unique_texts if lookups[text][1] is not None]
+    missed_texts = [text for text in unique_texts if lookups[text][1] is None]
+    rows_by_text = dict(
+        zip(cached_texts, load_hit_rows_batch([lookups[text][1] for text in cached_texts], user_id))
     )
-    return query.order_by(distance_expr.asc()).limit(top_k).all()
+
+    if missed_texts:
+        query_vectors = _embed_queries(missed_texts)
+        for text, vector in zip(missed_texts, query_vectors):
+            remember_query_vector(text, vector)
+        local_index = get_local_index(user_id)
+        store = get_vector_store()
+        with span(
+            "retrieval.search_batch",
+            queries=len(query_vectors),
+            **_search_attributes(store, local_index, top_k, document_ids),
+        ):
+            if local_index is not None:
+                row_lists = load_hit_rows_batch(
+                    [local_index.search(vector, top_k, document_ids) for vector in query_vectors],
+                    user_id,
+                )
+            else:
+                row_lists = store.search_rows_batch(
+                    query_vectors,
+                    user_id=user_id,
+                    top_k=top_k,
+                    document_ids=document_ids,
+                )
+        for text, vector, rows in zip(missed_texts, query_vectors, row_lists):
+            store_retrieval(lookups[text][0], rows, vector)
+            rows_by_text[text] = rows
+
+    results_by_text = {
+        text: _build_spans(_rows_to_results(rows_by_text[text]), user_id) for text in unique_texts
+    }
+    log.debug(
+        "retrieve_chunks_batch user_id=%s queries=%d unique=%d cached=%d top_k=%d doc_filter=%s",
+        user_id,
+        len(texts),
+        len(unique_texts),
+        len(cached_texts),
+        top_k,
+        len(document_ids) if document_ids else "all",
+    )
+    return [[dict(result) for result in results_by_text[text]] if text else [] for text in texts]
 
 
-def _build_chunk_query(
+def _fetch_chunk_rows(
     *,
     query_vector: List[float],
     user_id: str,
+    top_k: int,
     document_ids: List[str] | None,
-    include_document_rank: bool = False,
+    local_index: LocalIndex | None = None,
 ):
-    # pgvector cosine distance operator (<=>).
-    # Lower distance -> more similar -> we ORDER BY distance ASC.
-    distance_expr = Chunk.embedding.cosine_distance(query_vector)
-
-    columns = [
-        Chunk.id.label("chunk_id"),
-        Chunk.document_id.label("document_id"),
-        Chunk.content.label("snippet"),
-        Document.title.label("document_title"),
-        Document.source_type.label("source_type"),
-        Document.filename.label("filename"),
-        distance_expr.label("distance"),
-    ]
-    if include_document_rank:
-        columns.append(
-            db.func.row_number().over(
-                partition_by=Chunk.document_id,
-                order_by=distance_expr.asc(),
-            ).label("document_rank")
-        )
-
-    query = (
-        db.session.query(*columns)
-        .join(Document, Document.id == Chunk.document_id)
-        .filter(
-            Chunk.user_id == user_id,
-            Document.user_id == user_id,
-            Document.is_deleted.is_(False),
-            Document.current_ingestion_id.isnot(None),
-            Chunk.ingestion_id == Document.current_ingestion_id,
-        )
-    )
-
-    if document_ids:
-        query = query.filter(Document.id.in_(document_ids))
-
-    return query, distance_expr
+    store = get_vector_store()
+    with span("retrieval.search", **_search_attributes(store, local_index, top_k, document_ids)) as search_span:
+        if local_index is not None:
+            rows = load_hit_rows(local_index.search(query_vector, top_k, document_ids), user_id)
+        else:
+            rows = store.search_rows(
+                query_vector,
+                user_id=user_id,
+                top_k=top_k,
+                document_ids=document_ids,
+            )
+        search_span.set_attribute("rows", len(rows))
+    return rows
+
+
+def _search_attributes(store, local_index: LocalIndex | None, top_k: int, document_ids: List[str] | None) -> dict:
+    return {
+        "vector_store": "local_index" if local_index is not None else store.name,
+        "top_k": top_k,
+        "document_filter": len(document_ids) if document_ids else 0,
+    }
 
 
 def _select_diversified_rows(
@@ -312,11 +469,141 @@ def _rows_to_results(rows) -> List[dict]:
                 "document_title": _row_value(row, "document_title"),
                 "source_type": _row_value(row, "source_type"),
                 "filename": _row_value(row, "filename"),
+                "ingestion_id": _row_value(row, "ingestion_id"),
+                "chunk_index": _row_value(row, "chunk_index"),
+                "page_start": _row_value(row, "page_start"),
+                "page_end": _row_value(row, "page_end"),
             }
         )
     return results
 
 
+def merge_adjacent_chunks(results: List[dict]) -> List[dict]:
+    """
+    Merge results that are consecutive chunks of the same ingestion.
+
+    Spans keep the position of their best-ranked member.  Results without
+    ``ingestion_id`` / ``chunk_index`` are passed through unchanged.
+    """
+    runs: dict[str, list[tuple[int, dict]]] = {}
+    passthrough: list[tuple[int, dict]] = []
+    for position, result in enumerate(results):
+        if result.get("ingestion_id") is None or result.get("chunk_index") is None:
+            passthrough.append((position, result))
+        else:
+            runs.setdefault(result["ingestion_id"], []).append((position, result))
+
+    spans = list(passthrough)
+    for members in runs.values():
+        members.sort(key=lambda item: item[1]["chunk_index"])
+        run = [members[0]]
+        for member in members[1:]:
+            previous_index = run[-1][1]["chunk_index"]
+            if member[1]["chunk_index"] == previous_index:
+                continue
+            if member[1]["chunk_index"] == previous_index + 1:
+                run.append(member)
+                continue
+            spans.append(_merge_run(run))
+            run = [member]
+        spans.append(_merge_run(run))
+
+    spans.sort(key=lambda item: item[0])
+    return [span for _, span in spans]
+
+
+def _merge_run(run: list[tuple[int, dict]]) -> tuple[int, dict]:
+    if len(run) == 1:
+        return run[0]
+
+    best_position, best = min(run, key=lambda item: (-float(item[1]["score"]), item[0]))
+    text = run[0][1]["snippet"] or ""
+    for _, member in run[1:]:
+        snippet = member["snippet"] or ""
+        overlap = overlap_length(text, snippet)
+        text = text + snippet[overlap:] if overlap else f"{text}\n{snippet}"
+
+    pages = [
+        page
+        for _, member in run
+        for page in (member.get("page_start"), member.get("page_end"))
+        if page is not None
+    ]
+    span = {
+        **best,
+        "snippet": text,
+        "chunk_index": run[0][1]["chunk_index"],
+        "page_start": min(pages) if pages else None,
+        "page_end": max(pages) if pages else None,
+        "chunk_ids": [member["chunk_id"] for _, member in run],
+    }
+    return best_position, span
+
+
+def _build_spans(results: List[dict], user_id: str) -> List[dict]:
+    window = _config_int("RETRIEVAL_NEIGHBOR_WINDOW", 0)
+    if window > 0 and results:
+        results = _expand_neighbors(results, user_id, window)
+        return merge_adjacent_chunks(results)
+    if current_app.config.get("RETRIEVAL_MERGE_ADJACENT", True):
+        return merge_adjacent_chunks(results)
+    return results
+
+
+def _expand_neighbors(results: List[dict], user_id: str, window: int) -> List[dict]:
+    present = {(result["ingestion_id"], result["chunk_index"]) for result in results}
+    wanted: dict[tuple[str, int], int] = {}
+    hit_count = max(1, _config_int("RETRIEVAL_NEIGHBOR_HITS", _DEFAULT_NEIGHBOR_HITS))
+    for position, hit in enumerate(results[:hit_count]):
+        for offset in range(-window, window + 1):
+            key = (hit["ingestion_id"], hit["chunk_index"] + offset)
+            if offset and key[1] >= 0 and key not in present:
+                wanted.setdefault(key, position)
+    if not wanted:
+        return results
+
+    rows = (
+        db.session.query(
+            Chunk.id,
+            Chunk.ingestion_id,
+            Chunk.chunk_index,
+            Chunk.page_start,
+            Chunk.page_end,
+            Chunk.content,
+        )
+        .filter(
+            Chunk.user_id == user_id,
+            tuple_(Chunk.ingestion_id, Chunk.chunk_index).in_(list(wanted)),
+        )
+        .all()
+    )
+
+    # Neighbours are inserted right after their hit, with the hit's score, so
+    # merging folds them into the hit's span.
+    expanded: list[list[dict]] = [[result] for result in results]
+    for row in sorted(rows, key=lambda row: row.chunk_index):
+        hit_position = wanted[(row.ingestion_id, row.chunk_index)]
+        hit = results[hit_position]
+        expanded[hit_position].append(
+            {
+                **hit,
+                "chunk_id": int(row.id),
+                "snippet": row.content,
+                "chunk_index": row.chunk_index,
+                "page_start": row.page_start,
+                "page_end": row.page_end,
+            }
+        )
+    return [result for group in expanded for result in group]
+
+
+def _config_int(key: str, default: int) -> int:
+    try:
+        return int(current_app.config.get(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
 def _row_value(row, key: str):
     mapping = getattr(row, "_mapping", None)
     if mapping is not None and key in mapping:
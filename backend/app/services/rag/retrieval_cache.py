@@ -0,0 +1,220 @@
+"""
+Per-process cache of retrieval rankings.
+
+Public API
+----------
+    RetrievalCacheEntry                            (key + corpus version)
+    lookup_retrieval(user_id, query_text, *, top_k, document_ids, mode) -> (entry, hits)
+    lookup_retrieval_batch(user_id, query_texts, *, top_k, document_ids, mode) -> list[(entry, hits)]
+    store_retrieval(entry, rows, query_vector=None) -> None
+    invalidate_retrieval_cache(user_id) -> None
+    clear_retrieval_cache() -> None
+    remember_query_vector(query_text, vector) -> None
+    recall_query_vector(query_text) -> list[float] | None
+
+With RETRIEVAL_CACHE_ENABLED on (default), a repeated question in the same
+scope skips the query embedding and the vector search: the cache keeps the
+ranked ``(chunk_id, distance)`` hits, and the caller only reloads those rows
+by primary key (which re-checks user and current-ingestion scoping).
+
+Entries are keyed by user, normalized query text (case-folded, whitespace
+collapsed), sorted document filter, top_k, the retrieval mode (plain or
+diversified with its minimum document count) and the ranking settings
+(storage mode, coarse pass, vector store, ...).  Each entry also records the
+user's corpus version: a hash of their ``(document_id,
+current_ingestion_id)`` pairs, read with one query on ``documents`` per
+lookup.  Ingesting or deleting a document changes that version, so stale
+entries are never served, also across worker processes; the ingestion and
+delete paths additionally drop the user's entries to free memory.  The cache
+holds at most RETRIEVAL_CACHE_MAX_ENTRIES entries (LRU).
+
+Query vectors
+-------------
+Every query embedding retrieval computes is also remembered for the rest of
+the current application context (``flask.g``, i.e. the request or
+background job), keyed by the normalized query text, and cache entries keep
+the vector of the query that filled them so a hit remembers it too.
+``retrieval.embed_query`` reads it back, so code that needs the question's
+vector after retrieval (the semantic answer cache) costs no second
+embedding call.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, List, NamedTuple
+
+from flask import current_app, g, has_app_context
+
+from app.services.observability.metrics import CACHE_REQUESTS
+from app.services.observability.tracing import span
+from app.services.rag.vector_store import VectorHit, current_ingestions
+
+DEFAULT_MAX_ENTRIES = 1024
+
+# Settings that change the ranking and therefore belong in the key.
+_RANKING_SETTINGS = (
+    "EMBEDDING_STORAGE",
+    "EMBEDDING_DIM",
+    "RETRIEVAL_BINARY_OVERSAMPLE",
+    "RETRIEVAL_COARSE_PASS",
+    "RETRIEVAL_COARSE_OVERSAMPLE",
+    "RETRIEVAL_LOCAL_INDEX",
+    "VECTOR_STORE",
+    "VECTOR_STORE_IVF_PROBES",
+)
+
+
+class RetrievalCacheEntry(NamedTuple):
+    key: tuple
+    corpus_version: str
+
+
+_lock = threading.Lock()
+_entries: OrderedDict[tuple, tuple[str, tuple[VectorHit, ...], List[float] | None]] = OrderedDict()
+
+
+def lookup_retrieval(
+    user_id: str,
+    query_text: str,
+    *,
+    top_k: int,
+    document_ids: List[str] | None,
+    mode: tuple = ("plain",),
+) -> tuple[RetrievalCacheEntry | None, List[VectorHit] | None]:
+    """
+    Return ``(entry, hits)``.  *hits* is the cached ranking or None on a miss;
+    *entry* is what to pass to ``store_retrieval`` after a miss, or None when
+    the cache is disabled or the user has nothing searchable.
+    """
+    return lookup_retrieval_batch(
+        user_id, [query_text], top_k=top_k, document_ids=document_ids, mode=mode
+    )[0]
+
+
+def lookup_retrieval_batch(
+    user_id: str,
+    query_texts: List[str],
+    *,
+    top_k: int,
+    document_ids: List[str] | None,
+    mode: tuple = ("plain",),
+) -> List[tuple[RetrievalCacheEntry | None, List[VectorHit] | None]]:
+    """``lookup_retrieval`` for several queries with one corpus-version query."""
+    if not current_app.config.get("RETRIEVAL_CACHE_ENABLED", True) or _max_entries() <= 0:
+        return [(None, None) for _ in query_texts]
+    with span("retrieval.cache_lookup", queries=len(query_texts)) as lookup_span:
+        results = _lookup(user_id, query_texts, top_k=top_k, document_ids=document_ids, mode=mode)
+        hit_count = sum(1 for _, hits in results if hits is not None)
+        lookup_span.set_attribute("hits", hit_count)
+    CACHE_REQUESTS.inc(hit_count, cache="retrieval", result="hit")
+    CACHE_REQUESTS.inc(len(results) - hit_count, cache="retrieval", result="miss")
+    return results
+
+
+def _lookup(
+    user_id: str,
+    query_texts: List[str],
+    *,
+    top_k: int,
+    document_ids: List[str] | None,
+    mode: tuple,
+) -> List[tuple[RetrievalCacheEntry | None, List[VectorHit] | None]]:
+    version = _corpus_version(user_id)
+    if version is None:
+        return [(None, None) for _ in query_texts]
+
+    scope = (
+        tuple(sorted(set(document_ids))) if document_ids else None,
+        int(top_k),
+        tuple(mode),
+        tuple(str(current_app.config.get(name)) for name in _RANKING_SETTINGS),
+    )
+    results = []
+    with _lock:
+        for query_text in query_texts:
+            entry = RetrievalCacheEntry(key=(user_id, _normalize(query_text), *scope), corpus_version=version)
+            cached = _entries.get(entry.key)
+            if cached is not None and cached[0] != version:
+                del _entries[entry.key]
+                cached = None
+            if cached is None:
+                results.append((entry, None))
+                continue
+            _entries.move_to_end(entry.key)
+            results.append((entry, list(cached[1])))
+            if cached[2] is not None:
+                remember_query_vector(query_text, cached[2])
+    return results
+
+
+def store_retrieval(
+    entry: RetrievalCacheEntry | None,
+    rows: List[Any],
+    query_vector: List[float] | None = None,
+) -> None:
+    """Remember the ranking of *rows* (anything with chunk_id / distance / document_id)."""
+    if entry is None:
+        return
+    hits = tuple(
+        VectorHit(int(_row_value(row, "chunk_id")), float(_row_value(row, "distance")), _row_value(row, "document_id"))
+        for row in rows
+    )
+    with _lock:
+        _entries[entry.key] = (entry.corpus_version, hits, query_vector)
+        _entries.move_to_end(entry.key)
+        while len(_entries) > _max_entries():
+            _entries.popitem(last=False)
+
+
+def invalidate_retrieval_cache(user_id: str) -> None:
+    with _lock:
+        for key in [key for key in _entries if key[0] == user_id]:
+            del _entries[key]
+
+
+def clear_retrieval_cache() -> None:
+    with _lock:
+        _entries.clear()
+
+
+def remember_query_vector(query_text: str, vector: List[float]) -> None:
+    if not has_app_context():
+        return
+    vectors = g.setdefault("retrieval_query_vectors", {})
+    vectors[_normalize(query_text)] = vector
+
+
+def recall_query_vector(query_text: str) -> List[float] | None:
+    if not has_app_context():
+        return None
+    return g.get("retrieval_query_vectors", {}).get(_normalize(query_text))
+
+
+def _corpus_version(user_id: str) -> str | None:
+    corpus = sorted([document_id, ingestion_id] for document_id, ingestion_id in current_ingestions(user_id))
+    if not corpus:
+        return None
+    encoded = json.dumps(corpus, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+def _normalize(query_text: str) -> str:
+    return " ".join(query_text.split()).casefold()
+
+
+def _max_entries() -> int:
+    try:
+        return int(current_app.config.get("RETRIEVAL_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+    except (TypeError, ValueError):
+        return DEFAULT_MAX_ENTRIES
+
+
+def _row_value(row, key: str):
+    mapping = getattr(row, "_mapping", None)
+    if mapping is not None and key in mapping:
+        return mapping[key]
+    return getattr(row, key)
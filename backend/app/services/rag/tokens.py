@@ -0,0 +1,46 @@
+"""
+Approximate token counting for prompt budgeting.
+
+Public API
+----------
+    estimate_tokens(text: str) -> int
+    estimate_message_tokens(messages: list[dict]) -> int
+    truncate_to_tokens(text: str, max_tokens: int) -> str
+
+The generation models behind Ollama use different tokenizers, so exact counts
+would require loading each model's vocabulary.  A characters-per-token ratio
+is close enough for keeping prompts inside a budget and costs nothing.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+# English prose averages roughly four characters per token across common
+# BPE/SentencePiece vocabularies.
+CHARS_PER_TOKEN = 4
+
+# Chat templates wrap every message in role markers and separators.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str | None) -> int:
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_message_tokens(messages: Iterable[dict]) -> int:
+    return sum(
+        estimate_tokens(message.get("content")) + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[: max_chars - 3].rstrip() + "..."
@@ -0,0 +1,330 @@
+"""
+Pluggable vector search backends.
+
+Public API
+----------
+    VectorHit(chunk_id, distance, document_id)
+    VectorStore                                    (interface)
+    get_vector_store() -> VectorStore
+    result_columns() -> list
+    load_hit_rows(hits, user_id) -> list
+    load_hit_rows_batch(hit_lists, user_id) -> list[list]
+    current_ingestions(user_id, document_ids=None) -> list[tuple[str, str]]
+    rebuild_vector_store(store=None) -> int
+    write_snapshot_segment(directory, *, user_id, document_id, ingestion_id, chunk_ids, vectors) -> None
+    iter_snapshot_segments(directory) -> Iterator[dict]
+    as_float_list(value) -> list[float]
+
+Backends (VECTOR_STORE)
+-----------------------
+  pgvector (default)
+      PgVectorStore (pgvector_store.py): SQL on the chunk embedding columns,
+      honouring EMBEDDING_STORAGE and the coarse / binary first passes.
+  ivf
+      IVFVectorStore (ivf_store.py): memory-mapped segment files, one per
+      ingestion, under VECTOR_STORE_DIR; large segments carry an IVF
+      partitioning.  Moves the vector scans off the primary database; only
+      the current-ingestion lookup and the final row load still query it.
+
+Chunk rows keep their embedding columns under every backend.  They are the
+source of truth: ``rebuild_vector_store()`` re-indexes every current
+ingestion into the configured store (e.g. once after switching to ``ivf``).
+
+Snapshots
+---------
+``snapshot(path)`` writes one ``<ingestion_id>.npz`` per ingestion
+(``chunk_ids``, ``vectors``, ``meta`` = [user_id, document_id, ingestion_id])
+and ``restore(path)`` reads the same layout, so a snapshot taken from one
+backend can be restored into the other.  Snapshots need numpy.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import Any, Iterator, List, NamedTuple
+
+from flask import current_app
+
+from app.db.models.chunk import Chunk
+from app.db.models.document import Document
+from app.extensions import db
+from app.services.rag.embedding_storage import uses_half_column
+
+log = logging.getLogger(__name__)
+
+STORE_PGVECTOR = "pgvector"
+STORE_IVF = "ivf"
+STORE_NAMES = (STORE_PGVECTOR, STORE_IVF)
+
+
+class VectorHit(NamedTuple):
+    chunk_id: int
+    distance: float
+    document_id: str | None = None
+
+
+class VectorStore(ABC):
+    """Cosine-distance search over chunk embeddings, scoped per user."""
+
+    name = ""
+
+    @abstractmethod
+    def add(
+        self,
+        *,
+        user_id: str,
+        document_id: str,
+        ingestion_id: str,
+        chunk_ids: List[int],
+        vectors: List[List[float]],
+    ) -> None:
+        """Index the chunks of one ingestion (called before it becomes current)."""
+
+    @abstractmethod
+    def delete_ingestion(self, ingestion_id: str) -> int:
+        """Drop an ingestion from the index; returns the number of chunks removed."""
+
+    @abstractmethod
+    def search(
+        self,
+        query_vector: List[float],
+        *,
+        user_id: str,
+        top_k: int,
+        document_ids: List[str] | None = None,
+    ) -> List[VectorHit]:
+        """Nearest *top_k* current-ingestion chunks of *user_id*, nearest first."""
+
+    @abstractmethod
+    def document_seeds(
+        self,
+        query_vector: List[float],
+        *,
+        user_id: str,
+        count: int,
+        document_ids: List[str] | None = None,
+    ) -> List[VectorHit]:
+        """Best chunk of each of the *count* nearest documents, nearest first."""
+
+    @abstractmethod
+    def snapshot(self, path: str) -> int:
+        """Write every indexed ingestion to *path*; returns the number of chunks."""
+
+    @abstractmethod
+    def restore(self, path: str) -> int:
+        """Load a snapshot written by any backend; returns the number of chunks."""
+
+    def search_rows(
+        self,
+        query_vector: List[float],
+        *,
+        user_id: str,
+        top_k: int,
+        document_ids: List[str] | None = None,
+    ) -> list:
+        """``search`` plus the result columns of every hit (see load_hit_rows)."""
+        hits = self.search(query_vector, user_id=user_id, top_k=top_k, document_ids=document_ids)
+        return load_hit_rows(hits, user_id)
+
+    def search_batch(
+        self,
+        query_vectors: List[List[float]],
+        *,
+        user_id: str,
+        top_k: int,
+        document_ids: List[str] | None = None,
+    ) -> List[List[VectorHit]]:
+        """``search`` for every vector of *query_vectors*, in order."""
+        return [
+            self.search(query_vector, user_id=user_id, top_k=top_k, document_ids=document_ids)
+            for query_vector in query_vectors
+        ]
+
+    def search_rows_batch(
+        self,
+        query_vectors: List[List[float]],
+        *,
+        user_id: str,
+        top_k: int,
+        document_ids: List[str] | None = None,
+    ) -> List[list]:
+        """``search_batch`` plus result columns, loaded in one query for the whole batch."""
+        hit_lists = self.search_batch(query_vectors, user_id=user_id, top_k=top_k, document_ids=document_ids)
+        return load_hit_rows_batch(hit_lists, user_id)
+
+
+_store: VectorStore | None = None
+_store_signature: tuple | None = None
+
+
+def get_vector_store() -> VectorStore:
+    """Return the configured backend (module singleton, rebuilt when config changes)."""
+    global _store, _store_signature
+
+    cfg = current_app.config
+    name = str(cfg.get("VECTOR_STORE") or "").strip().lower()
+    if name not in STORE_NAMES:
+        name = STORE_PGVECTOR
+    signature = (name, cfg.get("VECTOR_STORE_DIR"), current_app.instance_path)
+    if _store is not None and _store_signature == signature:
+        return _store
+
+    if name == STORE_IVF:
+        from app.services.rag.ivf_store import IVFVectorStore
+
+        _store = IVFVectorStore()
+    else:
+        from app.services.rag.pgvector_store import PgVectorStore
+
+        _store = PgVectorStore()
+    _store_signature = signature
+    return _store
+
+
+def result_columns() -> list:
+    """Columns every retrieval row carries besides ``distance``."""
+    return [
+        Chunk.id.label("chunk_id"),
+        Chunk.document_id.label("document_id"),
+        Chunk.content.label("snippet"),
+        Document.title.label("document_title"),
+        Document.source_type.label("source_type"),
+        Document.filename.label("filename"),
+        Chunk.ingestion_id.label("ingestion_id"),
+        Chunk.chunk_index.label("chunk_index"),
+        Chunk.page_start.label("page_start"),
+        Chunk.page_end.label("page_end"),
+    ]
+
+
+def load_hit_rows(hits: List[Any], user_id: str) -> list:
+    """
+    Load the result columns of *hits* (anything with ``chunk_id`` and
+    ``distance``), keeping their order.  Chunks that are no longer current or
+    visible to *user_id* are dropped.
+    """
+    return load_hit_rows_batch([hits], user_id)[0]
+
+
+def load_hit_rows_batch(hit_lists: List[List[Any]], user_id: str) -> List[list]:
+    """``load_hit_rows`` for several hit lists with a single query."""
+    chunk_ids = {hit.chunk_id for hits in hit_lists for hit in hits}
+    if not chunk_ids:
+        return [[] for _ in hit_lists]
+    rows = (
+        db.session.query(*result_columns())
+        .join(Document, Document.id == Chunk.document_id)
+        .filter(
+            Chunk.id.in_(sorted(chunk_ids)),
+            Chunk.user_id == user_id,
+            Document.is_deleted.is_(False),
+            Chunk.ingestion_id == Document.current_ingestion_id,
+        )
+        .all()
+    )
+    by_id = {int(row.chunk_id): row for row in rows}
+    return [
+        [
+            SimpleNamespace(**by_id[hit.chunk_id]._mapping, distance=hit.distance)
+            for hit in hits
+            if hit.chunk_id in by_id
+        ]
+        for hits in hit_lists
+    ]
+
+
+def current_ingestions(user_id: str, document_ids: List[str] | None = None) -> list[tuple[str, str]]:
+    """``(document_id, current_ingestion_id)`` of the user's searchable documents."""
+    query = db.session.query(Document.id, Document.current_ingestion_id).filter(
+        Document.user_id == user_id,
+        Document.is_deleted.is_(False),
+        Document.current_ingestion_id.isnot(None),
+    )
+    if document_ids:
+        query = query.filter(Document.id.in_(document_ids))
+    return [(document_id, ingestion_id) for document_id, ingestion_id in query.all()]
+
+
+def rebuild_vector_store(store: VectorStore | None = None) -> int:
+    """Index every current ingestion from the chunk columns; returns the chunk count."""
+    store = store or get_vector_store()
+    embedding_column = Chunk.embedding_half if uses_half_column() else Chunk.embedding
+    documents = (
+        db.session.query(Document.user_id, Document.id, Document.current_ingestion_id)
+        .filter(Document.is_deleted.is_(False), Document.current_ingestion_id.isnot(None))
+        .all()
+    )
+
+    indexed = 0
+    for user_id, document_id, ingestion_id in documents:
+        rows = (
+            db.session.query(Chunk.id, embedding_column)
+            .filter(Chunk.ingestion_id == ingestion_id, embedding_column.isnot(None))
+            .order_by(Chunk.chunk_index)
+            .all()
+        )
+        if not rows:
+            continue
+        store.add(
+            user_id=user_id,
+            document_id=document_id,
+            ingestion_id=ingestion_id,
+            chunk_ids=[int(row[0]) for row in rows],
+            vectors=[as_float_list(row[1]) for row in rows],
+        )
+        indexed += len(rows)
+    log.info("rebuilt %s vector store: %d chunks", store.name, indexed)
+    return indexed
+
+
+def as_float_list(value: Any) -> List[float]:
+    # HalfVector (halfvec column) exposes to_list(); vector columns load as arrays.
+    if hasattr(value, "to_list"):
+        value = value.to_list()
+    return [float(component) for component in value]
+
+
+def write_snapshot_segment(
+    directory: str,
+    *,
+    user_id: str,
+    document_id: str,
+    ingestion_id: str,
+    chunk_ids: Any,
+    vectors: Any,
+) -> None:
+    np = require_numpy()
+    os.makedirs(directory, exist_ok=True)
+    np.savez(
+        os.path.join(directory, f"{ingestion_id}.npz"),
+        chunk_ids=np.asarray(chunk_ids, dtype=np.int64),
+        vectors=np.asarray(vectors, dtype=np.float32),
+        meta=np.asarray([user_id, document_id, ingestion_id]),
+    )
+
+
+def iter_snapshot_segments(directory: str) -> Iterator[dict]:
+    np = require_numpy()
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".npz"):
+            continue
+        with np.load(os.path.join(directory, name)) as segment:
+            user_id, document_id, ingestion_id = (str(value) for value in segment["meta"])
+            yield {
+                "user_id": user_id,
+                "document_id": document_id,
+                "ingestion_id": ingestion_id,
+                "chunk_ids": [int(chunk_id) for chunk_id in segment["chunk_ids"]],
+                "vectors": segment["vectors"],
+            }
+
+
+def require_numpy():
+    try:
+        import numpy
+    except ImportError as exc:
+        raise RuntimeError("this vector store operation requires numpy") from exc
+    return numpy
@@ -11,12 +11,16 @@ Provider split:
 
 from __future__ import annotations
 
+import json
 import logging
-from typing import Optional
+import time
+from typing import Iterator, Optional
 
 import requests
 from flask import current_app
 
+from app.services.observability.metrics import EMBEDDING_BATCH_SIZE, PROVIDER_REQUEST_SECONDS
+from app.services.observability.tracing import KIND_CLIENT, current_span, inject_traceparent, span
 from app.services.wrapper.retry import call_with_retry
 
 log = logging.getLogger(__name__)
@@ -26,6 +30,7 @@ DEFAULT_OLLAMA_API_KEY = "ollama"
 DEFAULT_OLLAMA_MODEL = "qwen3.5:0.8b"
 DEFAULT_OLLAMA_REASONING_EFFORT = "none"
 DEFAULT_WRAPPER_EMBEDDING_MODEL = "gemini/gemini-embedding-001"
+SESSION_AFFINITY_HEADER = "X-Session-Affinity"
 
 
 class WrapperError(Exception):
@@ -78,16 +83,83 @@ class _HTTPProviderClient:
         self._max_retries = max_retries
         self._base_delay = base_delay
 
-    def post_json(self, path: str, payload: dict, max_retries: Optional[int] = None) -> dict:
+    def post_json(
+        self,
+        path: str,
+        payload: dict,
+        max_retries: Optional[int] = None,
+        headers: Optional[dict] = None,
+    ) -> dict:
+        with span(
+            f"POST {path}",
+            KIND_CLIENT,
+            **{"provider": self._provider_name, "gen_ai.request.model": payload.get("model")},
+        ) as request_span:
+            response = self._send(path, payload, max_retries=max_retries, headers=headers)
+            try:
+                body = response.json()
+            except Exception as exc:
+                raise WrapperError(
+                    f"Invalid JSON from {self._provider_name} at {path}: {exc}",
+                    status_code=response.status_code,
+                    upstream=response.text,
+                )
+            usage = body.get("usage") if isinstance(body, dict) else None
+            if isinstance(usage, dict):
+                request_span.set_attributes(
+                    {
+                        "gen_ai.usage.input_tokens": usage.get("prompt_tokens"),
+                        "gen_ai.usage.output_tokens": usage.get("completion_tokens"),
+                    }
+                )
+            return body
+
+    def post_stream(
+        self,
+        path: str,
+        payload: dict,
+        max_retries: Optional[int] = None,
+        headers: Optional[dict] = None,
+    ) -> Iterator[dict]:
+        """
+        POST *payload* and yield the JSON events of a server-sent event stream.
+
+        Retries only cover the initial request; once events start flowing a
+        network error is raised as WrapperError.  Closing the returned
+        generator closes the connection, which stops upstream generation.
+        """
+        with span(
+            f"POST {path} (stream start)",
+            KIND_CLIENT,
+            **{"provider": self._provider_name, "gen_ai.request.model": payload.get("model")},
+        ):
+            response = self._send(path, payload, max_retries=max_retries, headers=headers, stream=True)
+        return self._iter_events(response, path)
+
+    def _send(
+        self,
+        path: str,
+        payload: dict,
+        max_retries: Optional[int] = None,
+        headers: Optional[dict] = None,
+        stream: bool = False,
+    ) -> requests.Response:
         url = self._base_url + path
         retries = self._max_retries if max_retries is None else max_retries
+        request_headers = inject_traceparent({**self._headers, **headers} if headers else self._headers)
+        attempts = 0
+        status = "error"
+        started = time.perf_counter()
 
         def do_request():
+            nonlocal attempts
+            attempts += 1
             return requests.post(
                 url,
                 json=payload,
-                headers=self._headers,
+                headers=request_headers,
                 timeout=self._timeout,
+                stream=stream,
             )
 
         try:
@@ -95,8 +167,11 @@ class _HTTPProviderClient:
                 do_request,
                 max_retries=retries,
                 base_delay=self._base_delay,
+                provider=self._provider_name,
             )
+            status = str(response.status_code)
         except requests.exceptions.Timeout:
+            status = "timeout"
             raise WrapperError(
                 f"{self._provider_name} request to {path} timed out after {self._timeout}s",
                 status_code=None,
@@ -114,26 +189,54 @@ class _HTTPProviderClient:
                 status_code=None,
                 upstream=str(exc),
             )
+        finally:
+            current_span().set_attribute("http.retry_count", max(0, attempts - 1))
+            PROVIDER_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                provider=self._provider_name,
+                model=payload.get("model"),
+                status=status,
+            )
 
+        current_span().set_attribute("http.response.status_code", response.status_code)
         if response.status_code >= 400:
             try:
                 body = response.json()
             except Exception:
                 body = response.text
+            response.close()
             raise WrapperError(
                 f"{self._provider_name} returned {response.status_code} for {path}",
                 status_code=response.status_code,
                 upstream=str(body),
             )
 
+        return response
+
+    def _iter_events(self, response: requests.Response, path: str) -> Iterator[dict]:
         try:
-            return response.json()
-        except Exception as exc:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    return
+                try:
+                    yield json.loads(data)
+                except ValueError as exc:
+                    raise WrapperError(
+                        f"Invalid stream event from {self._provider_name} at {path}: {exc}",
+                        status_code=response.status_code,
+                        upstream=data,
+                    )
+        except requests.exceptions.RequestException as exc:
             raise WrapperError(
-                f"Invalid JSON from {self._provider_name} at {path}: {exc}",
-                status_code=response.status_code,
-                upstream=response.text,
+                f"Stream from {self._provider_name} {path} was interrupted: {exc}",
+                status_code=None,
+                upstream=str(exc),
             )
+        finally:
+            response.close()
 
 
 class AIClient:
@@ -169,7 +272,97 @@ class AIClient:
         max_retries: Optional[int] = None,
         response_format: Optional[dict] = None,
         reasoning_effort: Optional[str] = None,
+        keep_alive: Optional[str] = None,
+        session_id: Optional[str] = None,
     ) -> dict:
+        """
+        *keep_alive* (default OLLAMA_KEEP_ALIVE) asks Ollama to keep the model,
+        and with it the KV cache of the last prompt, loaded between requests.
+        *session_id* is sent as the OpenAI ``user`` field and as the
+        SESSION_AFFINITY_HEADER so a proxy in front of several Ollama
+        instances can route every turn of a chat to the same instance.
+        """
+        payload, headers = self._build_chat_payload(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format=response_format,
+            reasoning_effort=reasoning_effort,
+            keep_alive=keep_alive,
+            session_id=session_id,
+        )
+
+        log.debug("generation chat_completions model=%s messages_count=%d", model, len(messages))
+        return self._get_generation_client().post_json(
+            "/chat/completions",
+            payload,
+            max_retries=max_retries,
+            headers=headers,
+        )
+
+    def chat_completions_stream(
+        self,
+        model: str,
+        messages: list,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        reasoning_effort: Optional[str] = None,
+        keep_alive: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Streaming variant of chat_completions that yields content deltas.
+
+        Close the returned generator to stop generation early.
+        """
+        payload, headers = self._build_chat_payload(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            reasoning_effort=reasoning_effort,
+            keep_alive=keep_alive,
+            session_id=session_id,
+        )
+        payload["stream"] = True
+
+        log.debug("generation chat_completions_stream model=%s messages_count=%d", model, len(messages))
+        events = self._get_generation_client().post_stream(
+            "/chat/completions",
+            payload,
+            max_retries=max_retries,
+            headers=headers,
+        )
+        return self._iter_content(events)
+
+    @staticmethod
+    def _iter_content(events: Iterator[dict]) -> Iterator[str]:
+        try:
+            for event in events:
+                choices = event.get("choices") or []
+                if not choices:
+                    continue
+                delta = choices[0].get("delta") or {}
+                content = delta.get("content")
+                if content:
+                    yield content
+        finally:
+            events.close()
+
+    def _build_chat_payload(
+        self,
+        *,
+        model: str,
+        messages: list,
+        temperature: float,
+        max_tokens: Optional[int],
+        response_format: Optional[dict] = None,
+        reasoning_effort: Optional[str] = None,
+        keep_alive: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> tuple[dict, Optional[dict]]:
         payload = {
             "model": model,
             "messages": messages,
@@ -184,16 +377,20 @@ class AIClient:
             resolved_reasoning_effort = get_generation_reasoning_effort()
         if resolved_reasoning_effort:
             payload["reasoning_effort"] = resolved_reasoning_effort
-
-        log.debug("generation chat_completions model=%s messages_count=%d", model, len(messages))
-        return self._get_generation_client().post_json(
-            "/chat/completions",
-            payload,
-            max_retries=max_retries,
-        )
+        resolved_keep_alive = keep_alive
+        if resolved_keep_alive is None:
+            resolved_keep_alive = get_generation_keep_alive()
+        if resolved_keep_alive:
+            payload["keep_alive"] = resolved_keep_alive
+        headers = None
+        if session_id:
+            payload["user"] = session_id
+            headers = {SESSION_AFFINITY_HEADER: session_id}
+        return payload, headers
 
     def embeddings(self, model: str, input) -> dict:
         payload = {"model": model, "input": input}
+        EMBEDDING_BATCH_SIZE.observe(len(input) if isinstance(input, list) else 1, model=model)
         log.debug(
             "embedding provider embeddings model=%s input_type=%s",
             model,
@@ -223,6 +420,10 @@ def get_generation_reasoning_effort() -> str:
     return effort or DEFAULT_OLLAMA_REASONING_EFFORT
 
 
+def get_generation_keep_alive() -> str:
+    return str(current_app.config.get("OLLAMA_KEEP_ALIVE") or "").strip()
+
+
 def get_embedding_model() -> str:
     model = str(current_app.config.get("WRAPPER_EMBEDDING_MODEL") or "").strip()
     return model or DEFAULT_WRAPPER_EMBEDDING_MODEL
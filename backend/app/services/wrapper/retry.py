@@ -10,6 +10,10 @@ Backoff is exponential with full jitter:
     sleep = random(0, base_delay * 2 ** attempt)
 For 429 responses the Retry-After header is respected when present.
 
+Every retry and the time slept before it are counted in the
+tutor_provider_retries_total / tutor_provider_backoff_seconds_total metrics,
+labelled with *provider*.
+
 IMPORTANT: Timeout exceptions are NOT retried — a slow model won't become
 fast on retry and retrying would multiply the total wait time.
 """
@@ -20,12 +24,14 @@ import logging
 
 import requests
 
+from app.services.observability.metrics import PROVIDER_BACKOFF_SECONDS, PROVIDER_RETRIES
+
 log = logging.getLogger(__name__)
 
 RETRYABLE_STATUSES = {429, 502, 503, 504}
 
 
-def call_with_retry(fn, max_retries: int = 3, base_delay: float = 1.0):
+def call_with_retry(fn, max_retries: int = 3, base_delay: float = 1.0, provider: str = "unknown"):
     """
     Call `fn()` and retry up to `max_retries` times on retryable HTTP status.
 
@@ -34,6 +40,7 @@ def call_with_retry(fn, max_retries: int = 3, base_delay: float = 1.0):
     fn : callable() -> requests.Response
     max_retries : int   maximum retry attempts (not counting the first call)
     base_delay  : float base sleep time in seconds for backoff calculation
+    provider    : str   metrics label for the upstream being called
 
     Returns
     -------
@@ -54,7 +61,8 @@ def call_with_retry(fn, max_retries: int = 3, base_delay: float = 1.0):
             raise
         except Exception:
             if attempt < max_retries:
-                _sleep(base_delay, attempt)
+                PROVIDER_RETRIES.inc(provider=provider, reason="network")
+                PROVIDER_BACKOFF_SECONDS.inc(_sleep(base_delay, attempt), provider=provider)
                 continue
             raise
 
@@ -79,6 +87,8 @@ def call_with_retry(fn, max_retries: int = 3, base_delay: float = 1.0):
             max_retries + 1,
             delay,
         )
+        PROVIDER_RETRIES.inc(provider=provider, reason=str(response.status_code))
+        PROVIDER_BACKOFF_SECONDS.inc(delay, provider=provider)
         time.sleep(delay)
 
     return last_response  # unreachable in practice but satisfies type checkers
@@ -96,6 +106,8 @@ def _compute_delay(response, base_delay: float, attempt: int) -> float:
     return random.uniform(0, cap)
 
 
-def _sleep(base_delay: float, attempt: int) -> None:
+def _sleep(base_delay: float, attempt: int) -> float:
     cap = base_delay * (2 ** attempt)
-    time.sleep(random.uniform(0, cap))
+    delay = random.uniform(0, cap)
+    time.sleep(delay)
+    return delay
@@ -0,0 +1,27 @@
+"""add quiz attempt summary status
+
+Revision ID: a2d4f6b8c0e1
+Revises: f1c3a5e7b9d2
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a2d4f6b8c0e1"
+down_revision = "f1c3a5e7b9d2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("quiz_attempts", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("summary_status", sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("quiz_attempts", schema=None) as batch_op:
+        batch_op.drop_column("summary_status")
@@ -0,0 +1,29 @@
+"""add users data_version
+
+Revision ID: a7c3e5f1b2d4
+Revises: d1e0b2c4a5f6
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a7c3e5f1b2d4"
+down_revision = "d1e0b2c4a5f6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("data_version", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.drop_column("data_version")
@@ -0,0 +1,27 @@
+"""add quiz_jobs heartbeat
+
+Revision ID: a9c1e3f5b7d2
+Revises: e7a1c3b5d9f4
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a9c1e3f5b7d2"
+down_revision = "e7a1c3b5d9f4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("quiz_jobs", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("quiz_jobs", schema=None) as batch_op:
+        batch_op.drop_column("heartbeat_at")
@@ -0,0 +1,40 @@
+"""create quiz_generation_cache table
+
+Revision ID: b8e2c4a6d0f3
+Revises: a2d4f6b8c0e1
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "b8e2c4a6d0f3"
+down_revision = "a2d4f6b8c0e1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "quiz_generation_cache",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("user_id", sa.String(length=36), nullable=False),
+        sa.Column("cache_key", sa.String(length=64), nullable=False),
+        sa.Column("corpus_json", sa.JSON(), nullable=False),
+        sa.Column("payload_json", sa.JSON(), nullable=False),
+        sa.Column("sources_json", sa.JSON(), nullable=False),
+        sa.Column("model_used", sa.String(length=100), nullable=True),
+        sa.Column("hit_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "cache_key", name="uq_quiz_generation_cache_user_key"),
+    )
+
+
+def downgrade():
+    op.drop_table("quiz_generation_cache")
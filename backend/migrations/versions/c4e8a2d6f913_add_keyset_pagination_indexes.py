@@ -0,0 +1,46 @@
+"""add keyset pagination indexes
+
+Revision ID: c4e8a2d6f913
+Revises: a7c3e5f1b2d4
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c4e8a2d6f913"
+down_revision = "a7c3e5f1b2d4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("chats", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_chats_user_updated_at_id", ["user_id", "updated_at", "id"], unique=False
+        )
+    with op.batch_alter_table("documents", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_documents_user_created_at_id", ["user_id", "created_at", "id"], unique=False
+        )
+    with op.batch_alter_table("quizzes", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_quizzes_user_created_at_id", ["user_id", "created_at", "id"], unique=False
+        )
+    with op.batch_alter_table("chat_messages", schema=None) as batch_op:
+        batch_op.create_index(
+            "ix_chat_messages_chat_created_at_id", ["chat_id", "created_at", "id"], unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("chat_messages", schema=None) as batch_op:
+        batch_op.drop_index("ix_chat_messages_chat_created_at_id")
+    with op.batch_alter_table("quizzes", schema=None) as batch_op:
+        batch_op.drop_index("ix_quizzes_user_created_at_id")
+    with op.batch_alter_table("documents", schema=None) as batch_op:
+        batch_op.drop_index("ix_documents_user_created_at_id")
+    with op.batch_alter_table("chats", schema=None) as batch_op:
+        batch_op.drop_index("ix_chats_user_updated_at_id")
@@ -0,0 +1,59 @@
+"""add float16 chunk embeddings for compact storage modes
+
+Revision ID: c7d9e1f3a5b8
+Revises: b8e2c4a6d0f3
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import HALFVEC
+
+
+# revision identifiers, used by Alembic.
+revision = "c7d9e1f3a5b8"
+down_revision = "b8e2c4a6d0f3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Chunks written in the halfvec / binary modes leave the float32 column empty.
+    op.alter_column("chunks", "embedding", nullable=True)
+
+    # halfvec needs pgvector >= 0.7; older servers skip the column and get it
+    # from convert_chunk_embeddings() once they are upgraded.  The HNSW indexes
+    # are built there too, for the mode being switched to, so deployments that
+    # stay on EMBEDDING_STORAGE=vector carry no index on an empty column.
+    if _pgvector_version() >= (0, 7):
+        op.add_column("chunks", sa.Column("embedding_half", HALFVEC(1536), nullable=True))
+
+
+def downgrade():
+    if _has_half_column():
+        op.execute(
+            "UPDATE chunks SET embedding = embedding_half::vector(1536) "
+            "WHERE embedding IS NULL AND embedding_half IS NOT NULL"
+        )
+        op.execute("DROP INDEX IF EXISTS ix_chunks_embedding_bits")
+        op.execute("DROP INDEX IF EXISTS ix_chunks_embedding_half")
+        op.drop_column("chunks", "embedding_half")
+    op.alter_column("chunks", "embedding", nullable=False)
+
+
+def _pgvector_version() -> tuple[int, ...]:
+    raw = op.get_bind().execute(
+        sa.text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    ).scalar()
+    parts = []
+    for part in str(raw or "").split("."):
+        digits = "".join(char for char in part if char.isdigit())
+        if not digits:
+            break
+        parts.append(int(digits))
+    return tuple(parts)
+
+
+def _has_half_column() -> bool:
+    return any(column["name"] == "embedding_half" for column in sa.inspect(op.get_bind()).get_columns("chunks"))
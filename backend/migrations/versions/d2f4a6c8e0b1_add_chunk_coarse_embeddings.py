@@ -0,0 +1,31 @@
+"""add 256-dim coarse chunk embedding prefix
+
+Revision ID: d2f4a6c8e0b1
+Revises: c7d9e1f3a5b8
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision = "d2f4a6c8e0b1"
+down_revision = "c7d9e1f3a5b8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Column only.  Filling it for existing chunks and building its HNSW index
+    # is left to embedding_storage.ensure_coarse_storage(), run when
+    # RETRIEVAL_COARSE_PASS is turned on, so deployments without the coarse
+    # pass never pay for a full-table UPDATE and an index build.
+    op.add_column("chunks", sa.Column("embedding_coarse", Vector(256), nullable=True))
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_chunks_embedding_coarse")
+    op.drop_column("chunks", "embedding_coarse")
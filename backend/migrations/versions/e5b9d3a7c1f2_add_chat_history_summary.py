@@ -0,0 +1,31 @@
+"""add chat rolling history summary
+
+Revision ID: e5b9d3a7c1f2
+Revises: c4e8a2d6f913
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "e5b9d3a7c1f2"
+down_revision = "c4e8a2d6f913"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("chats", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("history_summary", sa.Text(), nullable=True))
+        batch_op.add_column(
+            sa.Column("history_summary_until", sa.DateTime(timezone=True), nullable=True)
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("chats", schema=None) as batch_op:
+        batch_op.drop_column("history_summary_until")
+        batch_op.drop_column("history_summary")
@@ -0,0 +1,46 @@
+"""create answer_cache table
+
+Revision ID: e7a1c3b5d9f4
+Revises: d2f4a6c8e0b1
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision = "e7a1c3b5d9f4"
+down_revision = "d2f4a6c8e0b1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "answer_cache",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("user_id", sa.String(length=36), nullable=False),
+        sa.Column("source_key", sa.String(length=64), nullable=False),
+        sa.Column("question", sa.Text(), nullable=False),
+        sa.Column("question_embedding", Vector(1536), nullable=False),
+        sa.Column("answer", sa.Text(), nullable=False),
+        sa.Column("model_used", sa.String(length=100), nullable=True),
+        sa.Column("hit_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_answer_cache_source_key_created_at",
+        "answer_cache",
+        ["source_key", "created_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_answer_cache_source_key_created_at", table_name="answer_cache")
+    op.drop_table("answer_cache")
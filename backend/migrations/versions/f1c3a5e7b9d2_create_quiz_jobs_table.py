@@ -0,0 +1,51 @@
+"""create quiz_jobs table
+
+Revision ID: f1c3a5e7b9d2
+Revises: e5b9d3a7c1f2
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f1c3a5e7b9d2"
+down_revision = "e5b9d3a7c1f2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "quiz_jobs",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("user_id", sa.String(length=36), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("stage", sa.String(length=30), nullable=False),
+        sa.Column("spec_json", sa.JSON(), nullable=False),
+        sa.Column("progress_json", sa.JSON(), nullable=True),
+        sa.Column("quiz_id", sa.String(length=36), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("error_status", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.CheckConstraint(
+            "status IN ('queued', 'running', 'succeeded', 'failed')",
+            name="ck_quiz_jobs_status",
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["quiz_id"], ["quizzes.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    with op.batch_alter_table("quiz_jobs", schema=None) as batch_op:
+        batch_op.create_index("ix_quiz_jobs_user_status", ["user_id", "status"], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table("quiz_jobs", schema=None) as batch_op:
+        batch_op.drop_index("ix_quiz_jobs_user_status")
+
+    op.drop_table("quiz_jobs")
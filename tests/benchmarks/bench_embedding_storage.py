@@ -0,0 +1,183 @@
+"""
+Benchmark - recall and latency of the chunk embedding storage modes.
+
+Uses stored chunk embeddings of one user as queries and compares the
+``vector``, ``halfvec`` and ``binary`` retrieval paths, and the 256-dim
+coarse pass (RETRIEVAL_COARSE_PASS), against an exact float32 top-k (ivfflat
+probing every list).  Also prints the average stored
+size per embedding and the size of each vector index.
+
+Requires a Postgres database with pgvector >= 0.7, the c7d9e1f3a5b8 and
+d2f4a6c8e0b1 migrations, and chunks whose ``embedding_half`` and
+``embedding_coarse`` are filled.  ``--backfill`` fills them from the float32
+column first (the float32 values are kept) and builds the halfvec, binary and
+coarse indexes.
+
+Run from project root:
+    python tests/benchmarks/bench_embedding_storage.py --queries 50 --top-k 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(os.path.dirname(ROOT), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Import create_app before app.* service imports to avoid the repo's import shadowing issue.
+from app import create_app  # noqa: E402
+
+from sqlalchemy import func, text  # noqa: E402
+
+from app.db.models.chunk import Chunk  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.services.rag.embedding_storage import (  # noqa: E402
+    STORAGE_BINARY,
+    STORAGE_HALFVEC,
+    STORAGE_VECTOR,
+    convert_chunk_embeddings,
+    ensure_coarse_storage,
+    ensure_half_storage,
+)
+from app.services.rag.retrieval import _fetch_chunk_rows  # noqa: E402
+
+# (label, EMBEDDING_STORAGE, RETRIEVAL_COARSE_PASS)
+_MODES = (
+    ("vector", STORAGE_VECTOR, False),
+    ("halfvec", STORAGE_HALFVEC, False),
+    ("binary", STORAGE_BINARY, False),
+    ("coarse", STORAGE_VECTOR, True),
+)
+_INDEXES = (
+    "ix_chunks_embedding",
+    "ix_chunks_embedding_half",
+    "ix_chunks_embedding_bits",
+    "ix_chunks_embedding_coarse",
+)
+
+
+def _pick_user(user_id: str | None) -> str:
+    if user_id:
+        return user_id
+    row = (
+        db.session.query(Chunk.user_id, func.count(Chunk.id).label("chunk_count"))
+        .filter(Chunk.embedding.isnot(None), Chunk.embedding_half.isnot(None))
+        .group_by(Chunk.user_id)
+        .order_by(func.count(Chunk.id).desc())
+        .first()
+    )
+    if row is None:
+        sys.exit("no chunks with both embeddings; run with --backfill first")
+    return row.user_id
+
+
+def _exact_top_k(query_vector: list[float], user_id: str, top_k: int) -> list[int]:
+    db.session.execute(text("SET LOCAL ivfflat.probes = 1000"))
+    rows = _fetch_chunk_rows(query_vector=query_vector, user_id=user_id, top_k=top_k, document_ids=None)
+    return [int(row.chunk_id) for row in rows]
+
+
+def run_mode(
+    app,
+    storage: str,
+    coarse_pass: bool,
+    queries: list[list[float]],
+    truth: list[list[int]],
+    user_id: str,
+    top_k: int,
+):
+    app.config["EMBEDDING_STORAGE"] = storage
+    app.config["RETRIEVAL_COARSE_PASS"] = coarse_pass
+    timings: list[float] = []
+    recalls: list[float] = []
+    for query_vector, expected in zip(queries, truth):
+        started = time.perf_counter()
+        rows = _fetch_chunk_rows(query_vector=query_vector, user_id=user_id, top_k=top_k, document_ids=None)
+        timings.append(time.perf_counter() - started)
+        found = {int(row.chunk_id) for row in rows}
+        recalls.append(len(found & set(expected)) / len(expected) if expected else 1.0)
+        db.session.rollback()
+    return timings, recalls
+
+
+def print_sizes() -> None:
+    column_sizes = db.session.execute(
+        text(
+            "SELECT avg(pg_column_size(embedding)) AS float32, "
+            "avg(pg_column_size(embedding_half)) AS float16, "
+            "avg(pg_column_size(binary_quantize(embedding_half)::bit(1536))) AS bits, "
+            "avg(pg_column_size(embedding_coarse)) AS coarse "
+            "FROM chunks"
+        )
+    ).one()
+    print(
+        f"\navg bytes per embedding: float32={column_sizes.float32 or 0:.0f} "
+        f"float16={column_sizes.float16 or 0:.0f} bits={column_sizes.bits or 0:.0f} "
+        f"coarse={column_sizes.coarse or 0:.0f}"
+    )
+    for index_name in _INDEXES:
+        size = db.session.execute(
+            text("SELECT pg_size_pretty(pg_relation_size(to_regclass(:name)))"),
+            {"name": index_name},
+        ).scalar()
+        print(f"{index_name:>26}: {size or 'missing'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--user-id", default=None)
+    parser.add_argument("--backfill", action="store_true")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.backfill:
+            converted = convert_chunk_embeddings(STORAGE_HALFVEC)
+            ensure_half_storage(STORAGE_BINARY)
+            coarse_filled = ensure_coarse_storage()
+            db.session.commit()
+            print(f"backfilled embedding_half for {converted} chunks, embedding_coarse for {coarse_filled}")
+
+        user_id = _pick_user(args.user_id)
+        queries = [
+            list(row.embedding)
+            for row in (
+                db.session.query(Chunk.embedding)
+                .filter(Chunk.user_id == user_id, Chunk.embedding.isnot(None))
+                .order_by(func.random())
+                .limit(args.queries)
+                .all()
+            )
+        ]
+        print(f"user={user_id} queries={len(queries)} top_k={args.top_k}")
+
+        app.config["EMBEDDING_STORAGE"] = STORAGE_VECTOR
+        app.config["RETRIEVAL_COARSE_PASS"] = False
+        truth = []
+        for query_vector in queries:
+            truth.append(_exact_top_k(query_vector, user_id, args.top_k))
+            db.session.rollback()
+
+        print(f"\n{'mode':>8}  {'p50 (ms)':>9}  {'p95 (ms)':>9}  {'recall@k':>9}")
+        for mode, storage, coarse_pass in _MODES:
+            timings, recalls = run_mode(app, storage, coarse_pass, queries, truth, user_id, args.top_k)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(
+                f"{mode:>8}  {statistics.median(timings) * 1000:>9.2f}  {p95 * 1000:>9.2f}  "
+                f"{statistics.mean(recalls):>9.3f}"
+            )
+
+        print_sizes()
+
+
+if __name__ == "__main__":
+    main()
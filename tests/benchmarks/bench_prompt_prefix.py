@@ -0,0 +1,163 @@
+"""
+Benchmark - prompt prefill time for the two chat prompt layouts.
+
+Replays a synthetic multi-turn chat against the configured Ollama model and
+times each turn with ``max_tokens=1`` so the measurement is dominated by
+prompt prefill.  With the ``stable_prefix`` layout the system prompt and
+history form a prefix that Ollama can serve from its KV cache; with the
+``legacy`` layout the per-turn context sits in the system prompt and every
+turn is prefilled from scratch.
+
+Requires a running Ollama server and the usual backend .env.
+
+Run from project root:
+    python tests/benchmarks/bench_prompt_prefix.py --turns 8 --runs 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(os.path.dirname(ROOT), "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Import create_app before app.* service imports to avoid the repo's import shadowing issue.
+from app import create_app  # noqa: E402
+
+from app.services.rag.answering import (  # noqa: E402
+    PROMPT_LAYOUT_LEGACY,
+    PROMPT_LAYOUT_STABLE_PREFIX,
+    _build_messages,
+)
+from app.services.wrapper.client import get_client, get_generation_model  # noqa: E402
+
+_TOPICS = [
+    "gradient descent",
+    "the learning rate",
+    "overfitting",
+    "regularization",
+    "cross-validation",
+    "feature scaling",
+    "bias and variance",
+    "the cost function",
+    "stochastic updates",
+    "early stopping",
+]
+
+
+def _sources_for_turn(turn: int, context_chars: int) -> list[dict]:
+    topic = _TOPICS[turn % len(_TOPICS)]
+    sentence = f"Notes on {topic}: this passage explains {topic} with a worked example. "
+    snippet = (sentence * (context_chars // len(sentence) + 1))[:context_chars]
+    return [
+        {
+            "document_title": f"Lecture {turn + 1}",
+            "filename": f"lecture_{turn + 1}.pdf",
+            "source_type": "upload",
+            "snippet": snippet,
+        }
+    ]
+
+
+def _canned_answer(turn: int) -> str:
+    topic = _TOPICS[turn % len(_TOPICS)]
+    return f"[Source 1] describes {topic}. " + f"It matters because {topic} affects training. " * 12
+
+
+def run_layout(layout: str, *, turns: int, context_chars: int, model: str) -> list[float]:
+    client = get_client()
+    session_id = f"bench-{layout}-{uuid.uuid4().hex[:8]}"
+    history: list[dict] = []
+    timings: list[float] = []
+
+    for turn in range(turns):
+        question = f"Can you explain {_TOPICS[turn % len(_TOPICS)]} in more detail?"
+        messages = _build_messages(
+            question=question,
+            sources=_sources_for_turn(turn, context_chars),
+            history=history,
+            history_summary=None,
+            layout=layout,
+            model=model,
+        )
+        started = time.perf_counter()
+        client.chat_completions(
+            model=model,
+            messages=messages,
+            temperature=0.0,
+            max_tokens=1,
+            session_id=session_id,
+        )
+        timings.append(time.perf_counter() - started)
+        history.extend(
+            [
+                {"role": "user", "content": question},
+                {"role": "assistant", "content": _canned_answer(turn)},
+            ]
+        )
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--context-chars", type=int, default=2500)
+    parser.add_argument("--model", default=None)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        model = args.model or get_generation_model()
+        print(f"model={model} turns={args.turns} runs={args.runs} context_chars={args.context_chars}")
+
+        # Warm-up so model load time is not charged to the first layout.
+        get_client().chat_completions(
+            model=model,
+            messages=[{"role": "user", "content": "ok"}],
+            max_tokens=1,
+        )
+
+        results: dict[str, list[list[float]]] = {
+            PROMPT_LAYOUT_LEGACY: [],
+            PROMPT_LAYOUT_STABLE_PREFIX: [],
+        }
+        for _ in range(args.runs):
+            for layout in results:
+                results[layout].append(
+                    run_layout(
+                        layout,
+                        turns=args.turns,
+                        context_chars=args.context_chars,
+                        model=model,
+                    )
+                )
+
+    print(f"\n{'turn':>4}  {'legacy (s)':>11}  {'stable_prefix (s)':>18}")
+    for turn in range(args.turns):
+        legacy = statistics.median(run[turn] for run in results[PROMPT_LAYOUT_LEGACY])
+        stable = statistics.median(run[turn] for run in results[PROMPT_LAYOUT_STABLE_PREFIX])
+        print(f"{turn + 1:>4}  {legacy:>11.3f}  {stable:>18.3f}")
+
+    # Turn 1 has no history to reuse, so compare the later turns only.
+    legacy_later = [t for run in results[PROMPT_LAYOUT_LEGACY] for t in run[1:]]
+    stable_later = [t for run in results[PROMPT_LAYOUT_STABLE_PREFIX] for t in run[1:]]
+    if legacy_later and stable_later:
+        legacy_median = statistics.median(legacy_later)
+        stable_median = statistics.median(stable_later)
+        reduction = (1 - stable_median / legacy_median) * 100 if legacy_median else 0.0
+        print(
+            f"\nmedian prefill turns 2..{args.turns}: legacy={legacy_median:.3f}s "
+            f"stable_prefix={stable_median:.3f}s reduction={reduction:.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
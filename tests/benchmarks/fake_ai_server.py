@@ -0,0 +1,467 @@
+"""
+Fake Ollama / embedding server for offline benchmarks.
+
+Serves the two OpenAI-compatible endpoints the AI gateway calls:
+
+    POST /v1/chat/completions   (also /chat/completions; "stream": true -> SSE)
+    POST /v1/embeddings         (also /embeddings)
+
+Outputs are deterministic functions of the request:
+  - embeddings are hashed bag-of-words vectors, so texts that share words are
+    close and retrieval behaves plausibly; the leading dimensions carry most of
+    the weight, as with Matryoshka models;
+  - quiz prompts get quiz JSON that cites the chunk ids listed in the prompt
+    (spread over the listed documents), the router classifier gets a category,
+    and every other prompt gets a short answer citing [Source 1].
+
+Latency follows a LatencyProfile: a base delay plus prompt prefill and token
+decode time for chat, a base plus per-input delay for embeddings, with a
+fixed number of parallel slots per endpoint so requests queue the way they
+do on a real Ollama instance.  Profiles can also inject 503s, embedding
+429s (with Retry-After) and invalid quiz JSON that forces a repair round.
+
+Standalone use (point OLLAMA_BASE_URL at <url>/v1 and WRAPPER_BASE_URL at
+<url>):
+    python tests/benchmarks/fake_ai_server.py --port 11500 --profile gpu
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, fields, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+DEFAULT_DIMENSIONS = 3072
+_HEAD_DIMENSIONS = 256
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_SOURCE_RE = re.compile(r"chunk_id=(\d+) \| document_id=([^\s|]+)")
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    name: str
+    chat_base_sec: float = 0.0
+    prefill_tokens_per_sec: float = 0.0  # 0 = instant
+    decode_tokens_per_sec: float = 0.0  # 0 = instant
+    chat_parallel: int = 4
+    embed_base_sec: float = 0.0
+    embed_per_input_sec: float = 0.0
+    embed_parallel: int = 8
+    chat_error_rate: float = 0.0
+    embed_requests_per_sec: float = 0.0  # 0 = unlimited
+    invalid_quiz_ratio: float = 0.0
+
+    def scaled(self, factor: float) -> "LatencyProfile":
+        """Multiply every delay by *factor* (rates are divided by it)."""
+        if factor == 1:
+            return self
+        factor = max(factor, 1e-9)
+        return replace(
+            self,
+            chat_base_sec=self.chat_base_sec * factor,
+            prefill_tokens_per_sec=self.prefill_tokens_per_sec / factor,
+            decode_tokens_per_sec=self.decode_tokens_per_sec / factor,
+            embed_base_sec=self.embed_base_sec * factor,
+            embed_per_input_sec=self.embed_per_input_sec * factor,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+PROFILES = {
+    # No delays: measures the backend's own overhead.
+    "instant": LatencyProfile(name="instant", chat_parallel=64, embed_parallel=64),
+    # A small model on one GPU.
+    "gpu": LatencyProfile(
+        name="gpu",
+        chat_base_sec=0.05,
+        prefill_tokens_per_sec=2500,
+        decode_tokens_per_sec=80,
+        chat_parallel=4,
+        embed_base_sec=0.06,
+        embed_per_input_sec=0.0008,
+        embed_parallel=8,
+    ),
+    # CPU-only Ollama serving one request at a time.
+    "cpu": LatencyProfile(
+        name="cpu",
+        chat_base_sec=0.2,
+        prefill_tokens_per_sec=250,
+        decode_tokens_per_sec=15,
+        chat_parallel=1,
+        embed_base_sec=0.15,
+        embed_per_input_sec=0.002,
+        embed_parallel=4,
+    ),
+    # GPU timings with transient 503s, an embedding quota and sloppy quiz JSON.
+    "flaky": LatencyProfile(
+        name="flaky",
+        chat_base_sec=0.05,
+        prefill_tokens_per_sec=2500,
+        decode_tokens_per_sec=80,
+        chat_parallel=4,
+        embed_base_sec=0.06,
+        embed_per_input_sec=0.0008,
+        embed_parallel=8,
+        chat_error_rate=0.05,
+        embed_requests_per_sec=20,
+        invalid_quiz_ratio=0.3,
+    ),
+}
+
+
+class FakeAIServer:
+    """Threaded fake provider; ``start()`` returns once it is listening."""
+
+    def __init__(
+        self,
+        profile: LatencyProfile,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        dimensions: int = DEFAULT_DIMENSIONS,
+        seed: int = 0,
+    ):
+        self.profile = profile
+        self.dimensions = dimensions
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._chat_slots = threading.BoundedSemaphore(max(1, profile.chat_parallel))
+        self._embed_slots = threading.BoundedSemaphore(max(1, profile.embed_parallel))
+        self._quota_lock = threading.Lock()
+        self._quota_window_start = time.monotonic()
+        self._quota_used = 0
+        self._stats_lock = threading.Lock()
+        self.stats: dict[str, int] = {
+            "chat_requests": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "embedding_requests": 0,
+            "embedding_inputs": 0,
+            "injected_503": 0,
+            "injected_429": 0,
+            "invalid_quizzes": 0,
+        }
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeAIServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-ai-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    # ── Behaviour ─────────────────────────────────────────────────────────────
+
+    def _count(self, **increments: int) -> None:
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _chance(self, probability: float) -> bool:
+        if probability <= 0:
+            return False
+        with self._random_lock:
+            return self._random.random() < probability
+
+    def _take_embedding_quota(self) -> bool:
+        limit = self.profile.embed_requests_per_sec
+        if limit <= 0:
+            return True
+        with self._quota_lock:
+            now = time.monotonic()
+            if now - self._quota_window_start >= 1.0:
+                self._quota_window_start, self._quota_used = now, 0
+            if self._quota_used >= limit:
+                return False
+            self._quota_used += 1
+            return True
+
+    def embed(self, payload: dict) -> tuple[int, dict, dict]:
+        inputs = payload.get("input")
+        texts = inputs if isinstance(inputs, list) else [inputs]
+        if not self._take_embedding_quota():
+            self._count(injected_429=1)
+            return 429, {"error": {"message": "embedding quota exceeded"}}, {"Retry-After": "0.25"}
+
+        with self._embed_slots:
+            _sleep(self.profile.embed_base_sec + self.profile.embed_per_input_sec * len(texts))
+            data = [
+                {"object": "embedding", "index": index, "embedding": self.embedding(str(text or ""))}
+                for index, text in enumerate(texts)
+            ]
+        self._count(embedding_requests=1, embedding_inputs=len(texts))
+        tokens = sum(_estimate_tokens(str(text or "")) for text in texts)
+        return 200, {
+            "object": "list",
+            "model": payload.get("model"),
+            "data": data,
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }, {}
+
+    def embedding(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+        head = min(_HEAD_DIMENSIONS, self.dimensions)
+        for word in _WORD_RE.findall(text.lower()):
+            digest = hashlib.sha1(word.encode("utf-8")).digest()
+            sign = 1.0 if digest[0] & 1 else -1.0
+            vector[int.from_bytes(digest[1:5], "big") % head] += sign
+            vector[int.from_bytes(digest[5:9], "big") % self.dimensions] += 0.5 * sign
+        norm = math.sqrt(sum(value * value for value in vector))
+        if not norm:
+            vector[0], norm = 1.0, 1.0
+        return [round(value / norm, 6) for value in vector]
+
+    def chat(self, payload: dict) -> tuple[int, dict, dict]:
+        if self._chance(self.profile.chat_error_rate):
+            self._count(injected_503=1)
+            return 503, {"error": {"message": "model is busy"}}, {}
+
+        messages = payload.get("messages") or []
+        prompt = "\n".join(str(message.get("content") or "") for message in messages)
+        content = self.completion_text(messages)
+        prompt_tokens = _estimate_tokens(prompt)
+        completion_tokens = _estimate_tokens(content)
+        if payload.get("max_tokens"):
+            completion_tokens = min(completion_tokens, int(payload["max_tokens"]))
+
+        with self._chat_slots:
+            _sleep(self.profile.chat_base_sec + _tokens_time(prompt_tokens, self.profile.prefill_tokens_per_sec))
+            if not payload.get("stream"):
+                _sleep(_tokens_time(completion_tokens, self.profile.decode_tokens_per_sec))
+        self._count(chat_requests=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return 200, {
+            "id": "chatcmpl-" + hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12],
+            "object": "chat.completion",
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }, {}
+
+    def completion_text(self, messages: list[dict]) -> str:
+        system = str(messages[0].get("content") or "") if messages else ""
+        user = str(messages[-1].get("content") or "") if messages else ""
+        if "query classifier" in system:
+            lowered = user.lower()
+            if any(word in lowered for word in ("code", "python", "function", "bug")):
+                return json.dumps({"category": "coding"})
+            if any(word in lowered for word in ("prove", "calculate", "derive", "solve")):
+                return json.dumps({"category": "reasoning"})
+            return json.dumps({"category": "general"})
+
+        quiz_match = re.search(r"Create a quiz with exactly (\d+) questions", user)
+        if quiz_match is None:
+            quiz_match = re.search(r"must still contain exactly (\d+) questions", user)
+        if quiz_match is not None:
+            marks = _float_after(user, "Total marks across all questions:")
+            count = int(quiz_match.group(1))
+            quiz = self._quiz(user, count, marks / count if marks else 1.0, with_title=True)
+            if user.startswith("Create a quiz") and self._chance(self.profile.invalid_quiz_ratio):
+                self._count(invalid_quizzes=1)
+                quiz["questions"][-1]["citations"] = [987654321]
+            return json.dumps(quiz)
+
+        replacement_match = re.search(r"Write exactly (\d+) new quiz question", user)
+        if replacement_match is not None:
+            marks = _float_after(user, "Marks per question:") or 1.0
+            return json.dumps(self._quiz(user, int(replacement_match.group(1)), marks, with_title=False))
+
+        digest = hashlib.sha1(user.encode("utf-8")).hexdigest()
+        topic_words = [word for word in _WORD_RE.findall(user.lower()) if len(word) > 4][:6] or ["the", "material"]
+        sentences = [
+            f"According to [Source 1], {' '.join(topic_words[:3])} is covered in the notes.",
+            f"The key idea is how {topic_words[0]} relates to {topic_words[-1]}.",
+            "In practice you apply it step by step and check the result against the examples.",
+            f"Reference {digest[:8]}.",
+        ]
+        return " ".join(sentences)
+
+    def _quiz(self, prompt: str, count: int, marks_each: float, *, with_title: bool) -> dict:
+        sources = _SOURCE_RE.findall(prompt)
+        by_document: dict[str, list[int]] = {}
+        for chunk_id, document_id in sources:
+            by_document.setdefault(document_id, []).append(int(chunk_id))
+        chunk_order = [
+            chunks[index]
+            for index in range(max((len(chunks) for chunks in by_document.values()), default=0))
+            for chunks in by_document.values()
+            if index < len(chunks)
+        ] or [0]
+
+        allowed = _text_after(prompt, "Allowed question types:")
+        question_type = "mcq_single" if "mcq_single" in allowed or not allowed else "true_false"
+        topic = _text_after(prompt, "Topic:") or "the material"
+        questions = []
+        for index in range(count):
+            chunk_id = chunk_order[index % len(chunk_order)]
+            if question_type == "mcq_single":
+                options = [f"Option {letter} about {topic}" for letter in "ABCD"]
+                correct = {"option_index": (index + chunk_id) % 4}
+            else:
+                options = ["True", "False"]
+                correct = {"option_index": index % 2}
+            questions.append(
+                {
+                    "type": question_type,
+                    "question_text": f"Question {index + 1}: what does chunk {chunk_id} say about {topic}?",
+                    "options": options,
+                    "correct_answer": correct,
+                    "marks": round(marks_each, 2),
+                    "explanation": f"See chunk {chunk_id}.",
+                    "citations": [chunk_id],
+                }
+            )
+        quiz: dict[str, Any] = {"questions": questions}
+        if with_title:
+            quiz = {
+                "title": _text_after(prompt, "Title:") or f"{topic} Quiz",
+                "instructions": "Answer every question.",
+                **quiz,
+            }
+        return quiz
+
+
+def _make_handler(server: FakeAIServer):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):  # noqa: A002 - BaseHTTPRequestHandler signature
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip("/") in ("/health", "/v1/models"):
+                self._send_json(200, {"status": "ok", "profile": server.profile.name})
+            else:
+                self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json(400, {"error": {"message": "invalid JSON"}})
+                return
+
+            path = self.path.split("?", 1)[0].rstrip("/")
+            if path in ("/v1/embeddings", "/embeddings"):
+                self._send_json(*server.embed(payload))
+            elif path in ("/v1/chat/completions", "/chat/completions"):
+                status, body, headers = server.chat(payload)
+                if status == 200 and payload.get("stream"):
+                    self._send_stream(body)
+                else:
+                    self._send_json(status, body, headers)
+            else:
+                self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+        def _send_json(self, status: int, body: dict, headers: dict | None = None):
+            encoded = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def _send_stream(self, body: dict):
+            content = body["choices"][0]["message"]["content"]
+            pieces = [content[index : index + 16] for index in range(0, len(content), 16)] or [""]
+            delay = _tokens_time(body["usage"]["completion_tokens"], server.profile.decode_tokens_per_sec)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            for piece in pieces:
+                _sleep(delay / len(pieces))
+                event = {
+                    "id": body["id"],
+                    "object": "chat.completion.chunk",
+                    "model": body["model"],
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+
+    return Handler
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _tokens_time(tokens: int, tokens_per_sec: float) -> float:
+    return tokens / tokens_per_sec if tokens_per_sec > 0 else 0.0
+
+
+def _sleep(seconds: float) -> None:
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+def _text_after(text: str, label: str) -> str:
+    match = re.search(re.escape(label) + r"[ \t]*(.*)", text)
+    return match.group(1).strip() if match else ""
+
+
+def _float_after(text: str, label: str) -> float | None:
+    try:
+        return float(_text_after(text, label))
+    except ValueError:
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="gpu")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every delay by this factor")
+    parser.add_argument("--dimensions", type=int, default=DEFAULT_DIMENSIONS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeAIServer(
+        PROFILES[args.profile].scaled(args.scale),
+        host=args.host,
+        port=args.port,
+        dimensions=args.dimensions,
+        seed=args.seed,
+    )
+    print(f"fake AI server ({args.profile}) on {server.url}")
+    print(f"  OLLAMA_BASE_URL={server.url}/v1")
+    print(f"  WRAPPER_BASE_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
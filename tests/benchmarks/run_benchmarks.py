@@ -0,0 +1,510 @@
+"""
+Benchmark suite - end-to-end latency and throughput against a fake AI server.
+
+Starts tests/benchmarks/fake_ai_server.py in-process, points the AI gateway
+at it and drives the real Flask views through the test client, so the
+numbers cover routing, retrieval, prompt building, validation and the
+database, but not Ollama or the embedding provider themselves.  Scenarios:
+
+  ingest_pdf        upload a synthetic multi-page PDF (extraction, chunking,
+                    embedding, chunk inserts, vector indexing)
+  multi_doc_chat    chat turns in sessions scoped to several documents
+  quiz_generation   POST /api/quizzes over the same documents
+  analytics_reads   GET /api/analytics/{overview,progress,weak-topics}
+
+Each scenario reports operations, errors, wall time, throughput and
+p50/p95/p99 latency.  ``--json-out`` writes the report; ``--baseline`` compares
+against an earlier report and exits 1 when a scenario's p95 grew, or its
+throughput fell, by more than ``--max-regression``.
+
+Requires the usual backend .env and a migrated database (DATABASE_URL); a
+throwaway user is created and deleted again unless ``--keep-data`` is set.
+
+Run from project root:
+    python tests/benchmarks/run_benchmarks.py --profile gpu --iterations 20 --concurrency 4
+    python tests/benchmarks/run_benchmarks.py --profile instant --json-out bench.json
+    python tests/benchmarks/run_benchmarks.py --baseline bench.json --max-regression 0.25
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import textwrap
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(os.path.dirname(ROOT), "backend")
+for path in (BACKEND_DIR, os.path.dirname(os.path.abspath(__file__))):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Import create_app before app.* service imports to avoid the repo's import shadowing issue.
+from app import create_app  # noqa: E402
+
+from fake_ai_server import PROFILES, FakeAIServer  # noqa: E402
+
+SCENARIOS = ("ingest_pdf", "multi_doc_chat", "quiz_generation", "analytics_reads")
+
+_TOPICS = (
+    ("gradient descent", "learning rate step size convergence loss surface minimum parameters update"),
+    ("decision trees", "split impurity entropy gini leaf depth pruning features threshold"),
+    ("neural networks", "layers neurons activation backpropagation weights bias hidden output"),
+    ("probability", "events distribution conditional bayes independence expectation variance sample"),
+    ("linear regression", "slope intercept residuals least squares fit prediction coefficients error"),
+    ("sorting algorithms", "quicksort mergesort pivot comparison complexity stable partition array"),
+)
+_QUESTION_TEMPLATES = (
+    "What is {topic} and why does it matter?",
+    "How does {word} affect {topic}?",
+    "Can you compare {word} and {other} in {topic}?",
+    "Give an example of {topic} using {word}.",
+    "What are common mistakes with {word} in {topic}?",
+)
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    wall_sec: float = 0.0
+    units: int = 0
+    unit_name: str = ""
+    first_error: str | None = None
+
+    def summary(self) -> dict:
+        ordered = sorted(self.latencies)
+        result = {
+            "operations": len(self.latencies) + self.errors,
+            "errors": self.errors,
+            "wall_sec": round(self.wall_sec, 3),
+            "throughput_per_sec": round(len(self.latencies) / self.wall_sec, 3) if self.wall_sec else 0.0,
+            "mean_ms": round(statistics.fmean(ordered) * 1000, 2) if ordered else None,
+            "p50_ms": _percentile_ms(ordered, 50),
+            "p95_ms": _percentile_ms(ordered, 95),
+            "p99_ms": _percentile_ms(ordered, 99),
+        }
+        if self.unit_name:
+            result[f"{self.unit_name}_per_sec"] = round(self.units / self.wall_sec, 2) if self.wall_sec else 0.0
+        return result
+
+
+class Bench:
+    """Shared state: the app, the benchmark user and the documents it owns."""
+
+    def __init__(self, app, args):
+        self.app = app
+        self.args = args
+        self.document_ids: list[str] = []
+        self.corpus_ids: list[str] = []
+        self.user_id, self.token = self._register()
+
+    def client(self):
+        return self.app.test_client()
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    def _register(self) -> tuple[str, str]:
+        response = self.client().post(
+            "/api/auth/register",
+            json={"email": f"bench_{uuid.uuid4().hex[:10]}@tutor.local", "password": "benchmark-password"},
+        )
+        _expect(response, 201)
+        body = response.get_json()
+        return body["user"]["id"], body["access_token"]
+
+    def corpus(self) -> list[str]:
+        """Text documents shared by the chat and quiz scenarios (created once)."""
+        if not self.corpus_ids:
+            for index in range(self.args.documents):
+                topic, words = _TOPICS[index % len(_TOPICS)]
+                response = self.client().post(
+                    "/api/documents/text",
+                    headers=self.headers,
+                    json={"title": f"{topic.title()} notes", "text": _lecture_text(topic, words, paragraphs=40)},
+                )
+                _expect(response, 201)
+                self.corpus_ids.append(response.get_json()["document"]["id"])
+            self.document_ids.extend(self.corpus_ids)
+        return self.corpus_ids
+
+    def cleanup(self) -> None:
+        # app.db.* is imported only after create_app() has run (import shadowing issue).
+        from sqlalchemy import delete
+
+        from app.db.models.user import User
+        from app.extensions import db
+
+        client = self.client()
+        for document_id in self.document_ids:
+            client.delete(f"/api/documents/{document_id}", headers=self.headers)
+        with self.app.app_context():
+            db.session.execute(delete(User).where(User.id == self.user_id))
+            db.session.commit()
+
+
+# ── Scenarios ─────────────────────────────────────────────────────────────────
+
+def scenario_ingest_pdf(bench: Bench) -> ScenarioResult:
+    from app.db.models.chunk import Chunk
+
+    pdf_bytes = _synthetic_pdf(bench.args.pdf_pages)
+    result = ScenarioResult("ingest_pdf", unit_name="chunks")
+    lock = threading.Lock()
+
+    def upload(index: int) -> int:
+        response = bench.client().post(
+            "/api/documents/upload",
+            headers=bench.headers,
+            data={"file": (io.BytesIO(pdf_bytes), f"bench_lecture_{index}.pdf", "application/pdf")},
+            content_type="multipart/form-data",
+        )
+        _expect(response, 201)
+        body = response.get_json()
+        with lock:
+            bench.document_ids.append(body["document"]["id"])
+        with bench.app.app_context():
+            return Chunk.query.filter_by(ingestion_id=body["ingestion"]["id"]).count()
+
+    operations = [lambda index=index: upload(index) for index in range(bench.args.ingest_runs)]
+    return _run(result, operations, bench.args.concurrency)
+
+
+def scenario_multi_doc_chat(bench: Bench) -> ScenarioResult:
+    document_ids = bench.corpus()
+    sessions = []
+    for worker in range(bench.args.concurrency):
+        response = bench.client().post("/api/chat/sessions", headers=bench.headers, json={"title": f"Bench {worker}"})
+        _expect(response, 201)
+        chat_id = response.get_json()["id"]
+        _expect(
+            bench.client().put(
+                f"/api/chat/sessions/{chat_id}/documents",
+                headers=bench.headers,
+                json={"document_ids": document_ids},
+            ),
+            200,
+        )
+        sessions.append(chat_id)
+
+    def send(index: int) -> int:
+        chat_id = sessions[index % len(sessions)]
+        response = bench.client().post(
+            f"/api/chat/sessions/{chat_id}/messages",
+            headers=bench.headers,
+            json={"content": _question(index)},
+        )
+        _expect(response, 200, 201)
+        return 1
+
+    operations = [lambda index=index: send(index) for index in range(bench.args.iterations)]
+    # One worker per session so turns of a chat never overlap.
+    return _run(ScenarioResult("multi_doc_chat"), operations, bench.args.concurrency)
+
+
+def scenario_quiz_generation(bench: Bench) -> ScenarioResult:
+    document_ids = bench.corpus()
+    quiz_runs = max(1, bench.args.iterations // 4)
+
+    def create(index: int) -> int:
+        topic = _TOPICS[index % len(_TOPICS)][0]
+        response = bench.client().post(
+            "/api/quizzes",
+            headers=bench.headers,
+            json={
+                "topic": topic,
+                "question_count": bench.args.quiz_questions,
+                "marks": bench.args.quiz_questions * 2,
+                "document_ids": document_ids,
+                "fresh_questions": True,
+            },
+        )
+        _expect(response, 201)
+        return bench.args.quiz_questions
+
+    operations = [lambda index=index: create(index) for index in range(quiz_runs)]
+    return _run(ScenarioResult("quiz_generation", unit_name="questions"), operations, bench.args.concurrency)
+
+
+def scenario_analytics_reads(bench: Bench) -> ScenarioResult:
+    paths = ("/api/analytics/overview", "/api/analytics/progress", "/api/analytics/weak-topics")
+
+    def read(index: int) -> int:
+        _expect(bench.client().get(paths[index % len(paths)], headers=bench.headers), 200)
+        return 1
+
+    operations = [lambda index=index: read(index) for index in range(bench.args.iterations * len(paths))]
+    return _run(ScenarioResult("analytics_reads"), operations, bench.args.concurrency)
+
+
+_SCENARIO_FUNCTIONS: dict[str, Callable[[Bench], ScenarioResult]] = {
+    "ingest_pdf": scenario_ingest_pdf,
+    "multi_doc_chat": scenario_multi_doc_chat,
+    "quiz_generation": scenario_quiz_generation,
+    "analytics_reads": scenario_analytics_reads,
+}
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+def _run(result: ScenarioResult, operations: list[Callable[[], int]], concurrency: int) -> ScenarioResult:
+    """
+    Run *operations* on *concurrency* worker threads.  Operation i goes to
+    worker i % concurrency and each worker runs its share in order.
+    """
+    worker_count = max(1, min(concurrency, len(operations)))
+    shares = [operations[worker::worker_count] for worker in range(worker_count)]
+    lock = threading.Lock()
+
+    def work(share: list[Callable[[], int]]) -> None:
+        for operation in share:
+            started = time.perf_counter()
+            try:
+                units = operation()
+            except Exception as exc:  # report and keep measuring
+                with lock:
+                    result.errors += 1
+                    result.first_error = result.first_error or f"{type(exc).__name__}: {exc}"
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                result.latencies.append(elapsed)
+                result.units += units or 0
+
+    threads = [threading.Thread(target=work, args=(share,)) for share in shares]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.wall_sec = time.perf_counter() - started
+    return result
+
+
+def _compare(report: dict, baseline: dict, max_regression: float) -> list[str]:
+    regressions = []
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if previous.get("p95_ms") and current.get("p95_ms") is not None:
+            growth = current["p95_ms"] / previous["p95_ms"] - 1
+            if growth > max_regression:
+                regressions.append(
+                    f"{name}: p95 {previous['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms (+{growth * 100:.0f}%)"
+                )
+        if previous.get("throughput_per_sec"):
+            drop = 1 - current["throughput_per_sec"] / previous["throughput_per_sec"]
+            if drop > max_regression:
+                regressions.append(
+                    f"{name}: throughput {previous['throughput_per_sec']:.2f}/s -> "
+                    f"{current['throughput_per_sec']:.2f}/s (-{drop * 100:.0f}%)"
+                )
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: errors {previous.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+def _print_report(report: dict) -> None:
+    print(
+        f"\n{'scenario':<16} {'ops':>5} {'err':>4} {'wall s':>8} {'ops/s':>8} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  extra"
+    )
+    for name, summary in report["scenarios"].items():
+        extra = ", ".join(f"{key}={value}" for key, value in summary.items() if key.endswith("_per_sec") and key != "throughput_per_sec")
+        print(
+            f"{name:<16} {summary['operations']:>5} {summary['errors']:>4} {summary['wall_sec']:>8.2f} "
+            f"{summary['throughput_per_sec']:>8.2f} {_ms(summary['p50_ms']):>9} {_ms(summary['p95_ms']):>9} "
+            f"{_ms(summary['p99_ms']):>9}  {extra}"
+        )
+        if summary.get("first_error"):
+            print(f"{'':<16} first error: {summary['first_error']}")
+    stats = report["fake_server"]
+    print(
+        f"\nfake server: {stats['chat_requests']} chat ({stats['prompt_tokens']} prompt / "
+        f"{stats['completion_tokens']} completion tokens), {stats['embedding_requests']} embedding requests "
+        f"({stats['embedding_inputs']} inputs), injected 503={stats['injected_503']} "
+        f"429={stats['injected_429']} invalid quizzes={stats['invalid_quizzes']}"
+    )
+
+
+# ── Data ──────────────────────────────────────────────────────────────────────
+
+def _question(index: int) -> str:
+    topic, words = _TOPICS[index % len(_TOPICS)]
+    vocabulary = words.split()
+    template = _QUESTION_TEMPLATES[(index // len(_TOPICS)) % len(_QUESTION_TEMPLATES)]
+    return template.format(
+        topic=topic,
+        word=vocabulary[index % len(vocabulary)],
+        other=vocabulary[(index + 3) % len(vocabulary)],
+    )
+
+
+def _lecture_text(topic: str, words: str, paragraphs: int) -> str:
+    vocabulary = words.split()
+    lines = []
+    for paragraph in range(paragraphs):
+        first = vocabulary[paragraph % len(vocabulary)]
+        second = vocabulary[(paragraph * 3 + 1) % len(vocabulary)]
+        lines.append(
+            f"Section {paragraph + 1} on {topic}. The {first} determines how the {second} behaves. "
+            f"When the {first} changes, students should check the {second} against worked example "
+            f"{paragraph + 1}. A common exam question asks how {topic} uses the {first} and why the "
+            f"{second} matters in practice."
+        )
+    return "\n\n".join(lines)
+
+
+def _synthetic_pdf(pages: int) -> bytes:
+    """A plain PDF with *pages* pages of lecture text in Helvetica (no dependencies)."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_numbers = []
+    for page in range(pages):
+        topic, words = _TOPICS[page % len(_TOPICS)]
+        text_lines = []
+        for paragraph in _lecture_text(topic, words, paragraphs=6).split("\n\n"):
+            sentence = f"Page {page + 1}. {paragraph}"
+            text_lines.extend(textwrap.wrap(sentence, 95))
+        stream_lines = ["BT", "/F1 10 Tf", "12 TL", "50 790 Td"]
+        for line in text_lines[:60]:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            stream_lines.append(f"({escaped}) Tj T*")
+        stream_lines.append("ET")
+        stream = "\n".join(stream_lines).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_number = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_number
+        )
+        page_numbers.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % number for number in page_numbers)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_numbers)
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref_offset = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset))
+    return output.getvalue()
+
+
+def _percentile_ms(ordered: list[float], percentile: float) -> float | None:
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * percentile / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    value = ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+    return round(value * 1000, 2)
+
+
+def _ms(value: float | None) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def _expect(response, *statuses: int) -> None:
+    if response.status_code not in statuses:
+        raise RuntimeError(f"{response.request.method} {response.request.path} -> {response.status_code}: "
+                           f"{response.get_data(as_text=True)[:200]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="gpu")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the profile's delays by this factor")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ", ".join(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=20, help="chat turns and analytics rounds (quizzes: a quarter)")
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--documents", type=int, default=4, help="documents in the chat/quiz corpus")
+    parser.add_argument("--pdf-pages", type=int, default=60)
+    parser.add_argument("--ingest-runs", type=int, default=3)
+    parser.add_argument("--quiz-questions", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json-out", default=None)
+    parser.add_argument("--baseline", default=None, help="earlier --json-out report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    parser.add_argument("--keep-data", action="store_true", help="keep the benchmark user and documents")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = sorted(set(scenarios) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    profile = PROFILES[args.profile].scaled(args.scale)
+    server = FakeAIServer(profile, seed=args.seed).start()
+    app = create_app()
+    app.testing = True
+    app.config.update(
+        OLLAMA_BASE_URL=f"{server.url}/v1",
+        OLLAMA_API_KEY="benchmark",
+        WRAPPER_BASE_URL=server.url,
+        WRAPPER_KEY="benchmark",
+    )
+    print(f"profile={profile.name} scale={args.scale} server={server.url} concurrency={args.concurrency}")
+
+    bench = Bench(app, args)
+    results: dict[str, dict] = {}
+    try:
+        for name in scenarios:
+            print(f"running {name} ...", flush=True)
+            summary = _SCENARIO_FUNCTIONS[name](bench)
+            results[name] = summary.summary()
+            if summary.first_error:
+                results[name]["first_error"] = summary.first_error
+    finally:
+        if not args.keep_data:
+            bench.cleanup()
+        server.stop()
+
+    report = {
+        "profile": profile.as_dict(),
+        "scale": args.scale,
+        "concurrency": args.concurrency,
+        "iterations": args.iterations,
+        "scenarios": results,
+        "fake_server": dict(server.stats),
+    }
+    _print_report(report)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"\nreport written to {args.json_out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = _compare(report, json.load(handle), args.max_regression)
+        if regressions:
+            print("\nREGRESSIONS:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nno regression beyond {args.max_regression * 100:.0f}% against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
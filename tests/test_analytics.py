@@ -15,7 +15,7 @@ import json
 import os
 import sys
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 
 def hdr(label: str) -> None:
@@ -47,6 +47,8 @@ from app.db.models.document import Document  # noqa: E402
 from app.db.models.event import Event  # noqa: E402
 from app.db.models.user import User  # noqa: E402
 from app.extensions import db  # noqa: E402
+from app.services.analytics import metrics as analytics_metrics  # noqa: E402
+from app.services.cache import response_cache  # noqa: E402
 from app.services.quiz import generator as quiz_generator  # noqa: E402
 from app.services.quiz import summarizer as quiz_summarizer  # noqa: E402
 
@@ -395,6 +397,76 @@ try:
     require(weak_topics[0]["accuracy_percent"] == 50.0, "weak topic accuracy should be 50.0")
     require(weak_topics[0]["average_score_percent"] == 50.0, "weak topic score should be 50.0")
 
+    hdr("ANALYTICS ETAG CACHING")
+    etag = overview_response.headers.get("ETag")
+    require(bool(etag), "overview response should include an ETag")
+    not_modified = client.get(
+        "/api/analytics/overview",
+        headers={**auth_header(token_a), "If-None-Match": etag},
+    )
+    check(not_modified, 304)
+
+    other_user_etag = client.get(
+        "/api/analytics/overview",
+        headers={**auth_header(token_b), "If-None-Match": etag},
+    )
+    check(other_user_etag, 200)
+
+    second_session = client.post(
+        "/api/chat/sessions",
+        headers=auth_header(token_a),
+        json={"title": "Cache Bust Chat"},
+    )
+    check(second_session, 201)
+    refreshed_overview = client.get(
+        "/api/analytics/overview",
+        headers={**auth_header(token_a), "If-None-Match": etag},
+    )
+    check(refreshed_overview, 200)
+    require(refreshed_overview.headers.get("ETag") != etag, "ETag should change after a write")
+    require(
+        refreshed_overview.get_json()["totals"]["chat_sessions"] == 2,
+        "overview should reflect the new chat session after the data version bump",
+    )
+    print("unchanged analytics return 304 and writes invalidate the ETag")
+
+    hdr("PROGRESS CACHE EXPIRES AT UTC MIDNIGHT")
+    today_response = client.get("/api/analytics/progress", headers=auth_header(token_a))
+    check(today_response, 200)
+    progress_etag = today_response.headers.get("ETag")
+    today_last_day = today_response.get_json()["daily_activity"][-1]["date"]
+    check(
+        client.get("/api/analytics/progress", headers={**auth_header(token_a), "If-None-Match": progress_etag}),
+        304,
+    )
+
+    class TomorrowDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) + timedelta(days=1)
+
+    analytics_metrics.datetime = TomorrowDatetime
+    response_cache.datetime = TomorrowDatetime
+    try:
+        tomorrow_response = client.get(
+            "/api/analytics/progress",
+            headers={**auth_header(token_a), "If-None-Match": progress_etag},
+        )
+        check(tomorrow_response, 200)
+        require(tomorrow_response.headers.get("ETag") != progress_etag, "ETag should change after UTC midnight")
+        tomorrow_last_day = tomorrow_response.get_json()["daily_activity"][-1]["date"]
+        require(tomorrow_last_day > today_last_day, "the progress window should move to the new UTC day")
+        replayed = client.get("/api/analytics/progress", headers=auth_header(token_a))
+        check(replayed, 200)
+        require(
+            replayed.get_json()["daily_activity"][-1]["date"] == tomorrow_last_day,
+            "the cached body for the new day should be the new window",
+        )
+    finally:
+        analytics_metrics.datetime = datetime
+        response_cache.datetime = datetime
+    print(f"progress window moved from {today_last_day} to {tomorrow_last_day} without a write")
+
     hdr("EVENT TABLE CHECK")
     with app.app_context():
         event_rows_a = Event.query.filter_by(user_id=user_a_id).all()
@@ -0,0 +1,223 @@
+"""
+Integration test - semantic answer cache in generate_answer.
+
+Runs inside the Flask application context and patches retrieval, the
+question embedding and the chat client, so no wrapper or Ollama is needed.
+
+Run from project root:
+    python tests/test_answer_cache.py
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import uuid
+
+
+def hdr(label: str) -> None:
+    print("\n" + "=" * 60)
+    print(label)
+    print("=" * 60)
+
+
+def fail(message: str) -> None:
+    print(f"FAIL: {message}")
+    sys.exit(1)
+
+
+def require(condition: bool, message: str) -> None:
+    if not condition:
+        fail(message)
+
+
+ROOT = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(ROOT, "..", "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Import create_app before app.db.* imports to avoid the repo's import shadowing issue.
+from app import create_app  # noqa: E402
+
+app = create_app()
+app.config["ANSWER_CACHE_ENABLED"] = True
+app.config["ANSWER_CACHE_SIMILARITY"] = 0.9
+
+from app.db.models.answer_cache import AnswerCache  # noqa: E402
+from app.db.models.user import User  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.services.rag import answer_cache  # noqa: E402
+from app.services.rag import answering  # noqa: E402
+from app.services.rag import retrieval  # noqa: E402
+
+
+def unit_vector(*components: float) -> list[float]:
+    return list(components) + [0.0] * (1536 - len(components))
+
+
+QUESTION_VECTORS = {
+    "What is gradient descent?": unit_vector(1.0, 0.0),
+    "Explain gradient descent.": unit_vector(0.98, 0.2),
+    "What is a decision tree?": unit_vector(0.0, 1.0),
+}
+SOURCES = [
+    {
+        "chunk_id": 1,
+        "document_id": "doc-1",
+        "snippet": "Gradient descent updates parameters against the gradient.",
+        "score": 0.9,
+        "document_title": "ML notes",
+        "source_type": "text",
+        "filename": None,
+        "ingestion_id": "ing-1",
+        "chunk_index": 0,
+    }
+]
+
+chat_calls: list[list[dict]] = []
+embed_calls: list[str] = []
+
+
+class FakeChatClient:
+    def chat_completions(self, **kwargs):
+        chat_calls.append(kwargs["messages"])
+        return {"choices": [{"message": {"content": f"Answer {len(chat_calls)} [Source 1]"}}]}
+
+
+def fake_embed_query(text: str) -> list[float]:
+    embed_calls.append(text)
+    return QUESTION_VECTORS[text]
+
+
+original_retrieve_chunks = answering.retrieve_chunks
+original_get_client = answering.get_client
+original_embed_query = answer_cache.embed_query
+answering.retrieve_chunks = lambda **kwargs: [dict(source) for source in SOURCES]
+answering.get_client = lambda: FakeChatClient()
+answer_cache.embed_query = fake_embed_query
+
+try:
+    with app.app_context():
+        user = User(email=f"answercache_{uuid.uuid4().hex[:8]}@tutor.local", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        def ask(question: str, **kwargs) -> dict:
+            result = answering.generate_answer(
+                question=question,
+                user_id=user.id,
+                model="qwen3.5:0.8b",
+                top_k=1,
+                **kwargs,
+            )
+            db.session.commit()
+            return result
+
+        hdr("First question is generated and stored")
+        first = ask("What is gradient descent?")
+        require(not first["cached"], "first question should not be a cache hit")
+        require(len(chat_calls) == 1, "first question should call the model")
+        require(AnswerCache.query.count() == 1, "answer should be stored")
+        print("Stored:", first["answer"])
+
+        hdr("Same question (different case/spacing) is served from the cache")
+        again = ask("  what is GRADIENT descent? ")
+        require(again["cached"] and again["answer"] == first["answer"], "repeat should hit the cache")
+        require(len(chat_calls) == 1, "cache hit must not call the model")
+        require(again["sources"] == SOURCES, "cache hit should return the freshly retrieved sources")
+        print("Exact repeat hit without a new embedding:", len(embed_calls) == 1)
+
+        hdr("Similar question above the threshold is a hit")
+        similar = ask("Explain gradient descent.")
+        require(similar["cached"], "question within the cosine threshold should hit")
+        require(len(chat_calls) == 1, "similar question must not call the model")
+
+        hdr("Dissimilar question misses and is stored")
+        other = ask("What is a decision tree?")
+        require(not other["cached"] and len(chat_calls) == 2, "dissimilar question should be generated")
+        require(AnswerCache.query.count() == 2, "new answer should be stored")
+        require(embed_calls.count("What is a decision tree?") == 1, "lookup embedding should be reused for the store")
+
+        hdr("Chats with history bypass the cache")
+        with_history = ask(
+            "What is gradient descent?",
+            history=[{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}],
+        )
+        require(not with_history["cached"] and len(chat_calls) == 3, "history should bypass the cache")
+        require(AnswerCache.query.count() == 2, "answers with history must not be stored")
+
+        hdr("Changed sources change the key")
+        SOURCES[0]["ingestion_id"] = "ing-2"
+        reingested = ask("What is gradient descent?")
+        require(not reingested["cached"] and len(chat_calls) == 4, "new ingestion should miss")
+
+        hdr("Disabled cache is bypassed")
+        app.config["ANSWER_CACHE_ENABLED"] = False
+        disabled = ask("What is gradient descent?")
+        require(not disabled["cached"] and len(chat_calls) == 5, "disabled cache should always generate")
+finally:
+    answering.retrieve_chunks = original_retrieve_chunks
+    answering.get_client = original_get_client
+    answer_cache.embed_query = original_embed_query
+
+
+class CountingEmbeddingClient:
+    def __init__(self) -> None:
+        self.inputs: list = []
+
+    def embeddings(self, model, input):
+        self.inputs.append(input)
+        texts = input if isinstance(input, list) else [input]
+        return {"data": [{"index": index, "embedding": unit_vector(1.0, 0.1)} for index in range(len(texts))]}
+
+
+class EmptyStore:
+    name = "empty"
+
+    def search(self, *args, **kwargs):
+        return []
+
+    def search_rows(self, *args, **kwargs):
+        return []
+
+    def document_seeds(self, *args, **kwargs):
+        return []
+
+
+embedding_client = CountingEmbeddingClient()
+original_retrieval_get_client = retrieval.get_client
+original_retrieval_store = retrieval.get_vector_store
+retrieval.get_client = lambda: embedding_client
+retrieval.get_vector_store = lambda: EmptyStore()
+
+try:
+    hdr("Answer cache reuses the retrieval query vector")
+    question = "How does backpropagation work?"
+    with app.app_context():
+        retrieval.retrieve_chunks_diversified(question, user_id=user_id, top_k=3)
+        require(len(embedding_client.inputs) == 1, "retrieval should embed the question once")
+        store_vector = answer_cache.embed_query(f"  {question} ")
+        answer_cache.store_cached_answer(
+            user_id=user_id,
+            cache_key="reuse-key",
+            question=question,
+            answer="Stored answer",
+            model_used="qwen3.5:0.8b",
+        )
+        require(
+            len(embedding_client.inputs) == 1,
+            "the answer cache must not embed a question retrieval just embedded",
+        )
+        require(store_vector == unit_vector(1.0, 0.1), "recalled vector should be the retrieval vector")
+        db.session.rollback()
+
+    with app.app_context():
+        answer_cache.embed_query(question)
+        require(len(embedding_client.inputs) == 2, "remembered vectors should not outlive the request")
+    print("one embedding call per first-turn question")
+finally:
+    retrieval.get_client = original_retrieval_get_client
+    retrieval.get_vector_store = original_retrieval_store
+
+print("\nSemantic answer cache reuses first-turn answers over the same sources.")
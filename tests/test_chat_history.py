@@ -0,0 +1,363 @@
+"""
+Integration test - token-budgeted chat history with rolling summaries.
+
+Uses Flask's test client and patches model routing, answer generation, and
+the summariser client so the history manager can be verified without live
+Ollama or wrapper calls.
+
+Run from project root:
+    python test_chat_history.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+
+def hdr(label: str) -> None:
+    print("\n" + "=" * 60)
+    print(label)
+    print("=" * 60)
+
+
+def fail(message: str) -> None:
+    print(f"FAIL: {message}")
+    sys.exit(1)
+
+
+ROOT = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(ROOT, "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Import create_app before app.db.* imports to avoid the repo's import shadowing issue.
+from app import create_app  # noqa: E402
+
+app = create_app()
+app.testing = True
+app.config["CHAT_HISTORY_TOKEN_BUDGET"] = 400
+app.config["CHAT_HISTORY_SUMMARY_MAX_TOKENS"] = 120
+client = app.test_client()
+
+from app.api import chat as chat_api  # noqa: E402
+from app.db.models.chat import Chat  # noqa: E402
+from app.db.models.chat_message import ChatMessage  # noqa: E402
+from app.db.models.user import User  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.services.rag import answering  # noqa: E402
+from app.services.rag import history as chat_history  # noqa: E402
+from app.services.quiz import generator as quiz_generator  # noqa: E402
+from app.services.rag.context_packer import MIN_SOURCE_TOKENS, pack_sources, reply_token_reserve  # noqa: E402
+from app.services.rag.tokens import estimate_message_tokens, estimate_tokens  # noqa: E402
+
+
+def require(condition: bool, message: str) -> None:
+    if not condition:
+        fail(message)
+
+
+def auth_header(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def response_json(response):
+    try:
+        return response.get_json()
+    except Exception:
+        return response.get_data(as_text=True)
+
+
+def check(response, *expected_statuses: int):
+    if response.status_code not in expected_statuses:
+        payload = response_json(response)
+        fail(
+            f"unexpected status {response.status_code}, expected {expected_statuses}\n"
+            f"response={json.dumps(payload, indent=2) if isinstance(payload, dict) else payload}"
+        )
+    return response
+
+
+email = f"historytest_{uuid.uuid4().hex[:8]}@tutor.local"
+password = "historytest123"
+
+original_select_model = chat_api._select_model
+original_generate_answer = chat_api.generate_answer
+original_history_get_client = chat_history.get_client
+captured_calls: list[dict] = []
+summary_calls: list[list[dict]] = []
+
+
+def fake_generate_answer(**kwargs):
+    captured_calls.append(kwargs)
+    # Long answers are what used to make the prompt balloon.
+    return {
+        "answer": f"Answer {len(captured_calls)}: " + "gradient descent explanation " * 10,
+        "model": kwargs["model"],
+        "sources": [],
+        "out_of_context": False,
+    }
+
+
+class FakeSummaryClient:
+    def chat_completions(self, **kwargs):
+        summary_calls.append(kwargs["messages"])
+        return {"choices": [{"message": {"content": f"Rolling summary v{len(summary_calls)}."}}]}
+
+
+class FailingSummaryClient:
+    def chat_completions(self, **kwargs):
+        raise chat_api.WrapperError("summary model unavailable")
+
+
+chat_api._select_model = lambda message: {
+    "category": "general",
+    "model": "qwen3.5:0.8b",
+    "confidence": "high",
+    "method": "test",
+}
+chat_api.generate_answer = fake_generate_answer
+chat_history.get_client = lambda: FakeSummaryClient()
+
+try:
+    hdr("REGISTER USER AND CREATE SESSION")
+    register = client.post("/api/auth/register", json={"email": email, "password": password})
+    check(register, 201)
+    token = register.get_json()["access_token"]
+    session = client.post("/api/chat/sessions", headers=auth_header(token), json={"title": "History"})
+    check(session, 201)
+    chat_id = session.get_json()["id"]
+    print("created chat session")
+
+    hdr("SHORT SESSION KEEPS FULL HISTORY")
+    check(
+        client.post(
+            f"/api/chat/sessions/{chat_id}/messages",
+            headers=auth_header(token),
+            json={"content": "What is gradient descent?"},
+        ),
+        200,
+    )
+    require(captured_calls[-1]["history"] == [], "first turn should have no history")
+    require(captured_calls[-1]["history_summary"] is None, "first turn should have no summary")
+    check(
+        client.post(
+            f"/api/chat/sessions/{chat_id}/messages",
+            headers=auth_header(token),
+            json={"content": "And the learning rate?"},
+        ),
+        200,
+    )
+    require(len(captured_calls[-1]["history"]) == 2, "second turn should see the first exchange verbatim")
+    require(not summary_calls, "no summary should be generated while history fits the budget")
+    print("history under budget is passed verbatim")
+
+    hdr("LONG SESSION STAYS WITHIN BUDGET")
+    for turn in range(8):
+        check(
+            client.post(
+                f"/api/chat/sessions/{chat_id}/messages",
+                headers=auth_header(token),
+                json={"content": f"Follow-up question {turn} about convergence?"},
+            ),
+            200,
+        )
+        history_tokens = estimate_message_tokens(captured_calls[-1]["history"])
+        require(
+            history_tokens <= app.config["CHAT_HISTORY_TOKEN_BUDGET"],
+            f"history should stay within the token budget, got {history_tokens}",
+        )
+    require(summary_calls, "older turns should have been folded into a summary")
+    require(
+        len(summary_calls) < 8,
+        "summaries should be regenerated incrementally, not on every turn",
+    )
+    require(
+        captured_calls[-1]["history_summary"].startswith("Rolling summary"),
+        "answer generation should receive the rolling summary",
+    )
+    require(
+        "Rolling summary" in summary_calls[-1][1]["content"],
+        "summary regeneration should include the previous summary",
+    )
+    with app.app_context():
+        chat = db.session.get(Chat, chat_id)
+        require(chat.history_summary is not None, "summary should be stored on the chat row")
+        require(chat.history_summary_until is not None, "summary watermark should be stored")
+    print(f"{len(summary_calls)} summary updates over 10 turns")
+
+    hdr("SUMMARY FALLBACK WHEN MODEL FAILS")
+    chat_history.get_client = lambda: FailingSummaryClient()
+    calls_before = len(summary_calls)
+    for turn in range(4):
+        check(
+            client.post(
+                f"/api/chat/sessions/{chat_id}/messages",
+                headers=auth_header(token),
+                json={"content": f"Fallback question {turn}?"},
+            ),
+            200,
+        )
+    require(len(summary_calls) == calls_before, "failing client should not record summary calls")
+    require(
+        "Student asked" in captured_calls[-1]["history_summary"],
+        "fallback summary should be extractive when the summary model fails",
+    )
+    print("fallback summary used when the summary model is unavailable")
+
+    hdr("MESSAGE CAP FOLDS SHORT TURNS INTO THE SUMMARY")
+    chat_history.get_client = lambda: FakeSummaryClient()
+    short_session = client.post("/api/chat/sessions", headers=auth_header(token), json={"title": "Short turns"})
+    check(short_session, 201)
+    short_chat_id = short_session.get_json()["id"]
+    max_messages = app.config["CHAT_HISTORY_MAX_MESSAGES"]
+    with app.app_context():
+        user_id = db.session.get(Chat, short_chat_id).user_id
+        started = datetime.now(timezone.utc) - timedelta(hours=1)
+        for index in range(max_messages + 5):
+            db.session.add(
+                ChatMessage(
+                    chat_id=short_chat_id,
+                    user_id=user_id,
+                    role="user" if index % 2 == 0 else "assistant",
+                    content=f"Short message {index}.",
+                    created_at=started + timedelta(seconds=index),
+                )
+            )
+        db.session.commit()
+
+        chat = db.session.get(Chat, short_chat_id)
+        calls_before = len(summary_calls)
+        state = chat_history.build_history(chat)
+        short_tokens = estimate_message_tokens(state["history"])
+        require(
+            short_tokens < app.config["CHAT_HISTORY_TOKEN_BUDGET"],
+            "short turns should stay under the token budget so only the message cap triggers folding",
+        )
+        require(len(summary_calls) == calls_before + 1, "exceeding the message cap should fold once")
+        require(len(state["history"]) <= max_messages // 2, "folding should keep at most half the message cap")
+        folded_count = max_messages + 5 - len(state["history"])
+        folded_text = summary_calls[-1][1]["content"]
+        require(
+            all(f"Short message {index}." in folded_text for index in range(folded_count)),
+            "every message leaving the window should be summarised",
+        )
+        require(
+            state["history"][0]["content"] == f"Short message {folded_count}.",
+            "verbatim history should continue right after the summarised messages",
+        )
+        require(chat.history_summary_until is not None, "summary watermark should advance over folded messages")
+        db.session.commit()
+
+        db.session.add(
+            ChatMessage(
+                chat_id=short_chat_id,
+                user_id=user_id,
+                role="user",
+                content="One more short message.",
+                created_at=started + timedelta(seconds=max_messages + 5),
+            )
+        )
+        db.session.commit()
+        next_state = chat_history.build_history(db.session.get(Chat, short_chat_id))
+        require(len(summary_calls) == calls_before + 1, "a turn under the cap should not fold again")
+        require(
+            next_state["history"][:-1] == state["history"],
+            "between folds the verbatim history should only grow at the end",
+        )
+    print(f"{folded_count} short messages folded at the {max_messages}-message cap")
+
+    hdr("RETRIEVED SOURCES ARE PACKED INTO THE PROMPT")
+    words = [f"word{index}" for index in range(400)]
+    first_text = " ".join(words[:200])
+    # Adjacent chunk repeating the last 50 words of the first one (CHUNK_OVERLAP).
+    second_text = " ".join(words[150:350])
+    packing_sources = [
+        {"chunk_id": 1, "document_id": "doc-a", "snippet": first_text, "score": 0.9,
+         "document_title": "Notes", "source_type": "text"},
+        {"chunk_id": 2, "document_id": "doc-a", "snippet": second_text, "score": 0.8,
+         "document_title": "Notes", "source_type": "text"},
+        {"chunk_id": 3, "document_id": "doc-b", "snippet": "word160 " + "filler " * 300, "score": 0.2,
+         "document_title": "Other", "source_type": "text"},
+    ]
+    with app.app_context():
+        packed = pack_sources(packing_sources, token_budget=10_000)
+        require(packed[1]["snippet"].startswith("... word200"), "overlap with the adjacent chunk should be dropped")
+        require(packed[0]["snippet"] == first_text, "the earlier chunk should be kept whole")
+        require(packing_sources[1]["snippet"] == second_text, "input sources must not be modified")
+        require("word160" in packed[2]["snippet"], "chunks of other documents must not be trimmed")
+
+        tight = pack_sources(packing_sources, token_budget=300)
+        tight_tokens = [len(source["snippet"]) // 4 for source in tight]
+        require(sum(tight_tokens) <= 300, "packed sources should fit the token budget")
+        require(tight_tokens[0] > tight_tokens[2], "more relevant sources should keep more text")
+
+        app.config["CONTEXT_SOURCE_MAX_TOKENS"] = 200
+        messages = answering._build_messages(
+            question="What comes after word199?",
+            sources=packing_sources,
+            history=[],
+            history_summary=None,
+            layout=answering.PROMPT_LAYOUT_STABLE_PREFIX,
+            model="test-model",
+        )
+        app.config["CONTEXT_SOURCE_MAX_TOKENS"] = 1200
+    prompt_tokens = estimate_message_tokens(messages)
+    require(prompt_tokens < 200 + 400, f"context block should respect the source budget, got {prompt_tokens}")
+    require("[Source 3]" in messages[-1]["content"], "every source should stay citable")
+    print(f"packed prompt is {prompt_tokens} tokens for {sum(len(s['snippet']) for s in packing_sources) // 4} tokens of sources")
+
+    hdr("A 4096-TOKEN MODEL STILL GETS USABLE SOURCES")
+    small_history = [
+        {"role": "user" if index % 2 == 0 else "assistant", "content": "history turn " * 60}
+        for index in range(6)
+    ]
+    with app.app_context():
+        app.config["MODEL_CONTEXT_WINDOWS"] = "small-model=4096"
+        app.config["MODEL_CONTEXT_WINDOW"] = 4096
+        try:
+            reply_reserve = reply_token_reserve(answering._ANSWER_MAX_TOKENS, "small-model")
+            small_messages = answering._build_messages(
+                question="What comes after word199?",
+                sources=packing_sources,
+                history=small_history,
+                history_summary="Earlier the student asked about word lists.",
+                layout=answering.PROMPT_LAYOUT_STABLE_PREFIX,
+                model="small-model",
+            )
+            quiz_block = quiz_generator._build_source_block(packing_sources)
+        finally:
+            app.config["MODEL_CONTEXT_WINDOWS"] = ""
+            app.config["MODEL_CONTEXT_WINDOW"] = 8192
+    require(reply_reserve == 1024, f"the reply reserve should be a quarter of the window, got {reply_reserve}")
+    chat_context_tokens = estimate_tokens(small_messages[-1]["content"])
+    require(
+        chat_context_tokens > 20 * MIN_SOURCE_TOKENS,
+        f"chat sources should not collapse to the citable minimum, got {chat_context_tokens} tokens",
+    )
+    require(
+        estimate_message_tokens(small_messages) + reply_reserve <= 4096,
+        "prompt plus reply reserve should fit the 4096-token window",
+    )
+    quiz_block_tokens = estimate_tokens(quiz_block)
+    require(
+        quiz_block_tokens > 20 * MIN_SOURCE_TOKENS,
+        f"quiz sources should not collapse to the citable minimum, got {quiz_block_tokens} tokens",
+    )
+    print(f"4096-token window: chat context {chat_context_tokens} tokens, quiz sources {quiz_block_tokens} tokens")
+
+    hdr("ALL CHAT HISTORY TESTS PASSED")
+    print("Conversation history is token-budgeted with a rolling summary.")
+
+finally:
+    chat_api._select_model = original_select_model
+    chat_api.generate_answer = original_generate_answer
+    chat_history.get_client = original_history_get_client
+    with app.app_context():
+        user = User.query.filter_by(email=email).first()
+        if user is not None:
+            db.session.delete(user)
+        db.session.commit()
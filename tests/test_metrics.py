@@ -0,0 +1,236 @@
+"""
+Integration test - Prometheus metrics endpoint and pipeline instrumentation.
+
+Uses Flask's test client.  Provider HTTP calls are answered by a fake
+``requests.post`` (the first generation call returns 503 to exercise the
+retry counters) and the vector store is replaced by an in-memory no-op, so
+no wrapper, Ollama or pgvector is needed.
+
+Run from project root:
+    python tests/test_metrics.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import uuid
+
+
+def hdr(label: str) -> None:
+    print("\n" + "=" * 60)
+    print(label)
+    print("=" * 60)
+
+
+def fail(message: str) -> None:
+    print(f"FAIL: {message}")
+    sys.exit(1)
+
+
+def require(condition: bool, message: str) -> None:
+    if not condition:
+        fail(message)
+
+
+ROOT = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(ROOT, "..", "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Import create_app before app.db.* imports to avoid the repo's import shadowing issue.
+from app import create_app  # noqa: E402
+
+app = create_app()
+app.testing = True
+app.config.update(
+    METRICS_ENABLED=False,
+    METRICS_TOKEN="scrape-secret",
+    WRAPPER_BASE_URL="http://wrapper.test",
+    WRAPPER_KEY="test-key",
+    OLLAMA_BASE_URL="http://ollama.test/v1",
+    OLLAMA_BASE_DELAY=0.01,
+    OLLAMA_MAX_RETRIES=1,
+    OLLAMA_MODEL="qwen3.5:0.8b",
+    RETRIEVAL_CACHE_ENABLED=True,
+    TRACING_EXPORTER="none",
+)
+client = app.test_client()
+
+from app.api import chat as chat_api  # noqa: E402
+from app.services.observability.metrics import clear_metrics  # noqa: E402
+from app.services.rag import ingestion, retrieval  # noqa: E402
+from app.services.rag.retrieval_cache import clear_retrieval_cache  # noqa: E402
+from app.services.wrapper import client as wrapper_client  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict):
+        self.status_code = status_code
+        self._body = body
+        self.headers: dict = {}
+        self.text = json.dumps(body)
+
+    def json(self):
+        return self._body
+
+    def close(self):
+        pass
+
+
+class EmptyStore:
+    name = "empty"
+
+    def add(self, **kwargs):
+        pass
+
+    def delete_ingestion(self, ingestion_id):
+        pass
+
+    def document_seeds(self, *args, **kwargs):
+        return []
+
+    def search_rows(self, *args, **kwargs):
+        return []
+
+
+generation_calls: list[dict] = []
+
+
+def fake_post(url, json=None, headers=None, **kwargs):
+    if url.endswith("/v1/embeddings"):
+        inputs = json["input"] if isinstance(json["input"], list) else [json["input"]]
+        return FakeResponse(
+            200,
+            {"data": [{"index": index, "embedding": [0.1] * 1536} for index in range(len(inputs))]},
+        )
+    generation_calls.append(json)
+    if len(generation_calls) == 1:
+        return FakeResponse(503, {"error": "busy"})
+    return FakeResponse(200, {"choices": [{"message": {"content": "Metered answer."}}]})
+
+
+def auth_header(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def scrape() -> str:
+    response = client.get("/metrics", headers=auth_header("scrape-secret"))
+    require(response.status_code == 200, f"scrape failed: {response.status_code}")
+    return response.get_data(as_text=True)
+
+
+def sample(text: str, name: str, **labels) -> float:
+    """Return the value of one sample line, or 0 when it is absent."""
+    for line in text.splitlines():
+        match = re.fullmatch(r"([a-zA-Z_:]+)(?:\{(.*)\})? (\S+)", line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ""))
+        if found == {key: str(value) for key, value in labels.items()}:
+            return float(match.group(3))
+    return 0.0
+
+
+original_post = wrapper_client.requests.post
+original_heuristics_route = chat_api.heuristics_route
+original_retrieval_store = retrieval.get_vector_store
+original_ingestion_store = ingestion.get_vector_store
+wrapper_client.requests.post = fake_post
+chat_api.heuristics_route = lambda message: {
+    "category": "general",
+    "model": "qwen3.5:0.8b",
+    "confidence": "high",
+    "method": "test",
+}
+retrieval.get_vector_store = lambda: EmptyStore()
+ingestion.get_vector_store = lambda: EmptyStore()
+
+try:
+    hdr("Endpoint is off by default and token-protected when on")
+    require(client.get("/metrics").status_code == 404, "disabled endpoint should 404")
+    app.config["METRICS_ENABLED"] = True
+    require(client.get("/metrics").status_code == 401, "missing token should 401")
+    require(client.get("/metrics", headers=auth_header("wrong")).status_code == 401, "wrong token should 401")
+    response = client.get("/metrics", headers=auth_header("scrape-secret"))
+    require(response.status_code == 200, "valid token should 200")
+    require(response.content_type.startswith("text/plain; version=0.0.4"), "unexpected content type")
+    require("# TYPE tutor_provider_request_duration_seconds histogram" in response.get_data(as_text=True),
+            "catalog metrics should be declared")
+    clear_metrics()
+    clear_retrieval_cache()
+
+    hdr("Ingestion counts chunks and embedding batch sizes")
+    register = client.post(
+        "/api/auth/register",
+        json={"email": f"metrics_{uuid.uuid4().hex[:8]}@tutor.local", "password": "metricstest123"},
+    )
+    require(register.status_code == 201, f"register failed: {register.status_code}")
+    token = register.get_json()["access_token"]
+    text = " ".join(f"Sentence {index} about gradient descent and learning rates." for index in range(400))
+    document = client.post(
+        "/api/documents/text",
+        headers=auth_header(token),
+        json={"title": "Optimisation notes", "text": text},
+    )
+    require(document.status_code == 201, f"text document failed: {document.status_code} {document.get_data(as_text=True)}")
+    metrics_text = scrape()
+    chunks = sample(metrics_text, "tutor_ingested_chunks_total", kind="text")
+    require(chunks >= 2, f"expected several ingested chunks, got {chunks}")
+    require(sample(metrics_text, "tutor_ingestion_duration_seconds_count", kind="text", outcome="ready") == 1,
+            "ingestion duration should be observed once")
+    require(
+        sample(metrics_text, "tutor_embedding_batch_size_sum", model="gemini/gemini-embedding-001") == chunks,
+        "embedding batch sizes should add up to the chunk count",
+    )
+    print(f"ingested chunks: {chunks:.0f}")
+
+    hdr("Chat turn records provider latency, retries and retrieval")
+    session = client.post("/api/chat/sessions", headers=auth_header(token), json={"title": "Metrics"})
+    chat_id = session.get_json()["id"]
+    for _ in range(2):
+        sent = client.post(
+            f"/api/chat/sessions/{chat_id}/messages",
+            headers=auth_header(token),
+            json={"content": "What is gradient descent?"},
+        )
+        require(sent.status_code in (200, 201), f"send message failed: {sent.status_code}")
+    metrics_text = scrape()
+    print("\n".join(line for line in metrics_text.splitlines() if "_count{" in line or "_total{" in line))
+
+    require(
+        sample(metrics_text, "tutor_provider_request_duration_seconds_count",
+               provider="Ollama", model="qwen3.5:0.8b", status="200") >= 1,
+        "generation latency should be recorded with its final status",
+    )
+    require(sample(metrics_text, "tutor_provider_retries_total", provider="Ollama", reason="503") == 1,
+            "the 503 should count as one retry")
+    require(sample(metrics_text, "tutor_provider_backoff_seconds_total", provider="Ollama") > 0,
+            "backoff sleep time should be recorded")
+    retrieval_calls = sum(
+        sample(metrics_text, "tutor_retrieval_duration_seconds_count", mode=mode)
+        for mode in ("plain", "diversified")
+    )
+    require(retrieval_calls == 2, "retrieval latency should be recorded once per call")
+
+    hdr("Cache hit ratio inputs")
+    hits = sample(metrics_text, "tutor_cache_requests_total", cache="retrieval", result="hit")
+    misses = sample(metrics_text, "tutor_cache_requests_total", cache="retrieval", result="miss")
+    require(misses >= 1 and hits >= 1, f"repeat question should hit the retrieval cache (hits={hits} misses={misses})")
+    print(f"retrieval cache: {hits:.0f} hit(s), {misses:.0f} miss(es)")
+
+    hdr("Text format")
+    for line in metrics_text.splitlines():
+        require(
+            line.startswith("# ") or re.fullmatch(r"[a-zA-Z_:]+(\{.*\})? \S+", line) is not None,
+            f"malformed exposition line: {line!r}",
+        )
+finally:
+    wrapper_client.requests.post = original_post
+    chat_api.heuristics_route = original_heuristics_route
+    retrieval.get_vector_store = original_retrieval_store
+    ingestion.get_vector_store = original_ingestion_store
+
+print("\n/metrics exposes provider, retry, ingestion, retrieval and cache metrics.")
@@ -0,0 +1,318 @@
+"""
+Integration test - SQL statement counts for source-heavy read endpoints.
+
+Seeds chats and quizzes of different sizes directly in the database and
+asserts that the number of SQL statements issued by the read endpoints does
+not grow with the number of messages or questions (no N+1 source loading).
+
+Run from project root:
+    python test_query_counts.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+
+def hdr(label: str) -> None:
+    print("\n" + "=" * 60)
+    print(label)
+    print("=" * 60)
+
+
+def fail(message: str) -> None:
+    print(f"FAIL: {message}")
+    sys.exit(1)
+
+
+ROOT = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(ROOT, "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Import create_app before app.db.* imports to avoid the repo's import shadowing issue.
+from app import create_app  # noqa: E402
+
+app = create_app()
+app.testing = True
+client = app.test_client()
+
+from sqlalchemy import event  # noqa: E402
+
+from app.db.models.chat import Chat  # noqa: E402
+from app.db.models.chat_message import ChatMessage  # noqa: E402
+from app.db.models.chat_message_source import ChatMessageSource  # noqa: E402
+from app.db.models.chunk import Chunk  # noqa: E402
+from app.db.models.document import Document  # noqa: E402
+from app.db.models.document_ingestion import DocumentIngestion  # noqa: E402
+from app.db.models.quiz import Quiz  # noqa: E402
+from app.db.models.quiz_attempt import QuizAttempt  # noqa: E402
+from app.db.models.quiz_attempt_answer import QuizAttemptAnswer  # noqa: E402
+from app.db.models.quiz_question import QuizQuestion  # noqa: E402
+from app.db.models.quiz_question_source import QuizQuestionSource  # noqa: E402
+from app.db.models.user import User  # noqa: E402
+from app.extensions import db  # noqa: E402
+
+
+def require(condition: bool, message: str) -> None:
+    if not condition:
+        fail(message)
+
+
+def auth_header(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def response_json(response):
+    try:
+        return response.get_json()
+    except Exception:
+        return response.get_data(as_text=True)
+
+
+def check(response, *expected_statuses: int):
+    if response.status_code not in expected_statuses:
+        payload = response_json(response)
+        fail(
+            f"unexpected status {response.status_code}, expected {expected_statuses}\n"
+            f"response={json.dumps(payload, indent=2) if isinstance(payload, dict) else payload}"
+        )
+    return response
+
+
+@contextmanager
+def count_statements():
+    """Yield a list that collects every SQL statement executed in the block."""
+    statements: list[str] = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+email = f"querycount_{uuid.uuid4().hex[:8]}@tutor.local"
+password = "querycount123"
+SMALL = 2
+LARGE = 12
+
+
+def seed_corpus(user_id: str) -> tuple[str, int]:
+    document = Document(
+        user_id=user_id,
+        title="Query Count Notes",
+        source_type="text",
+        original_text="Python is a programming language.",
+    )
+    db.session.add(document)
+    db.session.flush()
+    ingestion = DocumentIngestion(
+        document_id=document.id,
+        user_id=user_id,
+        source_type="text",
+        text_snapshot="Python is a programming language.",
+        status="ready",
+    )
+    db.session.add(ingestion)
+    db.session.flush()
+    chunk = Chunk(
+        user_id=user_id,
+        document_id=document.id,
+        ingestion_id=ingestion.id,
+        chunk_index=0,
+        content="Python is a programming language.",
+        embedding=[0.0] * 1536,
+    )
+    db.session.add(chunk)
+    document.current_ingestion_id = ingestion.id
+    db.session.commit()
+    return document.id, chunk.id
+
+
+def seed_chat(user_id: str, document_id: str, chunk_id: int, message_count: int) -> str:
+    chat = Chat(user_id=user_id, title=f"Chat with {message_count} messages")
+    db.session.add(chat)
+    db.session.flush()
+    base = datetime.now(timezone.utc)
+    for index in range(message_count):
+        message = ChatMessage(
+            chat_id=chat.id,
+            user_id=user_id,
+            role="assistant" if index % 2 else "user",
+            content=f"message {index}",
+            created_at=base + timedelta(seconds=index),
+        )
+        db.session.add(message)
+        db.session.flush()
+        db.session.add(
+            ChatMessageSource(
+                message_id=message.id,
+                chunk_id=chunk_id,
+                document_id=document_id,
+                similarity_score=0.9,
+                snippet="Python is a programming language.",
+            )
+        )
+    db.session.commit()
+    return chat.id
+
+
+def seed_quiz(user_id: str, document_id: str, chunk_id: int, question_count: int) -> tuple[str, str]:
+    quiz = Quiz(
+        user_id=user_id,
+        title=f"Quiz with {question_count} questions",
+        spec_json={"count": question_count},
+        total_marks=float(question_count),
+    )
+    db.session.add(quiz)
+    db.session.flush()
+    attempt = QuizAttempt(quiz_id=quiz.id, user_id=user_id, total_marks=float(question_count))
+    db.session.add(attempt)
+    db.session.flush()
+    for index in range(question_count):
+        question = QuizQuestion(
+            quiz_id=quiz.id,
+            question_index=index,
+            type="mcq_single",
+            question_text=f"Question {index}?",
+            options_json=["A", "B"],
+            correct_json={"option_index": 0},
+            marks=1.0,
+        )
+        db.session.add(question)
+        db.session.flush()
+        db.session.add(
+            QuizQuestionSource(
+                question_id=question.id,
+                chunk_id=chunk_id,
+                document_id=document_id,
+                similarity_score=0.9,
+                snippet="Python is a programming language.",
+            )
+        )
+        db.session.add(
+            QuizAttemptAnswer(
+                attempt_id=attempt.id,
+                question_id=question.id,
+                chosen_json={"option_index": 0},
+            )
+        )
+    db.session.commit()
+    return quiz.id, attempt.id
+
+
+def statements_for(path: str, token: str) -> int:
+    with count_statements() as statements:
+        response = check(client.get(path, headers=auth_header(token)), 200)
+    require(response.get_json() is not None, f"{path} should return JSON")
+    return len(statements)
+
+
+try:
+    hdr("REGISTER USER")
+    register = client.post("/api/auth/register", json={"email": email, "password": password})
+    check(register, 201)
+    token = register.get_json()["access_token"]
+    with app.app_context():
+        user_id = User.query.filter_by(email=email).first().id
+    print("registered test user")
+
+    hdr("SEED CHATS AND QUIZZES")
+    with app.app_context():
+        document_id, chunk_id = seed_corpus(user_id)
+        small_chat_id = seed_chat(user_id, document_id, chunk_id, SMALL)
+        large_chat_id = seed_chat(user_id, document_id, chunk_id, LARGE)
+        small_quiz_id, small_attempt_id = seed_quiz(user_id, document_id, chunk_id, SMALL)
+        large_quiz_id, large_attempt_id = seed_quiz(user_id, document_id, chunk_id, LARGE)
+    print(f"seeded chats and quizzes with {SMALL} and {LARGE} items")
+
+    hdr("GET /api/chat/sessions/<id>/messages STATEMENT COUNT")
+    small_count = statements_for(f"/api/chat/sessions/{small_chat_id}/messages", token)
+    large_count = statements_for(f"/api/chat/sessions/{large_chat_id}/messages", token)
+    print(f"{SMALL} messages -> {small_count} statements, {LARGE} messages -> {large_count} statements")
+    require(small_count == large_count, "message history statement count should not grow with messages")
+    messages = client.get(
+        f"/api/chat/sessions/{large_chat_id}/messages", headers=auth_header(token)
+    ).get_json()
+    require(len(messages) == LARGE, "large chat should return every message")
+    require(all(len(message["sources"]) == 1 for message in messages), "every message should include its sources")
+
+    hdr("GET /api/quizzes/<id>/questions STATEMENT COUNT")
+    small_count = statements_for(f"/api/quizzes/{small_quiz_id}/questions", token)
+    large_count = statements_for(f"/api/quizzes/{large_quiz_id}/questions", token)
+    print(f"{SMALL} questions -> {small_count} statements, {LARGE} questions -> {large_count} statements")
+    require(small_count == large_count, "quiz questions statement count should not grow with questions")
+
+    hdr("GET /api/quizzes/attempts/<id> STATEMENT COUNT")
+    small_count = statements_for(f"/api/quizzes/attempts/{small_attempt_id}", token)
+    large_count = statements_for(f"/api/quizzes/attempts/{large_attempt_id}", token)
+    print(f"{SMALL} answers -> {small_count} statements, {LARGE} answers -> {large_count} statements")
+    require(small_count == large_count, "attempt detail statement count should not grow with answers")
+    attempt_payload = client.get(
+        f"/api/quizzes/attempts/{large_attempt_id}", headers=auth_header(token)
+    ).get_json()
+    require(len(attempt_payload["answers"]) == LARGE, "attempt detail should return every answer")
+    require(
+        all(len(question["sources"]) == 1 for question in attempt_payload["questions"]),
+        "every question should include its sources",
+    )
+
+    hdr("RENDERED QUIZ QUESTIONS ARE SERVED FROM CACHE")
+    with app.app_context():
+        cached_quiz_id, cached_attempt_id = seed_quiz(user_id, document_id, chunk_id, LARGE)
+    path = f"/api/quizzes/{cached_quiz_id}/questions"
+    with count_statements() as cold_statements:
+        cold_payload = check(client.get(path, headers=auth_header(token)), 200).get_json()
+    with count_statements() as warm_statements:
+        warm_payload = check(client.get(path, headers=auth_header(token)), 200).get_json()
+    print(f"cold -> {len(cold_statements)} statements, warm -> {len(warm_statements)} statements")
+    require(warm_payload == cold_payload, "cached questions response should match the rendered one")
+    require(len(warm_payload["questions"]) == LARGE, "cached response should include every question")
+    require(
+        not any("quiz_question" in statement for statement in warm_statements),
+        "warm questions request should not read questions or sources",
+    )
+    require(len(warm_statements) < len(cold_statements), "warm request should issue fewer statements")
+
+    with count_statements() as attempt_statements:
+        attempt_payload = check(
+            client.get(f"/api/quizzes/attempts/{cached_attempt_id}", headers=auth_header(token)), 200
+        ).get_json()
+    require(attempt_payload["questions"] == cold_payload["questions"], "attempt detail should reuse the cached questions")
+    require(attempt_payload["quiz"]["question_count"] == LARGE, "question_count should come from the cache")
+    require(
+        not any("quiz_question" in statement for statement in attempt_statements),
+        "attempt detail should not read questions or sources once they are cached",
+    )
+    answers = attempt_payload["answers"]
+    require(len(answers) == LARGE, "attempt detail should include every answer")
+    require(
+        [answer["question_index"] for answer in answers] == list(range(LARGE)),
+        "answers should follow question order",
+    )
+    for answer, question in zip(answers, cold_payload["questions"]):
+        require(answer["question_id"] == question["id"], "answer should match its question")
+        require(answer["sources"] == question["sources"], "answer sources should come from the cache")
+        require(answer["question_text"] == question["question_text"], "answer question text should be cached")
+        require("correct_json" not in answer, "unsubmitted attempt should not reveal answers")
+
+    hdr("ALL QUERY COUNT TESTS PASSED")
+    print("Source loading is batched for chat history and quiz serialization.")
+
+finally:
+    with app.app_context():
+        user = User.query.filter_by(email=email).first()
+        if user is not None:
+            db.session.delete(user)
+        db.session.commit()
@@ -13,8 +13,9 @@ from __future__ import annotations
 import json
 import os
 import sys
+import time
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 
 def hdr(label: str) -> None:
@@ -44,9 +45,11 @@ from app.db.models.document import Document  # noqa: E402
 from app.db.models.document_ingestion import DocumentIngestion  # noqa: E402
 from app.db.models.quiz_attempt import QuizAttempt  # noqa: E402
 from app.db.models.quiz_attempt_answer import QuizAttemptAnswer  # noqa: E402
+from app.db.models.quiz_question import QuizQuestion  # noqa: E402
 from app.db.models.user import User  # noqa: E402
 from app.extensions import db  # noqa: E402
 from app.services.quiz import generator as quiz_generator  # noqa: E402
+from app.services.quiz.answer_key import get_answer_key  # noqa: E402
 from app.services.quiz import summarizer as quiz_summarizer  # noqa: E402
 
 
@@ -356,7 +359,11 @@ try:
 
     require(submit_payload["score"] == 5.0, f"expected score 5.0, got {submit_payload['score']}")
     require(submit_payload["total_marks"] == 10.0, "wrong total_marks returned")
-    require(submit_payload["summary"]["overall"] == "Solid attempt with one correct answer and one incorrect answer.", "summary not returned")
+    require(submit_payload["summary"]["accuracy_pct"] == 50.0, "fallback summary not returned on submit")
+    require(
+        submit_payload["attempt"]["summary_status"] in {"pending", "ready"},
+        "submit should report the background summary status",
+    )
     require(len(submit_payload["answers"]) == 2, "submit endpoint did not return 2 graded answers")
 
     answer_1 = submit_payload["answers"][0]
@@ -388,6 +395,24 @@ try:
         require(answer_rows[1].marks_awarded == 0.0, "stored marks_awarded is wrong for answer 2")
     print("attempt and answer rows were stored correctly")
 
+    hdr("BACKGROUND ATTEMPT SUMMARY")
+    deadline = time.monotonic() + 30
+    polled_attempt = None
+    while time.monotonic() < deadline:
+        poll = client.get(f"/api/quizzes/attempts/{attempt_id}", headers=auth_header(token_a))
+        check(poll, 200)
+        polled_attempt = poll.get_json()["attempt"]
+        if polled_attempt["summary_status"] != "pending":
+            break
+        time.sleep(0.1)
+    require(polled_attempt["summary_status"] == "ready", f"summary was not generated: {polled_attempt}")
+    require(
+        polled_attempt["summary"]["overall"] == "Solid attempt with one correct answer and one incorrect answer.",
+        "LLM summary should replace the fallback summary",
+    )
+    require(polled_attempt["summary"]["score"] == 5.0, "summary should keep the graded counts")
+    print("LLM summary was written by the background worker")
+
     resubmit = client.post(
         f"/api/quizzes/{quiz_id}/attempts/{attempt_id}/submit",
         headers=auth_header(token_a),
@@ -427,6 +452,119 @@ try:
     check(get_attempt_other, 404)
     print("cross-user attempt access blocked")
 
+    hdr("STALE PENDING SUMMARY FALLS BACK")
+    stale_after_sec = app.config["ATTEMPT_SUMMARY_STALE_AFTER_SEC"]
+    with app.app_context():
+        # Simulate a process that died before its summary worker ran.
+        stored_attempt = db.session.get(QuizAttempt, attempt_id)
+        stored_attempt.summary_status = "pending"
+        stored_attempt.submitted_at = datetime.now(timezone.utc) - timedelta(seconds=stale_after_sec // 2)
+        db.session.commit()
+
+    fresh_pending = client.get(f"/api/quizzes/attempts/{attempt_id}", headers=auth_header(token_a))
+    check(fresh_pending, 200)
+    require(
+        fresh_pending.get_json()["attempt"]["summary_status"] == "pending",
+        "a recently submitted summary should stay pending",
+    )
+
+    with app.app_context():
+        stored_attempt = db.session.get(QuizAttempt, attempt_id)
+        stored_attempt.submitted_at = datetime.now(timezone.utc) - timedelta(seconds=stale_after_sec + 60)
+        db.session.commit()
+
+    stale_pending = client.get(f"/api/quizzes/attempts/{attempt_id}", headers=auth_header(token_a))
+    check(stale_pending, 200)
+    stale_attempt = stale_pending.get_json()["attempt"]
+    require(stale_attempt["summary_status"] == "fallback", f"stale pending summary should fall back: {stale_attempt}")
+    require(stale_attempt["summary"] is not None, "the stored summary should be kept")
+
+    with app.app_context():
+        quiz_summarizer.run_attempt_summary(attempt_id)
+        require(
+            db.session.get(QuizAttempt, attempt_id).summary_status == "fallback",
+            "a late worker should not overwrite an expired summary",
+        )
+    print("pending summaries older than ATTEMPT_SUMMARY_STALE_AFTER_SEC are served as fallback")
+
+    hdr("POST /api/quizzes/<quiz_id>/attempts/bulk")
+    with app.app_context():
+        attempts_before_bulk = QuizAttempt.query.filter_by(quiz_id=quiz_id).count()
+    invalid_bulk = client.post(
+        f"/api/quizzes/{quiz_id}/attempts/bulk",
+        headers=auth_header(token_a),
+        json={
+            "attempts": [
+                {"answers": [{"question_id": question_1_id, "chosen_option_index": 1}]},
+                {"answers": [{"question_id": "not-a-question", "chosen_option_index": 0}]},
+            ]
+        },
+    )
+    check(invalid_bulk, 400)
+    require("attempts[1]" in invalid_bulk.get_json()["error"], "bulk error should name the bad attempt")
+    with app.app_context():
+        require(
+            QuizAttempt.query.filter_by(quiz_id=quiz_id).count() == attempts_before_bulk,
+            "an invalid batch should not store any attempt",
+        )
+
+    bulk = client.post(
+        f"/api/quizzes/{quiz_id}/attempts/bulk",
+        headers=auth_header(token_a),
+        json={
+            "attempts": [
+                {
+                    "time_spent_sec": 60,
+                    "submitted_at": "2026-10-01T09:30:00Z",
+                    "answers": [
+                        {"question_id": question_1_id, "option_text": "a database"},
+                        {"question_id": question_2_id, "chosen_option_index": 1},
+                    ],
+                },
+                {"answers": [{"question_id": question_1_id, "answer": "a"}]},
+                {"answers": []},
+            ]
+        },
+    )
+    check(bulk, 201)
+    bulk_payload = bulk.get_json()
+    require(bulk_payload["imported"] == 3, "bulk endpoint should import 3 attempts")
+    require(
+        [item["score"] for item in bulk_payload["attempts"]] == [10.0, 5.0, 0.0],
+        f"bulk scores are wrong: {bulk_payload['attempts']}",
+    )
+    require(bulk_payload["attempts"][1]["unanswered_count"] == 1, "bulk unanswered count is wrong")
+    require(bulk_payload["mean_score"] == 5.0, "bulk mean score is wrong")
+
+    imported_id = bulk_payload["attempts"][0]["id"]
+    imported = client.get(f"/api/quizzes/attempts/{imported_id}", headers=auth_header(token_a))
+    check(imported, 200)
+    imported_payload = imported.get_json()
+    require(imported_payload["attempt"]["time_spent_sec"] == 60, "imported time_spent_sec not stored")
+    require(
+        imported_payload["attempt"]["submitted_at"].startswith("2026-10-01T09:30"),
+        "imported submitted_at not stored",
+    )
+    require(len(imported_payload["answers"]) == 2, "imported attempt should store one answer per question")
+    require(all(answer["is_correct"] for answer in imported_payload["answers"]), "imported answers should be graded")
+
+    bulk_other = client.post(
+        f"/api/quizzes/{quiz_id}/attempts/bulk",
+        headers=auth_header(token_b),
+        json={"attempts": [{"answers": []}]},
+    )
+    check(bulk_other, 404)
+
+    with app.app_context():
+        quiz_questions = (
+            QuizQuestion.query.filter_by(quiz_id=quiz_id).order_by(QuizQuestion.question_index).all()
+        )
+        require(
+            get_answer_key(quiz_id, quiz_questions) is get_answer_key(quiz_id, quiz_questions),
+            "compiled answer keys should be cached per quiz",
+        )
+    print("bulk grading imported 3 attempts with one compiled answer key")
+
     hdr("ALL QUIZ ATTEMPT TESTS PASSED")
     print("Quiz attempt API integration test completed successfully.")
 
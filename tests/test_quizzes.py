@@ -13,9 +13,12 @@ from __future__ import annotations
 
 import json
 import os
+import re
 import sys
+import threading
+import time
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 
 def hdr(label: str) -> None:
@@ -44,9 +47,15 @@ client = app.test_client()
 from app.db.models.chunk import Chunk  # noqa: E402
 from app.db.models.document import Document  # noqa: E402
 from app.db.models.document_ingestion import DocumentIngestion  # noqa: E402
+from app.db.models.quiz import Quiz  # noqa: E402
+from app.db.models.quiz_job import QuizJob  # noqa: E402
+from app.db.models.quiz_question import QuizQuestion  # noqa: E402
 from app.db.models.user import User  # noqa: E402
 from app.extensions import db  # noqa: E402
+from app.services.observability.metrics import QUIZ_REPAIRS, QUIZ_VALIDATION_ATTEMPTS  # noqa: E402
+from app.services.quiz import cache as quiz_cache  # noqa: E402
 from app.services.quiz import generator as quiz_generator  # noqa: E402
+from app.services.quiz import jobs as quiz_jobs  # noqa: E402
 from app.services.quiz.spec_parser import parse_quiz_request  # noqa: E402
 
 
@@ -499,6 +508,33 @@ try:
     require(all(item["id"] != quiz_id for item in quizzes_b), "user B can see user A quiz")
     print("user B cannot see user A quiz")
 
+    hdr("GET /api/quizzes KEYSET PAGINATION")
+    first_page = client.get("/api/quizzes", headers=auth_header(token_a), query_string={"limit": 1})
+    check(first_page, 200)
+    first_page_payload = first_page.get_json()
+    require(len(first_page_payload["quizzes"]) == 1, "limit=1 should return a single quiz")
+    require(bool(first_page_payload["next_cursor"]), "first page should return a next_cursor")
+    second_page = client.get(
+        "/api/quizzes",
+        headers=auth_header(token_a),
+        query_string={"limit": 1, "cursor": first_page_payload["next_cursor"]},
+    )
+    check(second_page, 200)
+    second_page_payload = second_page.get_json()
+    require(len(second_page_payload["quizzes"]) == 1, "second page should return a single quiz")
+    require(
+        second_page_payload["quizzes"][0]["id"] != first_page_payload["quizzes"][0]["id"],
+        "pages should not overlap",
+    )
+    require(second_page_payload["next_cursor"] is None, "second page should be the last page")
+    require(
+        all(page["quizzes"][0]["question_count"] == 2 for page in (first_page_payload, second_page_payload)),
+        "projected list should still report question_count",
+    )
+    bad_cursor = client.get("/api/quizzes", headers=auth_header(token_a), query_string={"cursor": "bogus"})
+    check(bad_cursor, 400)
+    print("quiz list pages with limit/cursor")
+
     hdr("GET /api/quizzes/<quiz_id>")
     detail_a = client.get(f"/api/quizzes/{quiz_id}", headers=auth_header(token_a))
     check(detail_a, 200)
@@ -528,6 +564,438 @@ try:
     check(questions_b, 404)
     print("questions endpoint blocks cross-user access")
 
+    hdr("QUIZ GENERATION CACHE")
+    cached_spec_payload = {
+        "topic": "  python BASICS ",
+        "question_count": 2,
+        "difficulty": "easy",
+        "marks": 10,
+        "time_limit_sec": 600,
+        "instructions": "Focus on introductory concepts.",
+        "document_ids": [doc_id],
+        "title": "A different title",
+    }
+    calls_before_cache = fake_client.calls
+    cached_quiz = client.post("/api/quizzes", headers=auth_header(token_a), json=cached_spec_payload)
+    check(cached_quiz, 201)
+    require(fake_client.calls == calls_before_cache, "identical spec should be served from the cache")
+    cached_questions = cached_quiz.get_json()["questions"]
+    require(
+        sorted(question["question_text"] for question in cached_questions)
+        == sorted(question["question_text"] for question in questions),
+        "cached quiz should reuse the validated questions",
+    )
+    require(all(question.get("sources") for question in cached_questions), "cached questions need sources")
+    require(cached_quiz.get_json()["quiz"]["title"] == "A different title", "cache hit should keep its own title")
+    second_hit = client.post(
+        "/api/quizzes",
+        headers=auth_header(token_a),
+        json={**cached_spec_payload, "title": "Yet another title"},
+    )
+    check(second_hit, 201)
+    require(fake_client.calls == calls_before_cache, "a different title should still hit the cache")
+    require(second_hit.get_json()["quiz"]["title"] == "Yet another title", "each cache hit should keep its title")
+    with app.app_context():
+        require(
+            db.session.get(Quiz, cached_quiz.get_json()["quiz"]["id"]).title == "A different title",
+            "earlier cached quiz title should be unchanged",
+        )
+    with app.app_context():
+        for stored in QuizQuestion.query.filter_by(quiz_id=cached_quiz.get_json()["quiz"]["id"]).all():
+            require(
+                stored.options_json[stored.correct_json["option_index"]] == stored.correct_json["option_text"],
+                "shuffled options should keep the correct answer",
+            )
+
+    fresh_quiz = client.post(
+        "/api/quizzes",
+        headers=auth_header(token_a),
+        json={**cached_spec_payload, "fresh_questions": True},
+    )
+    check(fresh_quiz, 201)
+    require(fake_client.calls > calls_before_cache, "fresh_questions should bypass the cache")
+
+    with app.app_context():
+        require(
+            quiz_cache.invalidate_document(user_a_id, doc_id) >= 1,
+            "reingestion should invalidate cached quizzes built from the document",
+        )
+        db.session.commit()
+    calls_before_miss = fake_client.calls
+    check(client.post("/api/quizzes", headers=auth_header(token_a), json=cached_spec_payload), 201)
+    require(fake_client.calls > calls_before_miss, "invalidated cache entry should not be served")
+    print("identical quiz specs reuse cached questions; fresh and invalidated requests regenerate")
+
+    hdr("POST /api/quizzes/jobs BACKGROUND GENERATION")
+    job_client = FakeClient()
+    quiz_generator.get_client = lambda: job_client
+    create_job = client.post(
+        "/api/quizzes/jobs",
+        headers=auth_header(token_a),
+        json={
+            "topic": "Python basics",
+            "question_count": 2,
+            "difficulty": "easy",
+            "marks": 10,
+            "document_ids": [doc_id],
+        },
+    )
+    check(create_job, 202)
+    job = create_job.get_json()["job"]
+    require(job["status"] in {"queued", "running", "succeeded"}, "new job has unexpected status")
+    require(create_job.headers.get("Location", "").endswith(job["id"]), "job Location header missing")
+
+    deadline = time.monotonic() + 30
+    job_payload = None
+    while time.monotonic() < deadline:
+        poll = client.get(f"/api/quizzes/jobs/{job['id']}", headers=auth_header(token_a))
+        check(poll, 200)
+        job_payload = poll.get_json()
+        if job_payload["job"]["status"] in {"succeeded", "failed"}:
+            break
+        time.sleep(0.2)
+
+    require(job_payload is not None, "job was never polled")
+    require(
+        job_payload["job"]["status"] == "succeeded",
+        f"quiz job did not succeed: {job_payload['job']}",
+    )
+    require(job_payload["job"]["stage"] == "done", "finished job should report the done stage")
+    require(job_payload["quiz"]["question_count"] == 2, "job quiz should have 2 questions")
+    require(
+        job_payload["job"]["progress"].get("validation_errors"),
+        "job should persist validation errors from the repair round",
+    )
+    require(job_client.calls >= 2, "job should have exercised the repair loop")
+
+    job_b = client.get(f"/api/quizzes/jobs/{job['id']}", headers=auth_header(token_b))
+    check(job_b, 404)
+    quiz_generator.get_client = lambda: fake_client
+    print(f"background quiz job completed: quiz={job_payload['job']['quiz_id']}")
+
+    hdr("STALE JOB EXPIRY USES HEARTBEATS")
+    with app.app_context():
+        long_ago = datetime.now(timezone.utc) - timedelta(hours=2)
+        job_spec = db.session.get(QuizJob, job["id"]).spec_json
+
+        def old_job(status: str) -> str:
+            stale = QuizJob(
+                user_id=user_a_id,
+                status=status,
+                stage=status,
+                spec_json=job_spec,
+                created_at=long_ago,
+                started_at=long_ago if status == "running" else None,
+                heartbeat_at=long_ago,
+            )
+            db.session.add(stale)
+            db.session.commit()
+            return stale.id
+
+        held_queued_id = old_job("queued")
+        held_running_id = old_job("running")
+        orphan_id = old_job("running")
+        quiz_jobs._hold(held_queued_id)
+        quiz_jobs._hold(held_running_id)
+        try:
+            require(quiz_jobs.touch_held_jobs() == 2, "heartbeat should refresh both held jobs")
+            quiz_jobs.expire_stale_quiz_jobs(user_a_id)
+            db.session.expire_all()
+            require(db.session.get(QuizJob, held_queued_id).status == "queued",
+                    "a job still waiting in this process's pool must not expire")
+            require(db.session.get(QuizJob, held_running_id).status == "running",
+                    "a long-running job with a fresh heartbeat must not expire")
+            require(db.session.get(QuizJob, orphan_id).status == "failed",
+                    "a job whose heartbeat stopped should expire")
+
+            # The orphan finishing late must not overwrite the expiry.
+            quiz_jobs._finish(orphan_id, status="succeeded", stage="done")
+            db.session.expire_all()
+            require(db.session.get(QuizJob, orphan_id).status == "failed",
+                    "final status writes should only apply to running jobs")
+            quiz_jobs._mark_failed(orphan_id, "late failure", 500)
+            db.session.expire_all()
+            require(db.session.get(QuizJob, orphan_id).error_message != "late failure",
+                    "a late failure should not overwrite the expiry message")
+        finally:
+            quiz_jobs._release(held_queued_id)
+            quiz_jobs._release(held_running_id)
+
+        db.session.execute(
+            QuizJob.__table__.update()
+            .where(QuizJob.id.in_([held_queued_id, held_running_id]))
+            .values(heartbeat_at=long_ago)
+        )
+        db.session.commit()
+        quiz_jobs.expire_stale_quiz_jobs(user_a_id)
+        db.session.expire_all()
+        require(db.session.get(QuizJob, held_queued_id).status == "failed",
+                "a released queued job without heartbeats should expire")
+        quiz_jobs.run_quiz_job(held_queued_id)
+        db.session.expire_all()
+        require(db.session.get(QuizJob, held_queued_id).status == "failed",
+                "an expired queued job must not be started")
+    print("stale expiry follows heartbeats; late outcomes do not overwrite expired jobs")
+
+    hdr("PARTIAL REPAIR KEEPS VALID QUESTIONS")
+
+    class PartialRepairFakeClient:
+        def __init__(self) -> None:
+            self.requests: list[dict] = []
+
+        def chat_completions(self, **kwargs):
+            self.requests.append(kwargs)
+            chunk_id = fake_client_holder["chunk_id"]
+            if len(self.requests) == 1:
+                questions = [
+                    {
+                        "type": "mcq_single",
+                        "question_text": f"Valid question {index}?",
+                        "options": ["A", "B", "C", "D"],
+                        "correct_answer": {"option_index": 0},
+                        "marks": 2,
+                        "explanation": "From the notes.",
+                        # questions[1] cites a chunk that was never supplied.
+                        "citations": [chunk_id if index != 1 else 987654321],
+                    }
+                    for index in range(3)
+                ]
+                content = json.dumps({"title": "Partial Quiz", "questions": questions})
+            else:
+                content = json.dumps(
+                    {
+                        "questions": [
+                            {
+                                "type": "mcq_single",
+                                "question_text": "Replacement question?",
+                                "options": ["A", "B", "C", "D"],
+                                "correct_answer": {"option_index": 1},
+                                "marks": 2,
+                                "explanation": "From the notes.",
+                                "citations": [chunk_id],
+                            }
+                        ]
+                    }
+                )
+            return {"choices": [{"message": {"content": content}}]}
+
+    partial_client = PartialRepairFakeClient()
+    quiz_generator.get_client = lambda: partial_client
+    partial_spec = parse_quiz_request({"topic": "Python basics", "question_count": 3, "marks": 6})
+    partial_repairs_before = QUIZ_REPAIRS.value(mode="partial", outcome="valid")
+    validated_runs_before = QUIZ_VALIDATION_ATTEMPTS.count(outcome="valid")
+    with app.app_context():
+        partial_payload, _ = quiz_generator._generate_valid_payload(
+            spec=partial_spec,
+            sources=[fake_source],
+        )
+    require(len(partial_client.requests) == 2, "partial repair should need exactly one extra call")
+    repair_request = partial_client.requests[1]
+    repair_prompt = repair_request["messages"][1]["content"]
+    require("Write exactly 1 new quiz question" in repair_prompt, "repair should ask for one replacement")
+    require("Previous response" not in repair_prompt, "partial repair should not resend the whole quiz")
+    require(repair_request["max_tokens"] < 4000, "partial repair should request fewer tokens")
+    require(
+        [question["question_text"] for question in partial_payload["questions"]]
+        == ["Valid question 0?", "Replacement question?", "Valid question 2?"],
+        "replacement should take the broken question's position",
+    )
+    require(
+        [question["question_index"] for question in partial_payload["questions"]] == [0, 1, 2],
+        "merged questions should be re-indexed",
+    )
+    require(
+        QUIZ_REPAIRS.value(mode="partial", outcome="valid") == partial_repairs_before + 1,
+        "successful partial repair should be counted",
+    )
+    require(
+        QUIZ_VALIDATION_ATTEMPTS.count(outcome="valid") == validated_runs_before + 1,
+        "validation attempts should be observed once per generation",
+    )
+    quiz_generator.get_client = lambda: fake_client
+    print("partial repair replaced only the broken question")
+
+    hdr("STREAMED GENERATION SALVAGES TRUNCATED OUTPUT")
+
+    class StreamingFakeClient:
+        def __init__(self) -> None:
+            self.stream_requests: list[dict] = []
+            self.requests: list[dict] = []
+            self.closed = False
+
+        def chat_completions_stream(self, **kwargs):
+            self.stream_requests.append(kwargs)
+            chunk_id = fake_client_holder["chunk_id"]
+            questions = [
+                {
+                    "type": "mcq_single",
+                    "question_text": f"Streamed question {index}?",
+                    "options": ["A", "B", "C", "D"],
+                    "correct_answer": {"option_index": 0},
+                    "marks": 2,
+                    "explanation": "From the notes.",
+                    "citations": [chunk_id],
+                }
+                for index in range(3)
+            ]
+            # The model runs out of tokens part-way through the third question.
+            text = "```json\n" + json.dumps({"title": "Streamed Quiz", "questions": questions})
+            text = text[: text.index("Streamed question 2") + 5]
+
+            def deltas():
+                try:
+                    for start in range(0, len(text), 7):
+                        yield text[start : start + 7]
+                finally:
+                    self.closed = True
+
+            return deltas()
+
+        def chat_completions(self, **kwargs):
+            self.requests.append(kwargs)
+            content = json.dumps(
+                {
+                    "questions": [
+                        {
+                            "type": "mcq_single",
+                            "question_text": "Replacement for the cut-off question?",
+                            "options": ["A", "B", "C", "D"],
+                            "correct_answer": {"option_index": 2},
+                            "marks": 2,
+                            "explanation": "From the notes.",
+                            "citations": [fake_client_holder["chunk_id"]],
+                        }
+                    ]
+                }
+            )
+            return {"choices": [{"message": {"content": content}}]}
+
+    streaming_client = StreamingFakeClient()
+    quiz_generator.get_client = lambda: streaming_client
+    app.config["QUIZ_GENERATION_STREAMING"] = True
+    progress_events: list[tuple[str, dict]] = []
+    try:
+        with app.app_context():
+            streamed_payload, _ = quiz_generator._generate_valid_payload(
+                spec=partial_spec,
+                sources=[fake_source],
+                progress=lambda stage, details: progress_events.append((stage, details)),
+            )
+    finally:
+        app.config["QUIZ_GENERATION_STREAMING"] = False
+    require(len(streaming_client.stream_requests) == 1, "initial generation should use the stream")
+    require(streaming_client.closed, "the token stream should be closed")
+    require(len(streaming_client.requests) == 1, "only the cut-off question should be regenerated")
+    require(
+        "Write exactly 1 new quiz question" in streaming_client.requests[0]["messages"][1]["content"],
+        "salvaged prefix should be completed by a partial repair",
+    )
+    require(
+        [question["question_text"] for question in streamed_payload["questions"]]
+        == ["Streamed question 0?", "Streamed question 1?", "Replacement for the cut-off question?"],
+        "valid streamed questions should be kept",
+    )
+    require(streamed_payload["title"] == "Streamed Quiz", "streamed title should be kept")
+    streamed_previews = [
+        details["streamed_questions"]
+        for stage, details in progress_events
+        if "streamed_questions" in details
+    ]
+    require(
+        [len(previews) for previews in streamed_previews] == [1, 2],
+        "each streamed question should be reported as soon as it closes",
+    )
+    require(
+        all("correct_json" not in preview for preview in streamed_previews[-1]),
+        "streamed previews must not reveal answers",
+    )
+    quiz_generator.get_client = lambda: fake_client
+    print("streamed generation kept 2 valid questions and repaired the truncated one")
+
+    hdr("SHARDED GENERATION FOR LARGE QUIZZES")
+
+    class ShardingFakeClient:
+        def __init__(self) -> None:
+            self.lock = threading.Lock()
+            self.requests: list[dict] = []
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+        def chat_completions(self, **kwargs):
+            with self.lock:
+                self.requests.append(kwargs)
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                prompt = kwargs["messages"][1]["content"]
+                chunk_ids = [int(value) for value in re.findall(r"chunk_id=(\d+)", prompt)]
+                count_match = re.search(r"exactly (\d+) (?:new quiz )?questions?", prompt)
+                count = int(count_match.group(1))
+                time.sleep(0.2)
+                questions = [
+                    {
+                        "type": "mcq_single",
+                        # Both shards open with the same question; one copy must be dropped.
+                        "question_text": (
+                            "Shared question?"
+                            if index == 0 and "Create a quiz" in prompt
+                            else f"Question from chunk {chunk_ids[0]} #{index} ({len(self.requests)})?"
+                        ),
+                        "options": ["A", "B", "C", "D"],
+                        "correct_answer": {"option_index": 0},
+                        "marks": 1,
+                        "explanation": "From the notes.",
+                        "citations": chunk_ids[:1],
+                    }
+                    for index in range(count)
+                ]
+                content = json.dumps({"title": "Sharded Quiz", "questions": questions})
+                return {"choices": [{"message": {"content": content}}]}
+            finally:
+                with self.lock:
+                    self.in_flight -= 1
+
+    sharding_client = ShardingFakeClient()
+    quiz_generator.get_client = lambda: sharding_client
+    app.config["QUIZ_GENERATION_SHARDS"] = 2
+    app.config["QUIZ_SHARD_MIN_QUESTIONS"] = 3
+    sharded_spec = parse_quiz_request({"topic": "Python basics", "question_count": 6, "marks": 12})
+    try:
+        with app.app_context():
+            plan = quiz_generator._plan_shards(sharded_spec, [fake_source, fake_source_two])
+            require(len(plan) == 2, "a 6-question quiz should be split into 2 shards")
+            require(
+                {plan[0][1][0]["chunk_id"], plan[1][1][0]["chunk_id"]}
+                == {fake_source["chunk_id"], fake_source_two["chunk_id"]},
+                "shards should receive disjoint sources",
+            )
+            require(
+                sum(shard_spec.question_count for shard_spec, _ in plan) == 6,
+                "shard question counts should add up to the request",
+            )
+            sharded_payload, _ = quiz_generator._generate_valid_payload(
+                spec=sharded_spec,
+                sources=[fake_source, fake_source_two],
+            )
+    finally:
+        app.config["QUIZ_GENERATION_SHARDS"] = 1
+        app.config["QUIZ_SHARD_MIN_QUESTIONS"] = 5
+    require(sharding_client.max_in_flight == 2, "shards should be generated concurrently")
+    require(len(sharding_client.requests) == 3, "two shards plus one replacement for the duplicate")
+    sharded_texts = [question["question_text"] for question in sharded_payload["questions"]]
+    require(len(sharded_texts) == 6, "sharded quiz should have 6 questions")
+    require(sharded_texts.count("Shared question?") == 1, "duplicate questions should be dropped")
+    require(
+        [question["question_index"] for question in sharded_payload["questions"]] == list(range(6)),
+        "merged questions should be re-indexed",
+    )
+    require(
+        sum(question["marks"] for question in sharded_payload["questions"]) == 12,
+        "marks should add up to the requested total",
+    )
+    quiz_generator.get_client = lambda: fake_client
+    print("6-question quiz generated by 2 concurrent shards and de-duplicated")
+
     hdr("ALL QUIZ ENDPOINT TESTS PASSED")
     print("Quiz API integration test completed successfully.")
 
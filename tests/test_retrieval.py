@@ -149,6 +149,197 @@ with app.app_context():
         )
     print(f"Correctly returned 0 results for unknown user_id {fake_user!r}.")
 
+    # ── Adjacent chunks merge into one span ────────────────────────────────────
+    hdr("Adjacent chunks merge into one span")
+    from app.services.rag.chunking import chunk_plain_text
+    from app.services.rag.retrieval import merge_adjacent_chunks
+
+    span_text = " ".join(f"word{i}" for i in range(1200))
+    text_chunks = chunk_plain_text(span_text)
+    synthetic = [
+        {"chunk_id": 100 + c.index, "document_id": "doc", "snippet": c.content, "score": score,
+         "ingestion_id": "ing", "chunk_index": c.index, "page_start": c.index + 1, "page_end": c.index + 1}
+        for c, score in ((text_chunks[3], 0.7), (text_chunks[2], 0.9), (text_chunks[0], 0.5))
+    ]
+    merged = merge_adjacent_chunks(synthetic)
+    if [m["chunk_id"] for m in merged] != [102, 100]:
+        fail(f"Expected chunks 2+3 merged under the best chunk, got {[m['chunk_id'] for m in merged]}")
+    if merged[0]["chunk_ids"] != [102, 103] or (merged[0]["page_start"], merged[0]["page_end"]) != (3, 4):
+        fail(f"Merged span has wrong members or pages: {merged[0]}")
+    expected_text = span_text[span_text.index(text_chunks[2].content):]
+    expected_text = expected_text[: expected_text.index(text_chunks[3].content) + len(text_chunks[3].content)]
+    if merged[0]["snippet"] != expected_text:
+        fail("Merged span should contain the overlap exactly once")
+    print("Adjacent chunks merged with the overlap de-duplicated.")
+
+    # ── Neighbour expansion widens the top hit ─────────────────────────────────
+    hdr("Neighbour expansion widens the top hit")
+    app.config["RETRIEVAL_NEIGHBOR_WINDOW"] = 1
+    app.config["RETRIEVAL_NEIGHBOR_HITS"] = 1
+    try:
+        expanded = retrieve_chunks(query_text=query, user_id=user_id, top_k=1)
+    finally:
+        app.config["RETRIEVAL_NEIGHBOR_WINDOW"] = 0
+    if results and expanded:
+        if expanded[0]["chunk_id"] != results[0]["chunk_id"]:
+            fail("Expanded span should keep the top hit as its chunk_id")
+        if len(expanded[0]["snippet"]) < len(results[0]["snippet"]):
+            fail("Expanded span should not be shorter than the hit itself")
+        print(f"Top hit widened to chunks {expanded[0].get('chunk_ids', [expanded[0]['chunk_id']])}.")
+
+    # ── Batched retrieval matches single queries ───────────────────────────────
+    hdr("retrieve_chunks_batch matches retrieve_chunks")
+    from app.services.rag.retrieval import retrieve_chunks_batch
+
+    second_query = "How are functions defined?"
+    batch = retrieve_chunks_batch([query, "  ", second_query], user_id=user_id, top_k=5)
+    if len(batch) != 3 or batch[1] != []:
+        fail(f"Batch should return one list per query and [] for blank ones, got {[len(b) for b in batch]}")
+    if [r["chunk_id"] for r in batch[0]] != [r["chunk_id"] for r in results]:
+        fail("First batch result differs from retrieve_chunks for the same query")
+    single_second = retrieve_chunks(query_text=second_query, user_id=user_id, top_k=5)
+    if [r["chunk_id"] for r in batch[2]] != [r["chunk_id"] for r in single_second]:
+        fail("Third batch result differs from retrieve_chunks for the same query")
+    print("Batched retrieval returns the single-query results per query.")
+
+    # ── Repeated queries are served from the retrieval cache ───────────────────
+    hdr("Retrieval cache skips the embedding for a repeated query")
+    from app.services.rag import retrieval as retrieval_module
+    from app.services.rag.retrieval_cache import clear_retrieval_cache, invalidate_retrieval_cache
+
+    original_embed_query = retrieval_module._embed_query
+    embed_calls = []
+
+    def counting_embed_query(text):
+        embed_calls.append(text)
+        return original_embed_query(text)
+
+    clear_retrieval_cache()
+    retrieval_module._embed_query = counting_embed_query
+    try:
+        first = retrieve_chunks(query_text=query, user_id=user_id, top_k=5)
+        again = retrieve_chunks(query_text=f"  {query.upper()} ", user_id=user_id, top_k=5)
+        if len(embed_calls) != 1:
+            fail(f"Expected one embedding call for a repeated query, got {len(embed_calls)}")
+        if again != first:
+            fail("Cached retrieval returned different results")
+        invalidate_retrieval_cache(user_id)
+        retrieve_chunks(query_text=query, user_id=user_id, top_k=5)
+        if len(embed_calls) != 2:
+            fail("invalidate_retrieval_cache should force a fresh search")
+    finally:
+        retrieval_module._embed_query = original_embed_query
+    print("Repeated query served from the cache; invalidation forces a new search.")
+
+    # ── In-process index agrees with pgvector ──────────────────────────────────
+    hdr("Local NumPy index returns the pgvector results")
+    from app.services.rag.local_index import get_local_index
+
+    app.config["RETRIEVAL_LOCAL_INDEX"] = True
+    try:
+        if get_local_index(user_id) is None:
+            print("Skipped: numpy missing or user above RETRIEVAL_LOCAL_INDEX_MAX_CHUNKS.")
+        else:
+            local_results = retrieve_chunks(query_text=query, user_id=user_id, top_k=5)
+            if [r["chunk_id"] for r in local_results] != [r["chunk_id"] for r in results]:
+                fail(
+                    f"Local index returned {[r['chunk_id'] for r in local_results]}, "
+                    f"pgvector returned {[r['chunk_id'] for r in results]}"
+                )
+            for local, remote in zip(local_results, results):
+                if abs(local["score"] - remote["score"]) > 1e-3:
+                    fail(f"Score mismatch for chunk {local['chunk_id']}: {local['score']} vs {remote['score']}")
+            print("Local index matches the pgvector top-k.")
+    finally:
+        app.config["RETRIEVAL_LOCAL_INDEX"] = False
+
+    # ── File-backed IVF store agrees with pgvector ─────────────────────────────
+    hdr("IVF vector store returns the pgvector results")
+    import tempfile
+    from app.services.rag.vector_store import rebuild_vector_store
+
+    app.config["VECTOR_STORE"] = "ivf"
+    app.config["VECTOR_STORE_DIR"] = tempfile.mkdtemp(prefix="vector_store_")
+    app.config["VECTOR_STORE_IVF_PROBES"] = 1024  # probe every list: exact
+    try:
+        try:
+            indexed = rebuild_vector_store()
+        except RuntimeError as exc:
+            print(f"Skipped: {exc}")
+        else:
+            ivf_results = retrieve_chunks(query_text=query, user_id=user_id, top_k=5)
+            if [r["chunk_id"] for r in ivf_results] != [r["chunk_id"] for r in results]:
+                fail(
+                    f"IVF store returned {[r['chunk_id'] for r in ivf_results]}, "
+                    f"pgvector returned {[r['chunk_id'] for r in results]}"
+                )
+            print(f"IVF store ({indexed} chunks indexed) matches the pgvector top-k.")
+
+            hdr("IVF k-means matches the dense one-hot reference")
+            import numpy as np
+            from app.services.rag import ivf_store
+
+            rng = np.random.default_rng(1)
+            matrix = rng.normal(size=(3000, 32)).astype(np.float32)
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+            n_lists = 54
+            reference = matrix[np.random.default_rng(0).choice(len(matrix), size=n_lists, replace=False)].copy()
+            for _ in range(ivf_store._KMEANS_ITERATIONS):
+                members = np.zeros((len(matrix), n_lists), dtype=np.float32)
+                members[np.arange(len(matrix)), np.argmax(matrix @ reference.T, axis=1)] = 1.0
+                sums = members.T @ matrix
+                empty = members.sum(axis=0) == 0
+                sums[empty] = reference[empty]
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                reference = (sums / norms).astype(np.float32)
+            centroids, assignment = ivf_store._train_lists(matrix, n_lists)
+            if not np.allclose(centroids, reference, atol=1e-5):
+                fail("k-means centroids differ from the one-hot reference")
+            if not (assignment == np.argmax(matrix @ reference.T, axis=1)).all():
+                fail("k-means list assignment differs from the one-hot reference")
+            print("Accumulated centroids match the dense reference.")
+
+            hdr("A failed ingestion writes no IVF segment")
+            from app.db.models.document_ingestion import DocumentIngestion
+            from app.services.rag import ingestion as ingestion_module
+
+            probe_doc = Document(user_id=user_id, title="IVF rollback probe", source_type="text", original_text="x")
+            db.session.add(probe_doc)
+            db.session.flush()
+            probe_ingestion = DocumentIngestion(
+                document_id=probe_doc.id, user_id=user_id, source_type="text", text_snapshot="x", status="processing"
+            )
+            db.session.add(probe_ingestion)
+            db.session.commit()
+
+            def fail_before_commit(_user_id):
+                raise RuntimeError("simulated failure before commit")
+
+            original_embed_chunks = ingestion_module._embed_chunks
+            original_invalidate = ingestion_module.invalidate_retrieval_cache
+            ingestion_module._embed_chunks = lambda chunks: [[1.0] + [0.0] * 1535 for _ in chunks]
+            ingestion_module.invalidate_retrieval_cache = fail_before_commit
+            try:
+                try:
+                    ingestion_module.ingest_text(probe_doc, probe_ingestion, "rollback probe text " * 40)
+                except RuntimeError:
+                    pass
+                leftovers = [
+                    name for name in os.listdir(app.config["VECTOR_STORE_DIR"])
+                    if name.startswith(probe_ingestion.id)
+                ]
+                if probe_ingestion.status != "failed" or leftovers:
+                    fail(f"failed ingestion left status={probe_ingestion.status!r} files={leftovers}")
+            finally:
+                ingestion_module._embed_chunks = original_embed_chunks
+                ingestion_module.invalidate_retrieval_cache = original_invalidate
+                db.session.delete(probe_doc)
+                db.session.commit()
+            print("No segment files for the failed ingestion.")
+    finally:
+        app.config["VECTOR_STORE"] = "pgvector"
+
 print("\n" + "=" * 60)
 print("ALL RETRIEVAL TESTS PASSED")
 print("=" * 60)
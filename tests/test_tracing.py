@@ -0,0 +1,200 @@
+"""
+Integration test - request-scoped tracing spans for a chat turn.
+
+Uses Flask's test client with TRACING_EXPORTER=log writing JSON lines to a
+temporary file.  The provider HTTP calls are answered by a fake
+``requests.post`` (the first generation call returns 503 to exercise the
+retry counter) and the vector store is replaced by an empty one, so no
+wrapper, Ollama or pgvector is needed.
+
+Run from project root:
+    python tests/test_tracing.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import uuid
+
+
+def hdr(label: str) -> None:
+    print("\n" + "=" * 60)
+    print(label)
+    print("=" * 60)
+
+
+def fail(message: str) -> None:
+    print(f"FAIL: {message}")
+    sys.exit(1)
+
+
+def require(condition: bool, message: str) -> None:
+    if not condition:
+        fail(message)
+
+
+ROOT = os.path.dirname(__file__)
+BACKEND_DIR = os.path.join(ROOT, "..", "backend")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Import create_app before app.db.* imports to avoid the repo's import shadowing issue.
+from app import create_app  # noqa: E402
+
+trace_path = os.path.join(tempfile.mkdtemp(prefix="tracing_"), "spans.jsonl")
+app = create_app()
+app.testing = True
+app.config.update(
+    TRACING_EXPORTER="log",
+    TRACING_LOG_PATH=trace_path,
+    TRACING_SAMPLE_RATIO=1.0,
+    WRAPPER_BASE_URL="http://wrapper.test",
+    WRAPPER_KEY="test-key",
+    OLLAMA_BASE_URL="http://ollama.test/v1",
+    OLLAMA_BASE_DELAY=0.0,
+    OLLAMA_MAX_RETRIES=1,
+    RETRIEVAL_CACHE_ENABLED=False,
+)
+client = app.test_client()
+
+from app.api import chat as chat_api  # noqa: E402
+from app.services.rag import retrieval  # noqa: E402
+from app.services.wrapper import client as wrapper_client  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict):
+        self.status_code = status_code
+        self._body = body
+        self.headers: dict = {}
+        self.text = json.dumps(body)
+
+    def json(self):
+        return self._body
+
+    def close(self):
+        pass
+
+
+class EmptyStore:
+    name = "empty"
+
+    def document_seeds(self, *args, **kwargs):
+        return []
+
+    def search_rows(self, *args, **kwargs):
+        return []
+
+
+provider_calls: list[dict] = []
+
+
+def fake_post(url, json=None, headers=None, **kwargs):
+    provider_calls.append({"url": url, "headers": dict(headers or {})})
+    if url.endswith("/v1/embeddings"):
+        return FakeResponse(200, {"data": [{"index": 0, "embedding": [0.1] * 1536}]})
+    generation_calls = [call for call in provider_calls if call["url"].endswith("/chat/completions")]
+    if len(generation_calls) == 1:
+        return FakeResponse(503, {"error": "busy"})
+    return FakeResponse(
+        200,
+        {
+            "choices": [{"message": {"content": "Traced answer."}}],
+            "usage": {"prompt_tokens": 42, "completion_tokens": 7},
+        },
+    )
+
+
+original_post = wrapper_client.requests.post
+original_heuristics_route = chat_api.heuristics_route
+original_get_vector_store = retrieval.get_vector_store
+wrapper_client.requests.post = fake_post
+chat_api.heuristics_route = lambda message: {
+    "category": "general",
+    "model": "qwen3.5:0.8b",
+    "confidence": "high",
+    "method": "test",
+}
+retrieval.get_vector_store = lambda: EmptyStore()
+
+
+def auth_header(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+try:
+    hdr("Posting a chat message with an incoming traceparent")
+    register = client.post(
+        "/api/auth/register",
+        json={"email": f"tracing_{uuid.uuid4().hex[:8]}@tutor.local", "password": "tracingtest123"},
+    )
+    require(register.status_code == 201, f"register failed: {register.status_code}")
+    token = register.get_json()["access_token"]
+    session = client.post("/api/chat/sessions", headers=auth_header(token), json={"title": "Tracing"})
+    chat_id = session.get_json()["id"]
+
+    incoming_trace_id = uuid.uuid4().hex
+    open(trace_path, "w").close()
+    response = client.post(
+        f"/api/chat/sessions/{chat_id}/messages",
+        headers={**auth_header(token), "traceparent": f"00-{incoming_trace_id}-00f067aa0ba902b7-01"},
+        json={"content": "What is gradient descent?"},
+    )
+    require(response.status_code in (200, 201), f"send message failed: {response.status_code}")
+
+    with open(trace_path, encoding="utf-8") as handle:
+        spans = [json.loads(line) for line in handle if line.strip()]
+    by_name = {span["name"]: span for span in spans}
+    print("Spans:", sorted(by_name))
+
+    hdr("Every stage has a span in the caller's trace")
+    request_span = by_name.get("POST /api/chat/sessions/<chat_id>/messages")
+    require(request_span is not None, "missing request span")
+    require(request_span["parent_span_id"] == "00f067aa0ba902b7", "request span should continue the caller's span")
+    require(request_span["attributes"].get("http.response.status_code") == response.status_code, "status missing")
+    for name in (
+        "chat.route_model",
+        "chat.build_history",
+        "retrieval.embed",
+        "retrieval.search",
+        "answering.generate",
+        "POST /chat/completions",
+        "POST /v1/embeddings",
+        "db.commit",
+    ):
+        require(name in by_name, f"missing span {name}")
+    require(all(span["trace_id"] == incoming_trace_id for span in spans), "all spans should share the trace id")
+
+    hdr("Spans nest and carry attributes")
+    generation = by_name["answering.generate"]
+    http_generation = by_name["POST /chat/completions"]
+    require(generation["parent_span_id"] == request_span["span_id"], "generation should be a child of the request")
+    require(http_generation["parent_span_id"] == generation["span_id"], "HTTP call should be a child of generation")
+    require(http_generation["attributes"].get("http.retry_count") == 1, "503 should count as one retry")
+    require(http_generation["attributes"].get("gen_ai.usage.input_tokens") == 42, "usage tokens missing")
+    require(generation["attributes"].get("gen_ai.request.model") == "qwen3.5:0.8b", "model attribute missing")
+    require(by_name["retrieval.search"]["attributes"].get("vector_store") == "empty", "store attribute missing")
+    require(by_name["chat.route_model"]["attributes"].get("router.method") == "test", "router attribute missing")
+
+    hdr("Outgoing provider requests carry a traceparent")
+    outgoing = provider_calls[-1]["headers"].get("traceparent", "")
+    require(outgoing.startswith(f"00-{incoming_trace_id}-"), f"unexpected traceparent {outgoing!r}")
+
+    hdr("Tracing off records nothing")
+    app.config["TRACING_EXPORTER"] = "none"
+    open(trace_path, "w").close()
+    client.post(
+        f"/api/chat/sessions/{chat_id}/messages",
+        headers=auth_header(token),
+        json={"content": "And again?"},
+    )
+    require(os.path.getsize(trace_path) == 0, "no spans should be written when tracing is off")
+finally:
+    wrapper_client.requests.post = original_post
+    chat_api.heuristics_route = original_heuristics_route
+    retrieval.get_vector_store = original_get_vector_store
+
+print("\nChat turns are traced per stage with retries, tokens and trace propagation.")